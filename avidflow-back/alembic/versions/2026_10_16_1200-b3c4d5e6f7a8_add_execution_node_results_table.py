@@ -0,0 +1,38 @@
+"""add execution_node_results table
+
+Revision ID: b3c4d5e6f7a8
+Revises: a8b9c0d1e2f3
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c4d5e6f7a8'
+down_revision: Union[str, None] = 'a8b9c0d1e2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-node execution results, written incrementally as nodes complete
+    op.create_table('execution_node_results',
+    sa.Column('execution_id', sa.String(length=36), nullable=False),
+    sa.Column('node_name', sa.String(), nullable=False),
+    sa.Column('run_index', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('raw_size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['execution_id'], ['executions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('execution_id', 'node_name', 'run_index')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('execution_node_results')
@@ -40,6 +40,15 @@ class BaseCredential:
         """
         raise NotImplementedError("Test method not implemented")
     
+    def _is_shown(self, prop: Dict[str, Any]) -> bool:
+        """Whether a property applies given its displayOptions.show conditions"""
+        show = prop.get("displayOptions", {}).get("show", {})
+        defaults = {p["name"]: p.get("default") for p in self.properties}
+        return all(
+            self.data.get(name, defaults.get(name)) in values
+            for name, values in show.items()
+        )
+    
     def validate(self) -> Dict[str, Any]:
         """
         Validate that all required properties are provided
@@ -50,6 +59,8 @@ class BaseCredential:
         missing_fields = []
         
         for prop in self.properties:
+            if not self._is_shown(prop):
+                continue
             if prop.get("required", False) and not self.data.get(prop["name"]):
                 missing_fields.append(prop["name"])
                 
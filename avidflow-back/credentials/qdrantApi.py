@@ -1,8 +1,10 @@
 """
 Qdrant Vector Database API credential for vector storage and similarity search.
 """
+import os
 import aiohttp
 from typing import Dict, Any
+from config import settings
 from .base import BaseCredential
 
 
@@ -12,12 +14,29 @@ class QdrantApiCredential(BaseCredential):
     name = "qdrantApi"
     display_name = "Qdrant API"
     properties = [
+        {
+            "name": "backend",
+            "displayName": "Backend",
+            "type": "options",
+            "options": [
+                {"name": "Qdrant Server", "value": "remote"},
+                {"name": "Local (In-Process)", "value": "local"}
+            ],
+            "default": "remote",
+            "required": False,
+            "description": "Local stores this credential's collections on the worker's disk and searches them in-process (small collections, tests)"
+        },
         {
             "name": "qdrantUrl",
             "displayName": "Qdrant URL",
             "type": "string",
             "required": True,
             "default": "http://localhost:6333",
+            "displayOptions": {
+                "show": {
+                    "backend": ["remote"]
+                }
+            },
             "description": "The URL of your Qdrant instance (e.g., http://localhost:6333 or https://your-cluster.qdrant.io)"
         },
         {
@@ -44,6 +63,9 @@ class QdrantApiCredential(BaseCredential):
                 "message": validation["message"]
             }
         
+        if self.data.get("backend") == "local":
+            return self._test_local()
+        
         try:
             # Get connection info to test credential
             qdrant_url = self.data.get("qdrantUrl", "").rstrip("/")
@@ -90,3 +112,19 @@ class QdrantApiCredential(BaseCredential):
                 "success": False,
                 "message": f"Error testing Qdrant API credential: {str(e)}"
             }
+    
+    def _test_local(self) -> Dict[str, Any]:
+        """Check that the server's local Qdrant directory is writable."""
+        try:
+            os.makedirs(settings.QDRANT_LOCAL_PATH, exist_ok=True)
+            if not os.access(settings.QDRANT_LOCAL_PATH, os.W_OK):
+                raise PermissionError("directory is not writable")
+            return {
+                "success": True,
+                "message": "Local Qdrant storage is available."
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error opening local Qdrant storage: {str(e)}"
+            }
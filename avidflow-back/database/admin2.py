@@ -21,6 +21,7 @@ from .models import (
     Option
 )
 from config import settings
+from services.webhook_route_cache import webhook_route_cache
 
 from starlette_admin.auth import AuthProvider
 from starlette_admin.exceptions import LoginFailed
@@ -86,6 +87,13 @@ class WorkflowView(ModelView):
     fields = ['id', 'name', 'description', 'nodes', 'connections', 'settings', 'pin_data', 'trigger_count', 'active', 'created_at', 'updated_at', 'user']
     exclude_fields_from_list = ['nodes', 'connections', 'settings', 'pin_data', 'user']
 
+    async def after_edit(self, request: Request, obj: Workflow) -> None:
+        # Cached webhook routes hold the previous workflow (and active flag)
+        await webhook_route_cache.invalidate_workflow(obj.id)
+
+    async def after_delete(self, request: Request, obj: Workflow) -> None:
+        await webhook_route_cache.invalidate_workflow(obj.id)
+
 
 class OptionView(ModelView):
     fields = ['id', 'name', 'value']
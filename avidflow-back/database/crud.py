@@ -1,5 +1,6 @@
 import uuid
 import json
+import zlib
 from sqlalchemy import desc, delete, update, case, and_, func, Integer
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session, selectinload
@@ -998,9 +999,151 @@ class ExecutionCRUD:
     
         db.commit()
         db.refresh(execution)
-    
+
         return execution
 
+    @staticmethod
+    def get_execution_checkpoint_sync(
+        db: Session,
+        execution_id: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Synchronously load the resume checkpoint stored by a suspended execution.
+
+        Args:
+            db: Database session (sync)
+            execution_id: ID of the execution
+
+        Returns:
+            The checkpoint dict or None if the execution has none
+        """
+        result = db.execute(
+            select(models.ExecutionData).where(
+                models.ExecutionData.execution_id == execution_id
+            )
+        )
+        execution_data = result.scalars().first()
+        if not execution_data or not execution_data.data:
+            return None
+        return json.loads(execution_data.data).get("checkpoint")
+
+    @staticmethod
+    def get_execution_workflow_data_sync(
+        db: Session,
+        execution_id: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Synchronously load the workflow snapshot stored with an execution.
+
+        Args:
+            db: Database session (sync)
+            execution_id: ID of the execution
+
+        Returns:
+            The workflow data dict or None if the execution has none
+        """
+        result = db.execute(
+            select(models.ExecutionData.workflow_data).where(
+                models.ExecutionData.execution_id == execution_id
+            )
+        )
+        return result.scalars().first() or None
+
+    @staticmethod
+    def save_node_result_sync(
+        db: Session,
+        execution_id: str,
+        node_name: str,
+        result: List[List[Dict[str, Any]]],
+        run_index: int = 0,
+    ) -> int:
+        """
+        Synchronously store one node's (binary-free, serialized) output.
+
+        Writes a single compressed row instead of rewriting the ExecutionData
+        blob, so the cost of persisting a node does not grow with the size of
+        the rest of the execution.
+
+        Args:
+            db: Database session (sync)
+            execution_id: ID of the execution
+            node_name: Name of the node that produced the result
+            result: Output as produced by to_dict_without_binary()
+            run_index: Run number of the node within the execution
+
+        Returns:
+            Number of payload bytes written
+        """
+        raw = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        payload = zlib.compress(raw)
+        db.merge(
+            models.ExecutionNodeResult(
+                execution_id=execution_id,
+                node_name=node_name,
+                run_index=run_index,
+                payload=payload,
+                raw_size=len(raw),
+            )
+        )
+        db.commit()
+        return len(payload)
+
+    @staticmethod
+    def _decode_node_results(rows: Sequence[models.ExecutionNodeResult]) -> Dict[str, Any]:
+        """Decompress node result rows into {node_name: result}; the latest run wins."""
+        return {
+            row.node_name: json.loads(zlib.decompress(row.payload))
+            for row in rows
+        }
+
+    @staticmethod
+    def _node_results_query(execution_id: str):
+        return (
+            select(models.ExecutionNodeResult)
+            .where(models.ExecutionNodeResult.execution_id == execution_id)
+            .order_by(
+                models.ExecutionNodeResult.created_at,
+                models.ExecutionNodeResult.run_index,
+            )
+        )
+
+    @staticmethod
+    def get_node_results_sync(db: Session, execution_id: str) -> Dict[str, Any]:
+        """Synchronously load the per-node results of an execution."""
+        result = db.execute(ExecutionCRUD._node_results_query(execution_id))
+        return ExecutionCRUD._decode_node_results(result.scalars().all())
+
+    @staticmethod
+    async def get_node_results(db: AsyncSession, execution_id: str) -> Dict[str, Any]:
+        """Load the per-node results of an execution."""
+        result = await db.execute(ExecutionCRUD._node_results_query(execution_id))
+        return ExecutionCRUD._decode_node_results(result.scalars().all())
+
+    @staticmethod
+    async def load_execution_data(
+        db: AsyncSession, execution: models.Execution
+    ) -> Dict[str, Any]:
+        """
+        Assemble the legacy execution data dict for an execution.
+
+        Node outputs written to execution_node_results are merged into
+        ``data["node_results"]`` (rows take precedence over blob entries).
+
+        Args:
+            db: Database session
+            execution: Execution with executionData loaded
+
+        Returns:
+            The execution data dict
+        """
+        data = {}
+        if execution.executionData and execution.executionData.data:
+            data = json.loads(execution.executionData.data)
+        node_results = await ExecutionCRUD.get_node_results(db, execution.id)
+        if node_results:
+            data["node_results"] = {**(data.get("node_results") or {}), **node_results}
+        return data
+
 class DynamicNodeCRUD:
     """CRUD operations for dynamic nodes"""
 
@@ -14,6 +14,7 @@ from sqlalchemy import (
     Text,
     Index,
     Numeric,
+    LargeBinary,
 )
 from sqlalchemy import Enum
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
@@ -170,7 +171,7 @@ class Credential(Base):
 class Execution(Base):
     __tablename__ = "executions"
 
-    STATUS_CHOICES = ["pending", "running", "success", "error"]
+    STATUS_CHOICES = ["pending", "running", "waiting", "success", "error"]
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     finished: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -214,6 +215,28 @@ class ExecutionData(Base):
     )
 
 
+class ExecutionNodeResult(Base):
+    """
+    One node's output for an execution, written as soon as the node completes.
+
+    ``payload`` is zlib-compressed JSON (the same shape as the legacy
+    ``ExecutionData.data["node_results"][node_name]``); the legacy blob is
+    assembled from these rows on read, see ExecutionCRUD.load_execution_data.
+    """
+    __tablename__ = "execution_node_results"
+
+    execution_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("executions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    node_name: Mapped[str] = mapped_column(String, primary_key=True)
+    run_index: Mapped[int] = mapped_column(primary_key=True, default=0)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    raw_size: Mapped[int] = mapped_column(default=0)  # uncompressed JSON bytes
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
 class Webhook(Base):
     __tablename__ = "webhook"
 
@@ -1,9 +1,15 @@
-from typing import Dict, List, Any, Set, Optional
+from typing import Dict, List, Any, Set, Optional, NamedTuple
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from config import settings
 from services.queue import QueueService
 from models.node import Node, NodeExecutionData
 from models.workflow import WorkflowModel
 from collections import deque, defaultdict
-from utils.serialization import to_dict_without_binary, deep_serialize
+from utils.serialization import ExecutionSerializer, deep_serialize, dumps
+from utils.concurrency import BoundedExecutor
+from utils.credential_cache import ExecutionCredentialCache
+from utils.http_pool import ExecutionHttpSessions
 from database.crud import ExecutionCRUD
 from database.config import get_sync_session_manual
 from nodes import node_definitions
@@ -12,17 +18,101 @@ from nodes import node_definitions
 from observability.langfuse_client import create_node_span, is_langfuse_enabled
 
 import logging
+import time
 
 
 logger = logging.getLogger(__name__)
 
 
+class InputEdge(NamedTuple):
+    """One incoming connection of a node, as seen from the target side."""
+    source: str
+    output_index: int
+    conn_type: str
+    input_index: int
+
+
+class InputConnectionIndex:
+    """
+    Reverse adjacency of ``workflow.connections``: target node -> incoming edges.
+
+    Built once per workflow so node construction (BaseNode._preprocess_input_data)
+    can look up its inputs directly instead of scanning every connection of
+    every node. ``connection_types`` holds every connection type used in the
+    workflow and ``max_input_index`` the highest input slot per (node, type).
+    Edges keep the iteration order of ``connections`` so merged inputs are
+    assembled in the same order as before.
+    """
+
+    __slots__ = ("connections", "connection_types", "inputs", "max_input_index")
+
+    def __init__(self, connections: Dict[str, Any]):
+        self.connections = connections
+        self.connection_types: Set[str] = set()
+        self.inputs: Dict[str, List[InputEdge]] = defaultdict(list)
+        self.max_input_index: Dict[tuple, int] = {}
+
+        for source_name, source_connections in connections.items():
+            if not isinstance(source_connections, dict):
+                continue
+            self.connection_types.update(source_connections.keys())
+            for conn_type, source_outputs in source_connections.items():
+                if not isinstance(source_outputs, list):
+                    continue
+                for output_index, connection_list in enumerate(source_outputs):
+                    if not isinstance(connection_list, list):
+                        continue
+                    for connection in connection_list:
+                        target = getattr(connection, "node", None)
+                        if target is None:
+                            continue
+                        input_index = getattr(connection, "index", 0)
+                        self.inputs[target].append(
+                            InputEdge(source_name, output_index, conn_type, input_index)
+                        )
+                        key = (target, conn_type)
+                        if input_index > self.max_input_index.get(key, 0):
+                            self.max_input_index[key] = input_index
+
+    def inputs_for(self, node_name: str) -> List[InputEdge]:
+        return self.inputs.get(node_name, [])
+
+    def get_max_input_index(self, node_name: str, conn_type: str) -> int:
+        return self.max_input_index.get((node_name, conn_type), 0)
+
+
 class ExecutionPlanBuilder:
     def __init__(self, workflow_data: WorkflowModel):
+        self.workflow = workflow_data
         self.nodes = workflow_data.nodes
         self.connections = workflow_data.connections
         self.node_map = {node.name: node for node in self.nodes}
 
+    def build_input_index(self) -> InputConnectionIndex:
+        """Return the workflow's reverse connection index, building it at most once."""
+        return self.input_index_for(self.workflow)
+
+    @staticmethod
+    def input_index_for(workflow: WorkflowModel) -> InputConnectionIndex:
+        """
+        Cached InputConnectionIndex for ``workflow``.
+
+        The index is stored on the workflow object and reused as long as its
+        ``connections`` mapping is the same object, so every node instantiated
+        for an execution (including repeatedly instantiated tool nodes) shares it.
+        """
+        connections = getattr(workflow, "connections", None) or {}
+        if hasattr(connections, "root"):
+            connections = connections.root
+        index = getattr(workflow, "_input_index", None)
+        if index is None or index.connections is not connections:
+            index = InputConnectionIndex(connections)
+            try:
+                workflow._input_index = index
+            except (AttributeError, TypeError, ValueError):
+                pass
+        return index
+
     def topological_sort(self) -> List[Node]:
         """
         Perform topological sorting of nodes based on their dependencies.
@@ -78,6 +168,18 @@ class ExecutionPlanBuilder:
         return sorted_nodes
 
 
+CHECKPOINT_VERSION = 1
+
+
+def _checkpoint_item(item: Any) -> Dict[str, Any]:
+    """Serialize one NodeExecutionData for a checkpoint (binary kept when JSON-safe)."""
+    try:
+        return item.model_dump(mode="json")
+    except Exception:
+        logger.warning("[Executor] Dropping non-serializable binary data from checkpoint")
+        return item.model_dump(mode="json", exclude={"binary_data"})
+
+
 class WorkflowExecutionContext:
     """
     Maintains state during workflow execution.
@@ -101,9 +203,78 @@ class WorkflowExecutionContext:
         self.primary_result = primary_result or {}
         self.node_results: Dict[str, Any] = {}
         self.completed_nodes: Set[str] = set()
+        # Per-node wall-clock timings: {node_name: {started_at, finished_at, duration_ms}}
+        self.node_timings: Dict[str, Dict[str, Any]] = {}
+        # Nodes whose output is already stored in execution_node_results
+        self.persisted_nodes: Set[str] = set()
+        # Reverse connection index shared by every node constructed for this execution
+        self.input_index = ExecutionPlanBuilder.input_index_for(workflow)
+        # Decrypted credentials shared by all nodes of this execution (see BaseNode.get_credentials)
+        self.credential_cache = ExecutionCredentialCache()
+        # Serialized node outputs / final_result, walked once and reused (see utils.serialization)
+        self.serializer = ExecutionSerializer()
+        # Keep-alive HTTP sessions shared by HTTP-calling nodes; closed when execute_nodes returns
+        self.http_sessions = ExecutionHttpSessions()
         # Langfuse trace context for creating per-node spans
         self.langfuse_trace_ctx = langfuse_trace_ctx
-    
+        # Durable waits: only executions that can be re-enqueued (execute_workflow)
+        # may suspend; a Wait node sets resume_at via request_suspend()
+        self.can_suspend = False
+        self.resume_at: Optional[datetime] = None
+        # Nodes the executor is running right now (tool nodes run inside them)
+        self.running_nodes: Set[str] = set()
+        # Branch-activation set restored from a checkpoint (None for a fresh run)
+        self.active_nodes: Optional[Set[str]] = None
+
+    def request_suspend(self, resume_at: datetime, node_name: str) -> bool:
+        """
+        Ask the executor to checkpoint once the current node finishes and to
+        resume the execution at ``resume_at``. Returns False when this execution
+        cannot be suspended, or when ``node_name`` is not a node the executor is
+        running (e.g. a Wait node called as an AI agent tool), in which case the
+        caller has to wait inline.
+        """
+        if not self.can_suspend or node_name not in self.running_nodes:
+            return False
+        if self.resume_at is None or resume_at > self.resume_at:
+            self.resume_at = resume_at
+        return True
+
+    def to_checkpoint(self, active_nodes: Set[str]) -> Dict[str, Any]:
+        """JSON-serializable execution state: completed results + active set."""
+        node_results = {}
+        for name in self.completed_nodes:
+            node_results[name] = [
+                [_checkpoint_item(item) for item in output]
+                for output in (self.node_results.get(name) or [])
+            ]
+        return {
+            "version": CHECKPOINT_VERSION,
+            "resume_at": self.resume_at.isoformat() if self.resume_at else None,
+            "completed_nodes": sorted(self.completed_nodes),
+            "active_nodes": sorted(active_nodes),
+            "persisted_nodes": sorted(self.persisted_nodes),
+            "node_results": node_results,
+            "node_timings": self.node_timings,
+        }
+
+    def restore_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Load state produced by to_checkpoint() so execution continues where it stopped."""
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported execution checkpoint version: {checkpoint.get('version')}")
+        self.node_results = {
+            name: [
+                [NodeExecutionData.model_validate(item) for item in output]
+                for output in outputs
+            ]
+            for name, outputs in checkpoint.get("node_results", {}).items()
+        }
+        self.completed_nodes = set(checkpoint.get("completed_nodes", []))
+        self.active_nodes = set(checkpoint.get("active_nodes", []))
+        self.node_timings = dict(checkpoint.get("node_timings") or {})
+        self.persisted_nodes = set(checkpoint.get("persisted_nodes", []))
+        self.resume_at = None
+
     @property
     def langfuse_trace_id(self) -> Optional[str]:
         """Get the Langfuse trace ID if available."""
@@ -123,150 +294,371 @@ class WorkflowExecutionContext:
 
 
 class WorkflowExecutor:
-    """Executes workflow nodes sequentially"""
+    """
+    Executes workflow nodes in topological order.
+
+    By default nodes run one at a time. With ``parallel=True`` (or
+    ``settings.PARALLEL_NODE_EXECUTION``) a ready-queue scheduler dispatches
+    every node whose upstream ``main`` inputs are resolved onto a bounded
+    gevent/thread pool, so independent branches overlap their network I/O.
+    Both modes share branch activation, error handling and final_result
+    selection, and record per-node timings in ``context.node_timings``.
+
+    When a node calls ``context.request_suspend()`` (durable Wait), no further
+    nodes are started; the result has status ``"waiting"`` and carries a
+    checkpoint that execute_workflow persists and later resumes from. Nodes
+    already in ``context.completed_nodes`` (restored checkpoint) are not re-run.
+    """
 
-    def __init__(self, context: WorkflowExecutionContext):
+    def __init__(
+        self,
+        context: WorkflowExecutionContext,
+        parallel: Optional[bool] = None,
+        max_workers: Optional[int] = None,
+    ):
         self.context = context
         self.queue_service = QueueService() if context.pub_sub else None
-
-
+        self.parallel = settings.PARALLEL_NODE_EXECUTION if parallel is None else parallel
+        self.max_workers = max_workers or settings.PARALLEL_NODE_MAX_WORKERS
 
     def execute_nodes(self, sorted_nodes: List[Node]) -> Dict[str, Any]:
         """Execute nodes in topological order (branch-aware)"""
-        
+        try:
+            return self._execute_nodes(sorted_nodes)
+        finally:
+            self.context.http_sessions.close()
+
+    def _execute_nodes(self, sorted_nodes: List[Node]) -> Dict[str, Any]:
         # Log node event publishing mode for debugging
         if not self.context.pub_sub:
             logger.info("[Executor] Webhook mode: Skipping per-node events (pub_sub=False)")
         else:
             logger.info("[Executor] WebSocket mode: Publishing per-node events (pub_sub=True)")
 
-        # Start nodes detection (same as previous minimal branch logic)
-        start_nodes = {n.name for n in self.context.workflow.nodes if getattr(n, "is_start", False)}
-        if not start_nodes:
-            in_degree = {n.name: 0 for n in self.context.workflow.nodes}
-            for src, c_types in (self.context.workflow.connections or {}).items():
-                if "main" in c_types:
-                    for arr in c_types["main"]:
-                        for conn in (arr or []):
-                            in_degree[conn.node] = in_degree.get(conn.node, 0) + 1
-            start_nodes = {name for name, deg in in_degree.items() if deg == 0}
+        if self.context.active_nodes is not None:
+            # Resuming from a checkpoint
+            active_nodes = set(self.context.active_nodes)
+        else:
+            active_nodes = self._start_nodes()
 
-        active_nodes = set(start_nodes)
+        if self.parallel and len(sorted_nodes) > 1:
+            return self._execute_nodes_parallel(sorted_nodes, active_nodes)
 
         final_result = None
-        connections = self.context.workflow.connections or {}
 
         for node in sorted_nodes:
+            if node.name in self.context.completed_nodes:
+                # Already executed before a checkpoint
+                node_result = self.context.node_results.get(node.name)
+                if node_result != [[]]:
+                    final_result = node_result
+                continue
+
             if node.name not in active_nodes and not node.is_start:
                 continue
 
             try:
-                node_result = self.execute_single_node(node)
+                node_result = self._run_node(node)
 
                 # Store raw node_result (list[list[NodeExecutionData]]) just like original
                 self.context.node_results[node.name] = node_result
                 self.context.completed_nodes.add(node.name)
-                
-                # Branch activation: only outputs with data
-                if isinstance(node_result, list):
-                    main_conns = (connections.get(node.name, {}) or {}).get("main", [])
-                    for out_index, out_items in enumerate(node_result):
-                        size = len(out_items) if isinstance(out_items, list) else 0
-                        if size == 0:
-                            logger.debug("Executor - Not activating downstream from %s output %d (empty)",
-                                         node.name, out_index)
-                            continue
-                        if out_index < len(main_conns) and main_conns[out_index]:
-                            for conn in main_conns[out_index]:
-                                active_nodes.add(conn.node)
-                                logger.debug("Executor - Activated node %s via %s output %d (%d items)",
-                                             conn.node, node.name, out_index, size)
+                self._persist_node_result(node, node_result)
+                self._activate_downstream(node, node_result, active_nodes)
 
                 # Match legacy logic: skip final_result update only if node_result == [[]]
-                if node_result == [[]]:
-                    continue
-                final_result = node_result
+                if node_result != [[]]:
+                    final_result = node_result
+                    self._publish_node_completed(node, node_result)
+
+            except Exception as e:
+                return self._handle_node_error(node, e)
 
-                # Legacy queue publish logic (use first element of serialized node_result)
-                # OPTIMIZATION: Skip node events for webhooks (pub_sub=False)
-                # WebSocket users (pub_sub=True) need real-time updates, webhooks only need final result
-                if self.queue_service and self.context.pub_sub:
+            if self.context.resume_at is not None:
+                return self._suspend(active_nodes)
+
+        return {
+            "status": "completed",
+            "all_results": self.context.node_results,
+            "final_result": final_result,
+            "node_timings": self.context.node_timings,
+        }
+
+    def _execute_nodes_parallel(
+        self, sorted_nodes: List[Node], active_nodes: Set[str]
+    ) -> Dict[str, Any]:
+        """
+        Ready-queue scheduler: a node is dispatched once every upstream ``main``
+        node has either completed or been skipped. Skipped (inactive) nodes are
+        resolved immediately so their descendants are not blocked.
+
+        The first failing node wins: no new nodes are dispatched after it, the
+        in-flight ones are allowed to finish, and the error is reported exactly
+        as in sequential mode. A suspension request stops dispatching the same way.
+        """
+        node_map = {node.name: node for node in sorted_nodes}
+        connections = self.context.workflow.connections or {}
+
+        # Remaining unresolved upstream edges per node, plus forward adjacency
+        pending: Dict[str, int] = {name: 0 for name in node_map}
+        successors: Dict[str, List[str]] = defaultdict(list)
+        for source_name, connection_types in connections.items():
+            if source_name not in node_map:
+                continue
+            for conn_array in (connection_types or {}).get("main", []) or []:
+                for conn in (conn_array or []):
+                    if conn.node in pending:
+                        successors[source_name].append(conn.node)
+                        pending[conn.node] += 1
+
+        ready = deque(
+            node.name for node in sorted_nodes
+            if pending[node.name] == 0 or node.is_start
+        )
+        dispatched: Set[str] = set()
+        in_flight: Dict[Future, Node] = {}
+        first_error: Optional[tuple] = None
+
+        def resolve(node_name: str) -> None:
+            for neighbor in successors.get(node_name, []):
+                pending[neighbor] -= 1
+                if pending[neighbor] == 0:
+                    ready.append(neighbor)
+
+        logger.info("[Executor] Parallel mode: %d nodes, max_workers=%d",
+                    len(sorted_nodes), self.max_workers)
+
+        pool = BoundedExecutor(self.max_workers, name_prefix="workflow-node")
+        try:
+            while True:
+                while ready and first_error is None and self.context.resume_at is None:
+                    node_name = ready.popleft()
+                    if node_name in dispatched:
+                        continue
+                    dispatched.add(node_name)
+                    node = node_map[node_name]
+                    if node_name in self.context.completed_nodes:
+                        # Already executed before a checkpoint
+                        resolve(node_name)
+                        continue
+                    if node_name not in active_nodes and not node.is_start:
+                        resolve(node_name)
+                        continue
+                    in_flight[pool.submit(self._run_node, node)] = node
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = in_flight.pop(future)
                     try:
-                        serialized = to_dict_without_binary(node_result)
-                        first_part = serialized[0] if serialized and len(serialized) > 0 else {}
-                        # Include langfuse_trace_id in message for frontend deep-linking
-                        node_message = {
-                            "event": "node_completed",
-                            "workflow_id": str(self.context.workflow.id),
-                            "execution_id": self.context.execution_id,
-                            "node_name": node.name,
-                            "data": first_part,
-                        }
-                        if self.context.langfuse_trace_id:
-                            node_message["langfuse_trace_id"] = self.context.langfuse_trace_id
-                        
-                        self.queue_service.publish_sync(
-                            queue_name="workflow_updates",
-                            message=node_message,
-                        )
+                        node_result = future.result()
                     except Exception as e:
-                        logger.debug("Executor - Queue publish failed for %s: %s", node.name, e)
-
-            except Exception as e:
-                error_msg = str(e)
-                logger.error("Executor - Error in node %s: %s", node.name, error_msg)
-                # Always publish errors (regardless of pub_sub) for monitoring/alerting
-                if self.queue_service:
+                        if first_error is None:
+                            first_error = (node, e)
+                        else:
+                            logger.error("Executor - Error in node %s (after %s failed): %s",
+                                         node.name, first_error[0].name, e)
+                        continue
+
+                    self.context.node_results[node.name] = node_result
+                    self.context.completed_nodes.add(node.name)
+                    self._persist_node_result(node, node_result)
+                    if first_error is not None:
+                        continue
                     try:
-                        # Include langfuse_trace_id in error message for debugging
-                        error_message = {
-                            "event": "node_error",
-                            "workflow_id": str(self.context.workflow.id),
-                            "execution_id": self.context.execution_id,
-                            "node_name": node.name,
-                            "error": error_msg,
-                        }
-                        if self.context.langfuse_trace_id:
-                            error_message["langfuse_trace_id"] = self.context.langfuse_trace_id
-                        
-                        self.queue_service.publish_sync(
-                            queue_name="workflow_updates",
-                            message=error_message,
-                        )
-                    except Exception:
-                        pass
-                
-                # Include langfuse_trace_id in error data for debugging
-                error_data = {
+                        self._activate_downstream(node, node_result, active_nodes)
+                        if node_result != [[]]:
+                            self._publish_node_completed(node, node_result)
+                    except Exception as e:
+                        first_error = (node, e)
+                        continue
+                    resolve(node.name)
+        finally:
+            pool.shutdown(wait=True)
+
+        if first_error is not None:
+            return self._handle_node_error(*first_error)
+        if self.context.resume_at is not None:
+            return self._suspend(active_nodes)
+
+        # Same final_result as the sequential walk: last node in topological
+        # order whose result is not [[]]
+        final_result = None
+        for node in sorted_nodes:
+            node_result = self.context.node_results.get(node.name)
+            if node.name in self.context.completed_nodes and node_result != [[]]:
+                final_result = node_result
+
+        return {
+            "status": "completed",
+            "all_results": self.context.node_results,
+            "final_result": final_result,
+            "node_timings": self.context.node_timings,
+        }
+
+    def _start_nodes(self) -> Set[str]:
+        """Start nodes detection (same as previous minimal branch logic)"""
+        start_nodes = {n.name for n in self.context.workflow.nodes if getattr(n, "is_start", False)}
+        if not start_nodes:
+            in_degree = {n.name: 0 for n in self.context.workflow.nodes}
+            for src, c_types in (self.context.workflow.connections or {}).items():
+                if "main" in c_types:
+                    for arr in c_types["main"]:
+                        for conn in (arr or []):
+                            in_degree[conn.node] = in_degree.get(conn.node, 0) + 1
+            start_nodes = {name for name, deg in in_degree.items() if deg == 0}
+        return set(start_nodes)
+
+    def _suspend(self, active_nodes: Set[str]) -> Dict[str, Any]:
+        """Stop here and hand back a checkpoint to resume from at context.resume_at."""
+        logger.info("[Executor] Suspending execution %s until %s (%d nodes completed)",
+                    self.context.execution_id, self.context.resume_at.isoformat(),
+                    len(self.context.completed_nodes))
+        return {
+            "status": "waiting",
+            "resume_at": self.context.resume_at.isoformat(),
+            "checkpoint": self.context.to_checkpoint(active_nodes),
+            "all_results": self.context.node_results,
+            "node_timings": self.context.node_timings,
+        }
+
+    def _run_node(self, node: Node) -> List[List[NodeExecutionData]]:
+        """Execute a node and record its start/finish timestamps."""
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        self.context.running_nodes.add(node.name)
+        try:
+            return self.execute_single_node(node)
+        finally:
+            self.context.running_nodes.discard(node.name)
+            self.context.node_timings[node.name] = {
+                "started_at": started_at.isoformat(),
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+
+    def _persist_node_result(self, node: Node, node_result: Any) -> None:
+        """
+        Write the node's output to execution_node_results right away. Failures
+        are logged and the node is left out of ``persisted_nodes``, so its
+        output still goes into the ExecutionData blob at the end.
+        """
+        if not settings.INCREMENTAL_NODE_RESULTS or not isinstance(node_result, list):
+            return
+        try:
+            with get_sync_session_manual() as session:
+                ExecutionCRUD.save_node_result_sync(
+                    session,
+                    self.context.execution_id,
+                    node.name,
+                    self.context.serializer.node_outputs(node_result),
+                )
+            self.context.persisted_nodes.add(node.name)
+        except Exception as e:
+            logger.warning("[Executor] Could not persist result of node %s: %s", node.name, e)
+
+    def _activate_downstream(
+        self, node: Node, node_result: Any, active_nodes: Set[str]
+    ) -> None:
+        """Branch activation: only outputs with data"""
+        if not isinstance(node_result, list):
+            return
+        connections = self.context.workflow.connections or {}
+        main_conns = (connections.get(node.name, {}) or {}).get("main", [])
+        for out_index, out_items in enumerate(node_result):
+            size = len(out_items) if isinstance(out_items, list) else 0
+            if size == 0:
+                logger.debug("Executor - Not activating downstream from %s output %d (empty)",
+                             node.name, out_index)
+                continue
+            if out_index < len(main_conns) and main_conns[out_index]:
+                for conn in main_conns[out_index]:
+                    active_nodes.add(conn.node)
+                    logger.debug("Executor - Activated node %s via %s output %d (%d items)",
+                                 conn.node, node.name, out_index, size)
+
+    def _publish_node_completed(self, node: Node, node_result: Any) -> None:
+        # Legacy queue publish logic (use first element of serialized node_result)
+        # OPTIMIZATION: Skip node events for webhooks (pub_sub=False)
+        # WebSocket users (pub_sub=True) need real-time updates, webhooks only need final result
+        if not (self.queue_service and self.context.pub_sub):
+            return
+        try:
+            serialized = self.context.serializer.node_outputs(node_result)
+            first_part = serialized[0] if serialized and len(serialized) > 0 else {}
+            # Include langfuse_trace_id in message for frontend deep-linking
+            node_message = {
+                "event": "node_completed",
+                "workflow_id": str(self.context.workflow.id),
+                "execution_id": self.context.execution_id,
+                "node_name": node.name,
+                "data": first_part,
+            }
+            if self.context.langfuse_trace_id:
+                node_message["langfuse_trace_id"] = self.context.langfuse_trace_id
+            
+            self.queue_service.publish_sync(
+                queue_name="workflow_updates",
+                message=node_message,
+            )
+        except Exception as e:
+            logger.debug("Executor - Queue publish failed for %s: %s", node.name, e)
+
+    def _handle_node_error(self, node: Node, e: Exception) -> Dict[str, Any]:
+        """Publish the node error, persist the failed execution and build the error result."""
+        error_msg = str(e)
+        logger.error("Executor - Error in node %s: %s", node.name, error_msg)
+        # Always publish errors (regardless of pub_sub) for monitoring/alerting
+        if self.queue_service:
+            try:
+                # Include langfuse_trace_id in error message for debugging
+                error_message = {
+                    "event": "node_error",
+                    "workflow_id": str(self.context.workflow.id),
+                    "execution_id": self.context.execution_id,
+                    "node_name": node.name,
                     "error": error_msg,
-                    "nodes_results": {
-                        k: to_dict_without_binary(v)
-                        for k, v in self.context.node_results.items()
-                    },
-                    "error_node_name": node.name,
                 }
                 if self.context.langfuse_trace_id:
-                    error_data["langfuse_trace_id"] = self.context.langfuse_trace_id
+                    error_message["langfuse_trace_id"] = self.context.langfuse_trace_id
                 
-                with get_sync_session_manual() as session:
-                    ExecutionCRUD.update_execution_status_sync(
-                        session,
-                        self.context.execution_id,
-                        "error",
-                        finished=True,
-                        data=error_data,
-                    )
-                return {
-                    "status": "error",
-                    "error_node_name": node.name,
-                    "error_message": error_msg,
-                    "all_results": self.context.node_results,
-                }
-
+                self.queue_service.publish_sync(
+                    queue_name="workflow_updates",
+                    message=error_message,
+                )
+            except Exception:
+                pass
+        
+        # Include langfuse_trace_id in error data for debugging
+        error_data = {
+            "error": error_msg,
+            "nodes_results": {
+                k: self.context.serializer.node_outputs(v)
+                for k, v in self.context.node_results.items()
+                if k not in self.context.persisted_nodes
+            },
+            "error_node_name": node.name,
+            "node_timings": self.context.node_timings,
+        }
+        if self.context.langfuse_trace_id:
+            error_data["langfuse_trace_id"] = self.context.langfuse_trace_id
+        
+        with get_sync_session_manual() as session:
+            ExecutionCRUD.update_execution_status_sync(
+                session,
+                self.context.execution_id,
+                "error",
+                finished=True,
+                data=error_data,
+            )
         return {
-            "status": "completed",
+            "status": "error",
+            "error_node_name": node.name,
+            "error_message": error_msg,
             "all_results": self.context.node_results,
-            "final_result": final_result,
+            "node_timings": self.context.node_timings,
         }
 
     def execute_single_node(self, node: Node) -> List[List[NodeExecutionData]]:
@@ -313,7 +705,11 @@ class WorkflowExecutor:
                 "is_start": node.is_start,
                 "is_end": node.is_end,
             },
-            input_data=self._safe_serialize_for_span(input_data),
+            # Input previews are only built when Langfuse will actually record them
+            input_data=(
+                self._safe_serialize_for_span(input_data, memoize=False)
+                if is_langfuse_enabled() else None
+            ),
         ) as node_span:
             try:
                 if node_define.get("type") == "trigger":
@@ -336,17 +732,22 @@ class WorkflowExecutor:
                     node_span.update(level="ERROR", output={"error": str(e)})
                 raise
     
-    def _safe_serialize_for_span(self, data: Any, max_size: int = 10000) -> Any:
+    def _safe_serialize_for_span(self, data: Any, max_size: int = 10000, memoize: bool = True) -> Any:
         """
         Safely serialize data for Langfuse span input/output.
         
-        Truncates large payloads to avoid performance issues.
+        Truncates large payloads to avoid performance issues. Node outputs are
+        memoized on the execution serializer; one-off inputs are not.
         """
         try:
-            serialized = deep_serialize(data)
-            # Convert to string to check size
-            import json
-            as_str = json.dumps(serialized) if not isinstance(serialized, str) else serialized
+            if memoize:
+                serialized = self.context.serializer.serialize(data)
+            else:
+                serialized = deep_serialize(data)
+            if isinstance(serialized, str):
+                as_str = serialized
+            else:
+                as_str = dumps(serialized).decode()
             if len(as_str) > max_size:
                 return {"_truncated": True, "preview": as_str[:max_size] + "..."}
             return serialized
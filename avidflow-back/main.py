@@ -16,6 +16,8 @@ from sqlalchemy.orm import sessionmaker
 from services.workflow_message_handler import WorkflowMessageHandler
 from services.workflow_message_consumer import WorkflowMessageConsumer
 from services.redis_manager import RedisManager
+from services.webhook_route_cache import webhook_route_cache
+from services.resume_scheduler import resume_scheduler
 from database.admin2 import admin
 from config import settings
 
@@ -76,6 +78,9 @@ async def lifespan(app: FastAPI):
     redis_manager = RedisManager()
     await redis_manager.connect()
     app.state.redis = redis_manager
+    await webhook_route_cache.start(redis_manager.redis)
+    message_handler.attach_registry(redis_manager.redis)
+    await resume_scheduler.start(redis_manager.redis)
 
     # Yield control to FastAPI
     yield
@@ -87,6 +92,9 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "message_consumer_connection"):
         await app.state.message_consumer_connection.close()
 
+    await webhook_route_cache.stop()
+    await resume_scheduler.stop()
+
     if hasattr(app.state, "redis"):
         await app.state.redis.disconnect()
 
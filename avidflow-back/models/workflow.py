@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from datetime import datetime
 from uuid import UUID
 from .connection import Connections
@@ -55,6 +55,9 @@ class WorkflowModel(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
+    # Reverse connection index, see engine.execution.ExecutionPlanBuilder.input_index_for
+    _input_index: Optional[Any] = PrivateAttr(default=None)
+
     class Config:
         from_attributes = True
 
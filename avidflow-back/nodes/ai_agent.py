@@ -495,6 +495,13 @@ class AIAgentNode(BaseNode, _AgentEventPublisher):
                         "display_name": "Enable Multi-turn Tool Calls",
                         "default": True,
                         "description": "Allow the model to use multiple tools across conversation turns"
+                    },
+                    {
+                        "name": "maxParallelTools",
+                        "type": NodeParameterType.NUMBER,
+                        "display_name": "Max Parallel Tool Calls",
+                        "default": 4,
+                        "description": "Maximum number of tool calls from one model response that run at the same time"
                     }
                 ]
             }
@@ -1127,7 +1134,8 @@ class AIAgentNode(BaseNode, _AgentEventPublisher):
                 workflow=self.workflow,
                 execution_data=self.execution_data,
                 node_name=self.node_data.name,
-                input_name="ai_model"
+                input_name="ai_model",
+                execution=getattr(self, "execution", None)
             )
             return chat_model_runnable
         except Exception as e:
@@ -1303,6 +1311,7 @@ class AIAgentNode(BaseNode, _AgentEventPublisher):
         max_iterations = int(options.get("maxIterations", 5))
         return_steps = bool(options.get("returnIntermediateSteps", False))
         enable_multi_turn = bool(options.get("enableMultiTurnTools", True))
+        max_parallel_tools = int(options.get("maxParallelTools", 4) or 1)
         
         # Get Runnable instances from providers
         chat_model_runnable = self._get_chat_model_runnable(item_index)
@@ -1319,30 +1328,27 @@ class AIAgentNode(BaseNode, _AgentEventPublisher):
         from utils.agent_events import AgentEventPublisher
         
         # ╔══════════════════════════════════════════════════════════════════════════════╗
-        # ║ RABBITMQ OPTIMIZATION: AgentRunnable event streaming DISABLED               ║
+        # ║ RABBITMQ OPTIMIZATION: AgentRunnable event streaming is OPT-IN              ║
         # ║                                                                              ║
-        # ║ REASON: AgentRunnable publishes granular events during agent loop:           ║
-        # ║   - agent_step (per iteration: 2-5 messages)                                 ║
-        # ║   - tool_called (per tool use: 30 messages in production workflow)           ║
-        # ║   - tool_result (per tool use: 30 messages)                                  ║
-        # ║   - model_result (per LLM call: 5-10 messages)                               ║
-        # ║   - memory_result (per memory operation: 2 messages)                         ║
+        # ║ AgentRunnable publishes granular events during the agent loop:               ║
+        # ║   - agent_step (per iteration: 2-5 events)                                   ║
+        # ║   - tool_called / tool_result (per tool use: 30 each in production)          ║
+        # ║   - model_result (per LLM call: 5-10 events)                                 ║
         # ║                                                                              ║
-        # ║ TOTAL DISABLED: ~70-100 intermediate messages per execution                 ║
-        # ║                                                                              ║
-        # ║ IMPACT: UI no longer shows live agent reasoning steps                        ║
-        # ║ JUSTIFICATION: Prevents RabbitMQ CPU spikes and server crashes              ║
+        # ║ One message per event caused RabbitMQ CPU spikes, so this stays off unless   ║
+        # ║ AGENT_EVENT_STREAMING is set. Events are then coalesced per execution        ║
+        # ║ (AGENT_EVENT_COALESCE_MS / AGENT_EVENT_MAX_BATCH) into a few messages.       ║
         # ╚══════════════════════════════════════════════════════════════════════════════╝
-        event_publisher = None  # DISABLED: Set to None to prevent intermediate events
-        # if self.pub_sub and hasattr(self, 'workflow_id') and hasattr(self, 'execution_id'):
-        #     event_publisher = AgentEventPublisher(
-        #         workflow_id=self.workflow_id,
-        #         execution_id=self.execution_id,
-        #         node_name=self.node_data.name,
-        #         lane=0,
-        #         pub_sub=True,
-        #         queue_service=self.queue if hasattr(self, 'queue') else None
-        #     )
+        event_publisher = None
+        if settings.AGENT_EVENT_STREAMING and self.pub_sub and hasattr(self, 'workflow_id') and hasattr(self, 'execution_id'):
+            event_publisher = AgentEventPublisher(
+                workflow_id=self.workflow_id,
+                execution_id=self.execution_id,
+                node_name=self.node_data.name,
+                lane=0,
+                pub_sub=True,
+                queue_service=self.queue if hasattr(self, 'queue') else None
+            )
         
         # Create AgentRunnable
         agent = AgentRunnable(
@@ -1353,8 +1359,9 @@ class AIAgentNode(BaseNode, _AgentEventPublisher):
             return_intermediate_steps=return_steps,
             enable_multi_turn_tools=enable_multi_turn,
             memory_runnable=memory_runnable,
-            event_publisher=event_publisher,  # None = disables all intermediate events
-            name=f"Agent_{self.node_data.name}"
+            event_publisher=event_publisher,  # None = no intermediate events
+            name=f"Agent_{self.node_data.name}",
+            max_parallel_tools=max_parallel_tools
         )
         
         # Register runnable for cleanup
@@ -1376,6 +1383,8 @@ class AIAgentNode(BaseNode, _AgentEventPublisher):
         finally:
             # Cleanup
             RunnableRegistry.unregister(runnable_id)
+            if event_publisher is not None:
+                event_publisher.flush()
 
     # =========== OLD AGENT LOOP CODE REMOVED ===========
     # The old 500+ line custom agent loop has been replaced with AgentRunnable delegation above.
@@ -1779,13 +1788,15 @@ class AIAgentNode(BaseNode, _AgentEventPublisher):
         )
         max_iterations = options.get("maxIterations", 5)
         return_intermediate_steps = options.get("returnIntermediateSteps", False)
+        max_parallel_tools = int(options.get("maxParallelTools", 4) or 1)
         
         # Create the AgentRunnable
         agent = AgentRunnable(
             chat_model=chat_model,
             system_message=system_message,
             max_iterations=max_iterations,
-            return_intermediate_steps=return_intermediate_steps
+            return_intermediate_steps=return_intermediate_steps,
+            max_parallel_tools=max_parallel_tools
         )
         
         # Attach tools if available
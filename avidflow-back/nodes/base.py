@@ -3,10 +3,16 @@ from abc import ABC
 from datetime import datetime
 from utils.encryption import decrypt_credential_data, encrypt_credential_data
 from enum import Enum
-from utils.expression_evaluator import ExpressionEngine, ExpressionError
+from utils.expression_evaluator import (
+    ExpressionEngine,
+    ExpressionError,
+    has_expression,
+    template_variables,
+)
 from pydantic import BaseModel, TypeAdapter
 from database.config import get_sync_session_manual
 from database.crud import CredentialCRUD
+from utils.credential_cache import ExecutionCredentialCache, worker_credential_cache
 from models import Node, WorkflowModel, NodeExecutionData, ConnectionType
 import json
 import base64
@@ -319,47 +325,25 @@ class BaseNode(ABC):
             logger.error(f"Failed to extract {connection_type} data from output[{source_output_index}]: {e}")
             return []
         
+    def _get_input_index(self):
+        """Reverse connection index of the workflow (built once, shared by all nodes)."""
+        from engine.execution import ExecutionPlanBuilder
+
+        return ExecutionPlanBuilder.input_index_for(self.workflow)
+
     def _get_max_input_index(self, connection_type: str) -> int:
         """Get the maximum input index for this node and connection type"""
         if not hasattr(self.workflow, 'connections'):
             return 0
-        
-        connections = self.workflow.connections
-        if hasattr(connections, 'root'):
-            connections = connections.root
-        
-        current_node_name = self.node_data.name
-        max_input_index = 0
-        
-        # Check for dynamic input configuration
-        # number_inputs = self.get_parameter("numberInputs", 0, 0)
-        # logger.warning(f"Dynamic input configuration for {current_node_name}: {number_inputs}")
-        # if number_inputs and isinstance(number_inputs, int):
-            # max_input_index = max(max_input_index, number_inputs - 1)
-        
-        # Also check actual connections
-        for source_node_name, source_connections in connections.items():
-            if not isinstance(source_connections, dict):
-                continue
-            
-            if connection_type not in source_connections:
-                continue
-            
-            for output_connections in source_connections[connection_type]:
-                if not isinstance(output_connections, list):
-                    continue
-                
-                for connection in output_connections:
-                    if getattr(connection, 'node', None) == current_node_name:
-                        input_index = getattr(connection, 'index', 0)
-                        max_input_index = max(max_input_index, input_index)
-        
-        return max_input_index
+        return self._get_input_index().get_max_input_index(self.node_data.name, connection_type)
 
     def _preprocess_input_data(self) -> Dict[str, List[List[NodeExecutionData]]]:
         """
         Preprocess execution data into n8n-style input_data structure.
 
+        Incoming connections come from the workflow's reverse connection index,
+        so this only touches the edges that target this node.
+
         Returns:
             Dict[connection_type, List[input_arrays]] for each connection type
             Structure: {"main": [[input0_items], [input1_items], ...]}
@@ -368,73 +352,38 @@ class BaseNode(ABC):
         if not self.execution_data or not hasattr(self.workflow, 'connections'):
             return {ConnectionType.MAIN: []}
 
-        connections = self.workflow.connections
-        if hasattr(connections, 'root'):
-            connections = connections.root
-
+        index = self._get_input_index()
         current_node_name = self.node_data.name
 
-        # Initialize input_data structure
+        # Every connection type used in the workflow gets its input slots
+        # (default to main if no connection types found)
         input_data = {}
-
-        # Find all connection types used in the workflow
-        all_connection_types = set()
-        for source_connections in connections.values():
-            if isinstance(source_connections, dict):
-                all_connection_types.update(source_connections.keys())
-
-        # Default to main if no connection types found
-        if not all_connection_types:
-            all_connection_types.add(ConnectionType.MAIN)
-
-        # Initialize each connection type with empty arrays
-        for conn_type in all_connection_types:
-            max_input_index = self._get_max_input_index(conn_type)
+        for conn_type in index.connection_types or {ConnectionType.MAIN}:
+            max_input_index = index.get_max_input_index(current_node_name, conn_type)
             input_data[conn_type] = [[] for _ in range(max_input_index + 1)]
 
         # Process all connections TO this node
-        for source_node_name, source_connections in connections.items():
-            if not isinstance(source_connections, dict):
+        for edge in index.inputs_for(current_node_name):
+            # Get source node's execution data: List[List[NodeExecutionData]]
+            source_data = self.execution_data.get(edge.source, [])
+            if not source_data:
                 continue
-            
-            # Process each connection type
-            for connection_type, source_outputs in source_connections.items():
-                if not isinstance(source_outputs, list):
-                    continue
-                
-                # Check each output from the source node
-                for source_output_index, connection_list in enumerate(source_outputs):
-                    if not isinstance(connection_list, list):
-                        continue
-                    
-                    for connection in connection_list:
-                        target_node = getattr(connection, 'node', None)
-                        target_input_index = getattr(connection, 'index', 0)
-
-                        # If this connection targets our node
-                        if target_node == current_node_name:
-                            # Get source node's execution data: List[List[NodeExecutionData]]
-                            source_data = self.execution_data.get(source_node_name, [])
-
-                            if source_data:
-                                # FIXED: Direct access to the structure you described
-                                output_items = self._extract_output_data(
-                                    source_data, 
-                                    source_output_index, 
-                                    connection_type
-                                )
-
-                                if output_items:
-                                    # Ensure connection type exists in input_data
-                                    if connection_type not in input_data:
-                                        input_data[connection_type] = []
-
-                                    # Ensure we have enough input slots
-                                    while len(input_data[connection_type]) <= target_input_index:
-                                        input_data[connection_type].append([])
-
-                                    # FIXED: Extend items to target input (merge multiple sources)
-                                    input_data[connection_type][target_input_index].extend(output_items)
+
+            output_items = self._extract_output_data(
+                source_data,
+                edge.output_index,
+                edge.conn_type
+            )
+            if not output_items:
+                continue
+
+            # Ensure we have enough input slots
+            inputs = input_data.setdefault(edge.conn_type, [])
+            while len(inputs) <= edge.input_index:
+                inputs.append([])
+
+            # Extend items to target input (merge multiple sources)
+            inputs[edge.input_index].extend(output_items)
 
         return input_data
 
@@ -542,31 +491,17 @@ class BaseNode(ABC):
     ) -> Any:
         """
         Evaluate expressions in parameter values using the production engine.
+
+        Literal parameters (no ``{{ }}``) are returned before any context work,
+        and only the context variables the compiled expression references are
+        built (see _build_expression_context).
         """
-        # Get current item data for expression context
-        input_data = self.get_input_data()
-        current_item = None
-        
-        if input_data and len(input_data) > item_index:
-            current_item = input_data[item_index]
-        
-        # Build expression context
-        expression_context = {
-            '$json': current_item.json_data if current_item else {},
-            '$binary': current_item.binary_data if current_item else {},
-            '$items': self._get_all_items(),
-            '$node': self._get_node_context(),
-            '$workflow': self._get_workflow_context(),
-            '$execution': self._get_execution_context(),
-            '$now': datetime.now(),
-            '$today': datetime.now().date(),
-            '$parameter': {
-                'name': parameter_name,
-                'itemIndex': item_index
-            },
-            # Add node reference function
-            '$node_ref': self._create_node_reference_function()
-        }
+        if not has_expression(value):
+            return value
+
+        expression_context = self._build_expression_context(
+            item_index, parameter_name, template_variables(value)
+        )
         
         try:
             return self._expression_engine.evaluate_parameter(
@@ -579,6 +514,71 @@ class BaseNode(ABC):
             e.context['itemIndex'] = item_index
             raise e
 
+    # Context variables that only depend on the node and the item index
+    _CACHEABLE_CONTEXT_VARIABLES = ('$json', '$binary', '$items', '$node', '$workflow', '$execution', '$node_ref')
+
+    def _build_expression_context(
+        self,
+        item_index: int,
+        parameter_name: str,
+        variables: Optional[frozenset] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the expression context, restricted to ``variables`` (all when None).
+
+        Item-independent values ($items, $node, $workflow, ...) and the current
+        item's $json/$binary are cached per node instance and item index; the
+        cache is dropped whenever ``self.input_data`` is replaced.
+        """
+        if getattr(self, '_expression_cache_input', None) is not self.input_data:
+            self._expression_cache_input = self.input_data
+            self._expression_items: Optional[List[NodeExecutionData]] = None
+            self._expression_context_cache: Dict[int, Dict[str, Any]] = {}
+
+        cached = self._expression_context_cache.setdefault(item_index, {})
+        expression_context: Dict[str, Any] = {}
+        for name in self._CACHEABLE_CONTEXT_VARIABLES:
+            if variables is not None and name not in variables:
+                continue
+            if name not in cached:
+                cached[name] = self._resolve_context_variable(name, item_index)
+            expression_context[name] = cached[name]
+
+        if variables is None or '$now' in variables:
+            expression_context['$now'] = datetime.now()
+        if variables is None or '$today' in variables:
+            expression_context['$today'] = datetime.now().date()
+        expression_context['$parameter'] = {
+            'name': parameter_name,
+            'itemIndex': item_index
+        }
+        return expression_context
+
+    def _resolve_context_variable(self, name: str, item_index: int) -> Any:
+        """Compute one cacheable expression context variable"""
+        if name in ('$json', '$binary'):
+            items = self._get_expression_items()
+            current_item = items[item_index] if len(items) > item_index else None
+            if name == '$json':
+                return current_item.json_data if current_item else {}
+            return current_item.binary_data if current_item else {}
+        if name == '$items':
+            return self._get_expression_items()
+        if name == '$node':
+            return self._get_node_context()
+        if name == '$workflow':
+            return self._get_workflow_context()
+        if name == '$execution':
+            return self._get_execution_context()
+        # Add node reference function
+        return self._create_node_reference_function()
+
+    def _get_expression_items(self) -> List[NodeExecutionData]:
+        """Validated input items, computed once per input_data for expression contexts"""
+        if self._expression_items is None:
+            self._expression_items = self._get_all_items() or []
+        return self._expression_items
+
     def _create_node_reference_function(self) -> Callable[[str], NodeReference]:
         """Create a function that returns NodeReference objects"""
         def node_ref(node_name: str) -> NodeReference:
@@ -637,8 +637,8 @@ class BaseNode(ABC):
         self._credentials = credentials
         self._validate_credentials()
 
-    def get_credentials(self, credential_type: str) -> Optional[Dict[str, Any]]:
-        """Get credentials for the node by type"""
+    def _get_credential_id(self, credential_type: str) -> Optional[str]:
+        """Resolve the credential id configured on this node for a credential type"""
         if not hasattr(self, 'node_data') or not self.node_data:
             return None
             
@@ -649,67 +649,74 @@ class BaseNode(ABC):
 
         if isinstance(credentials, dict) and credential_type in credentials:
             credential_info = credentials[credential_type]
-           
-            credential_id = None
-            
+
             # Handle NodeCredential object
             if hasattr(credential_info, 'id') and hasattr(credential_info, 'name'):
-                credential_id = credential_info.id
+                return credential_info.id
 
             # Handle dict format
-            elif isinstance(credential_info, dict) and 'id' in credential_info:
-                credential_id = credential_info['id']
-            
-            if credential_id:
-                try:
-                    with get_sync_session_manual() as session:
-                        credential = CredentialCRUD().get_credential_sync(session, credential_id)
-                        if credential:
-                            credential_data = decrypt_credential_data(credential.data)
-                            return credential_data
-                        else:
-                            logger.error('No credential found in database for id: %s', credential_id)
-                except Exception as e:
-                    logger.error('Error retrieving credential %s: %s', credential_id, str(e))
+            if isinstance(credential_info, dict) and 'id' in credential_info:
+                return credential_info['id']
 
         return None
 
+    def _get_credential_cache(self) -> Optional[ExecutionCredentialCache]:
+        """Execution-scoped credential cache, when running inside a workflow execution"""
+        execution = getattr(self, 'execution', None)
+        return getattr(execution, 'credential_cache', None)
+
+    def _load_credential(self, credential_id: str) -> Optional[Dict[str, Any]]:
+        """Read and decrypt a credential from the database"""
+        try:
+            with get_sync_session_manual() as session:
+                credential = CredentialCRUD().get_credential_sync(session, credential_id)
+                if credential:
+                    return decrypt_credential_data(credential.data)
+                logger.error('No credential found in database for id: %s', credential_id)
+        except Exception as e:
+            logger.error('Error retrieving credential %s: %s', credential_id, str(e))
+        return None
+
+    def get_credentials(self, credential_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Get credentials for the node by type.
+
+        Within a workflow execution the decrypted credential is cached on the
+        execution context, so per-item calls hit the database only once.
+        """
+        credential_id = self._get_credential_id(credential_type)
+        if not credential_id:
+            return None
+
+        cache = self._get_credential_cache()
+        if cache is not None:
+            return cache.get(credential_id, self._load_credential)
+        return self._load_credential(credential_id)
+
     def update_credentials(self, credential_type: str, credential_data: Dict[str, Any]) -> None:
         """Update node credentials"""
-        if not hasattr(self, 'node_data') or not self.node_data:
+        credential_id = self._get_credential_id(credential_type)
+        if not credential_id:
             return None
-            
-        # Look for credentials in the node_data.credentials field
-        credentials = getattr(self.node_data, 'credentials', None)
-        if not credentials:
-            return None
-
-        if isinstance(credentials, dict) and credential_type in credentials:
-            credential_info = credentials[credential_type]
-           
-            credential_id = None
-            
-            # Handle NodeCredential object
-            if hasattr(credential_info, 'id') and hasattr(credential_info, 'name'):
-                credential_id = credential_info.id
 
-            # Handle dict format
-            elif isinstance(credential_info, dict) and 'id' in credential_info:
-                credential_id = credential_info['id']
-            
-            if credential_id:
-                try:
-                    with get_sync_session_manual() as session:
-                        credential = CredentialCRUD().get_credential_sync(session, credential_id)
-                        if credential:
-                            credential.data = encrypt_credential_data(credential_data)
-                            session.commit()
-                            session.refresh(credential)
-                            return credential.data
-                        else:
-                            logger.error('No credential found in database for id: %s', credential_id)
-                except Exception as e:
-                    logger.error('Error retrieving credential %s: %s', credential_id, str(e))
+        try:
+            with get_sync_session_manual() as session:
+                credential = CredentialCRUD().get_credential_sync(session, credential_id)
+                if credential:
+                    credential.data = encrypt_credential_data(credential_data)
+                    session.commit()
+                    session.refresh(credential)
+                    # Refreshed tokens must be visible to later get_credentials calls
+                    cache = self._get_credential_cache()
+                    if cache is not None:
+                        cache.set(credential_id, credential_data)
+                    else:
+                        worker_credential_cache.invalidate(credential_id)
+                    return credential.data
+                else:
+                    logger.error('No credential found in database for id: %s', credential_id)
+        except Exception as e:
+            logger.error('Error retrieving credential %s: %s', credential_id, str(e))
 
     def get_input_data(
         self, 
@@ -767,6 +774,8 @@ class BaseNode(ABC):
     def set_execution_id(self, execution_id: str) -> None:
         """Set the execution ID for tracking purposes"""
         self._execution_id = execution_id
+        # $execution may already be cached in the expression context
+        self._expression_cache_input = None
    
     def set_run_mode(self, mode: NodeRunMode) -> None:
         """Set the node running mode"""
@@ -4,7 +4,9 @@ from nodes.base import BaseNode, NodeParameterType
 from utils.model_registry import ModelRegistry, ModelAdapterProtocol
 from utils.langchain_chat_models import ChatModelRunnable
 from utils.langchain_base import RunnableRegistry
-import requests, json, logging
+from utils.embedding_providers import OpenAIEmbeddingProvider
+from utils.response_cache import ChatResponseCache
+import requests, json, logging, weakref
 
 logger = logging.getLogger(__name__)
 
@@ -194,6 +196,15 @@ class OpenAIChatModelNode(BaseNode):
                     {"name": "timeout", "type": NodeParameterType.NUMBER, "display_name": "Timeout (s)", "default": 120},
                     {"name": "organization", "type": NodeParameterType.STRING, "display_name": "Organization (optional)", "default": ""},
                     {"name": "base_url", "type": NodeParameterType.STRING, "display_name": "Base URL (optional)", "default": ""},
+                    {"name": "responseCache", "type": NodeParameterType.OPTIONS, "display_name": "Response Cache", "options": [
+                        {"name": "Off", "value": "off"},
+                        {"name": "Exact Match", "value": "exact", "description": "Reuse answers to identical requests"},
+                        {"name": "Exact + Semantic", "value": "semantic", "description": "Also reuse answers to similar first questions"},
+                    ], "default": "off", "description": "Cache answers of this workflow when Temperature is 0"},
+                    {"name": "cacheTtl", "type": NodeParameterType.NUMBER, "display_name": "Cache TTL (s)", "default": 3600},
+                    {"name": "semanticThreshold", "type": NodeParameterType.NUMBER, "display_name": "Semantic Similarity Threshold", "default": 0.95,
+                     "typeOptions": {"minValue": 0.5, "maxValue": 1, "numberStepSize": 0.01}},
+                    {"name": "cacheEmbeddingModel", "type": NodeParameterType.STRING, "display_name": "Semantic Cache Embedding Model", "default": "text-embedding-3-small"},
                 ]
             }
         ],
@@ -267,6 +278,32 @@ class OpenAIChatModelNode(BaseNode):
             logger.error(f"OpenAI Chat Model error: {e}")
             return [[NodeExecutionData(json_data={"error": str(e)}, binary_data=None)]]
     
+    def _build_response_cache(self, opts: Dict[str, Any], base_url: str, api_key: str) -> Optional[ChatResponseCache]:
+        """Response cache scoped to this workflow, or None when the option is off."""
+        mode = opts.get("responseCache") or "off"
+        if mode not in ("exact", "semantic"):
+            return None
+        embedder = None
+        if mode == "semantic":
+            # Question embeddings go over the execution's keep-alive sessions,
+            # which the executor closes when the execution ends
+            embedder = OpenAIEmbeddingProvider(
+                api_key=api_key,
+                base_url=base_url,
+                model=opts.get("cacheEmbeddingModel") or "text-embedding-3-small",
+                http_sessions=getattr(getattr(self, "execution", None), "http_sessions", None),
+            )
+        cache = ChatResponseCache(
+            scope=getattr(self.workflow, "id", "") or "",
+            ttl_seconds=int(opts.get("cacheTtl") or 0) or None,
+            embedder=embedder,
+            semantic_threshold=float(opts.get("semanticThreshold") or 0.95),
+        )
+        if embedder is not None:
+            # Outside an execution the provider owns its session: close it with the cache
+            weakref.finalize(cache, embedder.close)
+        return cache
+    
     def get_runnable(self, item_index: int = 0) -> ChatModelRunnable:
         """
         Get LangChain-compatible ChatModelRunnable for LCEL composition.
@@ -335,6 +372,7 @@ class OpenAIChatModelNode(BaseNode):
                 model=model,
                 temperature=temperature,
                 name=f"OpenAI-{model}",
+                response_cache=self._build_response_cache(opts, base_url, api_key),
                 **options
             )
             
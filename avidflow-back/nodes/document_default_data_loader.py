@@ -22,9 +22,11 @@ Document Format (LangChain compatible):
     }
 }
 """
-from typing import Dict, List, Any, Optional
+from itertools import chain
+from typing import Dict, Iterator, List, Any, Optional
 from models import NodeExecutionData
 from nodes.base import BaseNode, NodeParameterType
+from utils.text_splitter import TextSplitter
 import json
 import logging
 
@@ -162,11 +164,34 @@ class DocumentDefaultDataLoaderNode(BaseNode):
                         "description": "Split text longer than max length into multiple documents",
                         "default": False
                     },
+                    {
+                        "name": "lengthUnit",
+                        "type": NodeParameterType.OPTIONS,
+                        "display_name": "Length Unit",
+                        "description": "Unit of Max Text Length and Chunk Overlap",
+                        "options": [
+                            {"name": "Characters", "value": "characters"},
+                            {
+                                "name": "Tokens",
+                                "value": "tokens",
+                                "description": "Tokens of the embedding model, so chunks match its input limit"
+                            }
+                        ],
+                        "default": "characters"
+                    },
+                    {
+                        "name": "tokenizerModel",
+                        "type": NodeParameterType.STRING,
+                        "display_name": "Tokenizer Model",
+                        "description": "Model whose tokenizer counts tokens when Length Unit is Tokens",
+                        "default": "text-embedding-3-small",
+                        "placeholder": "text-embedding-3-small"
+                    },
                     {
                         "name": "maxTextLength",
                         "type": NodeParameterType.NUMBER,
                         "display_name": "Max Text Length",
-                        "description": "Maximum length for a single document (characters)",
+                        "description": "Maximum length for a single document (in the Length Unit)",
                         "default": 10000,
                         "typeOptions": {
                             "minValue": 100,
@@ -177,7 +202,7 @@ class DocumentDefaultDataLoaderNode(BaseNode):
                         "name": "chunkOverlap",
                         "type": NodeParameterType.NUMBER,
                         "display_name": "Chunk Overlap",
-                        "description": "Number of characters to overlap between chunks",
+                        "description": "Length of text (in the Length Unit) repeated between consecutive chunks",
                         "default": 200,
                         "typeOptions": {
                             "minValue": 0,
@@ -252,20 +277,21 @@ class DocumentDefaultDataLoaderNode(BaseNode):
                 
                 # Handle text splitting if enabled
                 if options.get("splitLongText", False):
-                    max_length = int(options.get("maxTextLength", 10000))
-                    overlap = int(options.get("chunkOverlap", 200))
+                    chunks = self._split_text(page_content, options)
+                    first = next(chunks, None)
+                    second = next(chunks, None)
                     
-                    if len(page_content) > max_length:
-                        # Split into chunks
-                        chunks = self._split_text(page_content, max_length, overlap)
-                        logger.debug(f"[Document Loader] Item {item_index}: Split into {len(chunks)} chunks")
-                        
-                        for chunk_index, chunk in enumerate(chunks):
+                    if second is not None:
+                        start = len(results)
+                        for chunk_index, chunk in enumerate(chain((first, second), chunks)):
                             chunk_metadata = metadata.copy()
                             chunk_metadata["chunk"] = chunk_index
-                            chunk_metadata["total_chunks"] = len(chunks)
-                            
                             results.append(self._create_document_item(chunk, chunk_metadata))
+                        
+                        total_chunks = len(results) - start
+                        for document in results[start:]:
+                            document.json_data["metadata"]["total_chunks"] = total_chunks
+                        logger.debug(f"[Document Loader] Item {item_index}: Split into {total_chunks} chunks")
                         continue
                 
                 # Create single document
@@ -456,55 +482,31 @@ class DocumentDefaultDataLoaderNode(BaseNode):
             binary_data=None
         )
     
-    def _split_text(
-        self,
-        text: str,
-        max_length: int,
-        overlap: int
-    ) -> List[str]:
+    def _split_text(self, text: str, options: Dict[str, Any]) -> Iterator[str]:
         """
-        Split text into chunks with overlap.
+        Lazily split text into overlapping chunks.
         
-        This is a simple character-based splitter.
-        For more sophisticated splitting, consider:
-        - Sentence boundaries
-        - Paragraph boundaries
-        - Token-based splitting
+        Chunks are cut at paragraph, line, sentence (including Persian
+        punctuation), clause and word boundaries, in that order of preference,
+        and sized in characters or in tokens of the embedding model.
         
         Args:
             text: Text to split
-            max_length: Maximum characters per chunk
-            overlap: Number of characters to overlap
+            options: Node options (maxTextLength, chunkOverlap, lengthUnit, tokenizerModel)
             
         Returns:
-            List[str]: Text chunks
+            Iterator[str]: Text chunks
         """
-        if len(text) <= max_length:
-            return [text]
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + max_length
-            
-            # If not at the end, try to split at a space
-            if end < len(text):
-                # Look for last space in the chunk
-                last_space = text[start:end].rfind(' ')
-                if last_space > 0:
-                    end = start + last_space
-            
-            chunks.append(text[start:end].strip())
-            
-            # Move start position (with overlap)
-            start = end - overlap
-            
-            # Prevent infinite loop
-            if start <= 0:
-                start = end
+        max_length = int(options.get("maxTextLength", 10000))
+        # Overlap must leave room for new text in every chunk
+        overlap = min(int(options.get("chunkOverlap", 200)), max_length // 2)
         
-        return chunks
+        if options.get("lengthUnit", "characters") == "tokens":
+            model = options.get("tokenizerModel") or "text-embedding-3-small"
+            splitter = TextSplitter.from_tokens(max_length, overlap, model=model)
+        else:
+            splitter = TextSplitter(max_length, overlap)
+        return splitter.split(text)
     
     # ============================================================================
     # Alternative Loaders (for future expansion)
@@ -104,6 +104,17 @@ class EmbeddingsOpenAINode(BaseNode):
                             "maxValue": 2048
                         }
                     },
+                    {
+                        "name": "maxConcurrency",
+                        "type": NodeParameterType.NUMBER,
+                        "display_name": "Max Concurrent Requests",
+                        "description": "Number of embedding batches sent to the API at the same time",
+                        "default": 4,
+                        "typeOptions": {
+                            "minValue": 1,
+                            "maxValue": 16
+                        }
+                    },
                     {
                         "name": "stripNewLines",
                         "type": NodeParameterType.BOOLEAN,
@@ -159,7 +170,9 @@ class EmbeddingsOpenAINode(BaseNode):
         Execute the embeddings node.
         
         This node outputs embedding configuration (provider metadata) that consuming
-        nodes use to generate embeddings. It does NOT generate embeddings itself.
+        nodes use to generate embeddings. Items carrying text (query, text,
+        content, ...) also get an ``embedding``; their texts are embedded
+        together, in batches, once all items are processed.
         
         Returns:
             List[List[NodeExecutionData]]: Output items with ai_embedding config
@@ -174,6 +187,8 @@ class EmbeddingsOpenAINode(BaseNode):
                 input_data = [[]]
             
             results: List[NodeExecutionData] = []
+            # Items with text to embed, grouped by provider config: (result index, text)
+            pending: Dict[tuple, Dict[str, Any]] = {}
             
             for item_index, item in enumerate(input_data):
                 # Get parameters for this item
@@ -224,6 +239,8 @@ class EmbeddingsOpenAINode(BaseNode):
                     embedding_config["timeout"] = int(options["timeout"])
                 if options.get("batchSize"):
                     embedding_config["batchSize"] = int(options["batchSize"])
+                if options.get("maxConcurrency"):
+                    embedding_config["maxConcurrency"] = int(options["maxConcurrency"])
                 if options.get("stripNewLines") is not None:
                     embedding_config["stripNewLines"] = bool(options["stripNewLines"])
                 
@@ -251,6 +268,8 @@ class EmbeddingsOpenAINode(BaseNode):
                     sanitized_config["timeout"] = embedding_config["timeout"]
                 if "batchSize" in embedding_config:
                     sanitized_config["batchSize"] = embedding_config["batchSize"]
+                if "maxConcurrency" in embedding_config:
+                    sanitized_config["maxConcurrency"] = embedding_config["maxConcurrency"]
                 if "stripNewLines" in embedding_config:
                     sanitized_config["stripNewLines"] = embedding_config["stripNewLines"]
                 
@@ -263,30 +282,23 @@ class EmbeddingsOpenAINode(BaseNode):
                     "_embedding_config_internal": embedding_config  # Full config with API key (for internal use)
                 }
                 
-                # If there's text to embed, generate the embedding
+                # Text to embed is collected and embedded in batches after the loop
                 if text_to_embed:
-                    logger.info(f"[OpenAI Embeddings] Generating embedding for {text_field}='{text_to_embed[:50]}...'")
-                    try:
-                        embeddings = self._generate_embeddings_sync(
-                            [text_to_embed],
-                            model=model,
-                            api_key=api_key,
-                            base_url=base_url,
-                            dimensions=dimensions,
-                            timeout=embedding_config.get("timeout", 60)
-                        )
-                        if embeddings and len(embeddings) > 0:
-                            output_data["embedding"] = embeddings[0]
-                            logger.info(f"[OpenAI Embeddings] Generated {len(embeddings[0])}-dimensional embedding")
-                    except Exception as embed_error:
-                        logger.error(f"[OpenAI Embeddings] Failed to generate embedding: {embed_error}")
-                        output_data["embedding_error"] = str(embed_error)
+                    logger.debug(f"[OpenAI Embeddings] Item {item_index}: embedding {text_field}='{text_to_embed[:50]}...'")
+                    group = pending.setdefault(
+                        tuple(sorted(embedding_config.items())),
+                        {"config": embedding_config, "entries": []}
+                    )
+                    group["entries"].append((len(results), text_to_embed))
                 
                 results.append(NodeExecutionData(
                     json_data=output_data,
                     binary_data=item.binary_data
                 ))
             
+            for group in pending.values():
+                self._embed_items(results, group["config"], group["entries"])
+            
             logger.info(f"[OpenAI Embeddings] Processed {len(results)} items with embedding config")
             return [results]
             
@@ -297,8 +309,44 @@ class EmbeddingsOpenAINode(BaseNode):
                 binary_data=None
             )]]
     
+    def _embed_items(
+        self,
+        results: List[NodeExecutionData],
+        embedding_config: Dict[str, Any],
+        entries: List[tuple]
+    ) -> None:
+        """
+        Embed the texts of several output items with one provider config.
+        
+        Sets ``embedding`` (or ``embedding_error``) on each item in
+        ``entries``, given as (index in results, text).
+        """
+        texts = [text for _, text in entries]
+        logger.info(f"[OpenAI Embeddings] Generating {len(texts)} embeddings")
+        try:
+            embeddings = self._batch_generate_embeddings(
+                texts,
+                batch_size=embedding_config.get("batchSize", 100),
+                max_concurrency=embedding_config.get("maxConcurrency", 4),
+                model=embedding_config["model"],
+                api_key=embedding_config["api_key"],
+                base_url=embedding_config["base_url"],
+                dimensions=embedding_config["dimensions"],
+                organization=embedding_config.get("organization"),
+                timeout=embedding_config.get("timeout", 60)
+            )
+        except Exception as embed_error:
+            logger.error(f"[OpenAI Embeddings] Failed to generate embeddings: {embed_error}")
+            for index, _ in entries:
+                results[index].json_data["embedding_error"] = str(embed_error)
+            return
+        
+        for (index, _), embedding in zip(entries, embeddings):
+            results[index].json_data["embedding"] = embedding
+        logger.info(f"[OpenAI Embeddings] Generated {len(embeddings)} {len(embeddings[0])}-dimensional embeddings")
+    
     # ============================================================================
-    # Utility Methods (for future direct embedding generation if needed)
+    # Utility Methods
     # ============================================================================
     
     def _generate_embeddings_sync(
@@ -314,8 +362,8 @@ class EmbeddingsOpenAINode(BaseNode):
         """
         Generate embeddings synchronously using OpenAI API.
         
-        NOTE: This method is currently NOT used by execute().
-        It's provided for future direct embedding generation if needed.
+        Single request without batching, retries or a pooled session;
+        execute() uses _batch_generate_embeddings.
         
         Args:
             texts: List of text strings to embed
@@ -382,26 +430,47 @@ class EmbeddingsOpenAINode(BaseNode):
         self,
         texts: List[str],
         batch_size: int = 100,
+        max_concurrency: int = 4,
         **kwargs
     ) -> List[List[float]]:
         """
         Generate embeddings in batches to handle large text lists.
         
+        Delegates to OpenAIEmbeddingProvider, which packs batches by token
+        count, keeps max_concurrency of them in flight over the execution's
+        pooled session, backs off on 429 and returns vectors in input order.
+        
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts per batch
-            **kwargs: Additional parameters for _generate_embeddings_sync
+            batch_size: Maximum number of texts per batch
+            max_concurrency: Number of batches sent at the same time
+            **kwargs: Provider parameters (model, api_key, base_url, dimensions, organization, timeout)
             
         Returns:
             List[List[float]]: All embedding vectors
-        """
-        all_embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            logger.debug(f"[OpenAI Embeddings] Generating batch {i//batch_size + 1} ({len(batch)} texts)")
             
-            batch_embeddings = self._generate_embeddings_sync(batch, **kwargs)
-            all_embeddings.extend(batch_embeddings)
+        Raises:
+            ValueError: If API request fails
+        """
+        from utils.embedding_providers import OpenAIEmbeddingProvider
+        from utils.qdrant_exceptions import QdrantBaseException
         
-        return all_embeddings
+        execution = getattr(self, "execution", None)
+        provider = OpenAIEmbeddingProvider(
+            api_key=kwargs["api_key"],
+            model=kwargs["model"],
+            base_url=kwargs.get("base_url", "https://api.openai.com/v1"),
+            dimensions=kwargs.get("dimensions"),
+            organization=kwargs.get("organization"),
+            timeout=kwargs.get("timeout", 60),
+            batch_size=batch_size,
+            use_cache=False,
+            max_concurrency=max_concurrency,
+            http_sessions=getattr(execution, "http_sessions", None),
+        )
+        try:
+            return provider.generate_embeddings(texts)
+        except QdrantBaseException as e:
+            raise ValueError(f"{e.message}: {e.details}" if e.details else e.message)
+        finally:
+            provider.close()
@@ -1,8 +1,9 @@
-import requests
 import json
 import base64
 from typing import Dict, Any, List
 from models import NodeExecutionData
+from utils.concurrency import BoundedExecutor
+from utils.http_pool import ExecutionHttpSessions, HostRateLimiter, host_of
 from .base import BaseNode
 import logging
 import email
@@ -129,6 +130,20 @@ class HttpRequestNode(BaseNode):
                         "default": False,
                         "displayName": "Allow Unauthorized Certificates",
                         "description": "Allow connections to sites with invalid certificates"
+                    },
+                    {
+                        "name": "concurrency",
+                        "type": "number",
+                        "default": 1,
+                        "displayName": "Concurrency",
+                        "description": "Number of items to request in parallel. Output order always matches input order"
+                    },
+                    {
+                        "name": "rateLimit",
+                        "type": "number",
+                        "default": 0,
+                        "displayName": "Rate Limit",
+                        "description": "Maximum requests per second to the same host (0 = unlimited)"
                     }
                 ]
             }
@@ -166,80 +181,119 @@ class HttpRequestNode(BaseNode):
     
     def execute(self) -> List[List[NodeExecutionData]]:
         """Execute HTTP request and return the response"""
-        result_items: List[NodeExecutionData] = []
         items = self.get_input_data()
+        specs = [self._build_request(i) for i in range(len(items))]
+        if not specs:
+            return [[]]
 
-        for i, item in enumerate(items):
-            url = self.get_parameter("url", i)
-            method = self.get_parameter("method", i, "GET")
-            auth_type = self.get_parameter("authentication", i, None)
-            headers = self.get_parameter("headerParameters", i, {})
-            query_params = self.get_parameter("queryParameters", i, {})
-            body = self.get_parameter("bodyContent", i, {})
-            options = self.get_parameter("options", i, {})
-
-            # Setup authentication
-            auth = None
-            if auth_type == "basicAuth":
-                creds = self.get_credentials("httpBasicAuth")
-                if creds:
-                    auth = (creds.get("username", ""), creds.get("password", ""))
-            elif auth_type == "headerAuth":
-                creds = self.get_credentials("httpHeaderAuth")
-                if creds:
-                    headers[creds.get("name", "Authorization")] = creds.get("value", "")
-            elif auth_type == "oauth2":
-                creds = self.get_credentials("oAuth2Api")
-                if creds:
-                    # Implement OAuth2 logic - simplified for example
-                    oauth_token_data = creds.get("oauthTokenData", {})
-                    access_token = oauth_token_data.get("access_token", "")
-                    headers["Authorization"] = f"Bearer {access_token}"
-
-            # Request options
-            timeout = options.get("timeout", 10000) / 1000  # Convert to seconds
-            verify_ssl = not options.get("allowUnauthorizedCerts", False)
+        options = self.get_parameter("options", 0, {}) or {}
+        concurrency = max(1, int(options.get("concurrency", 1) or 1))
+        sessions = getattr(getattr(self, "execution", None), "http_sessions", None)
+        owns_sessions = sessions is None
+        if owns_sessions:
+            sessions = ExecutionHttpSessions()
+        limiter = sessions.rate_limiter(float(options.get("rateLimit", 0) or 0))
 
-            try:
-                # Setup request
-                request_kwargs = {
-                    "url": url,
-                    "headers": headers,
-                    "params": query_params,
-                    "timeout": timeout,
-                    "verify": verify_ssl,
-                    "auth": auth,
-                }
+        try:
+            if concurrency == 1 or len(specs) == 1:
+                result_items = [self._send(sessions, limiter, spec, concurrency) for spec in specs]
+            else:
+                # Futures are collected in item order, so output i still belongs to input i
+                with BoundedExecutor(min(concurrency, len(specs)), name_prefix="http-request") as pool:
+                    futures = [
+                        pool.submit(self._send, sessions, limiter, spec, concurrency)
+                        for spec in specs
+                    ]
+                    result_items = [future.result() for future in futures]
+        finally:
+            if owns_sessions:
+                sessions.close()
 
-                if method != "GET" and body:
-                    request_kwargs["json"] = body
+        return [result_items]
 
-                # Make the request
-                response = requests.request(method, **request_kwargs)
+    def _build_request(self, i: int) -> Dict[str, Any]:
+        """Resolve parameters and credentials for item ``i`` (always on the calling thread)."""
+        url = self.get_parameter("url", i)
+        method = self.get_parameter("method", i, "GET")
+        auth_type = self.get_parameter("authentication", i, None)
+        headers = self.get_parameter("headerParameters", i, {})
+        query_params = self.get_parameter("queryParameters", i, {})
+        body = self.get_parameter("bodyContent", i, {})
+        options = self.get_parameter("options", i, {})
 
-                # Process response
-                result = {
-                    "statusCode": response.status_code,
-                    "headers": dict(response.headers),
-                }
+        # Setup authentication
+        auth = None
+        if auth_type == "basicAuth":
+            creds = self.get_credentials("httpBasicAuth")
+            if creds:
+                auth = (creds.get("username", ""), creds.get("password", ""))
+        elif auth_type == "headerAuth":
+            creds = self.get_credentials("httpHeaderAuth")
+            if creds:
+                headers[creds.get("name", "Authorization")] = creds.get("value", "")
+        elif auth_type == "oauth2":
+            creds = self.get_credentials("oAuth2Api")
+            if creds:
+                # Implement OAuth2 logic - simplified for example
+                oauth_token_data = creds.get("oauthTokenData", {})
+                access_token = oauth_token_data.get("access_token", "")
+                headers["Authorization"] = f"Bearer {access_token}"
 
-                try:
-                    result["body"] = response.json()
-                except json.JSONDecodeError:
-                    result["body"] = response.text
+        # Request options
+        timeout = options.get("timeout", 10000) / 1000  # Convert to seconds
+        verify_ssl = not options.get("allowUnauthorizedCerts", False)
 
-                output_item = NodeExecutionData(**{'json_data': result})
-                result_items.append(output_item)
+        request_kwargs = {
+            "headers": headers,
+            "params": query_params,
+            "timeout": timeout,
+        }
+        if method != "GET" and body:
+            request_kwargs["json"] = body
 
-            except Exception as e:
-                output_item = NodeExecutionData(**{
-                    "json_data": {
-                        "error": str(e),
-                        "url": url,
-                        "method": method
-                    },
-                    "binary_data": None
-                })
-                result_items.append(output_item)
+        return {
+            "url": url,
+            "method": method,
+            "auth": auth,
+            "verify": verify_ssl,
+            "kwargs": request_kwargs,
+        }
 
-        return [result_items]
+    def _send(
+        self,
+        sessions: ExecutionHttpSessions,
+        limiter: HostRateLimiter,
+        spec: Dict[str, Any],
+        concurrency: int,
+    ) -> NodeExecutionData:
+        """Send one prepared request over the pooled session for its host"""
+        url, method = spec["url"], spec["method"]
+        try:
+            session = sessions.get(url, spec["verify"], spec["auth"], pool_maxsize=concurrency)
+            limiter.acquire(host_of(url))
+
+            # Make the request
+            response = session.request(method, url, **spec["kwargs"])
+
+            # Process response
+            result = {
+                "statusCode": response.status_code,
+                "headers": dict(response.headers),
+            }
+
+            try:
+                result["body"] = response.json()
+            except json.JSONDecodeError:
+                result["body"] = response.text
+
+            return NodeExecutionData(**{'json_data': result})
+
+        except Exception as e:
+            return NodeExecutionData(**{
+                "json_data": {
+                    "error": str(e),
+                    "url": url,
+                    "method": method
+                },
+                "binary_data": None
+            })
@@ -1,10 +1,14 @@
 from __future__ import annotations
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass
 from time import time
 import time as time_module  # For sleep() in threading fallback
+import heapq
+import json
 import logging
 
+from config import settings
 from models import NodeExecutionData
 from nodes.base import BaseNode, NodeParameterType
 
@@ -22,17 +26,54 @@ except ImportError:
 
 # ── In-process conversation store (no Redis) ──────────────────────────────────
 
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # Total budget across sessions (approximate)
+MESSAGE_OVERHEAD_BYTES = 64  # Rough per-message dict overhead in the size estimate
+
+
+def _estimate_size(messages: List[Dict[str, Any]]) -> int:
+    """Approximate bytes held by a message list: string lengths plus per-message overhead."""
+    size = 0
+    for message in messages:
+        size += MESSAGE_OVERHEAD_BYTES
+        for value in message.values():
+            if isinstance(value, str):
+                size += len(value)
+            elif value is not None:
+                size += len(json.dumps(value, ensure_ascii=False, default=str))
+    return size
+
+
 @dataclass
 class _Entry:
     messages: List[Dict[str, Any]]
     expires_at: float
+    size: int = 0
 
 class _InMemoryConversationStore:
-    def __init__(self) -> None:
+    """
+    Per-worker session store with TTL expiry and a total-bytes budget.
+    
+    - Expiry: every entry with a TTL is pushed on a min-heap keyed by
+      expires_at, so a purge pops only the expired entries (O(k log n))
+      instead of scanning every session. Heap items of overwritten or
+      deleted entries are skipped when popped.
+    - Capacity: _store is an OrderedDict in LRU order; when the estimated
+      size of all sessions exceeds max_bytes the least recently used
+      sessions are evicted (0 disables the budget).
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None, start_cleanup: bool = True) -> None:
         self._lock = GeventLock()  # Use gevent-compatible lock
-        self._store: Dict[str, _Entry] = {}
+        self._store: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._expiry: List[Tuple[float, int, str, _Entry]] = []
+        self._seq = 0
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self.total_bytes = 0
+        self.expired = 0
+        self.evicted = 0
         self._cleanup_running = False
-        self._start_cleanup_greenlet()
+        if start_cleanup:
+            self._start_cleanup_greenlet()
 
     def _start_cleanup_greenlet(self) -> None:
         """
@@ -85,6 +126,7 @@ class _InMemoryConversationStore:
                     # Run cleanup with full exception protection
                     try:
                         self._purge_expired()
+                        logger.debug(f"[Memory Cleanup] Store stats: {self.stats()}")
                     except Exception as e:
                         # CRITICAL: Catch exceptions from _purge_expired to prevent loop crash
                         logger.error(
@@ -129,23 +171,15 @@ class _InMemoryConversationStore:
             self._cleanup_running = False
             raise
 
-    def _purge_expired(self) -> None:
-        """Remove expired entries and log cleanup stats"""
-        now = time()
-        to_del = []
-        
+    def _purge_expired(self) -> int:
+        """Remove expired entries (popped from the expiry heap); returns how many."""
         with self._lock:
-            for k, v in self._store.items():
-                if v.expires_at and v.expires_at <= now:
-                    to_del.append(k)
-            
-            for k in to_del:
-                self._store.pop(k, None)
+            purged = self._pop_expired(time())
             
             # Log cleanup statistics
-            if to_del:
+            if purged:
                 logger.info(
-                    f"[Memory Cleanup] Purged {len(to_del)} expired sessions. "
+                    f"[Memory Cleanup] Purged {purged} expired sessions. "
                     f"Active sessions: {len(self._store)}"
                 )
             
@@ -155,28 +189,92 @@ class _InMemoryConversationStore:
                     f"[Memory Cleanup] High session count: {len(self._store)} active sessions. "
                     f"Consider using Redis for production!"
                 )
+            return purged
+
+    def _pop_expired(self, now: float) -> int:
+        """Pop heap items due by ``now``; caller holds the lock."""
+        purged = 0
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            _, _, key, entry = heapq.heappop(expiry)
+            # Skip items whose entry was overwritten or deleted since it was pushed
+            if self._store.get(key) is entry:
+                self._remove(key)
+                purged += 1
+        self.expired += purged
+        return purged
+
+    def _remove(self, key: str) -> Optional[_Entry]:
+        entry = self._store.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+        return entry
+
+    def _evict_over_budget(self) -> None:
+        """Evict least recently used sessions until the store fits max_bytes (never the newest)."""
+        while self.max_bytes and self.total_bytes > self.max_bytes and len(self._store) > 1:
+            key = next(iter(self._store))
+            entry = self._remove(key)
+            self.evicted += 1
+            logger.info(
+                f"[Memory Cleanup] Evicted session {key} ({entry.size} bytes) to stay within "
+                f"{self.max_bytes} bytes. Active sessions: {len(self._store)}"
+            )
+
+    def _compact_expiry(self) -> None:
+        """Rebuild the heap when stale items (overwritten sessions) dominate it."""
+        if len(self._expiry) > 2 * len(self._store) + 64:
+            self._expiry = [item for item in self._expiry if self._store.get(item[2]) is item[3]]
+            heapq.heapify(self._expiry)
 
     def get(self, key: str) -> List[Dict[str, Any]]:
         with self._lock:
-            self._purge_expired()
+            self._pop_expired(time())
             entry = self._store.get(key)
             if not entry:
                 return []
+            self._store.move_to_end(key)
             return list(entry.messages)
 
     def set(self, key: str, messages: List[Dict[str, Any]], ttl_seconds: Optional[int]) -> None:
         with self._lock:
-            self._purge_expired()
-            expires_at = time() + ttl_seconds if ttl_seconds else 0
+            now = time()
+            self._pop_expired(now)
+            expires_at = now + ttl_seconds if ttl_seconds else 0
             # cap stored messages to avoid unbounded growth (soft cap)
             capped = messages[-800:] if len(messages) > 800 else list(messages)
-            self._store[key] = _Entry(messages=capped, expires_at=expires_at)
+            entry = _Entry(messages=capped, expires_at=expires_at, size=_estimate_size(capped))
+            self._remove(key)
+            self._store[key] = entry
+            self.total_bytes += entry.size
+            if expires_at:
+                self._seq += 1
+                heapq.heappush(self._expiry, (expires_at, self._seq, key, entry))
+                self._compact_expiry()
+            self._evict_over_budget()
 
     def delete(self, key: str) -> None:
         with self._lock:
-            self._store.pop(key, None)
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._expiry.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Session count, estimated bytes, and expiry/eviction counters for monitoring."""
+        with self._lock:
+            return {
+                "sessions": len(self._store),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
 
-_STORE = _InMemoryConversationStore()
+_STORE = _InMemoryConversationStore(max_bytes=settings.BUFFER_MEMORY_MAX_BYTES)
 
 # ── Memory Manager API used by the Agent ──────────────────────────────────────
 
@@ -290,6 +388,11 @@ class MemoryManager:
         except Exception as e:
             logger.warning(f"Memory clear failed: {e}")
 
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        """Worker-level store stats: sessions, bytes, max_bytes, expired, evicted."""
+        return _STORE.stats()
+
 # ── Node: Simple Memory (like n8n MemoryBufferWindow) ─────────────────────────
 
 class BufferMemoryNode(BaseNode):
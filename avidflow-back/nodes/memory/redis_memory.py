@@ -16,8 +16,12 @@ Architecture Notes:
   - Outputs `ai_memory` type for AI Agent node consumption
 
 Session Key Format:
-  - Keys stored as: `memory:redis:{session_id}`
-  - Messages serialized as JSON arrays
+  - "json" storage (default): `memory:redis:{session_id}` holds the whole
+    history as one JSON array, rewritten on every save
+  - "list" storage: `memory:redis:{session_id}:messages` is a Redis list with
+    one JSON message per element (RPUSH per turn, LRANGE/LTRIM windowing),
+    `:system` holds system messages and `:meta` the turn counter. A legacy
+    JSON blob found for the session is migrated on first load
   - TTL managed by Redis EXPIRE command
 
 Dependencies:
@@ -25,7 +29,7 @@ Dependencies:
 """
 from __future__ import annotations
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 import json
 from time import time
@@ -177,15 +181,21 @@ class RedisMemoryManager:
     
     DEFAULT_TTL_SECONDS = 3600  # 1 hour default session expiry
     KEY_PREFIX = "memory:redis:"  # Distinguishes from buffer_memory keys
+    MAX_MESSAGES = 800  # Hard cap when no context window is configured
     
-    def __init__(self, credentials: Dict[str, Any]):
+    STORAGE_JSON = "json"  # One JSON blob per session (legacy layout)
+    STORAGE_LIST = "list"  # Append-only Redis list per session
+    
+    def __init__(self, credentials: Dict[str, Any], storage_mode: str = STORAGE_JSON):
         """
         Initialize Redis memory manager with credentials.
         
         Args:
             credentials: Dictionary containing Redis connection parameters
+            storage_mode: "json" (whole history per key) or "list" (append-only)
         """
         self.credentials = credentials
+        self.storage_mode = storage_mode if storage_mode == self.STORAGE_LIST else self.STORAGE_JSON
         self._client = None
     
     def _get_client(self):
@@ -211,6 +221,17 @@ class RedisMemoryManager:
         """
         return f"{self.KEY_PREFIX}{session_id}"
     
+    def _list_keys(self, session_id: str) -> Tuple[str, str, str]:
+        """Keys of the list layout: (messages list, system messages, meta hash)."""
+        base = self._key(session_id)
+        return f"{base}:messages", f"{base}:system", f"{base}:meta"
+    
+    @staticmethod
+    def _window_size(context_window: Optional[int]) -> int:
+        """Messages kept for a context window (approximately 4 messages per turn)."""
+        window = max(0, int(context_window or 0))
+        return window * 4 if window > 0 else 0
+    
     def load(self, session_id: str, context_window: int) -> List[Dict[str, Any]]:
         """
         Load conversation history for a session.
@@ -225,6 +246,8 @@ class RedisMemoryManager:
         Returns:
             List of message dictionaries with role and content
         """
+        if self.storage_mode == self.STORAGE_LIST:
+            return self._load_list(session_id, context_window)
         try:
             client = self._get_client()
             key = self._key(session_id)
@@ -295,44 +318,15 @@ class RedisMemoryManager:
             context_window: If provided, truncate to N recent turns
             auto_clear_on_full: If True, clear old messages when window is full
         """
+        if self.storage_mode == self.STORAGE_LIST:
+            self._save_list(session_id, messages, ttl_seconds, context_window, auto_clear_on_full)
+            return
         try:
             client = self._get_client()
             key = self._key(session_id)
-            
-            # Apply context window truncation if specified
-            if context_window is not None and context_window > 0:
-                # Separate system from conversation messages
-                system_msgs = [m for m in messages if m.get("role") == "system"]
-                non_system = [m for m in messages if m.get("role") != "system"]
-                
-                # Calculate max messages based on window
-                window = max(0, int(context_window))
-                max_messages = window * 4  # 4 messages per turn
-                
-                # Count actual turns (user messages)
-                user_messages = [m for m in non_system if m.get("role") == "user"]
-                turn_count = len(user_messages)
-                
-                # AUTO-CLEAR LOGIC: Reset when window is full
-                if auto_clear_on_full and turn_count >= window:
-                    # Find last turn start (last user message)
-                    user_indices = [i for i, m in enumerate(non_system) if m.get("role") == "user"]
-                    last_turn_start = user_indices[-1] if user_indices else 0
-                    recent = non_system[last_turn_start:]
-                    
-                    logger.info(
-                        f"[RedisMemory] Auto-clear triggered for session {session_id}: "
-                        f"Window FULL ({turn_count} turns >= {window} limit). "
-                        f"Cleared {len(non_system) - len(recent)} old messages."
-                    )
-                else:
-                    # Normal truncation
-                    recent = non_system[-max_messages:] if len(non_system) > max_messages else non_system
-                
-                messages_to_save = system_msgs + recent
-            else:
-                # Hard cap to prevent unbounded growth (800 messages max)
-                messages_to_save = messages[-800:] if len(messages) > 800 else messages
+            messages_to_save = self._select_messages_to_save(
+                session_id, messages, context_window, auto_clear_on_full
+            )
             
             # Serialize to JSON
             messages_json = json.dumps(messages_to_save, ensure_ascii=False)
@@ -357,6 +351,253 @@ class RedisMemoryManager:
             # NOTE: We don't raise here to avoid breaking the AI Agent workflow
             # Memory loss is preferable to workflow failure
     
+    def _select_messages_to_save(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        context_window: Optional[int],
+        auto_clear_on_full: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply context window truncation (and auto-clear) to a full history.
+        
+        Returns:
+            System messages followed by the conversation messages to keep
+        """
+        # Apply context window truncation if specified
+        if context_window is not None and context_window > 0:
+            # Separate system from conversation messages
+            system_msgs = [m for m in messages if m.get("role") == "system"]
+            non_system = [m for m in messages if m.get("role") != "system"]
+            
+            # Calculate max messages based on window
+            window = max(0, int(context_window))
+            max_messages = window * 4  # 4 messages per turn
+            
+            # Count actual turns (user messages)
+            user_messages = [m for m in non_system if m.get("role") == "user"]
+            turn_count = len(user_messages)
+            
+            # AUTO-CLEAR LOGIC: Reset when window is full
+            if auto_clear_on_full and turn_count >= window:
+                # Find last turn start (last user message)
+                user_indices = [i for i, m in enumerate(non_system) if m.get("role") == "user"]
+                last_turn_start = user_indices[-1] if user_indices else 0
+                recent = non_system[last_turn_start:]
+                
+                logger.info(
+                    f"[RedisMemory] Auto-clear triggered for session {session_id}: "
+                    f"Window FULL ({turn_count} turns >= {window} limit). "
+                    f"Cleared {len(non_system) - len(recent)} old messages."
+                )
+            else:
+                # Normal truncation
+                recent = non_system[-max_messages:] if len(non_system) > max_messages else non_system
+            
+            messages_to_save = system_msgs + recent
+        else:
+            # Hard cap to prevent unbounded growth (800 messages max)
+            messages_to_save = messages[-self.MAX_MESSAGES:] if len(messages) > self.MAX_MESSAGES else messages
+        
+        return messages_to_save
+    
+    # ── Append-only list storage ─────────────────────────────────────────────
+    
+    def append(
+        self,
+        session_id: str,
+        new_messages: List[Dict[str, Any]],
+        ttl_seconds: Optional[int] = None,
+        context_window: Optional[int] = None,
+        auto_clear_on_full: bool = True
+    ) -> None:
+        """
+        Append the messages of one turn to the session history.
+        
+        In "list" storage this is a single pipelined round trip (RPUSH, LTRIM
+        to the window, EXPIRE) whose cost depends on the turn, not on the
+        history length. The `:meta` turn counter counts user messages appended
+        since the last auto-clear; when it reaches the window the history is
+        cut back to the last turn, like save() does. In "json" storage the
+        history is loaded and saved again.
+        
+        Args:
+            session_id: Unique session identifier
+            new_messages: Messages added since the last save/append
+            ttl_seconds: Time-to-live in seconds (None = use default)
+            context_window: If provided, keep N recent turns
+            auto_clear_on_full: If True, clear old messages when window is full
+        """
+        if not new_messages:
+            return
+        if self.storage_mode != self.STORAGE_LIST:
+            history = self.load(session_id, 0)
+            self.save(session_id, history + list(new_messages), ttl_seconds, context_window, auto_clear_on_full)
+            return
+        try:
+            client = self._get_client()
+            messages_key, system_key, meta_key = self._list_keys(session_id)
+            system_msgs = [m for m in new_messages if m.get("role") == "system"]
+            non_system = [m for m in new_messages if m.get("role") != "system"]
+            user_indices = [i for i, m in enumerate(non_system) if m.get("role") == "user"]
+            window = max(0, int(context_window or 0))
+            cap = self._window_size(window) or self.MAX_MESSAGES
+            effective_ttl = ttl_seconds if ttl_seconds is not None else self.DEFAULT_TTL_SECONDS
+            
+            pipe = client.pipeline(transaction=True)
+            pipe.hincrby(meta_key, "turns", len(user_indices))
+            if non_system:
+                pipe.rpush(messages_key, *[json.dumps(m, ensure_ascii=False) for m in non_system])
+                pipe.ltrim(messages_key, -cap, -1)
+            if system_msgs:
+                pipe.set(system_key, json.dumps(system_msgs, ensure_ascii=False))
+            self._queue_ttl(pipe, (messages_key, system_key, meta_key), effective_ttl)
+            turns = pipe.execute()[0]
+            
+            # AUTO-CLEAR LOGIC: Reset to the last turn when the window is full
+            if window and auto_clear_on_full and user_indices and turns >= window:
+                kept = len(non_system) - user_indices[-1]
+                pipe = client.pipeline(transaction=True)
+                pipe.ltrim(messages_key, -kept, -1)
+                pipe.hset(meta_key, "turns", 1)
+                pipe.execute()
+                logger.info(
+                    f"[RedisMemory] Auto-clear triggered for session {session_id}: "
+                    f"Window FULL ({turns} turns >= {window} limit). Kept last {kept} messages."
+                )
+            
+            logger.debug(
+                f"[RedisMemory] Appended {len(new_messages)} messages for session {session_id} "
+                f"(ttl={effective_ttl}s)"
+            )
+            
+        except Exception as e:
+            logger.error(f"[RedisMemory] Append failed for session {session_id}: {e}")
+    
+    def _load_list(self, session_id: str, context_window: int) -> List[Dict[str, Any]]:
+        """load() for "list" storage: LRANGE only the windowed tail."""
+        try:
+            client = self._get_client()
+            messages_key, system_key, _ = self._list_keys(session_id)
+            start = -self._window_size(context_window) or 0
+            
+            pipe = client.pipeline(transaction=False)
+            pipe.get(system_key)
+            pipe.lrange(messages_key, start, -1)
+            pipe.exists(self._key(session_id))
+            system_json, raw_messages, legacy = pipe.execute()
+            
+            if legacy and not raw_messages and not system_json:
+                # Session written in "json" storage: convert it once, then read it again
+                self._migrate_legacy(client, session_id)
+                pipe = client.pipeline(transaction=False)
+                pipe.get(system_key)
+                pipe.lrange(messages_key, start, -1)
+                system_json, raw_messages = pipe.execute()
+            
+            system_msgs = json.loads(system_json) if system_json else []
+            recent = [json.loads(raw) for raw in raw_messages]
+            result = system_msgs + recent
+            
+            logger.debug(
+                f"[RedisMemory] Loaded {len(result)} messages for session {session_id} "
+                f"(window={context_window}, system={len(system_msgs)}, recent={len(recent)})"
+            )
+            
+            return result
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"[RedisMemory] JSON decode error for session {session_id}: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"[RedisMemory] Load failed for session {session_id}: {e}")
+            return []
+    
+    def _save_list(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        ttl_seconds: Optional[int],
+        context_window: Optional[int],
+        auto_clear_on_full: bool
+    ) -> None:
+        """save() for "list" storage: replace the whole history in one transaction."""
+        try:
+            client = self._get_client()
+            messages_to_save = self._select_messages_to_save(
+                session_id, messages, context_window, auto_clear_on_full
+            )
+            effective_ttl = ttl_seconds if ttl_seconds is not None else self.DEFAULT_TTL_SECONDS
+            
+            pipe = client.pipeline(transaction=True)
+            self._queue_replace(pipe, session_id, messages_to_save, effective_ttl)
+            pipe.execute()
+            
+            logger.debug(
+                f"[RedisMemory] Saved {len(messages_to_save)} messages for session {session_id} "
+                f"(ttl={effective_ttl}s)"
+            )
+            
+        except Exception as e:
+            logger.error(f"[RedisMemory] Save failed for session {session_id}: {e}")
+    
+    def _migrate_legacy(self, client: Any, session_id: str) -> None:
+        """
+        Move a "json" storage blob into the list layout, keeping its TTL.
+        
+        The legacy key is WATCHed, so when two workers migrate the same
+        session only one transaction applies and the other just re-reads.
+        """
+        from redis.exceptions import WatchError
+        
+        key = self._key(session_id)
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(key)
+                stored_json = pipe.get(key)
+                ttl = pipe.ttl(key)
+                stored = json.loads(stored_json) if stored_json else []
+                if not isinstance(stored, list):
+                    stored = []
+                system_msgs = [m for m in stored if m.get("role") == "system"]
+                non_system = [m for m in stored if m.get("role") != "system"]
+                
+                pipe.multi()
+                self._queue_replace(
+                    pipe, session_id, system_msgs + non_system[-self.MAX_MESSAGES:],
+                    ttl if ttl and ttl > 0 else 0
+                )
+                pipe.execute()
+                logger.info(
+                    f"[RedisMemory] Migrated session {session_id} to list storage "
+                    f"({len(stored)} messages)"
+                )
+            except WatchError:
+                logger.debug(f"[RedisMemory] Session {session_id} migrated concurrently")
+    
+    def _queue_replace(self, pipe: Any, session_id: str, messages: List[Dict[str, Any]], ttl: int) -> None:
+        """Queue commands that replace the list-layout keys (and drop the legacy key)."""
+        messages_key, system_key, meta_key = self._list_keys(session_id)
+        system_msgs = [m for m in messages if m.get("role") == "system"]
+        non_system = [m for m in messages if m.get("role") != "system"]
+        
+        pipe.delete(messages_key, system_key, meta_key, self._key(session_id))
+        if non_system:
+            pipe.rpush(messages_key, *[json.dumps(m, ensure_ascii=False) for m in non_system])
+        if system_msgs:
+            pipe.set(system_key, json.dumps(system_msgs, ensure_ascii=False))
+        pipe.hset(meta_key, "turns", sum(1 for m in non_system if m.get("role") == "user"))
+        self._queue_ttl(pipe, (messages_key, system_key, meta_key), ttl)
+    
+    @staticmethod
+    def _queue_ttl(pipe: Any, keys: Tuple[str, ...], ttl: int) -> None:
+        # TTL of 0 means no expiration
+        for key in keys:
+            if ttl > 0:
+                pipe.expire(key, ttl)
+            else:
+                pipe.persist(key)
+    
     def clear(self, session_id: str) -> None:
         """
         Clear all messages for a session.
@@ -368,7 +609,8 @@ class RedisMemoryManager:
             client = self._get_client()
             key = self._key(session_id)
             
-            deleted = client.delete(key)
+            # Both layouts are removed, whichever mode wrote the session
+            deleted = client.delete(key, *self._list_keys(session_id))
             
             if deleted:
                 logger.info(f"[RedisMemory] Cleared session: {session_id}")
@@ -390,6 +632,9 @@ class RedisMemoryManager:
         """
         try:
             client = self._get_client()
+            if self.storage_mode == self.STORAGE_LIST:
+                messages_key, system_key, _ = self._list_keys(session_id)
+                return bool(client.exists(messages_key, system_key, self._key(session_id)))
             key = self._key(session_id)
             return bool(client.exists(key))
         except Exception as e:
@@ -409,6 +654,8 @@ class RedisMemoryManager:
         try:
             client = self._get_client()
             key = self._key(session_id)
+            if self.storage_mode == self.STORAGE_LIST and not client.exists(key):
+                key = self._list_keys(session_id)[2]  # Meta hash exists for every list session
             return client.ttl(key)
         except Exception as e:
             logger.error(f"[RedisMemory] TTL check failed for session {session_id}: {e}")
@@ -434,6 +681,7 @@ class RedisMemoryNode(BaseNode):
         - sessionKey: Alternative session ID from previous node
         - contextWindowLength: Number of turns to include in context
         - ttlSeconds: Session expiration time
+        - storageMode: "json" (whole history per key) or "list" (append-only)
         
     Outputs:
         - ai_memory: Configuration object for AI Agent consumption
@@ -506,6 +754,18 @@ class RedisMemoryNode(BaseNode):
                 "default": True,
                 "description": "If enabled, each user gets their own conversation history.",
             },
+            {
+                "name": "storageMode",
+                "type": NodeParameterType.OPTIONS,
+                "displayName": "Storage Mode",
+                "options": [
+                    {"name": "JSON Document", "value": RedisMemoryManager.STORAGE_JSON},
+                    {"name": "Append-Only List", "value": RedisMemoryManager.STORAGE_LIST},
+                ],
+                "default": RedisMemoryManager.STORAGE_JSON,
+                "description": "Append-Only List writes only the new messages of each turn instead of "
+                               "rewriting the whole history. Existing JSON sessions are migrated on first load.",
+            },
         ],
         "credentials": [{"name": "redisApi", "required": True}],
     }
@@ -558,6 +818,9 @@ class RedisMemoryNode(BaseNode):
                     separate_per_user = self.get_node_parameter(
                         "separateSessionPerUser", idx, True
                     )
+                    storage_mode = self.get_node_parameter(
+                        "storageMode", idx, RedisMemoryManager.STORAGE_JSON
+                    )
                     
                     # Session key takes precedence if provided
                     final_session_id = session_key if session_key else session_id
@@ -576,6 +839,7 @@ class RedisMemoryNode(BaseNode):
                         "session_id": final_session_id,
                         "context_window_length": context_window,
                         "ttl_seconds": ttl_seconds,
+                        "storage_mode": storage_mode,
                         "credentials": credentials,  # Passed for lazy loading
                     }
                     
@@ -683,6 +947,7 @@ class RedisMemoryNode(BaseNode):
         session_key = self.get_node_parameter("sessionKey", item_index, "")
         context_window = int(self.get_node_parameter("contextWindowLength", item_index, 5))
         ttl_seconds = int(self.get_node_parameter("ttlSeconds", item_index, 3600))
+        storage_mode = self.get_node_parameter("storageMode", item_index, RedisMemoryManager.STORAGE_JSON)
         
         # Get credentials
         credentials = self.get_credentials("redisApi")
@@ -698,6 +963,7 @@ class RedisMemoryNode(BaseNode):
             context_window=context_window,
             ttl_seconds=ttl_seconds,
             credentials=credentials,
+            storage_mode=storage_mode,
         )
         
         logger.info(
@@ -723,14 +989,18 @@ class RedisMemoryNode(BaseNode):
         if not credentials:
             raise ValueError("Redis credentials not configured")
         
-        return RedisMemoryManager(credentials)
+        storage_mode = self.get_node_parameter("storageMode", item_index, RedisMemoryManager.STORAGE_JSON)
+        return RedisMemoryManager(credentials, storage_mode=storage_mode)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #                          CONVENIENCE FUNCTIONS
 # ══════════════════════════════════════════════════════════════════════════════
 
-def create_redis_memory_manager(credentials: Dict[str, Any]) -> RedisMemoryManager:
+def create_redis_memory_manager(
+    credentials: Dict[str, Any],
+    storage_mode: str = RedisMemoryManager.STORAGE_JSON
+) -> RedisMemoryManager:
     """
     Factory function to create a RedisMemoryManager.
     
@@ -739,6 +1009,7 @@ def create_redis_memory_manager(credentials: Dict[str, Any]) -> RedisMemoryManag
     Args:
         credentials: Dictionary with Redis connection parameters
                     (host, port, database, user, password, ssl)
+        storage_mode: "json" (default) or "list" for append-only storage
         
     Returns:
         RedisMemoryManager instance
@@ -759,4 +1030,4 @@ def create_redis_memory_manager(credentials: Dict[str, Any]) -> RedisMemoryManag
         # Save messages
         manager.save("session-123", messages, ttl_seconds=3600)
     """
-    return RedisMemoryManager(credentials)
+    return RedisMemoryManager(credentials, storage_mode=storage_mode)
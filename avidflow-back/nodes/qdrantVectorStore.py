@@ -5,6 +5,7 @@ REFACTORED ARCHITECTURE:
 - Thin orchestrator delegating to specialized components
 - Uses Pydantic models for parameter validation
 - QdrantClientAdapter for all HTTP operations (with pooling + retry)
+- LocalQdrantAdapter instead when the credential selects the local backend
 - Embedding providers via factory pattern (supports OpenAI, future: Cohere, etc.)
 - Retriever abstraction composing client + provider
 - Proper exception handling (no error dicts)
@@ -34,6 +35,7 @@ from utils.connection_resolver import ConnectionResolver
 
 # New infrastructure (refactored)
 from utils.qdrant_client import QdrantClientAdapter
+from utils.qdrant_local import LocalQdrantAdapter
 from utils.embedding_providers import EmbeddingProviderFactory
 from utils.qdrant_retriever import Retriever
 from utils.qdrant_models import (
@@ -603,16 +605,25 @@ class QdrantVectorStoreNode(BaseNode):
     # NEW REFACTORED INFRASTRUCTURE (Connection Pooling + Provider Pattern)
     # ============================================================================
 
-    def _initialize_qdrant_adapter(self) -> QdrantClientAdapter:
+    def _initialize_qdrant_adapter(self) -> Union[QdrantClientAdapter, LocalQdrantAdapter]:
         """
         Initialize Qdrant client adapter with connection pooling.
+        Credentials with backend "local" get the in-process LocalQdrantAdapter,
+        holding the collections of that credential only.
         
         Returns:
-            Configured QdrantClientAdapter
+            Configured QdrantClientAdapter or LocalQdrantAdapter
             
         Raises:
             ParameterError: If credentials are invalid
         """
+        credentials = self.get_credentials("qdrantApi") or {}
+        if credentials.get("backend") == "local":
+            # Namespaced by credential id, never by a user-supplied value
+            adapter = LocalQdrantAdapter.for_credential(self._get_credential_id("qdrantApi"))
+            logger.debug(f"[Qdrant] Initialized local adapter: {adapter.path}")
+            return adapter
+        
         try:
             config = QdrantConnectionConfig(
                 url=self._get_base_url(),
@@ -665,7 +676,7 @@ class QdrantVectorStoreNode(BaseNode):
                 # Create provider via factory
                 provider = EmbeddingProviderFactory.create(
                     provider_type="openai",
-                    config=config.dict()
+                    config={**config.dict(), "http_sessions": self._get_http_sessions()}
                 )
                 
                 #logger.info(f"[Qdrant] Initialized {config.provider_type} provider from credentials: {config.model}")
@@ -682,7 +693,7 @@ class QdrantVectorStoreNode(BaseNode):
             try:
                 provider = EmbeddingProviderFactory.create(
                     provider_type=embedding_config.get("provider_type", "openai"),
-                    config=embedding_config
+                    config={**embedding_config, "http_sessions": self._get_http_sessions()}
                 )
                 #logger.info(f"[Qdrant] Initialized provider from ai_embedding connection: {embedding_config.get('model')}")
                 return provider
@@ -693,6 +704,10 @@ class QdrantVectorStoreNode(BaseNode):
         #logger.info("[Qdrant] No embedding provider available (no credentials or ai_embedding connection)")
         return None
     
+    def _get_http_sessions(self) -> Optional[Any]:
+        """Execution-scoped HTTP session pool, so embedding calls reuse keep-alive connections."""
+        return getattr(getattr(self, "execution", None), "http_sessions", None)
+    
     def _initialize_retriever(self) -> Retriever:
         """
         Initialize retriever composing adapter + provider.
@@ -729,12 +744,13 @@ class QdrantVectorStoreNode(BaseNode):
                         dimensions=provider_config.get("dimensions"),
                         organization=provider_config.get("organization"),
                         timeout=provider_config.get("timeout", 60),
-                        batch_size=100
+                        batch_size=100,
+                        max_concurrency=provider_config.get("maxConcurrency", 4)
                     )
                     
                     provider = EmbeddingProviderFactory.create(
                         provider_type=provider_type,
-                        config=config.dict()
+                        config={**config.dict(), "http_sessions": self._get_http_sessions()}
                     )
                     
                     #logger.info(f"[Qdrant] Initialized {provider_type} provider from ai_embedding connection")
@@ -1236,13 +1252,17 @@ class QdrantVectorStoreNode(BaseNode):
         retriever = self._initialize_retriever()
         
         # Use retriever for document insertion (handles embedding generation internally)
-        # Note: batch_size is handled internally by the provider, not passed here
-        result = retriever.insert_documents(
-            collection_name=params.collection_name,
-            documents=documents,
-            text_field=params.text_field,
-            wait=params.wait
-        )
+        # batch_size is the number of documents embedded and upserted per chunk
+        try:
+            result = retriever.insert_documents(
+                collection_name=params.collection_name,
+                documents=documents,
+                text_field=params.text_field,
+                wait=params.wait,
+                chunk_size=batch_size
+            )
+        finally:
+            retriever.provider.close()
         
         inserted_count = result.get("documents_inserted", 0)
         #logger.info(f"[Qdrant] Inserted {inserted_count} documents in typed mode")
@@ -1340,7 +1360,10 @@ class QdrantVectorStoreNode(BaseNode):
                         "Connect an embeddings node or configure embeddingsOpenAi credential."
                     )
                 
-                embeddings = provider.generate_embeddings([query_text])
+                try:
+                    embeddings = provider.generate_embeddings([query_text])
+                finally:
+                    provider.close()
                 query_vector = embeddings[0]
                 #logger.info(f"[Qdrant Search] Generated {len(query_vector)}D embedding")
                 
@@ -1441,12 +1464,15 @@ class QdrantVectorStoreNode(BaseNode):
             retriever = self._initialize_retriever()
             
             # Use retriever's search_as_tool_output for RAG
-            results = retriever.search_as_tool_output(
-                collection_name=collection_name,
-                query_data=query_data,
-                top_k=limit,
-                score_threshold=score_threshold
-            )
+            try:
+                results = retriever.search_as_tool_output(
+                    collection_name=collection_name,
+                    query_data=query_data,
+                    top_k=limit,
+                    score_threshold=score_threshold
+                )
+            finally:
+                retriever.provider.close()
             
             logger.info(f"[Qdrant Retriever] Found {len(results)} documents")
             
@@ -1,7 +1,8 @@
 import logging
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
+from config import settings
 from models import NodeExecutionData
 from .base import BaseNode, NodeParameterType
 
@@ -11,6 +12,12 @@ class WaitNode(BaseNode):
     """
     Wait Node that pauses workflow execution for a specified duration or until a specific time.
     Supports different wait modes: fixed time, amount of time, and webhook resumption.
+
+    Opt-in (``settings.DURABLE_WAIT_MIN_SECONDS`` > 0): waits at least that long
+    are durable when the execution supports it. The node asks the execution
+    context to suspend, the executor checkpoints and the Celery task is resumed
+    later, so no worker slot is held while waiting. Otherwise, and always when
+    the node runs as an AI agent tool or in a sub-workflow, it sleeps inline.
     """
 
     type = "wait"
@@ -61,6 +68,19 @@ class WaitNode(BaseNode):
         if not input_data or input_data == [[]]:
             return [[]]
         amount = self.get_node_parameter("amount", 0, 0)
-        time.sleep(amount)
+        if not self._suspend_execution(amount):
+            time.sleep(amount)
+
+        return [input_data]
 
-        return [input_data]
\ No newline at end of file
+    def _suspend_execution(self, amount: float) -> bool:
+        """Hand the wait over to the executor (checkpoint + timed resume) if possible."""
+        threshold = settings.DURABLE_WAIT_MIN_SECONDS
+        execution = getattr(self, "execution", None)
+        if not threshold or amount < threshold or not hasattr(execution, "request_suspend"):
+            return False
+        resume_at = datetime.now(timezone.utc) + timedelta(seconds=amount)
+        if not execution.request_suspend(resume_at, self.node_data.name):
+            return False
+        logger.info(f"Wait node {self.node_data.name}: suspending execution until {resume_at.isoformat()}")
+        return True
\ No newline at end of file
@@ -640,7 +640,7 @@ async def get_execution_data(
         raise HTTPException(status_code=404, detail="No execution data available")
     
     try:
-        data = json.loads(execution.executionData.data) if execution.executionData.data else {}
+        data = await crud.ExecutionCRUD.load_execution_data(db, execution)
         workflow_data = execution.executionData.workflow_data or {}
         
         # Build formatted node outputs
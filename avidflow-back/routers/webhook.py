@@ -7,6 +7,8 @@ from database.crud import WorkflowCRUD, WebhookCRUD, ExecutionCRUD
 from datetime import datetime, timezone
 from typing import Dict, Any
 from models import WorkflowModel
+from config import settings
+from services.webhook_route_cache import webhook_route_cache
 
 router = APIRouter()
 
@@ -24,22 +26,25 @@ async def webhook_listener(
     request: Request,
     db: AsyncSession = Depends(get_db_from_app),
 ):
-    webhook = await WebhookCRUD.get_webhook_by_id(db, webhook_id)
-    if not webhook:
+    async def resolve_workflow_id():
+        webhook = await WebhookCRUD.get_webhook_by_id(db, webhook_id)
+        return webhook.workflow_id if webhook else None
+
+    async def load_workflow(workflow_id):
+        workflow = await WorkflowCRUD.get_workflow(db, workflow_id)
+        return workflow if workflow and workflow.active else None
+
+    # Validated workflow, trigger nodes and serialized payload, cached per
+    # webhook until the workflow is updated
+    route = await webhook_route_cache.get(webhook_id, resolve_workflow_id, load_workflow)
+    if route is None:
         raise HTTPException(status_code=404, detail="جای اشتباهی آمده اید!")
 
-    workflow = await WorkflowCRUD.get_workflow(db, webhook.workflow_id)
-
-    if not workflow or not workflow.active:
-        raise HTTPException(status_code=404, detail="جای اشتباهی آمده اید!")
-
-    workflow_data = WorkflowModel.model_validate(workflow)
-
-    node = next((n for n in workflow_data.nodes if n.type == node_type), None)
-    if not node or not node.is_webhook:
+    trigger = route.trigger(node_type)
+    if trigger is None:
         raise HTTPException(status_code=404, detail="جای اشتباهی آمده اید!")
 
-    http_method = node.parameters.model_dump(mode="json").get("httpMethod")
+    node, http_method = trigger
     if (not http_method or http_method != request.method.upper()) and node.type != "chat":
         raise HTTPException(status_code=404, detail="جای اشتباهی آمده اید!")
 
@@ -66,8 +71,8 @@ async def webhook_listener(
     execution_id = str(uuid.uuid4())
 
     task_arguments = {
-        "workflow_data": workflow_data.model_dump(),
-        "user_id": workflow.user_id,
+        **route.reference.task_arguments(),
+        "user_id": route.user_id,
         "primary_result": payload if node.type == "chat" else webhook_data,
         "execution_id": execution_id,
         "pub_sub": False,
@@ -75,11 +80,11 @@ async def webhook_listener(
 
     await ExecutionCRUD.create_execution(
         db=db,
-        workflow_id=workflow.id,
+        workflow_id=route.workflow_id,
         execution_id=execution_id,
         mode="trigger",
         status="pending",
-        workflow_data=workflow_data.model_dump(mode='json'),
+        workflow_data=route.payload,
         data={},
     )
 
@@ -87,13 +92,28 @@ async def webhook_listener(
     from tasks.workflow import execute_workflow
 
     if node.type == "chat":
-        task_result = execute_workflow.apply_async(
-            kwargs=task_arguments, task_id=execution_id
-        ).get()
+        # The response is built from the execution's result, so waits must run
+        # inline; the task publishes the result and this request awaits it
+        # without holding the event loop
+        message_handler = request.app.state.message_handler
+        await message_handler.register_execution_result_waiter(execution_id)
+        try:
+            execute_workflow.apply_async(
+                kwargs={**task_arguments, "allow_suspend": False, "publish_result": True},
+                task_id=execution_id,
+            )
+        except Exception:
+            message_handler.discard_execution_result_waiter(execution_id)
+            raise
+        task_result = await message_handler.wait_for_execution_result(
+            execution_id, timeout=settings.CHAT_WEBHOOK_TIMEOUT_SECONDS
+        )
+        if task_result is None:
+            raise HTTPException(status_code=504, detail="پاسخ چت در زمان مقرر آماده نشد")
         return (
             "خطا در پردازش درخواست چت"
             if task_result.get("error") or task_result.get("status", None) == "error"
-            else task_result.get("result").get("final_result")[0][0]['json_data']
+            else task_result.get("final_result")[0][0]['json_data']
         )
 
     task_result = execute_workflow.apply_async(
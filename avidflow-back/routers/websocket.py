@@ -6,6 +6,7 @@ from database.models import User
 from database.crud import WorkflowCRUD ,ExecutionCRUD
 from models.workflow import WorkflowModel
 from tasks.workflow import execute_workflow
+from utils.workflow_cache import WorkflowReference
 from services.redis_manager import RedisManager
 from auth.dependencies import get_current_user_websocket
 import logging
@@ -38,11 +39,10 @@ async def workflow_execution_websocket(
     
     # Get application state from websocket scope
     app = websocket.app
+    # Generate unique execution ID for this connection
+    execution_id = str(uuid.uuid4())
     
     try:
-        # Generate unique execution ID for this connection
-        execution_id = str(uuid.uuid4())
-
         workflow_db = await WorkflowCRUD.get_workflow(db, workflow_id)
         if not workflow_db:
             await websocket.send_json({"type": "error", "error": "Workflow not found"})
@@ -103,7 +103,7 @@ async def workflow_execution_websocket(
 
         # Start the workflow execution (Celery)
         task_arguments = {
-            "workflow_data": workflow_data,
+            **WorkflowReference.of(workflow_data).task_arguments(),
             "user_id": current_user.id,
             "primary_result": primary_result,
             "execution_id": execution_id,
@@ -134,5 +134,6 @@ async def workflow_execution_websocket(
             logger.info(f'WEB SOCKET CLOSED WITH EXCEPTION {str(e)}')
             pass
     finally:
+        # Timeouts, disconnects and errors skip the completion event's cleanup
+        app.state.message_handler.unregister_execution(workflow_id, execution_id)
         logger.info('WEB SOCKET CLOSED IN FINALLY')
-        pass
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
 from database import crud
 from services.scheduler import SchedulerService
+from services.webhook_route_cache import webhook_route_cache
 from models import ExecutionSummary
 from models.workflow import (
     WorkflowCreate,
@@ -15,6 +16,7 @@ from models.workflow import (
 from database.models import User
 from auth.dependencies import get_current_user
 from fastapi_pagination import Page, Params
+from utils.workflow_cache import WorkflowReference
 
 router = APIRouter()
 
@@ -87,6 +89,8 @@ async def update_workflow(
     workflow = await crud.WorkflowCRUD.update_workflow(
         db, workflow_id, workflow_update.model_dump(mode="json", exclude_unset=True)
     )
+    # Cached webhook routes hold the previous workflow (and active flag)
+    await webhook_route_cache.invalidate_workflow(workflow_id)
 
     if workflow:
         workflow_model = WorkflowModel.model_validate(workflow)
@@ -113,6 +117,7 @@ async def delete_workflow(
     result = await crud.WorkflowCRUD.delete_workflow(db, workflow_id)
     if not result:
         raise HTTPException(status_code=500, detail="Failed to delete workflow")
+    await webhook_route_cache.invalidate_workflow(workflow_id)
 
     workflow_model = WorkflowModel.model_validate(workflow)
     await SchedulerService.schedule_workflow(db, workflow_model, "delete")
@@ -134,6 +139,7 @@ async def activate_workflow(
 
     # Activate the workflow
     workflow = await crud.WorkflowCRUD.activate_workflow(db, workflow_id)
+    await webhook_route_cache.invalidate_workflow(workflow_id)
     if workflow:
         workflow_model = WorkflowModel.model_validate(workflow)
         await SchedulerService.schedule_workflow(db, workflow_model, "activate")
@@ -157,6 +163,7 @@ async def deactivate_workflow(
 
     # Deactivate the workflow
     workflow = await crud.WorkflowCRUD.deactivate_workflow(db, workflow_id)
+    await webhook_route_cache.invalidate_workflow(workflow_id)
     if workflow:
         workflow_model = WorkflowModel.model_validate(workflow)
         await SchedulerService.schedule_workflow(db, workflow_model, "deactivate")
@@ -270,7 +277,7 @@ async def execute_workflow(
     )
 
     task_arguments = {
-        "workflow_data": workflow_data,
+        **WorkflowReference.of(workflow_data).task_arguments(),
         "user_id": current_user.id,
         "primary_result": input_data,
         "execution_id": execution_id,
@@ -0,0 +1,120 @@
+"""
+Registry of which API worker owns a WebSocket connection or waiter.
+
+Each API worker (WorkflowMessageHandler) has an id and a coordination queue
+bound to the "websocket_direct" exchange under that id. When it registers a
+WebSocket execution, a chat result waiter or a test webhook waiter, it
+records route key -> worker id in Redis ("websocket_route:{route key}"). A
+worker that receives a message it cannot deliver locally looks the owner up
+and publishes to that worker only, instead of broadcasting on the fanout
+exchange, so each event is delivered at most twice whatever the number of API
+workers.
+
+Routes expire after WEBSOCKET_ROUTE_TTL_SECONDS unless the owning worker's
+heartbeat refreshes them, so routes of a worker that died (or of a
+connection it failed to clean up) do not accumulate.
+
+Route keys:
+- "{workflow_id}:{execution_id}": WebSocket execution updates
+- "execution_result:{execution_id}": chat webhook awaiting its result
+- "test_webhook:{token}": editor waiting for a test webhook payload
+
+A chat result the Celery task could not publish is stored under
+RESULT_FALLBACK_KEY instead, where the waiting worker polls for it.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ROUTE_PREFIX = "websocket_route:"
+RESULT_FALLBACK_KEY = "execution_result_fallback:{execution_id}"
+
+
+class ConnectionRegistry:
+    """Route key -> owning worker id in Redis (expiring keys), with a local owner cache."""
+
+    def __init__(self, redis, max_cached: int = 10_000, ttl_seconds: Optional[int] = None):
+        self.redis = redis
+        self.max_cached = max_cached
+        self.ttl_seconds = max(1, ttl_seconds or settings.WEBSOCKET_ROUTE_TTL_SECONDS)
+        # Owners of execution route keys never change, so found ones are cached
+        self._owners: "OrderedDict[str, str]" = OrderedDict()
+        self.lookups = 0
+        self.cache_hits = 0
+
+    async def register(self, route_key: str, worker_id: str) -> bool:
+        try:
+            await self.redis.set(ROUTE_PREFIX + route_key, worker_id, ex=self.ttl_seconds)
+            return True
+        except Exception as e:
+            logger.error(f"[ConnectionRegistry] Failed to register {route_key}: {e}")
+            return False
+
+    async def refresh(self, route_keys: Iterable[str]) -> None:
+        """Extend the lifetime of routes still held by the calling worker (heartbeat)."""
+        route_keys = list(route_keys)
+        if not route_keys:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for route_key in route_keys:
+                    pipe.expire(ROUTE_PREFIX + route_key, self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"[ConnectionRegistry] Failed to refresh {len(route_keys)} routes: {e}")
+
+    async def unregister(self, route_keys: Iterable[str], worker_id: str) -> None:
+        """Remove ``worker_id``'s routes (keys re-registered by another worker are kept)."""
+        route_keys = list(route_keys)
+        if not route_keys:
+            return
+        for route_key in route_keys:
+            self._owners.pop(route_key, None)
+        try:
+            owners = await self.redis.mget([ROUTE_PREFIX + key for key in route_keys])
+            owned = [
+                ROUTE_PREFIX + key for key, owner in zip(route_keys, owners)
+                if (owner.decode() if isinstance(owner, bytes) else owner) == worker_id
+            ]
+            if owned:
+                await self.redis.delete(*owned)
+        except Exception as e:
+            logger.error(f"[ConnectionRegistry] Failed to unregister {len(route_keys)} routes: {e}")
+
+    async def owner(self, route_key: str, cache: bool = True) -> Optional[str]:
+        """Worker id owning ``route_key``, or None if nobody registered it.
+
+        Only keys that keep their owner (execution ids) should be cached;
+        test webhook tokens are reused by later test runs on any worker.
+
+        Raises:
+            Exception: Redis is unreachable (callers fall back to broadcasting)
+        """
+        self.lookups += 1
+        owner = self._owners.get(route_key) if cache else None
+        if owner is not None:
+            self.cache_hits += 1
+            return owner
+        owner = await self.redis.get(ROUTE_PREFIX + route_key)
+        if owner is None:
+            return None
+        if isinstance(owner, bytes):
+            owner = owner.decode()
+        if not cache:
+            return owner
+        self._owners[route_key] = owner
+        while len(self._owners) > self.max_cached:
+            self._owners.popitem(last=False)
+        return owner
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "cache_hits": self.cache_hits,
+            "cached_owners": len(self._owners),
+        }
@@ -1,48 +1,382 @@
 import json
+import os
+import queue
+import threading
+import time
+import logging
 import pika
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
 import aio_pika
 from config import settings
 
+logger = logging.getLogger(__name__)
 
-class QueueService:
-    """Service for RabbitMQ messaging"""
-    
-    def __init__(self):
-        self.connection_params = pika.ConnectionParameters(
-            host=settings.RABBITMQ_HOST,
-            port=settings.RABBITMQ_PORT,
-            virtual_host=settings.RABBITMQ_VHOST,
-            credentials=pika.PlainCredentials(
-                username=settings.RABBITMQ_USER,
-                password=settings.RABBITMQ_PASSWORD
-            )
-        )
-        
-    def publish_sync(self, queue_name: str, message: Dict[str, Any]) -> bool:
-        """Publish message to queue (synchronous version)"""
+
+# Events after which nothing else is published for the execution; flushed
+# immediately in batching mode so the WebSocket client (or the chat webhook
+# awaiting execution_result) is never left waiting.
+TERMINAL_EVENTS = frozenset({"workflow_completed", "workflow_error", "node_error", "execution_result"})
+
+_RECONNECT_ERRORS = (
+    pika.exceptions.AMQPConnectionError,
+    pika.exceptions.AMQPChannelError,
+    pika.exceptions.StreamLostError,
+    ConnectionError,
+    OSError,
+)
+
+
+class _PooledChannel:
+    """A long-lived connection/channel pair plus the queues already declared on it."""
+
+    def __init__(self, connection: pika.BlockingConnection, confirms: bool):
+        self.connection = connection
+        self.channel = connection.channel()
+        if confirms:
+            self.channel.confirm_delivery()
+        self.declared: Set[str] = set()
+
+    @property
+    def is_open(self) -> bool:
+        return self.connection.is_open and self.channel.is_open
+
+    def close(self) -> None:
         try:
-            connection = pika.BlockingConnection(self.connection_params)
-            channel = connection.channel()
-            
-            # Declare queue (creates if doesn't exist)
-            channel.queue_declare(queue=queue_name, durable=True)
-            
-            # Publish message
+            if self.connection.is_open:
+                self.connection.close()
+        except Exception:
+            pass
+
+
+class SyncPublisherPool:
+    """
+    Per-worker pool of persistent pika channels for synchronous publishing.
+
+    - Each channel is used by one greenlet/thread at a time (pika's
+      BlockingConnection is not thread-safe). Under the Celery gevent pool the
+      threading/queue primitives are monkey-patched, so waiting for a free
+      channel yields instead of blocking the worker.
+    - Broken connections are dropped and reopened transparently (one retry).
+    - queue_declare runs once per queue per connection.
+    - Optional publisher confirms and an optional batching mode that
+      publishes bursts of messages on a single channel checkout per flush.
+    - Idle connections are kept alive: BlockingConnection only answers
+      heartbeats inside pika calls, so a background loop services them every
+      ``keepalive_interval`` seconds (0 disables it).
+    """
+
+    def __init__(
+        self,
+        connection_params: pika.ConnectionParameters,
+        size: int = 4,
+        confirms: bool = False,
+        batching: bool = False,
+        batch_size: int = 50,
+        batch_interval_ms: int = 20,
+        keepalive_interval: float = 0,
+    ):
+        self.connection_params = connection_params
+        self.size = max(1, size)
+        self.confirms = confirms
+        self.batching = batching
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = max(1, batch_interval_ms) / 1000.0
+        self.keepalive_interval = keepalive_interval
+
+        self._idle: "queue.LifoQueue[_PooledChannel]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "published": 0,
+            "failed": 0,
+            "connections_opened": 0,
+            "reconnects": 0,
+            "batches_flushed": 0,
+            "publish_time_ms_total": 0.0,
+            "publish_time_ms_max": 0.0,
+        }
+
+        # Batching state: ordered (queue_name, body, persistent) tuples
+        self._buffer: List[Tuple[str, bytes, bool]] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Guards the started flags so each background thread starts once
+        self._threads_lock = threading.Lock()
+        self._flusher_started = False
+        self._keepalive_started = False
+
+    # ── channel pool ──────────────────────────────────────────────────────
+
+    def _open_channel(self) -> _PooledChannel:
+        pooled = _PooledChannel(pika.BlockingConnection(self.connection_params), self.confirms)
+        self._incr("connections_opened")
+        return pooled
+
+    def _checkout(self) -> _PooledChannel:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open_channel()
+                if pooled.is_open:
+                    return pooled
+                pooled.close()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, pooled: Optional[_PooledChannel]) -> None:
+        if pooled is not None and pooled.is_open:
+            self._idle.put(pooled)
+            self._ensure_keepalive()
+        self._slots.release()
+
+    def keepalive_idle(self) -> None:
+        """Process pending I/O (heartbeats) on idle connections; drop dead ones."""
+        checked: List[_PooledChannel] = []
+        while self._slots.acquire(blocking=False):
+            try:
+                checked.append(self._idle.get_nowait())
+            except queue.Empty:
+                self._slots.release()
+                break
+        for pooled in checked:
+            try:
+                pooled.connection.process_data_events(time_limit=0)
+            except _RECONNECT_ERRORS as e:
+                logger.warning("[Queue] Idle publisher connection lost (%s)", e)
+                pooled.close()
+            self._checkin(pooled)
+
+    def _ensure_keepalive(self) -> None:
+        if self._keepalive_started or self.keepalive_interval <= 0:
+            return
+        with self._threads_lock:
+            if self._keepalive_started:
+                return
+            self._keepalive_started = True
+
+        def keepalive_loop() -> None:
+            while True:
+                time.sleep(self.keepalive_interval)
+                try:
+                    self.keepalive_idle()
+                except Exception as e:
+                    logger.error("[Queue] Publisher keepalive failed: %s", e)
+
+        threading.Thread(target=keepalive_loop, daemon=True, name="QueuePublishKeepalive").start()
+
+    def _send(
+        self,
+        pooled: _PooledChannel,
+        messages: List[Tuple[str, bytes, bool]],
+    ) -> None:
+        channel = pooled.channel
+        for queue_name, _, _ in messages:
+            if queue_name not in pooled.declared:
+                # Declare queue (creates if doesn't exist)
+                channel.queue_declare(queue=queue_name, durable=True)
+                pooled.declared.add(queue_name)
+
+        for queue_name, body, persistent in messages:
             channel.basic_publish(
-                exchange='',
+                exchange="",
                 routing_key=queue_name,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Make message persistent
-                )
+                body=body,
+                properties=_properties(persistent),
             )
-            
-            connection.close()
+
+    def publish_many(self, messages: List[Tuple[str, bytes, bool]]) -> bool:
+        """Publish messages in order on one pooled channel, reconnecting once on failure."""
+        if not messages:
             return True
+        started = time.perf_counter()
+        for attempt in (1, 2):
+            try:
+                pooled = self._checkout()
+            except _RECONNECT_ERRORS as e:
+                error = e
+            else:
+                try:
+                    self._send(pooled, messages)
+                    self._checkin(pooled)
+                    self._record_publish(len(messages), started)
+                    return True
+                except _RECONNECT_ERRORS as e:
+                    # A partial burst may be re-sent on retry (at-least-once)
+                    pooled.close()
+                    self._checkin(None)
+                    error = e
+                except Exception as e:
+                    # Confirm nacks/unroutable: the channel is still usable
+                    self._checkin(pooled)
+                    logger.error("[Queue] Error publishing to queue: %s", e)
+                    break
+            if attempt == 1:
+                self._incr("reconnects")
+                logger.warning("[Queue] Publisher connection lost (%s), reconnecting", error)
+                continue
+            logger.error("[Queue] Error publishing to queue: %s", error)
+        self._incr("failed", len(messages))
+        return False
+
+    # ── batching ──────────────────────────────────────────────────────────
+
+    def enqueue(self, queue_name: str, body: bytes, persistent: bool = True, flush: bool = False) -> bool:
+        """Buffer a message; flushes inline when the batch is full or ``flush`` is set."""
+        self._ensure_flusher()
+        with self._buffer_lock:
+            self._buffer.append((queue_name, body, persistent))
+            full = len(self._buffer) >= self.batch_size
+        if flush or full:
+            return self.flush()
+        return True
+
+    def flush(self) -> bool:
+        """Publish everything buffered so far, preserving order."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                pending, self._buffer = self._buffer, []
+            if not pending:
+                return True
+            self._incr("batches_flushed")
+            return self.publish_many(pending)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher_started:
+            return
+        with self._threads_lock:
+            if self._flusher_started:
+                return
+            self._flusher_started = True
+
+        def flush_loop() -> None:
+            while True:
+                time.sleep(self.batch_interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error("[Queue] Background flush failed: %s", e)
+
+        threading.Thread(target=flush_loop, daemon=True, name="QueuePublishFlusher").start()
+
+    # ── metrics ───────────────────────────────────────────────────────────
+
+    def _incr(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _record_publish(self, count: int, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["published"] += count
+            self._stats["publish_time_ms_total"] += elapsed_ms
+            self._stats["publish_time_ms_max"] = max(self._stats["publish_time_ms_max"], elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        calls = stats["published"] or 1
+        stats["publish_time_ms_avg"] = round(stats["publish_time_ms_total"] / calls, 3)
+        stats["idle_channels"] = self._idle.qsize()
+        with self._buffer_lock:
+            stats["buffered"] = len(self._buffer)
+        return stats
+
+    def close(self) -> None:
+        if self.batching:
+            self.flush()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def _properties(persistent: bool) -> pika.BasicProperties:
+    return pika.BasicProperties(delivery_mode=2 if persistent else 1)
+
+
+_publisher_pools: Dict[int, SyncPublisherPool] = {}
+_publisher_pools_lock = threading.Lock()
+
+
+def get_sync_publisher() -> SyncPublisherPool:
+    """Return this worker process's publisher pool (re-created after fork)."""
+    pid = os.getpid()
+    pool = _publisher_pools.get(pid)
+    if pool is None:
+        with _publisher_pools_lock:
+            pool = _publisher_pools.get(pid)
+            if pool is None:
+                _publisher_pools.clear()  # drop pools inherited from the parent
+                pool = SyncPublisherPool(
+                    _connection_params(),
+                    size=settings.RABBITMQ_PUBLISHER_POOL_SIZE,
+                    confirms=settings.RABBITMQ_PUBLISHER_CONFIRMS,
+                    batching=settings.RABBITMQ_PUBLISH_BATCHING,
+                    batch_size=settings.RABBITMQ_PUBLISH_BATCH_SIZE,
+                    batch_interval_ms=settings.RABBITMQ_PUBLISH_BATCH_INTERVAL_MS,
+                    keepalive_interval=settings.RABBITMQ_HEARTBEAT / 2,
+                )
+                _publisher_pools[pid] = pool
+    return pool
+
+
+def _connection_params() -> pika.ConnectionParameters:
+    return pika.ConnectionParameters(
+        host=settings.RABBITMQ_HOST,
+        port=settings.RABBITMQ_PORT,
+        virtual_host=settings.RABBITMQ_VHOST,
+        credentials=pika.PlainCredentials(
+            username=settings.RABBITMQ_USER,
+            password=settings.RABBITMQ_PASSWORD
+        ),
+        heartbeat=settings.RABBITMQ_HEARTBEAT,
+    )
+
+
+class QueueService:
+    """Service for RabbitMQ messaging"""
+    
+    def __init__(self, publisher: Optional[SyncPublisherPool] = None):
+        self.connection_params = _connection_params()
+        self._publisher = publisher
+
+    @property
+    def publisher(self) -> SyncPublisherPool:
+        return self._publisher or get_sync_publisher()
+        
+    def publish_sync(self, queue_name: str, message: Dict[str, Any], persistent: bool = True) -> bool:
+        """
+        Publish message to queue (synchronous version).
+
+        Uses the worker's persistent channel pool instead of a connection per
+        message. In batching mode the message is buffered and flushed with the
+        rest of the burst; terminal workflow events flush immediately.
+        """
+        try:
+            body = json.dumps(message).encode()
         except Exception as e:
-            print(f"Error publishing to queue: {str(e)}")
+            logger.error("[Queue] Error serializing message for %s: %s", queue_name, e)
             return False
+
+        publisher = self.publisher
+        if publisher.batching:
+            return publisher.enqueue(
+                queue_name, body, persistent, flush=message.get("event") in TERMINAL_EVENTS
+            )
+        return publisher.publish_many([(queue_name, body, persistent)])
+
+    def flush(self) -> bool:
+        """Flush any batched messages (no-op when batching is disabled)."""
+        return self.publisher.flush()
+
+    def get_publisher_stats(self) -> Dict[str, Any]:
+        """Publish counters for this worker: latency, reconnects, failures, batches."""
+        return self.publisher.stats()
     
     async def publish(self, queue_name: str, message: Dict[str, Any]) -> bool:
         """Publish message to queue (async version)"""
@@ -0,0 +1,138 @@
+"""
+Deferred resumes of durable Wait executions.
+
+Celery holds an eta task as an unacknowledged RabbitMQ message until it is
+due, and RabbitMQ requeues messages held longer than its consumer_timeout
+(30 minutes by default). Resumes further away than
+DURABLE_WAIT_MAX_ETA_SECONDS are therefore recorded in Redis instead: the
+execution id in the sorted set RESUMES_KEY, scored by its resume time, and the
+execute_workflow arguments in the hash RESUME_TASKS_KEY. Every API worker
+polls the set and claims a due resume by moving its score
+DURABLE_WAIT_RESUME_LEASE_SECONDS ahead (a WATCHed transaction, so only one
+worker wins). The entry is removed only after the task (without eta) has been
+enqueued; a worker that fails or dies in between leaves it to be claimed again
+once the lease expires.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+RESUMES_KEY = "durable_wait_resumes"
+RESUME_TASKS_KEY = "durable_wait_resume_tasks"
+
+_sync_redis = None
+_sync_redis_lock = threading.Lock()
+
+
+def get_sync_redis():
+    """Redis client for Celery workers, or None when REDIS_URL is not configured."""
+    global _sync_redis
+    if _sync_redis is None and settings.REDIS_URL:
+        with _sync_redis_lock:
+            if _sync_redis is None:
+                from redis import Redis
+                _sync_redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _sync_redis
+
+
+def defer_resume(redis, execution_id: str, task_kwargs: Dict[str, Any], resume_at: datetime) -> None:
+    """Record a resume for the scheduler (synchronous, called from Celery tasks)."""
+    pipe = redis.pipeline()
+    pipe.hset(RESUME_TASKS_KEY, execution_id, json.dumps(task_kwargs))
+    pipe.zadd(RESUMES_KEY, {execution_id: resume_at.timestamp()})
+    pipe.execute()
+
+
+class ResumeScheduler:
+    """Enqueues deferred resumes once they are due (runs in each API worker)."""
+
+    def __init__(self, poll_seconds: Optional[float] = None, batch_size: int = 100):
+        self.poll_seconds = settings.DURABLE_WAIT_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.batch_size = batch_size
+        self.lease_seconds = settings.DURABLE_WAIT_RESUME_LEASE_SECONDS
+        self.redis = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+
+    async def start(self, redis) -> None:
+        if redis is None or self._task is not None:
+            return
+        self.redis = redis
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[ResumeScheduler] Poll failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    async def poll_once(self) -> int:
+        """Enqueue due resumes claimed by this worker; returns how many."""
+        from tasks.workflow import execute_workflow
+
+        now = time.time()
+        due = await self.redis.zrangebyscore(RESUMES_KEY, "-inf", now, start=0, num=self.batch_size)
+        enqueued = 0
+        for execution_id in due:
+            if not await self._claim(execution_id, now):
+                continue  # claimed by another API worker
+            try:
+                task_kwargs = await self.redis.hget(RESUME_TASKS_KEY, execution_id)
+                if task_kwargs is None:
+                    logger.error(f"[ResumeScheduler] No task arguments for execution {execution_id}")
+                    continue
+                execute_workflow.apply_async(kwargs=json.loads(task_kwargs))
+            except Exception as e:
+                logger.error(f"[ResumeScheduler] Enqueue failed for execution {execution_id}: {e}")
+                continue
+            pipe = self.redis.pipeline()
+            pipe.zrem(RESUMES_KEY, execution_id)
+            pipe.hdel(RESUME_TASKS_KEY, execution_id)
+            await pipe.execute()
+            enqueued += 1
+        self.enqueued += enqueued
+        return enqueued
+
+    async def _claim(self, execution_id: str, now: float) -> bool:
+        """Lease a due resume to this worker by pushing its score past the lease."""
+        from redis.exceptions import WatchError
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(RESUMES_KEY)
+                score = await pipe.zscore(RESUMES_KEY, execution_id)
+                if score is None or score > now:
+                    await pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.zadd(RESUMES_KEY, {execution_id: now + self.lease_seconds})
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.redis = None
+
+
+resume_scheduler = ResumeScheduler()
@@ -0,0 +1,299 @@
+"""
+Hot route cache for production webhooks (/webhook/{webhook_id}/{node_type}).
+
+A WebhookRoute holds everything the listener derives from the database for a
+webhook id: the validated WorkflowModel, the webhook trigger node of each node
+type with its configured HTTP method, the workflow serialized once to JSON
+(the execution row's snapshot) and its WorkflowReference (the Celery task
+arguments).
+
+Two tiers:
+- In-process LRU per API worker (WEBHOOK_ROUTE_CACHE_MAX_ENTRIES), so a hot
+  webhook costs no database query, validation or serialization.
+- Redis, shared by all workers: the serialized route under
+  "webhook_route:{webhook_id}", tagged with the workflow's route version.
+
+The workflow router (update, delete, activate, deactivate) and the admin
+WorkflowView call invalidate_workflow() after a workflow changes; it drops
+local routes, bumps the version key
+"webhook_route_version:{workflow_id}" (older Redis entries no longer match)
+and publishes the workflow id on WEBHOOK_ROUTE_CHANNEL so every worker drops
+its routes too. WEBHOOK_ROUTE_CACHE_TTL_SECONDS bounds staleness if a message
+is missed. Without Redis the cache is per worker only, and other workers see
+an update once their routes expire.
+
+Cached routes are shared between requests and must be treated as read-only.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from config import settings
+from models import Node, WorkflowModel
+from utils.workflow_cache import WorkflowReference
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_ROUTE_PREFIX = "webhook_route:"
+WEBHOOK_ROUTE_VERSION_PREFIX = "webhook_route_version:"
+WEBHOOK_ROUTE_CHANNEL = "webhook_route_invalidations"
+
+
+class WebhookRoute:
+    """Resolved webhook: workflow, trigger nodes and pre-serialized payload."""
+
+    __slots__ = ("webhook_id", "workflow_id", "user_id", "workflow", "payload", "reference",
+                 "triggers", "version")
+
+    def __init__(self, webhook_id: str, user_id: str, workflow: WorkflowModel,
+                 payload: Dict[str, Any], version: int = 0):
+        self.webhook_id = webhook_id
+        self.workflow_id = workflow.id
+        self.user_id = user_id
+        self.workflow = workflow
+        self.payload = payload
+        self.reference = WorkflowReference.of(payload)
+        self.version = version
+        # node_type -> (node, httpMethod) for the first node of each type, as
+        # the listener matches it; only webhook nodes can be triggered
+        self.triggers: Dict[str, Tuple[Node, Optional[str]]] = {}
+        seen = set()
+        for node in workflow.nodes:
+            if node.type in seen:
+                continue
+            seen.add(node.type)
+            if node.is_webhook:
+                http_method = node.parameters.model_dump(mode="json").get("httpMethod")
+                self.triggers[node.type] = (node, http_method)
+
+    @classmethod
+    def from_workflow(cls, webhook_id: str, workflow: Any, version: int = 0) -> "WebhookRoute":
+        """Build a route from a Workflow row (or anything WorkflowModel validates)."""
+        workflow_data = WorkflowModel.model_validate(workflow)
+        return cls(webhook_id, workflow.user_id, workflow_data,
+                   workflow_data.model_dump(mode="json"), version)
+
+    def trigger(self, node_type: str) -> Optional[Tuple[Node, Optional[str]]]:
+        return self.triggers.get(node_type)
+
+    def dumps(self) -> str:
+        return json.dumps({
+            "user_id": self.user_id,
+            "version": self.version,
+            "workflow": self.payload,
+        })
+
+    @classmethod
+    def from_dict(cls, webhook_id: str, data: Dict[str, Any]) -> "WebhookRoute":
+        workflow_data = WorkflowModel.model_validate(data["workflow"])
+        return cls(webhook_id, data["user_id"], workflow_data, data["workflow"], data["version"])
+
+
+WorkflowIdResolver = Callable[[], Awaitable[Optional[str]]]
+WorkflowLoader = Callable[[str], Awaitable[Optional[Any]]]
+
+
+class WebhookRouteCache:
+    """In-process LRU of WebhookRoutes backed by Redis, invalidated per workflow."""
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 300, redis=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # webhook_id -> (expires_at, route)
+        # Bumped by every invalidation; a load that started before one is not stored
+        self._generation = 0
+        self._listener: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    async def get(self, webhook_id: str, resolve: WorkflowIdResolver,
+                  load: WorkflowLoader) -> Optional[WebhookRoute]:
+        """
+        Route for ``webhook_id``, loading it on a miss.
+
+        ``resolve`` returns the webhook's workflow id (None if the webhook does
+        not exist); ``load`` returns that Workflow row, or None when it is
+        missing or inactive. Unroutable webhooks are not cached.
+        """
+        if not self.enabled:
+            return await self._load(webhook_id, resolve, load)
+
+        entry = self._entries.get(webhook_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(webhook_id)
+                self.hits += 1
+                return entry[1]
+            del self._entries[webhook_id]
+
+        generation = self._generation
+        route = await self._get_shared(webhook_id)
+        if route is not None:
+            self.redis_hits += 1
+        else:
+            self.misses += 1
+            route = await self._load(webhook_id, resolve, load)
+            if route is None:
+                return None
+            if generation == self._generation:
+                await self._set_shared(route)
+
+        if generation == self._generation:
+            self._store(route)
+        return route
+
+    async def _load(self, webhook_id: str, resolve: WorkflowIdResolver,
+                    load: WorkflowLoader) -> Optional[WebhookRoute]:
+        workflow_id = await resolve()
+        if not workflow_id:
+            return None
+        # Read the version before the workflow: an update committed after this
+        # read bumps it, so the route built below is rejected from Redis
+        version = await self._current_version(workflow_id)
+        workflow = await load(workflow_id)
+        if not workflow:
+            return None
+        return WebhookRoute.from_workflow(webhook_id, workflow, version)
+
+    def _store(self, route: WebhookRoute) -> None:
+        self._entries[route.webhook_id] = (time.monotonic() + self.ttl_seconds, route)
+        self._entries.move_to_end(route.webhook_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_shared(self, webhook_id: str) -> Optional[WebhookRoute]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(f"{WEBHOOK_ROUTE_PREFIX}{webhook_id}")
+            if raw is None:
+                return None
+            data = json.loads(raw)
+            # Check the version before paying for validation
+            if await self._current_version(data["workflow"]["id"]) != data["version"]:
+                return None
+            return WebhookRoute.from_dict(webhook_id, data)
+        except Exception as e:
+            logger.warning(f"[WebhookRouteCache] Failed to read route {webhook_id}: {e}")
+            return None
+
+    async def _current_version(self, workflow_id: str) -> int:
+        if self.redis is None:
+            return 0
+        try:
+            return int(await self.redis.get(f"{WEBHOOK_ROUTE_VERSION_PREFIX}{workflow_id}") or 0)
+        except Exception as e:
+            logger.warning(f"[WebhookRouteCache] Failed to read route version of {workflow_id}: {e}")
+            return 0
+
+    async def _set_shared(self, route: WebhookRoute) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.setex(
+                f"{WEBHOOK_ROUTE_PREFIX}{route.webhook_id}", int(self.ttl_seconds), route.dumps()
+            )
+        except Exception as e:
+            logger.warning(f"[WebhookRouteCache] Failed to store route {route.webhook_id}: {e}")
+
+    def drop_workflow(self, workflow_id: str) -> int:
+        """Drop this worker's routes of ``workflow_id``; returns how many."""
+        self._generation += 1
+        stale = [key for key, (_, route) in self._entries.items() if route.workflow_id == workflow_id]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    async def invalidate_workflow(self, workflow_id: str) -> None:
+        """Forget the routes of ``workflow_id`` on every worker (after it changed)."""
+        self.invalidations += 1
+        self.drop_workflow(workflow_id)
+        if self.redis is None:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.incr(f"{WEBHOOK_ROUTE_VERSION_PREFIX}{workflow_id}")
+                pipe.publish(WEBHOOK_ROUTE_CHANNEL, workflow_id)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"[WebhookRouteCache] Failed to publish invalidation of {workflow_id}: {e}")
+
+    async def start(self, redis) -> None:
+        """Use ``redis`` as the shared tier and listen for other workers' invalidations."""
+        if redis is None or self._listener is not None:
+            return
+        try:
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(WEBHOOK_ROUTE_CHANNEL)
+        except Exception as e:
+            # Without invalidation messages routes could go stale: stay local-only
+            logger.error(f"[WebhookRouteCache] Failed to subscribe to invalidations: {e}")
+            return
+        self.redis = redis
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            while True:
+                try:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Invalidations may have been missed while disconnected
+                    logger.error(f"[WebhookRouteCache] Invalidation listener error: {e}")
+                    self.clear()
+                    await asyncio.sleep(1)
+                    continue
+                if message and message.get("type") == "message":
+                    workflow_id = message["data"]
+                    if isinstance(workflow_id, bytes):
+                        workflow_id = workflow_id.decode()
+                    self.drop_workflow(workflow_id)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self.redis = None
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+webhook_route_cache = WebhookRouteCache(
+    max_entries=settings.WEBHOOK_ROUTE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.WEBHOOK_ROUTE_CACHE_TTL_SECONDS,
+)
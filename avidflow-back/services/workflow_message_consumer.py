@@ -2,7 +2,7 @@ import json
 from typing import Dict, Any
 import aio_pika
 from config import settings
-from services.workflow_message_handler import WorkflowMessageHandler
+from services.workflow_message_handler import WEBSOCKET_DIRECT_EXCHANGE, WorkflowMessageHandler
 
 class WorkflowMessageConsumer:
     """Consumes workflow messages from RabbitMQ"""
@@ -55,6 +55,15 @@ class WorkflowMessageConsumer:
         
         # Bind to the fanout exchange
         await websocket_queue.bind(websocket_exchange)
+
+        # And to the direct exchange under this worker's id, for messages
+        # routed here through the connection registry
+        direct_exchange = await channel.declare_exchange(
+            WEBSOCKET_DIRECT_EXCHANGE,
+            aio_pika.ExchangeType.DIRECT,
+            durable=True
+        )
+        await websocket_queue.bind(direct_exchange, routing_key=self.message_handler.worker_id)
         
         # Start consuming coordination messages
         await websocket_queue.consume(self._process_websocket_coordination_message)
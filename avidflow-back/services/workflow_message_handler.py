@@ -1,12 +1,30 @@
 import asyncio
 import json
-from typing import Dict, Any
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Optional
 import aio_pika
 from fastapi import WebSocket
 from config import settings
+from services.connection_registry import RESULT_FALLBACK_KEY, ConnectionRegistry
+
+logger = logging.getLogger(__name__)
+
+# Direct exchange with one binding per API worker (routing key = worker_id)
+WEBSOCKET_DIRECT_EXCHANGE = "websocket_direct"
+
 
 class WorkflowMessageHandler:
-    """Handles messages from RabbitMQ and forwards them to appropriate WebSocket connections"""
+    """Handles messages from RabbitMQ and forwards them to appropriate WebSocket connections
+
+    Messages for connections or waiters held by another API worker are routed
+    to that worker only, through the ConnectionRegistry and the direct
+    exchange. Without a registry (no Redis) they are broadcast on the
+    "websocket_messages" fanout exchange to every worker. So are messages for
+    a route whose registration failed: its worker announces the route on the
+    fanout exchange and the others broadcast its messages until the route TTL.
+    """
     
     def __init__(self):
         self.local_websocket_connections = {}  # Only local connections for this worker
@@ -14,9 +32,22 @@ class WorkflowMessageHandler:
         self.connection = None
         self.channel = None
         self.websocket_exchange = None
+        self.direct_exchange = None
+
+        self.worker_id = uuid.uuid4().hex
+        self.registry: Optional[ConnectionRegistry] = None
+        self._registered_routes: set[str] = set()
+        # Routes other workers failed to register -> broadcast deadline (loop time)
+        self._fanout_routes: "OrderedDict[str, float]" = OrderedDict()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._background_tasks: set[asyncio.Task] = set()
+        self.routing_stats = {"direct": 0, "broadcast": 0, "dropped": 0}
 
         # token -> {"event": asyncio.Event, "data": Dict[str, Any] | None, "connection_key": str}
         self.test_webhook_waiters: dict[str, dict] = {}
+
+        # execution_id -> {"event": asyncio.Event, "data": Dict[str, Any] | None}
+        self.execution_result_waiters: dict[str, dict] = {}
     
     async def initialize_rabbitmq(self):
         """Initialize RabbitMQ connection for WebSocket coordination"""
@@ -35,31 +66,131 @@ class WorkflowMessageHandler:
             aio_pika.ExchangeType.FANOUT,
             durable=True
         )
+
+        # Direct exchange for messages routed to the worker that owns the connection
+        self.direct_exchange = await self.channel.declare_exchange(
+            WEBSOCKET_DIRECT_EXCHANGE,
+            aio_pika.ExchangeType.DIRECT,
+            durable=True
+        )
+
+    def attach_registry(self, redis) -> None:
+        """Route forwarded messages through the Redis connection registry (call from the event loop)."""
+        self.registry = ConnectionRegistry(redis) if redis is not None else None
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self.registry is not None:
+            self._heartbeat = asyncio.get_running_loop().create_task(self._refresh_routes())
+
+    async def _refresh_routes(self) -> None:
+        """Keep this worker's routes alive; they expire after the TTL once it stops."""
+        while True:
+            await asyncio.sleep(self.registry.ttl_seconds / 3)
+            await self.registry.refresh(self._registered_routes)
+
+    async def _register_route(self, route_key: str) -> None:
+        if self.registry is None:
+            return
+        if await self.registry.register(route_key, self.worker_id):
+            self._registered_routes.add(route_key)
+            return
+        # Other workers would find no owner and drop the route's messages
+        await self._publish_fanout({"type": "route_fanout", "route_key": route_key})
+
+    def _is_fanout_route(self, route_key: str) -> bool:
+        deadline = self._fanout_routes.get(route_key)
+        if deadline is None:
+            return False
+        if deadline > asyncio.get_running_loop().time():
+            return True
+        del self._fanout_routes[route_key]
+        return False
+
+    def _release_route(self, route_key: str) -> None:
+        """Unregister a route in the background (callers may be synchronous)."""
+        if route_key not in self._registered_routes:
+            return
+        self._registered_routes.discard(route_key)
+        task = asyncio.get_running_loop().create_task(
+            self.registry.unregister([route_key], self.worker_id)
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _forward(self, route_key: str, payload: Dict[str, Any], cache_owner: bool = True) -> None:
+        """Send a coordination message to the worker owning ``route_key``."""
+        body = json.dumps(payload).encode()
+        if (
+            self.registry is not None
+            and self.direct_exchange is not None
+            and not self._is_fanout_route(route_key)
+        ):
+            try:
+                owner = await self.registry.owner(route_key, cache=cache_owner)
+            except Exception as e:
+                logger.warning(f"[WorkflowMessageHandler] Registry lookup failed, broadcasting: {e}")
+            else:
+                if owner is None or owner == self.worker_id:
+                    # No worker holds a connection or waiter for it (anymore)
+                    self.routing_stats["dropped"] += 1
+                    return
+                await self.direct_exchange.publish(
+                    aio_pika.Message(body=body, delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT),
+                    routing_key=owner
+                )
+                self.routing_stats["direct"] += 1
+                return
+
+        if await self._publish_fanout(payload, body):
+            self.routing_stats["broadcast"] += 1
+
+    async def _publish_fanout(self, payload: Dict[str, Any], body: Optional[bytes] = None) -> bool:
+        """Publish a coordination message to every API worker."""
+        if not self.websocket_exchange:
+            return False
+        try:
+            await self.websocket_exchange.publish(
+                aio_pika.Message(
+                    body=body or json.dumps(payload).encode(),
+                    delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT,
+                ),
+                routing_key=""
+            )
+            return True
+        except Exception as e:
+            logger.error(f"[WorkflowMessageHandler] Fanout publish failed: {e}")
+            return False
     
     async def register_execution(self, workflow_id: str, execution_id: str, websocket: WebSocket) -> None:
-        """Register a new execution websocket locally and notify other workers"""
+        """Register a new execution websocket locally and in the connection registry"""
         connection_key = f"{workflow_id}:{execution_id}"
         
         # Store locally
         self.local_websocket_connections[connection_key] = websocket
         self.execution_complete_events[connection_key] = asyncio.Event()
         
-        # Notify other workers about this registration via RabbitMQ
-        if self.websocket_exchange:
-            registration_message = {
-                "type": "websocket_registered",
-                "workflow_id": workflow_id,
-                "execution_id": execution_id,
-                "worker_id": id(self)  # Use object id as worker identifier
-            }
-            
-            await self.websocket_exchange.publish(
-                aio_pika.Message(
-                    body=json.dumps(registration_message).encode(),
-                    delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT
-                ),
-                routing_key=""
-            )
+        # Other workers receiving this execution's updates route them here
+        await self._register_route(connection_key)
+
+    def unregister_execution(self, workflow_id: str, execution_id: str) -> None:
+        """Drop an execution's websocket and route (idempotent; the socket may already be gone)."""
+        self._cleanup_connection(f"{workflow_id}:{execution_id}")
+    
+    @staticmethod
+    def _websocket_payload(message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Frame sent to the client for a workflow_updates message.
+        
+        Coalesced agent events (utils/agent_events.py) arrive as one
+        "agent_event_batch" envelope; they go out as a single
+        "workflow_update_batch" frame whose data is the list of the envelopes
+        a "workflow_update" frame would otherwise have carried one by one.
+        """
+        event = message.get("event")
+        if isinstance(event, dict) and event.get("type") == "agent_event_batch":
+            return {"type": "workflow_update_batch", "data": event.get("events", [])}
+        return {"type": "workflow_update", "data": message}
     
     async def handle_message(self, message: Dict[str, Any]) -> None:
         """Process messages from RabbitMQ and send to appropriate websocket"""
@@ -70,6 +201,10 @@ class WorkflowMessageHandler:
         if not workflow_id or not execution_id:
             return
         
+        if event == "execution_result":
+            await self.receive_execution_result(execution_id, message.get("result"))
+            return
+        
         connection_key = f"{workflow_id}:{execution_id}"
         
         # Check if we have this WebSocket connection locally
@@ -78,10 +213,7 @@ class WorkflowMessageHandler:
         if websocket:
             try:
                 # Send message to the local WebSocket
-                await websocket.send_json({
-                    "type": "workflow_update",
-                    "data": message
-                })
+                await websocket.send_json(self._websocket_payload(message))
                 
                 # If this is a completion or error event, signal completion and close
                 if event in ["workflow_completed", "workflow_error", "node_error"]:
@@ -98,18 +230,11 @@ class WorkflowMessageHandler:
                 # Connection might be already closed
                 self._cleanup_connection(connection_key)
         else:
-            # Forward to other workers via RabbitMQ fanout exchange
-            if self.websocket_exchange:
-                await self.websocket_exchange.publish(
-                    aio_pika.Message(
-                        body=json.dumps({
-                            "type": "workflow_message_forward",
-                            "message": message
-                        }).encode(),
-                        delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT
-                    ),
-                    routing_key=""
-                )
+            # Forward to the worker holding the connection
+            await self._forward(connection_key, {
+                "type": "workflow_message_forward",
+                "message": message
+            })
     
     async def register_test_webhook_waiter(self, connection_key: str, token: str) -> None:
         """Register a waiter for a test webhook payload identified by token."""
@@ -118,6 +243,7 @@ class WorkflowMessageHandler:
             "data": None,
             "connection_key": connection_key,
         }
+        await self._register_route(f"test_webhook:{token}")
 
     async def wait_for_test_webhook(self, token: str, timeout: float = 120.0) -> dict | None:
         """Wait for test webhook payload or timeout."""
@@ -132,6 +258,7 @@ class WorkflowMessageHandler:
         finally:
             # cleanup regardless of outcome
             self.test_webhook_waiters.pop(token, None)
+            self._release_route(f"test_webhook:{token}")
 
     async def receive_test_webhook_payload(self, token: str, payload: dict) -> None:
         """Receive payload locally or forward to any worker that registered the token."""
@@ -140,23 +267,98 @@ class WorkflowMessageHandler:
             waiter["data"] = payload
             waiter["event"].set()
             return
-        # Forward to all workers; the correct worker will deliver to its local waiter
-        if self.websocket_exchange:
-            await self.websocket_exchange.publish(
-                aio_pika.Message(
-                    body=json.dumps({
-                        "type": "webhook_test_payload",
-                        "token": token,
-                        "payload": payload
-                    }).encode(),
-                    delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT
-                ),
-                routing_key=""
-            )
+        # Forward to the worker that registered the token
+        await self._forward(f"test_webhook:{token}", {
+            "type": "webhook_test_payload",
+            "token": token,
+            "payload": payload
+        }, cache_owner=False)
+
+    async def register_execution_result_waiter(self, execution_id: str) -> None:
+        """Register a waiter for an execution's final result (before the task is enqueued)."""
+        self.execution_result_waiters[execution_id] = {
+            "event": asyncio.Event(),
+            "data": None,
+        }
+        await self._register_route(f"execution_result:{execution_id}")
+
+    async def wait_for_execution_result(
+        self, execution_id: str, timeout: float = 300.0, poll_seconds: Optional[float] = None
+    ) -> dict | None:
+        """Wait for the result published by the execution's task, or None on timeout.
+
+        Every ``poll_seconds`` the Redis fallback key is checked too, so a result
+        the task stored there (because publishing failed) ends the wait early.
+        """
+        waiter = self.execution_result_waiters.get(execution_id)
+        if not waiter:
+            return None
+        if poll_seconds is None:
+            poll_seconds = settings.CHAT_WEBHOOK_RESULT_POLL_SECONDS
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(waiter["event"].wait(), timeout=min(poll_seconds, remaining))
+                    return waiter["data"]
+                except asyncio.TimeoutError:
+                    pass
+                result = await self._fallback_result(execution_id)
+                if result is not None:
+                    return result
+        finally:
+            self.execution_result_waiters.pop(execution_id, None)
+            self._release_route(f"execution_result:{execution_id}")
+
+    async def _fallback_result(self, execution_id: str) -> dict | None:
+        """Result stored in Redis by a task that could not publish it, if any."""
+        if self.registry is None:
+            return None
+        key = RESULT_FALLBACK_KEY.format(execution_id=execution_id)
+        try:
+            raw = await self.registry.redis.get(key)
+            if raw is None:
+                return None
+            await self.registry.redis.delete(key)
+            return json.loads(raw)
+        except Exception as e:
+            logger.warning(f"[WorkflowMessageHandler] Fallback result lookup failed for {execution_id}: {e}")
+            return None
+
+    def discard_execution_result_waiter(self, execution_id: str) -> None:
+        """Drop a waiter whose execution could not be started."""
+        self.execution_result_waiters.pop(execution_id, None)
+        self._release_route(f"execution_result:{execution_id}")
+
+    async def receive_execution_result(self, execution_id: str, result: dict) -> None:
+        """Deliver a result to the local waiter or forward it to the worker that has one."""
+        waiter = self.execution_result_waiters.get(execution_id)
+        if waiter:
+            waiter["data"] = result
+            waiter["event"].set()
+            return
+        await self._forward(f"execution_result:{execution_id}", {
+            "type": "execution_result",
+            "execution_id": execution_id,
+            "result": result
+        }, cache_owner=False)
 
     async def handle_websocket_coordination_message(self, data: Dict[str, Any]) -> None:
         """Handle coordination messages between workers"""
         message_type = data.get("type")
+
+        if message_type == "route_fanout":
+            route_key = data.get("route_key")
+            if route_key and self.registry is not None:
+                ttl = self.registry.ttl_seconds
+                self._fanout_routes[route_key] = asyncio.get_running_loop().time() + ttl
+                self._fanout_routes.move_to_end(route_key)
+                while len(self._fanout_routes) > self.registry.max_cached:
+                    self._fanout_routes.popitem(last=False)
+            return
         
         if message_type == "workflow_message_forward":
             # This is a forwarded workflow message, try to handle it locally
@@ -176,6 +378,14 @@ class WorkflowMessageHandler:
                 waiter["data"] = payload
                 waiter["event"].set()
             return
+
+        # Deliver an execution result to local waiter if present
+        if message_type == "execution_result":
+            waiter = self.execution_result_waiters.get(data.get("execution_id"))
+            if waiter:
+                waiter["data"] = data.get("result")
+                waiter["event"].set()
+            return
     
     async def _handle_forwarded_message(self, message: Dict[str, Any]) -> None:
         """Handle a message forwarded from another worker"""
@@ -191,10 +401,7 @@ class WorkflowMessageHandler:
         
         if websocket:
             try:
-                await websocket.send_json({
-                    "type": "workflow_update",
-                    "data": message
-                })
+                await websocket.send_json(self._websocket_payload(message))
                 
                 if event in ["workflow_completed", "workflow_error"]:
                     if connection_key in self.execution_complete_events:
@@ -213,8 +420,17 @@ class WorkflowMessageHandler:
             del self.local_websocket_connections[connection_key]
         if connection_key in self.execution_complete_events:
             del self.execution_complete_events[connection_key]
+        self._release_route(connection_key)
     
     async def close(self):
-        """Close RabbitMQ connections"""
+        """Unregister remaining routes and close RabbitMQ connections"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self.registry is not None and self._registered_routes:
+            await self.registry.unregister(self._registered_routes, self.worker_id)
+            self._registered_routes.clear()
         if self.connection:
             await self.connection.close()
\ No newline at end of file
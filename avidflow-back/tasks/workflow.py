@@ -1,18 +1,27 @@
 import uuid
+import json
 from celery_app import celery_app
 from typing import Dict, Any, Optional
 from functools import reduce
 from models import Node, WorkflowModel
 from gevent import monkey
-from utils.serialization import deep_serialize, to_dict_without_binary
+from utils.serialization import deep_serialize, json_size
 from database.crud import ExecutionCRUD, SubscriptionCRUD, WorkflowCRUD
 from database.config import get_sync_session_manual
 from engine.execution import (
-    ExecutionPlanBuilder,
     WorkflowExecutionContext,
     WorkflowExecutor,
 )
 from services.queue import QueueService
+from services.connection_registry import RESULT_FALLBACK_KEY
+from services.resume_scheduler import defer_resume, get_sync_redis
+from config import settings
+from utils.workflow_cache import (
+    CachedWorkflow,
+    WorkflowReference,
+    prepare_workflow,
+    workflow_model_cache,
+)
 from datetime import datetime, timezone
 
 # Langfuse observability (gracefully degrades if not configured)
@@ -47,21 +56,178 @@ def count_executed_nodes(execution_result: Dict[str, Any]) -> int:
 
 @celery_app.task(name="workflow.execute_workflow", pydantic=True)
 def execute_workflow(
-    workflow_data: WorkflowModel,
     execution_id: str,
     user_id: str,  # Add user_id parameter
     primary_result: Dict[str, Any] | None = None,
     pub_sub: bool = False,
+    resume: bool = False,
+    allow_suspend: bool = True,
+    publish_result: bool = False,
+    workflow_id: Optional[str] = None,
+    workflow_version: Optional[str] = None,
+    workflow_data: Optional[WorkflowModel] = None,
 ) -> Dict[str, Any]:
     """
     Execute entire workflow with node limit check.
+
+    Workflow reference:
+    - Callers pass WorkflowReference.task_arguments() (workflow_id and
+      workflow_version, a hash of the definition) instead of the workflow
+    - The validated model and execution order come from workflow_model_cache,
+      loading the execution's workflow snapshot on a miss
+    - workflow_data (the full definition) is still accepted for messages
+      enqueued before references were introduced
+
+    Durable waits:
+    - A Wait node may suspend the execution (allow_suspend=False for callers
+      that need the final result, e.g. chat webhooks)
+    - The checkpoint is stored in ExecutionData and this task is re-enqueued
+      with resume=True (as an eta task, or through services.resume_scheduler
+      for long waits); the resumed run skips the node limit check, continues
+      from the checkpoint and deletes it when it finishes or fails
+
+    Result delivery:
+    - publish_result=True publishes an "execution_result" message with the
+      final result (or error) to the workflow_updates queue; the API worker
+      awaiting it (WorkflowMessageHandler.wait_for_execution_result) answers
+      the request without blocking its event loop on the Celery result. If
+      the publish fails the result is stored in Redis, where the waiter polls
     
     Langfuse Integration:
     - Creates one trace per workflow execution
     - trace_id is stored in ExecutionData and propagated to RabbitMQ messages
     - Frontend can deep-link to Langfuse UI using langfuse_trace_id
     """
-    
+    workflow_id = workflow_id or (workflow_data.id if workflow_data else None)
+    try:
+        try:
+            if workflow_data is not None:
+                prepared = prepare_workflow(workflow_data)
+            else:
+                prepared = resolve_workflow(workflow_id, workflow_version, execution_id)
+        except Exception as e:
+            response = fail_unresolved_execution(workflow_id, execution_id, str(e), pub_sub)
+            if publish_result:
+                publish_execution_result(workflow_id, execution_id, response)
+            return response
+        response = run_workflow(
+            prepared, execution_id, user_id, primary_result, pub_sub, resume, allow_suspend,
+            workflow_version,
+        )
+    except Exception as e:
+        if publish_result:
+            publish_execution_result(workflow_id, execution_id, {"status": "error", "error": str(e)})
+        raise
+    if publish_result:
+        publish_execution_result(workflow_id, execution_id, response)
+    return response
+
+
+def resolve_workflow(
+    workflow_id: Optional[str], workflow_version: Optional[str], execution_id: str
+) -> CachedWorkflow:
+    """Validated workflow and execution order for a task's workflow reference."""
+    if not workflow_id or not workflow_version:
+        raise ValueError(f"Execution {execution_id} has no workflow reference")
+
+    def load_snapshot() -> Optional[Dict[str, Any]]:
+        with get_sync_session_manual() as session:
+            return ExecutionCRUD.get_execution_workflow_data_sync(session, execution_id)
+
+    return workflow_model_cache.get(workflow_id, workflow_version, load_snapshot)
+
+
+def fail_unresolved_execution(
+    workflow_id: Optional[str], execution_id: str, error_msg: str, pub_sub: bool
+) -> Dict[str, Any]:
+    """Mark an execution whose workflow could not be loaded (or ordered) as failed."""
+    logger.error(f"Workflow {workflow_id} execution {execution_id} failed: {error_msg}")
+    with get_sync_session_manual() as session:
+        ExecutionCRUD.update_execution_status_sync(
+            session, execution_id, "error", finished=True, data={"error": error_msg}
+        )
+    if pub_sub:
+        queue_service.publish_sync(
+            queue_name="workflow_updates",
+            message={
+                "event": "workflow_error",
+                "workflow_id": str(workflow_id),
+                "execution_id": execution_id,
+                "error": error_msg,
+            },
+        )
+    return {
+        "workflow_id": workflow_id,
+        "execution_id": execution_id,
+        "status": "error",
+        "error": error_msg,
+    }
+
+
+def publish_execution_result(
+    workflow_id: str, execution_id: str, response: Dict[str, Any]
+) -> bool:
+    """
+    Publish the part of a task response the awaiting chat webhook needs.
+
+    Never raises (it also runs while a task failure propagates). When the
+    message cannot be published, the result is stored under
+    RESULT_FALLBACK_KEY for the waiter to pick up; returns False if neither
+    worked and the webhook will time out.
+    """
+    result: Dict[str, Any] = {
+        "status": response.get("status", "success"),
+        "final_result": (response.get("result") or {}).get("final_result"),
+    }
+    if response.get("error"):
+        result["error"] = response["error"]
+    try:
+        published = queue_service.publish_sync(
+            queue_name="workflow_updates",
+            message={
+                "event": "execution_result",
+                "workflow_id": str(workflow_id),
+                "execution_id": execution_id,
+                "result": result,
+            },
+            persistent=False,
+        )
+    except Exception as e:
+        logger.error(f"Publishing the result of execution {execution_id} failed: {e}")
+        published = False
+    if published:
+        return True
+
+    redis = get_sync_redis()
+    if redis is None:
+        logger.error(f"Result of execution {execution_id} was not published and REDIS_URL is not set")
+        return False
+    try:
+        redis.set(
+            RESULT_FALLBACK_KEY.format(execution_id=execution_id),
+            json.dumps(result, default=str),
+            ex=settings.CHAT_WEBHOOK_TIMEOUT_SECONDS,
+        )
+    except Exception as e:
+        logger.error(f"Storing the result of execution {execution_id} failed: {e}")
+        return False
+    logger.warning(f"Result of execution {execution_id} was not published, stored in Redis instead")
+    return True
+
+
+def run_workflow(
+    prepared: CachedWorkflow,
+    execution_id: str,
+    user_id: str,
+    primary_result: Dict[str, Any] | None = None,
+    pub_sub: bool = False,
+    resume: bool = False,
+    allow_suspend: bool = True,
+    workflow_version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Body of execute_workflow: run (or resume) the workflow and build the task response."""
+    workflow_data = prepared.workflow
+
     # Count total nodes before execution
     total_nodes = count_workflow_nodes(workflow_data)
     langfuse_trace_id: Optional[str] = None
@@ -88,60 +254,66 @@ def execute_workflow(
         
         with get_sync_session_manual() as session:
             try:
-                # =========================================================
-                # EXECUTION LIMIT ENFORCEMENT (2024-12 Update)
-                # =========================================================
-                # Check subscription and consume nodes atomically.
-                # - Users with active subscription: use plan's nodes_limit
-                # - Users without subscription: get default 2000 nodes
-                # - If quota exceeded: block execution and return error
-                #
-                # See SubscriptionCRUD.check_and_consume_nodes_sync() for implementation.
-                # =========================================================
-                success, subscription = SubscriptionCRUD.check_and_consume_nodes_sync(
-                    session, user_id, total_nodes
-                )
-                
-                if not success:
-                    # Subscription exists but insufficient nodes
-                    remaining = subscription.remaining_nodes if subscription else 0
-                    error_msg = f"Node limit exceeded. Required: {total_nodes}, Available: {remaining}"
-                    
-                    # Update execution status to error
-                    ExecutionCRUD.update_execution_status_sync(
-                        session, execution_id, "error", finished=True, data={"error": error_msg}
+                checkpoint = None
+                if resume:
+                    checkpoint = ExecutionCRUD.get_execution_checkpoint_sync(session, execution_id)
+                    if not checkpoint:
+                        raise ValueError(f"No checkpoint found to resume execution {execution_id}")
+                    ExecutionCRUD.update_execution_status_sync(session, execution_id, status="running")
+                else:
+                    # =========================================================
+                    # EXECUTION LIMIT ENFORCEMENT (2024-12 Update)
+                    # =========================================================
+                    # Check subscription and consume nodes atomically.
+                    # - Users with active subscription: use plan's nodes_limit
+                    # - Users without subscription: get default 2000 nodes
+                    # - If quota exceeded: block execution and return error
+                    #
+                    # See SubscriptionCRUD.check_and_consume_nodes_sync() for implementation.
+                    # =========================================================
+                    success, subscription = SubscriptionCRUD.check_and_consume_nodes_sync(
+                        session, user_id, total_nodes
                     )
+                
+                    if not success:
+                        # Subscription exists but insufficient nodes
+                        remaining = subscription.remaining_nodes if subscription else 0
+                        error_msg = f"Node limit exceeded. Required: {total_nodes}, Available: {remaining}"
                     
-                    # Publish error if pub_sub enabled
-                    if pub_sub:
-                        queue_service.publish_sync(
-                            queue_name="workflow_updates",
-                            message={
-                                "event": "workflow_error",
-                                "workflow_id": str(workflow_data.id),
-                                "execution_id": execution_id,
-                                "error": error_msg,
-                            },
+                        # Update execution status to error
+                        ExecutionCRUD.update_execution_status_sync(
+                            session, execution_id, "error", finished=True, data={"error": error_msg}
                         )
                     
-                    return {
-                        "workflow_id": workflow_data.id,
-                        "execution_id": execution_id,
-                        "status": "error",
-                        "error": error_msg,
-                        "error_type": "subscription_limit",
-                        "nodes_required": total_nodes,
-                        "nodes_available": remaining,
-                    }
+                        # Publish error if pub_sub enabled
+                        if pub_sub:
+                            queue_service.publish_sync(
+                                queue_name="workflow_updates",
+                                message={
+                                    "event": "workflow_error",
+                                    "workflow_id": str(workflow_data.id),
+                                    "execution_id": execution_id,
+                                    "error": error_msg,
+                                },
+                            )
+                    
+                        return {
+                            "workflow_id": workflow_data.id,
+                            "execution_id": execution_id,
+                            "status": "error",
+                            "error": error_msg,
+                            "error_type": "subscription_limit",
+                            "nodes_required": total_nodes,
+                            "nodes_available": remaining,
+                        }
 
-                ExecutionCRUD.update_execution_status_sync(
-                    session, execution_id, status="running",
-                    start_time=datetime.now(timezone.utc)
-                )
+                    ExecutionCRUD.update_execution_status_sync(
+                        session, execution_id, status="running",
+                        start_time=datetime.now(timezone.utc)
+                    )
 
-                # Create execution plan with topological sorting
-                plan_builder = ExecutionPlanBuilder(workflow_data)
-                sorted_nodes = plan_builder.topological_sort()
+                # Execution plan (topological order) is computed once per workflow version
+                sorted_nodes = list(prepared.sorted_nodes)
                 # logger.info("Workflow Exec %s - Topological order: %s",
                 #             execution_id, [n.name for n in sorted_nodes])
 
@@ -153,10 +325,29 @@ def execute_workflow(
                     primary_result=primary_result,
                     langfuse_trace_ctx=trace_ctx,  # Pass trace context for per-node spans
                 )
+                execution_context.can_suspend = allow_suspend
+                if checkpoint:
+                    execution_context.restore_checkpoint(checkpoint)
 
                 executor = WorkflowExecutor(execution_context)
                 #logger.info("Workflow Exec %s - Starting node execution", execution_id)
                 result = executor.execute_nodes(sorted_nodes)
+                if result.get("status") == "waiting":
+                    return schedule_resume(
+                        session, workflow_data, execution_id, user_id,
+                        primary_result, pub_sub, result, langfuse_trace_id,
+                        workflow_version,
+                    )
+                if resume and result.get("status") == "error":
+                    # The executor recorded the node error; drop the checkpoint with it
+                    ExecutionCRUD.update_execution_status_sync(
+                        session, execution_id, "error", finished=True, data={"checkpoint": None}
+                    )
+                logger.debug("Workflow Exec %s - Credential cache stats: %s",
+                             execution_id, execution_context.credential_cache.stats())
+                # final_result is persisted, published and returned: serialize it once
+                serializer = execution_context.serializer
+                final_output = serializer.serialize(result.get('final_result'))
                 #logger.info("Workflow Exec %s - Finished node execution. Collected node keys=%s",
                             #execution_id, list(result.get("all_results", {}).keys()))
 
@@ -183,16 +374,24 @@ def execute_workflow(
                 # Update Langfuse trace with final output
                 if trace_ctx:
                     trace_ctx.update(
-                        output=deep_serialize(result.get('final_result')) if result.get('final_result') else None,
+                        output=final_output if result.get('final_result') else None,
                         metadata={"nodes_executed": executed_nodes}
                     )
 
                 if 'final_result' in result:
                     # Include langfuse_trace_id in execution data for frontend deep-linking
                     execution_data = {
-                        "output": deep_serialize(result['final_result']),
-                        "node_results": {k: to_dict_without_binary(v) for k, v in result["all_results"].items()}
+                        "output": final_output,
+                        # Outputs already written to execution_node_results are not duplicated here
+                        "node_results": {
+                            k: serializer.node_outputs(v)
+                            for k, v in result["all_results"].items()
+                            if k not in execution_context.persisted_nodes
+                        },
+                        "node_timings": result.get("node_timings", {}),
                     }
+                    if resume:
+                        execution_data["checkpoint"] = None
                     if langfuse_trace_id:
                         execution_data["langfuse_trace_id"] = langfuse_trace_id
                     
@@ -206,7 +405,7 @@ def execute_workflow(
                         message_payload = {
                             "event": "workflow_completed",
                             "workflow_id": str(workflow_data.id),
-                            "final_result": deep_serialize(result['final_result']),
+                            "final_result": final_output,
                             "execution_id": execution_id,
                         }
                         if langfuse_trace_id:
@@ -220,12 +419,15 @@ def execute_workflow(
                 response = {
                     "workflow_id": workflow_data.id,
                     "execution_id": execution_id,
-                    "result": deep_serialize(result),
+                    "result": serializer.serialize(result),
                     "nodes_consumed": total_nodes,
                     "nodes_executed": executed_nodes,
                 }
                 if langfuse_trace_id:
                     response["langfuse_trace_id"] = langfuse_trace_id
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Workflow Exec %s - Serializer stats: %s, result size=%d bytes",
+                                 execution_id, serializer.stats(), json_size(response["result"]))
                 
                 return response
 
@@ -244,6 +446,8 @@ def execute_workflow(
                 error_data = {"error": error_msg}
                 if langfuse_trace_id:
                     error_data["langfuse_trace_id"] = langfuse_trace_id
+                if resume:
+                    error_data["checkpoint"] = None
                 
                 ExecutionCRUD.update_execution_status_sync(
                     session, execution_id, "error", finished=True, data=error_data
@@ -277,6 +481,66 @@ def execute_workflow(
                 return error_response
 
 
+def schedule_resume(
+    session,
+    workflow_data: WorkflowModel,
+    execution_id: str,
+    user_id: str,
+    primary_result: Dict[str, Any] | None,
+    pub_sub: bool,
+    result: Dict[str, Any],
+    langfuse_trace_id: Optional[str] = None,
+    workflow_version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Persist a suspended execution's checkpoint and enqueue its resume at resume_at."""
+    resume_at = datetime.fromisoformat(result["resume_at"])
+    waiting_data = {
+        "checkpoint": result["checkpoint"],
+        "node_timings": result.get("node_timings", {}),
+    }
+    if langfuse_trace_id:
+        waiting_data["langfuse_trace_id"] = langfuse_trace_id
+    ExecutionCRUD.update_execution_status_sync(
+        session, execution_id, "waiting", data=waiting_data
+    )
+
+    if workflow_version:
+        # The execution's workflow snapshot is already stored: resume by reference
+        workflow_arguments = {"workflow_id": str(workflow_data.id), "workflow_version": workflow_version}
+    else:
+        workflow_arguments = {"workflow_data": workflow_data.model_dump(mode="json")}
+    task_kwargs = {
+        **workflow_arguments,
+        "execution_id": execution_id,
+        "user_id": user_id,
+        "primary_result": primary_result,
+        "pub_sub": pub_sub,
+        "resume": True,
+    }
+
+    delay = (resume_at - datetime.now(timezone.utc)).total_seconds()
+    redis = get_sync_redis() if delay > settings.DURABLE_WAIT_MAX_ETA_SECONDS else None
+    deferred = False
+    if redis is not None:
+        # Not held by the broker as an eta message (see services.resume_scheduler)
+        try:
+            defer_resume(redis, execution_id, task_kwargs, resume_at)
+            deferred = True
+        except Exception as e:
+            logger.warning("Workflow Exec %s - Could not defer resume in Redis (%s), using eta",
+                           execution_id, e)
+    if not deferred:
+        execute_workflow.apply_async(kwargs=task_kwargs, eta=resume_at)
+    logger.info("Workflow Exec %s - Waiting, resume scheduled at %s", execution_id, resume_at.isoformat())
+
+    return {
+        "workflow_id": workflow_data.id,
+        "execution_id": execution_id,
+        "status": "waiting",
+        "resume_at": result["resume_at"],
+    }
+
+
 @celery_app.task(name="workflow.workflow_executor")
 def workflow_executor(workflow_id: str):
     execution_id = str(uuid.uuid4())
@@ -299,7 +563,7 @@ def workflow_executor(workflow_id: str):
         )
 
         task_arguments = {
-            "workflow_data": workflow_data,
+            **WorkflowReference.of(workflow_data).task_arguments(),
             "user_id": workflow_db.user_id,
             "primary_result": {},
             "execution_id": execution_id,
@@ -53,10 +53,8 @@ def create_fresh_store():
     import nodes.memory.buffer_memory as buffer_module
     
     # Create new store (disable cleanup greenlet for controlled testing)
-    new_store = _InMemoryConversationStore.__new__(_InMemoryConversationStore)
+    new_store = _InMemoryConversationStore(start_cleanup=False)
     new_store._lock = threading.RLock()
-    new_store._store = {}
-    new_store._cleanup_running = True  # Prevent auto-spawn
     
     # Swap global store
     original_store = buffer_module._STORE
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for coalesced agent events (utils/agent_events.py):
+token deltas are merged, events are batched per window or per N events in
+seq order, terminal events flush immediately, ephemeral batches are
+published non-persistent, publishers of one execution share its buffer, and
+a batch reaches the WebSocket client as one frame.
+The wall-clock comparison with per-event publishing is marked "stress".
+
+Run with: pytest tests/test_agent_events.py -v
+"""
+
+import sys
+import os
+import gc
+import json
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.agent_events import (
+    AgentEventBuffer,
+    AgentEventPublisher,
+    _execution_buffers,
+    agent_event_metrics,
+)
+
+
+class RecordingQueue:
+    """QueueService stand-in recording (message, persistent) per publish_sync call."""
+
+    def __init__(self):
+        self.published = []
+
+    def publish_sync(self, queue_name, message, persistent=True):
+        json.dumps(message)  # serialized once per message, as by QueueService
+        self.published.append((message, persistent))
+        return True
+
+
+def make_publisher(queue, window_ms=60_000, max_events=1000, **kwargs):
+    buffer = AgentEventBuffer(queue, window_ms=window_ms, max_events=max_events)
+    return AgentEventPublisher("wf", "exec-1", "AI Agent", queue_service=queue, buffer=buffer, **kwargs)
+
+
+def flattened(published):
+    """Envelopes in publish order, batches unpacked."""
+    envelopes = []
+    for message, _ in published:
+        if message["event"].get("type") == "agent_event_batch":
+            envelopes.extend(message["event"]["events"])
+        else:
+            envelopes.append(message)
+    return envelopes
+
+
+class TestAgentEventBuffer(unittest.TestCase):
+
+    def setUp(self):
+        agent_event_metrics.reset()
+        self.addCleanup(agent_event_metrics.reset)
+
+    def test_tokens_are_merged_and_terminal_event_flushes(self):
+        queue = RecordingQueue()
+        publisher = make_publisher(queue)
+        publisher.agent_started(model="gpt-4o", tools_count=1)
+        for token in ["Hel", "lo", ", wor", "ld"]:
+            publisher.model_token(token)
+        publisher.tool_called(name="search", tool_call_id="call_1", args={})
+        publisher.model_token("!")
+        self.assertEqual(queue.published, [])
+
+        publisher.agent_completed(final_preview="Hello, world!")
+        self.assertEqual(len(queue.published), 1)
+        message, persistent = queue.published[0]
+        self.assertTrue(persistent)
+        self.assertEqual((message["seq_from"], message["seq"], message["event"]["count"]), (1, 8, 8))
+
+        envelopes = message["event"]["events"]
+        self.assertEqual([e["event"]["type"] for e in envelopes],
+                         ["agent_started", "model_token", "tool_called", "model_token", "agent_completed"])
+        self.assertEqual(envelopes[1]["event"]["text"], "Hello, world")
+        self.assertEqual((envelopes[1]["seq_from"], envelopes[1]["seq"]), (2, 5))
+        self.assertEqual([e["seq"] for e in envelopes], [1, 5, 6, 7, 8])
+        self.assertEqual(agent_event_metrics.stats()["events"], 8)
+
+    def test_window_flush_is_ephemeral(self):
+        queue = RecordingQueue()
+        publisher = make_publisher(queue, window_ms=20)
+        publisher.model_token("a")
+        publisher.model_token("b")
+        for _ in range(100):
+            if queue.published:
+                break
+            time.sleep(0.01)
+        # A single merged envelope is published as is
+        [(message, persistent)] = queue.published
+        self.assertEqual((message["event"]["type"], message["event"]["text"]), ("model_token", "ab"))
+        self.assertFalse(persistent)
+
+    def test_flushes_every_max_events(self):
+        queue = RecordingQueue()
+        publisher = make_publisher(queue, max_events=10)
+        for i in range(25):
+            publisher.agent_step(iteration=i)
+        self.assertEqual([m["event"]["count"] for m, _ in queue.published], [10, 10])
+        publisher.flush()
+        self.assertEqual([e["seq"] for e in flattened(queue.published)], list(range(1, 26)))
+
+    def test_shared_buffer_keeps_nodes_apart(self):
+        queue = RecordingQueue()
+        buffer = AgentEventBuffer(queue, window_ms=60_000)
+        one = AgentEventPublisher("wf", "exec-1", "Agent A", queue_service=queue, buffer=buffer)
+        two = AgentEventPublisher("wf", "exec-1", "Agent B", queue_service=queue, buffer=buffer)
+        one.model_token("x")
+        two.model_token("y")
+        one.model_token("z")
+        two.agent_error("boom")
+        envelopes = flattened(queue.published)
+        self.assertEqual([(e["node_name"], e["event"].get("text")) for e in envelopes],
+                         [("Agent A", "x"), ("Agent B", "y"), ("Agent A", "z"), ("Agent B", None)])
+
+    def test_publishers_share_the_execution_buffer(self):
+        queue = RecordingQueue()
+        one = AgentEventPublisher("wf", "exec-shared", "Agent A", queue_service=queue)
+        two = AgentEventPublisher("wf", "exec-shared", "Agent B", queue_service=queue)
+        other = AgentEventPublisher("wf", "exec-other", "Agent A", queue_service=queue)
+        self.assertIs(one.buffer, two.buffer)
+        self.assertIsNot(one.buffer, other.buffer)
+
+        one.model_token("x")
+        two.model_token("y")
+        two.flush()
+        [(message, _)] = queue.published
+        self.assertEqual([e["node_name"] for e in message["event"]["events"]], ["Agent A", "Agent B"])
+
+        # Released once no publisher (or pending flush) holds it
+        del one, two, other
+        gc.collect()
+        self.assertNotIn(("wf", "exec-shared"), _execution_buffers)
+
+    def test_disabled_publisher_and_zero_window(self):
+        queue = RecordingQueue()
+        make_publisher(queue, pub_sub=False).agent_completed()
+        self.assertEqual(queue.published, [])
+
+        publisher = make_publisher(queue, window_ms=0)
+        publisher.model_token("a")
+        publisher.model_token("b")
+        self.assertEqual(len(queue.published), 2)
+
+    def test_publish_errors_are_logged(self):
+        queue = MagicMock()
+        queue.publish_sync.side_effect = ConnectionError("broker down")
+        publisher = make_publisher(queue)
+        publisher.agent_error("boom")  # does not raise
+        queue.publish_sync.assert_called_once()
+
+
+class TestWebSocketFrames(unittest.IsolatedAsyncioTestCase):
+
+    async def test_batch_is_one_frame_of_envelopes(self):
+        from services.workflow_message_handler import WorkflowMessageHandler
+
+        queue = RecordingQueue()
+        publisher = make_publisher(queue)
+        for text in ("Hel", "lo"):
+            publisher.model_token(text)
+        publisher.agent_completed(final_preview="Hello")
+        publisher.tool_called(name="search", tool_call_id="call_1", args={})
+        publisher.flush()
+        batch, single = [json.loads(json.dumps(message)) for message, _ in queue.published]
+
+        handler = WorkflowMessageHandler()
+        websocket = AsyncMock()
+        handler.local_websocket_connections["wf:exec-1"] = websocket
+        await handler.handle_message(batch)
+        await handler.handle_message(single)
+
+        frames = [c.args[0] for c in websocket.send_json.await_args_list]
+        self.assertEqual(frames, [
+            {"type": "workflow_update_batch", "data": batch["event"]["events"]},
+            {"type": "workflow_update", "data": single},
+        ])
+        self.assertEqual(
+            [e["event"]["type"] for e in frames[0]["data"]],
+            ["model_token", "agent_completed"],
+        )
+
+
+class TestAgentEventBenchmark(unittest.TestCase):
+
+    TOKENS = 5000
+
+    def stream(self, publisher):
+        publisher.agent_started(model="gpt-4o")
+        for i in range(self.TOKENS):
+            publisher.model_token(f" tok{i}")
+        publisher.agent_completed(final_preview="...")
+
+    def test_streamed_answer_messages(self):
+        events = self.TOKENS + 2
+        unbuffered = RecordingQueue()
+        self.stream(make_publisher(unbuffered, window_ms=0))
+        self.assertEqual(len(unbuffered.published), events)
+
+        buffered = RecordingQueue()
+        self.stream(make_publisher(buffered, max_events=64))
+        self.assertLessEqual(len(buffered.published), events // 64 + 1)
+        self.assertTrue(any(not persistent for _, persistent in buffered.published))
+        text = "".join(e["event"]["text"] for e in flattened(buffered.published) if e["event"]["type"] == "model_token")
+        self.assertEqual(text, "".join(f" tok{i}" for i in range(self.TOKENS)))
+
+    @pytest.mark.stress
+    def test_streamed_answer_throughput(self):
+        def timed(publisher):
+            started = time.perf_counter()
+            self.stream(publisher)
+            return time.perf_counter() - started
+
+        unbuffered_time = timed(make_publisher(RecordingQueue(), window_ms=0))
+        buffered_time = timed(make_publisher(RecordingQueue(), max_events=64))
+        self.assertLess(buffered_time, unbuffered_time)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent tool calls within one agent turn (AgentRunnable) and the
+TimeoutRunner that executes them.
+
+Run with: pytest tests/test_agent_tool_concurrency.py -v
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.concurrency import TimeoutRunner
+from utils.langchain_agents import AgentRunnable
+
+
+class _FakeChatModel:
+    """Requests every tool once on the first call, then answers."""
+
+    provider, model, temperature = "fake", "fake-model", 0.0
+
+    def __init__(self, tool_names):
+        self.tool_names = tool_names
+        self.calls = []
+
+    def invoke(self, payload):
+        self.calls.append([dict(m) for m in payload["messages"]])
+        if len(self.calls) == 1:
+            tool_calls = [
+                {"id": f"call_{i}", "name": name, "arguments": {"q": i}}
+                for i, name in enumerate(self.tool_names)
+            ]
+            return {"assistant_message": {"content": "", "tool_calls": tool_calls}, "usage": {"total_tokens": 10}}
+        return {"assistant_message": {"content": "Here is the final answer."}, "usage": {"total_tokens": 10}}
+
+
+class _FakeTools:
+    """Each tool sleeps for the given delay; tracks peak concurrency."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.tools = dict.fromkeys(delays)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def get_tool_schemas(self, format="openai"):
+        return [{"type": "function", "function": {"name": name}} for name in self.delays]
+
+    def invoke(self, payload):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays[payload["tool_name"]])
+            if payload["tool_name"] == "broken":
+                raise RuntimeError("boom")
+            return {"ok": True, "data": {"tool": payload["tool_name"], "q": payload["arguments"]["q"]}}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class _WordEncoding:
+    def encode(self, text):
+        return text.split()
+
+
+def run_agent(delays, **config):
+    tools = _FakeTools(delays)
+    model = _FakeChatModel(list(delays))
+    agent = AgentRunnable(chat_model=model, tools=tools, **config)
+    agent._process_tool_response = lambda tool_name, raw_result, user_query, assistant_text="": raw_result
+    # Token accounting is not under test (and needs tiktoken's encoding files)
+    with patch("utils.token_ledger.get_encoding", lambda model="gpt-4": _WordEncoding()), \
+            patch("utils.langchain_agents.truncate_tool_results", lambda data, **kwargs: data):
+        result = agent.invoke({"user_input": "look everything up"})
+    return result, model, tools
+
+
+class TestTimeoutRunner(unittest.TestCase):
+
+    def test_results_in_call_order(self):
+        with TimeoutRunner(4) as runner:
+            calls = [lambda d=d, i=i: (time.sleep(d), i)[1] for i, d in enumerate([0.05, 0.01, 0.03])]
+            outcomes = runner.run(calls, timeout=1)
+        self.assertEqual([o.value for o in outcomes], [0, 1, 2])
+        self.assertEqual(runner.stats()["completed"], 3)
+
+    def test_timeouts_and_errors(self):
+        def fail():
+            raise ValueError("bad")
+
+        runner = TimeoutRunner(2)
+        outcomes = runner.run([lambda: time.sleep(0.5), fail, lambda: "ok"], timeout=0.1)
+        self.assertEqual([o.status for o in outcomes], ["timeout", "error", "ok"])
+        self.assertIsInstance(outcomes[1].value, ValueError)
+        self.assertEqual(runner.stats()["hung"], 1)
+
+        # One worker is still busy with the timed-out call; the other keeps serving
+        outcomes = runner.run([lambda: 1, lambda: 2], timeout=0.1)
+        self.assertEqual([o.value for o in outcomes], [1, 2])
+        runner.shutdown()
+
+    def test_cancelled_when_every_worker_is_hung(self):
+        runner = TimeoutRunner(1)
+        outcomes = runner.run([lambda: time.sleep(0.5), lambda: "late"], timeout=0.05)
+        self.assertEqual([o.status for o in outcomes], ["timeout", "cancelled"])
+        self.assertEqual(runner.stats()["cancelled"], 1)
+        runner.shutdown()
+
+
+class TestAgentToolConcurrency(unittest.TestCase):
+
+    DELAYS = {"qdrant_search": 0.2, "http_lookup": 0.05, "sheets_read": 0.15, "web_fetch": 0.1}
+
+    def test_turn_tools_run_concurrently_in_order(self):
+        result, model, tools = run_agent(self.DELAYS)
+        self.assertTrue(result["success"])
+        # All four tools were in flight at once
+        self.assertEqual(tools.peak, 4)
+
+        tool_messages = [m for m in model.calls[1] if m["role"] == "tool"]
+        self.assertEqual([m["tool_call_id"] for m in tool_messages], ["call_0", "call_1", "call_2", "call_3"])
+        self.assertEqual([json.loads(m["content"])["tool"] for m in tool_messages], list(self.DELAYS))
+
+    def test_run_is_published_as_agent_events(self):
+        publisher = MagicMock()
+        result, _, _ = run_agent({"fast": 0.0, "broken": 0.0}, event_publisher=publisher)
+        self.assertTrue(result["success"])
+        self.assertEqual([c[0] for c in publisher.method_calls], [
+            "agent_started", "agent_step", "model_result", "tool_called", "tool_called",
+            "tool_result", "tool_result", "agent_step", "model_result", "agent_completed",
+        ])
+        tool_results = [c.kwargs for c in publisher.method_calls if c[0] == "tool_result"]
+        self.assertEqual([(r["name"], r["ok"]) for r in tool_results], [("fast", True), ("broken", False)])
+
+    def test_max_parallel_tools(self):
+        _, _, tools = run_agent(self.DELAYS, max_parallel_tools=2)
+        self.assertEqual(tools.peak, 2)
+
+    def test_timeout_and_errors_become_tool_messages(self):
+        result, model, _ = run_agent(
+            {"slow": 0.5, "broken": 0.0, "fast": 0.0}, tool_timeout=0.1
+        )
+        contents = [json.loads(m["content"]) for m in model.calls[1] if m["role"] == "tool"]
+        self.assertIn("timed out", contents[0]["error"])
+        self.assertEqual(contents[1]["error"], "boom")
+        self.assertEqual(contents[2]["tool"], "fast")
+        self.assertEqual(result["tool_call_stats"]["timed_out"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
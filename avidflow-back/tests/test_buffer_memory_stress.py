@@ -13,8 +13,8 @@ Environment: Designed for Celery with gevent pool (--pool=gevent)
 Run with:
     pytest tests/test_buffer_memory_stress.py -v -s
     
-For stress tests only:
-    pytest tests/test_buffer_memory_stress.py -v -s -k "stress"
+For stress tests only (deselected by default):
+    pytest tests/test_buffer_memory_stress.py -v -s -m stress
 """
 from __future__ import annotations
 
@@ -150,10 +150,8 @@ def fresh_store():
     original_store = buffer_module._STORE
     
     # Create new store (disable cleanup greenlet for controlled testing)
-    new_store = _InMemoryConversationStore.__new__(_InMemoryConversationStore)
+    new_store = _InMemoryConversationStore(start_cleanup=False)
     new_store._lock = threading.RLock()
-    new_store._store = {}
-    new_store._cleanup_running = True  # Prevent auto-spawn
     
     buffer_module._STORE = new_store
     
@@ -912,6 +910,152 @@ class TestEdgeCases:
         logger.info("✅ PASSED: Very large message content")
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+#                    SCENARIO 8: CAPACITY BUDGET & THROUGHPUT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class _FullScanStore:
+    """The previous store: every get/set scans all sessions for expired entries."""
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._store = {}
+        self.examined = 0
+    
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            self.examined += len(self._store)
+            for k in [k for k, v in self._store.items() if v[1] and v[1] <= now]:
+                self._store.pop(k, None)
+    
+    def get(self, key):
+        with self._lock:
+            self._purge_expired()
+            entry = self._store.get(key)
+            return list(entry[0]) if entry else []
+    
+    def set(self, key, messages, ttl_seconds):
+        with self._lock:
+            self._purge_expired()
+            self._store[key] = (list(messages[-800:]), time.time() + ttl_seconds if ttl_seconds else 0)
+
+
+class TestCapacityAndThroughput:
+    """
+    Test Scenario: Many active sessions on one worker.
+    
+    Purpose: Ensure that:
+    - Purges touch only expired entries (expiry heap, not a full scan)
+    - The store stays within its byte budget by evicting LRU sessions
+    - Stats report sessions, bytes and evictions
+    """
+    
+    def test_lru_eviction_within_byte_budget(self, memory_manager, fresh_store):
+        """Least recently used sessions are evicted once the budget is exceeded."""
+        conversation = create_conversation(10)
+        memory_manager.save("probe", conversation, ttl_seconds=3600)
+        fresh_store.max_bytes = 20 * fresh_store.stats()["bytes"]  # Room for 20 sessions
+        memory_manager.clear("probe")
+        
+        for i in range(50):
+            memory_manager.save(f"lru-{i}", conversation, ttl_seconds=3600)
+            memory_manager.load("lru-0", context_window=5)  # keep lru-0 hot
+        
+        stats = memory_manager.stats()
+        assert stats["bytes"] <= stats["max_bytes"]
+        assert stats["sessions"] == 20
+        assert stats["evicted"] == 30
+        assert memory_manager.load("lru-0", context_window=5), "Recently used session must survive"
+        assert memory_manager.load("lru-1", context_window=5) == [], "Cold session should be evicted"
+        assert memory_manager.load("lru-49", context_window=5)
+        
+        logger.info(f"✅ PASSED: LRU eviction within budget {stats}")
+    
+    def test_expiry_heap_skips_overwritten_entries(self, memory_manager, fresh_store):
+        """An entry refreshed with a longer TTL is not purged by its old heap item."""
+        memory_manager.save("refresh", create_conversation(1), ttl_seconds=1)
+        memory_manager.save("refresh", create_conversation(2), ttl_seconds=3600)
+        memory_manager.save("short", create_conversation(1), ttl_seconds=1)
+        memory_manager.save("forever", create_conversation(1), ttl_seconds=0)
+        
+        with patch("nodes.memory.buffer_memory.time", return_value=time.time() + 2):
+            purged = fresh_store._purge_expired()
+        
+        assert purged == 1
+        assert set(fresh_store._store) == {memory_manager._key("refresh"), memory_manager._key("forever")}
+        assert fresh_store.stats()["expired"] == 1
+        
+        memory_manager.clear("refresh")
+        memory_manager.clear("forever")
+        assert fresh_store.stats()["bytes"] == 0
+        
+        logger.info("✅ PASSED: Expiry heap skips overwritten entries")
+    
+    def test_purges_touch_only_due_sessions(self, fresh_store):
+        """
+        Per-message expiry work with many active sessions, compared with the
+        previous store that scanned every session on each access.
+        """
+        import heapq
+        
+        NUM_SESSIONS = 2000
+        NUM_EXPIRED = 50
+        NUM_OPS = 200
+        conversation = create_conversation(3)
+        
+        def run(store):
+            for i in range(NUM_OPS):
+                key = f"session-{(i * 7919) % NUM_SESSIONS}"
+                store.set(key, store.get(key) + [{"role": "user", "content": f"msg {i}"}], 3600)
+        
+        legacy = _FullScanStore()
+        for i in range(NUM_SESSIONS):
+            legacy.set(f"session-{i}", conversation, 3600)
+        legacy.examined = 0
+        run(legacy)
+        
+        for i in range(NUM_SESSIONS):
+            fresh_store.set(f"session-{i}", conversation, 3600)
+        for i in range(NUM_EXPIRED):
+            fresh_store.set(f"short-{i}", conversation, 1)
+        with patch("nodes.memory.buffer_memory.time", return_value=time.time() + 2), \
+                patch.object(heapq, "heappop", wraps=heapq.heappop) as heappop:
+            run(fresh_store)
+        
+        assert legacy.examined == 2 * NUM_OPS * NUM_SESSIONS
+        # Only the due sessions were popped, once each
+        assert heappop.call_count == NUM_EXPIRED
+        assert len(fresh_store._store) == NUM_SESSIONS
+        assert fresh_store.stats()["expired"] == NUM_EXPIRED
+        
+        logger.info("✅ PASSED: Purges touch only due sessions")
+    
+    @pytest.mark.stress
+    def test_throughput_with_many_active_sessions(self, fresh_store):
+        """Get/set throughput with 10,000 active sessions against the full-scan store."""
+        NUM_SESSIONS = 10000
+        NUM_OPS = 2000
+        conversation = create_conversation(3)
+        
+        def run(store):
+            for i in range(NUM_SESSIONS):
+                store.set(f"session-{i}", conversation, 3600)
+            start = time.perf_counter()
+            for i in range(NUM_OPS):
+                key = f"session-{(i * 7919) % NUM_SESSIONS}"
+                store.set(key, store.get(key) + [{"role": "user", "content": f"msg {i}"}], 3600)
+            return NUM_OPS / (time.perf_counter() - start)
+        
+        legacy_ops = run(_FullScanStore())
+        heap_ops = run(fresh_store)
+        
+        assert len(fresh_store._store) == NUM_SESSIONS
+        assert heap_ops > legacy_ops, "Expiry heap should not slow down with session count"
+        
+        logger.info("✅ PASSED: Throughput with many active sessions")
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #                    RUN ALL TESTS
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -923,5 +1067,5 @@ if __name__ == "__main__":
         "-v",
         "-s",
         "--tb=short",
-        # Add "-k stress" to run only stress tests
+        # Add "-m stress" to run only stress tests
     ])
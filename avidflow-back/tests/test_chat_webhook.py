@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Tests and load test for chat webhooks answered through the execution result
+channel: the webhook registers a waiter on WorkflowMessageHandler, enqueues
+execute_workflow(publish_result=True), and awaits the "execution_result"
+message instead of blocking the event loop on AsyncResult.get().
+
+The Celery task is replaced by a thread that sleeps for the simulated LLM run
+and then publishes through tasks.workflow.publish_execution_result, whose
+queue message is delivered to the handler as the RabbitMQ consumer would.
+The wall-clock comparison with blocking AsyncResult.get() is marked "stress".
+
+Run with: pytest tests/test_chat_webhook.py -v
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+from routers import webhook as webhook_router
+from services.workflow_message_handler import WorkflowMessageHandler
+from tasks import workflow as workflow_tasks
+
+WORKFLOW = SimpleNamespace(
+    id="wf-chat",
+    name="FAQ bot",
+    description=None,
+    user_id="user-1",
+    active=True,
+    created_at=None,
+    updated_at=None,
+    nodes=[{
+        "id": "chat", "name": "Chat", "type": "chat", "position": (0, 0),
+        "parameters": {}, "is_start": True, "is_webhook": True,
+    }],
+    connections={},
+)
+
+
+def chat_reply(message):
+    return {"result": {"final_result": [[{"json_data": {"output": f"echo: {message}"}}]]}}
+
+
+class _FakeExecuteWorkflow:
+    """Stands in for the Celery task: runs for ``latency`` seconds on another thread."""
+
+    def __init__(self, latency, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = []
+        self.gate = None  # threading.Barrier every run waits on before publishing
+
+    def apply_async(self, kwargs, task_id=None):
+        self.calls.append(kwargs)
+        threading.Thread(target=self._run, args=(kwargs,), daemon=True).start()
+        return SimpleNamespace(id=task_id, get=self._blocking_get(kwargs))
+
+    def _run(self, kwargs):
+        time.sleep(self.latency)
+        if self.gate is not None:
+            self.gate.wait()
+        if kwargs.get("publish_result"):
+            response = {"status": "error", "error": "LLM failed"} if self.fail else \
+                chat_reply(kwargs["primary_result"]["message"])
+            workflow_tasks.publish_execution_result(
+                WORKFLOW.id, kwargs["execution_id"], response
+            )
+
+    def _blocking_get(self, kwargs):
+        def get():
+            time.sleep(self.latency)
+            return chat_reply(kwargs["primary_result"]["message"])
+        return get
+
+
+class ChatWebhookTestCase(unittest.IsolatedAsyncioTestCase):
+
+    LATENCY = 0.2
+
+    async def asyncSetUp(self):
+        self.loop = asyncio.get_running_loop()
+        self.handler = WorkflowMessageHandler()
+        self.task = _FakeExecuteWorkflow(self.LATENCY)
+        self.published = []
+
+        def publish_sync(queue_name, message, persistent=True):
+            # What WorkflowMessageConsumer does with a workflow_updates message
+            self.published.append((queue_name, message, persistent))
+            asyncio.run_coroutine_threadsafe(self.handler.handle_message(message), self.loop)
+            return True
+
+        async def no_db():
+            yield None
+
+        app = FastAPI()
+        app.include_router(webhook_router.router)
+        app.state.message_handler = self.handler
+        app.dependency_overrides[webhook_router.get_db_from_app] = no_db
+        for patcher in (
+            patch.object(webhook_router.WebhookCRUD, "get_webhook_by_id",
+                         AsyncMock(return_value=SimpleNamespace(workflow_id=WORKFLOW.id))),
+            patch.object(webhook_router.WorkflowCRUD, "get_workflow", AsyncMock(return_value=WORKFLOW)),
+            patch.object(webhook_router.ExecutionCRUD, "create_execution", AsyncMock()),
+            patch.object(workflow_tasks, "execute_workflow", self.task),
+            patch.object(workflow_tasks.queue_service, "publish_sync", publish_sync),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        self.addAsyncCleanup(self.client.aclose)
+
+    async def chat(self, message):
+        return await self.client.post("/webhook/hook-1/chat", json={"message": message})
+
+
+class TestChatWebhook(ChatWebhookTestCase):
+
+    async def test_result_is_awaited_and_returned(self):
+        response = await self.chat("hello")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"output": "echo: hello"})
+
+        kwargs = self.task.calls[0]
+        self.assertTrue(kwargs["publish_result"])
+        self.assertFalse(kwargs["allow_suspend"])
+        queue_name, message, persistent = self.published[0]
+        self.assertEqual((queue_name, message["event"], persistent), ("workflow_updates", "execution_result", False))
+        self.assertEqual(message["execution_id"], kwargs["execution_id"])
+        self.assertEqual(self.handler.execution_result_waiters, {})
+
+    async def test_error_result(self):
+        self.task.fail = True
+        response = await self.chat("hello")
+        self.assertEqual(response.json(), "خطا در پردازش درخواست چت")
+
+    async def test_timeout(self):
+        with patch.object(webhook_router.settings, "CHAT_WEBHOOK_TIMEOUT_SECONDS", 0.05):
+            response = await self.chat("hello")
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(self.handler.execution_result_waiters, {})
+
+    async def test_result_for_another_worker_is_forwarded(self):
+        exchange = SimpleNamespace(publish=AsyncMock())
+        self.handler.websocket_exchange = exchange
+        await self.handler.handle_message({
+            "event": "execution_result", "workflow_id": "wf", "execution_id": "elsewhere",
+            "result": {"status": "success", "final_result": []},
+        })
+        exchange.publish.assert_awaited_once()
+
+        # The worker holding the waiter receives it through the fanout exchange
+        await self.handler.register_execution_result_waiter("exec-1")
+        await self.handler.handle_websocket_coordination_message(
+            {"type": "execution_result", "execution_id": "exec-1", "result": {"status": "success"}}
+        )
+        self.assertEqual(await self.handler.wait_for_execution_result("exec-1", timeout=1), {"status": "success"})
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class TestUnpublishedResult(ChatWebhookTestCase):
+
+    async def asyncSetUp(self):
+        self.execute_workflow = workflow_tasks.execute_workflow
+        await super().asyncSetUp()
+        # The task's and the API worker's clients share one server
+        server = fakeredis.FakeServer()
+        self.sync_redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+        self.handler.attach_registry(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+        for patcher in (
+            patch.object(workflow_tasks, "get_sync_redis", return_value=self.sync_redis),
+            patch.object(workflow_tasks.settings, "CHAT_WEBHOOK_RESULT_POLL_SECONDS", 0.05),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_failed_publish_is_answered_from_redis(self):
+        with patch.object(workflow_tasks.queue_service, "publish_sync", return_value=False):
+            response = await self.chat("hello")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"output": "echo: hello"})
+        execution_id = self.task.calls[0]["execution_id"]
+        self.assertIsNone(self.sync_redis.get(f"execution_result_fallback:{execution_id}"))
+
+    async def test_publish_errors_do_not_raise(self):
+        with patch.object(workflow_tasks.queue_service, "publish_sync", side_effect=ConnectionError("down")):
+            self.assertTrue(workflow_tasks.publish_execution_result("wf", "exec-1", {"status": "error"}))
+        with patch.object(workflow_tasks, "get_sync_redis", return_value=MagicMock(set=MagicMock(side_effect=OSError))), \
+                patch.object(workflow_tasks.queue_service, "publish_sync", return_value=False):
+            self.assertFalse(workflow_tasks.publish_execution_result("wf", "exec-2", {"status": "error"}))
+        self.assertIsNotNone(self.sync_redis.get("execution_result_fallback:exec-1"))
+        self.assertIsNone(self.sync_redis.get("execution_result_fallback:exec-2"))
+
+    async def test_task_failure_is_not_masked(self):
+        with patch.object(workflow_tasks, "prepare_workflow", return_value=object()), \
+                patch.object(workflow_tasks, "run_workflow", side_effect=RuntimeError("engine crashed")), \
+                patch.object(workflow_tasks.queue_service, "publish_sync", side_effect=ConnectionError("down")):
+            with self.assertRaisesRegex(RuntimeError, "engine crashed"):
+                self.execute_workflow.run(
+                    execution_id="exec-1", user_id="user-1", publish_result=True, workflow_data=WORKFLOW,
+                )
+
+
+class TestChatWebhookLoad(ChatWebhookTestCase):
+    """Concurrent chat requests against one event loop (one uvicorn worker)."""
+
+    CONCURRENCY = 20
+
+    async def test_concurrent_chats_share_the_event_loop(self):
+        # No task publishes before all of them started: a request blocking the
+        # event loop would keep the others from being enqueued and break the gate
+        self.task.gate = threading.Barrier(self.CONCURRENCY, timeout=10)
+        responses = await asyncio.gather(*(self.chat(f"q{i}") for i in range(self.CONCURRENCY)))
+        self.assertEqual([r.json() for r in responses], [{"output": f"echo: q{i}"} for i in range(self.CONCURRENCY)])
+        self.assertFalse(self.task.gate.broken)
+        self.assertEqual(self.handler.execution_result_waiters, {})
+
+    @pytest.mark.stress
+    async def test_awaited_chats_outpace_blocking_get(self):
+        started = time.perf_counter()
+        await asyncio.gather(*(self.chat(f"q{i}") for i in range(self.CONCURRENCY)))
+        awaited_time = time.perf_counter() - started
+
+        # Previous handler: AsyncResult.get() inside the async endpoint
+        async def blocking_chat(i):
+            kwargs = {"primary_result": {"message": f"q{i}"}}
+            return self.task.apply_async(kwargs=kwargs).get()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(blocking_chat(i) for i in range(5)))
+        blocking_time = (time.perf_counter() - started) * self.CONCURRENCY / 5
+
+        self.assertLess(awaited_time, self.LATENCY * 3)
+        self.assertGreater(blocking_time, self.LATENCY * self.CONCURRENCY * 0.9)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for the reverse connection index used by BaseNode input preprocessing.
+
+The index is checked against a brute-force scan of workflow.connections (the
+previous per-node algorithm), and a 300-node synthetic workflow is used to
+compare the cost of constructing every node with and without it ("stress").
+
+Run with: pytest tests/test_connection_index.py -v
+"""
+
+import sys
+import os
+import time
+import random
+import unittest
+from typing import Any, Dict, List
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.execution import ExecutionPlanBuilder, InputConnectionIndex, WorkflowExecutionContext
+from models import NodeExecutionData, WorkflowModel
+from nodes.base import BaseNode
+
+
+class _PlainNode(BaseNode):
+    type = "plainTest"
+    version = 1
+    description = {}
+    properties = {}
+
+
+def make_workflow(node_count: int, fan_in: int = 3, seed: int = 7) -> WorkflowModel:
+    """Layered DAG: every node gets up to `fan_in` main inputs plus an occasional ai_tool edge."""
+    rng = random.Random(seed)
+    names = [f"Node {i}" for i in range(node_count)]
+    connections: Dict[str, Any] = {}
+    for i, target in enumerate(names[1:], start=1):
+        for source in rng.sample(names[:i], min(fan_in, i)):
+            conn_type = "ai_tool" if rng.random() < 0.1 else "main"
+            outputs = connections.setdefault(source, {}).setdefault(conn_type, [])
+            output_index = rng.randint(0, 1)
+            while len(outputs) <= output_index:
+                outputs.append([])
+            outputs[output_index].append(
+                {"node": target, "type": conn_type, "index": rng.randint(0, 1)}
+            )
+    return WorkflowModel(
+        id="wf-big",
+        name="synthetic",
+        nodes=[
+            {"id": name, "name": name, "type": "plainTest", "position": (0, 0), "parameters": {}}
+            for name in names
+        ],
+        connections=connections,
+    )
+
+
+def make_execution_data(workflow: WorkflowModel) -> Dict[str, List[List[NodeExecutionData]]]:
+    return {
+        node.name: [
+            [NodeExecutionData(json_data={"from": node.name, "output": 0})],
+            [NodeExecutionData(json_data={"from": node.name, "output": 1})],
+        ]
+        for node in workflow.nodes
+    }
+
+
+def legacy_preprocess(node_name: str, workflow: WorkflowModel, execution_data: Dict[str, Any]):
+    """Reference implementation: full scan of workflow.connections for one node."""
+    connections = workflow.connections
+    input_data: Dict[str, List[list]] = {}
+    conn_types = set()
+    for source_connections in connections.values():
+        conn_types.update(source_connections.keys())
+    for conn_type in conn_types or {"main"}:
+        max_index = 0
+        for source_connections in connections.values():
+            for outputs in source_connections.get(conn_type, []):
+                for conn in outputs or []:
+                    if conn.node == node_name:
+                        max_index = max(max_index, conn.index)
+        input_data[conn_type] = [[] for _ in range(max_index + 1)]
+    for source, source_connections in connections.items():
+        for conn_type, outputs in source_connections.items():
+            for output_index, conn_list in enumerate(outputs):
+                for conn in conn_list or []:
+                    if conn.node != node_name:
+                        continue
+                    source_data = execution_data.get(source, [])
+                    if len(source_data) > output_index and source_data[output_index]:
+                        input_data[conn_type][conn.index].extend(source_data[output_index])
+    return input_data
+
+
+class TestInputConnectionIndex(unittest.TestCase):
+
+    def test_matches_full_scan(self):
+        workflow = make_workflow(60)
+        execution_data = make_execution_data(workflow)
+        for node_model in workflow.nodes:
+            node = _PlainNode(node_model, workflow, execution_data)
+            self.assertEqual(
+                node.input_data,
+                legacy_preprocess(node_model.name, workflow, execution_data),
+                node_model.name,
+            )
+
+    def test_index_built_once_per_workflow(self):
+        workflow = make_workflow(20)
+        context = WorkflowExecutionContext(workflow=workflow, execution_id="exec-1")
+        self.assertIsInstance(context.input_index, InputConnectionIndex)
+        self.assertIs(ExecutionPlanBuilder(workflow).build_input_index(), context.input_index)
+
+        execution_data = make_execution_data(workflow)
+        node = _PlainNode(workflow.nodes[5], workflow, execution_data)
+        self.assertIs(node._get_input_index(), context.input_index)
+
+    def test_replacing_connections_rebuilds_index(self):
+        workflow = make_workflow(10)
+        first = ExecutionPlanBuilder.input_index_for(workflow)
+        workflow.connections = {}
+        second = ExecutionPlanBuilder.input_index_for(workflow)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.inputs_for("Node 3"), [])
+
+    def test_node_without_inputs(self):
+        workflow = make_workflow(5)
+        node = _PlainNode(workflow.nodes[0], workflow, make_execution_data(workflow))
+        self.assertEqual(node.input_data["main"], [[]])
+        self.assertEqual(node._get_max_input_index("main"), 0)
+
+
+class TestConnectionIndexBenchmark(unittest.TestCase):
+
+    @pytest.mark.stress
+    def test_300_node_workflow(self):
+        workflow = make_workflow(300)
+        execution_data = make_execution_data(workflow)
+
+        started = time.perf_counter()
+        for node_model in workflow.nodes:
+            legacy_preprocess(node_model.name, workflow, execution_data)
+        legacy = time.perf_counter() - started
+
+        started = time.perf_counter()
+        ExecutionPlanBuilder(workflow).build_input_index()
+        for node_model in workflow.nodes:
+            _PlainNode(node_model, workflow, execution_data)
+        indexed = time.perf_counter() - started
+
+        self.assertLess(indexed, legacy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for execution-scoped and worker-level credential caching used by
+BaseNode.get_credentials / update_credentials.
+
+Run with: pytest tests/test_credential_cache.py -v
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Node, WorkflowModel
+from nodes.base import BaseNode
+from utils.credential_cache import ExecutionCredentialCache, WorkerCredentialLRU
+
+
+class _CredentialNode(BaseNode):
+    type = "credentialTest"
+    version = 1
+    description = {}
+    properties = {}
+
+
+def make_node(execution=None) -> BaseNode:
+    node_model = Node(
+        id="n1",
+        name="HTTP",
+        type="credentialTest",
+        position=(0, 0),
+        parameters={},
+        credentials={"httpHeaderAuth": {"id": "cred-1", "name": "My header"}},
+    )
+    workflow = WorkflowModel(id="wf", name="wf", nodes=[node_model], connections={})
+    node = _CredentialNode(node_model, workflow, {})
+    node.execution = execution
+    return node
+
+
+class TestExecutionCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        self.db_reads = 0
+
+        def fake_decrypt(data):
+            self.db_reads += 1
+            return {"name": "X-Token", "value": data}
+
+        credential = MagicMock(data="secret-v1")
+        crud = MagicMock()
+        crud.return_value.get_credential_sync.return_value = credential
+        self.credential = credential
+        self.patches = [
+            patch("nodes.base.get_sync_session_manual", MagicMock()),
+            patch("nodes.base.CredentialCRUD", crud),
+            patch("nodes.base.decrypt_credential_data", fake_decrypt),
+            patch("nodes.base.encrypt_credential_data", lambda data: "encrypted"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_per_item_calls_hit_db_once(self):
+        execution = MagicMock(credential_cache=ExecutionCredentialCache(WorkerCredentialLRU(0)))
+        node = make_node(execution)
+
+        for _ in range(500):
+            creds = node.get_credentials("httpHeaderAuth")
+        self.assertEqual(creds["value"], "secret-v1")
+        self.assertEqual(self.db_reads, 1)
+
+        stats = execution.credential_cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 499)
+
+    def test_cache_is_shared_across_nodes_of_one_execution(self):
+        execution = MagicMock(credential_cache=ExecutionCredentialCache(WorkerCredentialLRU(0)))
+        make_node(execution).get_credentials("httpHeaderAuth")
+        make_node(execution).get_credentials("httpHeaderAuth")
+        self.assertEqual(self.db_reads, 1)
+
+    def test_returned_dict_is_a_copy(self):
+        execution = MagicMock(credential_cache=ExecutionCredentialCache(WorkerCredentialLRU(0)))
+        node = make_node(execution)
+        node.get_credentials("httpHeaderAuth")["value"] = "tampered"
+        self.assertEqual(node.get_credentials("httpHeaderAuth")["value"], "secret-v1")
+
+    def test_update_credentials_refreshes_cache(self):
+        execution = MagicMock(credential_cache=ExecutionCredentialCache(WorkerCredentialLRU(0)))
+        node = make_node(execution)
+        node.get_credentials("httpHeaderAuth")
+
+        node.update_credentials("httpHeaderAuth", {"name": "X-Token", "value": "refreshed"})
+        self.assertEqual(node.get_credentials("httpHeaderAuth")["value"], "refreshed")
+        self.assertEqual(self.db_reads, 1)
+
+    def test_without_execution_context_reads_db_every_time(self):
+        node = make_node(execution=None)
+        node.get_credentials("httpHeaderAuth")
+        node.get_credentials("httpHeaderAuth")
+        self.assertEqual(self.db_reads, 2)
+
+    def test_unknown_credential_type(self):
+        node = make_node(execution=None)
+        self.assertIsNone(node.get_credentials("oAuth2Api"))
+        self.assertEqual(self.db_reads, 0)
+
+
+class TestWorkerCredentialLRU(unittest.TestCase):
+
+    def test_shared_across_executions_until_ttl(self):
+        worker = WorkerCredentialLRU(ttl_seconds=0.05)
+        loader = MagicMock(return_value={"token": "a"})
+
+        ExecutionCredentialCache(worker).get("c1", loader)
+        ExecutionCredentialCache(worker).get("c1", loader)
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(worker.stats()["hits"], 1)
+
+        time.sleep(0.06)
+        ExecutionCredentialCache(worker).get("c1", loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_lru_eviction(self):
+        worker = WorkerCredentialLRU(ttl_seconds=60, max_entries=2)
+        worker.set("a", {})
+        worker.set("b", {})
+        worker.get("a")
+        worker.set("c", {})
+        self.assertIsNone(worker.get("b"))
+        self.assertIsNotNone(worker.get("a"))
+        self.assertEqual(worker.stats()["evictions"], 1)
+
+    def test_disabled_by_default_ttl(self):
+        worker = WorkerCredentialLRU(ttl_seconds=0)
+        worker.set("a", {"x": 1})
+        self.assertIsNone(worker.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Tests for durable (checkpoint + timed resume) Wait nodes.
+
+The Wait node is run through WorkflowExecutor with time.sleep patched to fail,
+so a passing test proves the wait never blocks a worker: the executor returns
+a "waiting" result with a JSON checkpoint, and a fresh context restored from
+that checkpoint finishes the remaining nodes without re-running earlier ones.
+
+Run with: pytest tests/test_durable_wait.py -v
+"""
+
+import sys
+import os
+import json
+import threading
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from unittest.mock import patch, MagicMock
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.execution import ExecutionPlanBuilder, WorkflowExecutionContext, WorkflowExecutor
+from models import Node, NodeExecutionData, WorkflowModel
+from nodes.wait import WaitNode
+from services.resume_scheduler import RESUME_TASKS_KEY, RESUMES_KEY, ResumeScheduler, defer_resume
+from utils.concurrency import BoundedExecutor
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+CALLS: List[str] = []
+CALLS_LOCK = threading.Lock()
+
+
+class RecordingNode:
+    """Emits one item tagged with its name and records that it ran."""
+
+    def __init__(self, node_data: Node, workflow: WorkflowModel, execution_data: Dict[str, Any]):
+        self.name = node_data.name
+        self.execution = None
+
+    def set_execution_id(self, execution_id: str) -> None:
+        pass
+
+    def execute(self) -> List[List[NodeExecutionData]]:
+        with CALLS_LOCK:
+            CALLS.append(self.name)
+        return [[NodeExecutionData(json_data={"node": self.name})]]
+
+    trigger = execute
+
+
+class FailingNode(RecordingNode):
+
+    def execute(self) -> List[List[NodeExecutionData]]:
+        raise RuntimeError(f"{self.name} failed")
+
+
+class ToolCallingNode(RecordingNode):
+    """Runs a Wait node the way the agent tool runner does: sharing its execution."""
+
+    def __init__(self, node_data: Node, workflow: WorkflowModel, execution_data: Dict[str, Any]):
+        super().__init__(node_data, workflow, execution_data)
+        self.workflow = workflow
+
+    def execute(self) -> List[List[NodeExecutionData]]:
+        tool_model = Node(id="tool", name="Wait Tool", type="wait", position=(0, 0), parameters={"amount": 30})
+        tool = WaitNode(tool_model, self.workflow, {})
+        tool.execution = self.execution
+        tool.input_data = {"main": [[NodeExecutionData(json_data={"node": self.name})]]}
+        return tool.execute()
+
+
+NODE_DEFINITIONS = {
+    "record": {"node_class": RecordingNode, "type": "regular"},
+    "wait": {"node_class": WaitNode, "type": "regular"},
+    "fail": {"node_class": FailingNode, "type": "regular"},
+    "agent": {"node_class": ToolCallingNode, "type": "regular"},
+}
+
+
+def make_workflow(nodes: Dict[str, Dict[str, Any]], edges: List[tuple]) -> WorkflowModel:
+    connections: Dict[str, Any] = {}
+    for source, target in edges:
+        outputs = connections.setdefault(source, {"main": [[]]})["main"]
+        outputs[0].append({"node": target, "type": "main", "index": 0})
+    return WorkflowModel(
+        id="wf-wait",
+        name="wait test",
+        nodes=[
+            {
+                "id": name,
+                "name": name,
+                "type": spec.get("type", "record"),
+                "position": (0, 0),
+                "parameters": spec.get("parameters", {}),
+                "is_start": spec.get("is_start", False),
+            }
+            for name, spec in nodes.items()
+        ],
+        connections=connections,
+    )
+
+
+WAIT_WORKFLOW = {
+    "Start": {"is_start": True},
+    "Wait": {"type": "wait", "parameters": {"amount": 30}},
+    "After": {},
+}
+WAIT_EDGES = [("Start", "Wait"), ("Wait", "After")]
+
+
+@contextmanager
+def patched_engine():
+    with patch("engine.execution.node_definitions", NODE_DEFINITIONS), \
+            patch("engine.execution.get_sync_session_manual", MagicMock()), \
+            patch("engine.execution.ExecutionCRUD", MagicMock()):
+        yield
+
+
+def execute(workflow: WorkflowModel, can_suspend: bool = True, checkpoint: Dict[str, Any] = None,
+            parallel: bool = False) -> Dict[str, Any]:
+    context = WorkflowExecutionContext(workflow=workflow, execution_id="exec-wait")
+    context.can_suspend = can_suspend
+    if checkpoint:
+        context.restore_checkpoint(checkpoint)
+    executor = WorkflowExecutor(context, parallel=parallel, max_workers=4)
+    sorted_nodes = ExecutionPlanBuilder(workflow).topological_sort()
+    return executor.execute_nodes(sorted_nodes)
+
+
+def run(workflow: WorkflowModel, **kwargs) -> Dict[str, Any]:
+    with patched_engine():
+        return execute(workflow, **kwargs)
+
+
+def _no_sleep(seconds):
+    raise AssertionError(f"Wait node slept inline for {seconds}s")
+
+
+@patch("nodes.wait.time.sleep", _no_sleep)
+@patch("nodes.wait.settings.DURABLE_WAIT_MIN_SECONDS", 1)
+class TestDurableWait(unittest.TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_wait_suspends_then_resumes_from_checkpoint(self):
+        workflow = make_workflow(WAIT_WORKFLOW, WAIT_EDGES)
+        before = datetime.now(timezone.utc)
+        result = run(workflow)
+
+        self.assertEqual(result["status"], "waiting")
+        self.assertEqual(CALLS, ["Start"])
+        resume_at = datetime.fromisoformat(result["resume_at"])
+        self.assertGreaterEqual(resume_at, before + timedelta(seconds=30))
+
+        # Checkpoint survives a JSON round trip (it is stored in ExecutionData)
+        checkpoint = json.loads(json.dumps(result["checkpoint"]))
+        self.assertEqual(checkpoint["completed_nodes"], ["Start", "Wait"])
+        self.assertIn("After", checkpoint["active_nodes"])
+
+        resumed = run(workflow, checkpoint=checkpoint)
+        self.assertEqual(resumed["status"], "completed")
+        self.assertEqual(CALLS, ["Start", "After"])
+        self.assertEqual(set(resumed["all_results"]), {"Start", "Wait", "After"})
+        self.assertEqual(resumed["final_result"][0][0].json_data["node"], "After")
+        self.assertEqual(resumed["all_results"]["Wait"][0][0].json_data["node"], "Start")
+
+    def test_parallel_mode_resumes_remaining_nodes(self):
+        nodes = dict(WAIT_WORKFLOW, Other={})
+        workflow = make_workflow(nodes, WAIT_EDGES + [("Start", "Other")])
+        result = run(workflow, parallel=True)
+        self.assertEqual(result["status"], "waiting")
+        self.assertNotIn("After", CALLS)
+
+        resumed = run(workflow, checkpoint=result["checkpoint"], parallel=True)
+        self.assertEqual(resumed["status"], "completed")
+        self.assertEqual(sorted(CALLS), ["After", "Other", "Start"])
+
+    def test_thousands_of_waits_hold_no_worker(self):
+        """2000 executions with a 30s wait each all suspend on 8 workers without sleeping."""
+        workflow = make_workflow(WAIT_WORKFLOW, WAIT_EDGES)
+        executions = 2000
+
+        # Patch once: patching module globals from several threads at once is not safe
+        with patched_engine(), BoundedExecutor(8, name_prefix="wait-test") as pool:
+            futures = [pool.submit(execute, workflow) for _ in range(executions)]
+            statuses = [future.result()["status"] for future in futures]
+
+        self.assertEqual(statuses, ["waiting"] * executions)
+        self.assertNotIn("After", CALLS)
+
+
+class TestInlineWaitFallback(unittest.TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_sleeps_when_execution_cannot_suspend(self):
+        workflow = make_workflow(WAIT_WORKFLOW, WAIT_EDGES)
+        with patch("nodes.wait.time.sleep") as sleep:
+            result = run(workflow, can_suspend=False)
+        sleep.assert_called_once_with(30)
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(CALLS, ["Start", "After"])
+
+    def test_disabled_by_default(self):
+        workflow = make_workflow(WAIT_WORKFLOW, WAIT_EDGES)
+        with patch("nodes.wait.time.sleep") as sleep:
+            result = run(workflow)
+        sleep.assert_called_once_with(30)
+        self.assertEqual(result["status"], "completed")
+
+    @patch("nodes.wait.settings.DURABLE_WAIT_MIN_SECONDS", 1)
+    def test_wait_called_as_tool_sleeps_inline(self):
+        workflow = make_workflow({"Start": {"is_start": True}, "Agent": {"type": "agent"}, "After": {}},
+                                 [("Start", "Agent"), ("Agent", "After")])
+        with patch("nodes.wait.time.sleep") as sleep:
+            result = run(workflow)
+        sleep.assert_called_once_with(30)
+        self.assertEqual(result["status"], "completed")
+
+
+class TestScheduleResume(unittest.TestCase):
+
+    def test_persists_checkpoint_and_enqueues_with_eta(self):
+        from tasks import workflow as workflow_tasks
+
+        workflow = make_workflow(WAIT_WORKFLOW, WAIT_EDGES)
+        with patch("nodes.wait.time.sleep", _no_sleep), patch("nodes.wait.settings.DURABLE_WAIT_MIN_SECONDS", 1):
+            result = run(workflow)
+
+        session = MagicMock()
+        with patch.object(workflow_tasks, "ExecutionCRUD") as crud, \
+                patch.object(workflow_tasks.execute_workflow, "apply_async") as apply_async:
+            response = workflow_tasks.schedule_resume(
+                session, workflow, "exec-wait", "user-1", {"body": {}}, True, result,
+            )
+
+        self.assertEqual(response["status"], "waiting")
+        args, kwargs = crud.update_execution_status_sync.call_args
+        self.assertEqual(args[2], "waiting")
+        self.assertEqual(kwargs["data"]["checkpoint"], result["checkpoint"])
+
+        _, enqueue = apply_async.call_args
+        self.assertEqual(enqueue["eta"], datetime.fromisoformat(result["resume_at"]))
+        self.assertTrue(enqueue["kwargs"]["resume"])
+        self.assertTrue(enqueue["kwargs"]["pub_sub"])
+        self.assertEqual(enqueue["kwargs"]["execution_id"], "exec-wait")
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class TestDeferredResume(unittest.IsolatedAsyncioTestCase):
+    """Resumes beyond DURABLE_WAIT_MAX_ETA_SECONDS go through Redis, not eta tasks."""
+
+    async def test_long_wait_is_enqueued_by_the_scheduler(self):
+        from tasks import workflow as workflow_tasks
+
+        server = fakeredis.FakeServer()
+        sync_redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+        workflow = make_workflow(WAIT_WORKFLOW, WAIT_EDGES)
+        with patch("nodes.wait.time.sleep", _no_sleep), patch("nodes.wait.settings.DURABLE_WAIT_MIN_SECONDS", 1):
+            result = run(workflow)
+        resume_at = datetime.fromisoformat(result["resume_at"])
+
+        with patch.object(workflow_tasks, "ExecutionCRUD"), \
+                patch.object(workflow_tasks, "get_sync_redis", return_value=sync_redis), \
+                patch.object(workflow_tasks.settings, "DURABLE_WAIT_MAX_ETA_SECONDS", 10), \
+                patch.object(workflow_tasks.execute_workflow, "apply_async") as apply_async:
+            workflow_tasks.schedule_resume(MagicMock(), workflow, "exec-wait", "user-1", None, False, result)
+            apply_async.assert_not_called()
+            self.assertEqual(sync_redis.zscore(RESUMES_KEY, "exec-wait"), resume_at.timestamp())
+
+            # Two API workers, polled by hand
+            workers = [ResumeScheduler() for _ in range(2)]
+            for scheduler in workers:
+                scheduler.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+            self.assertEqual(await workers[0].poll_once(), 0)  # not due yet
+            with patch("services.resume_scheduler.time.time", return_value=resume_at.timestamp() + 1):
+                self.assertEqual([await w.poll_once() for w in workers], [1, 0])
+
+        _, enqueue = apply_async.call_args
+        self.assertNotIn("eta", enqueue)
+        self.assertEqual((enqueue["kwargs"]["execution_id"], enqueue["kwargs"]["resume"]), ("exec-wait", True))
+        self.assertEqual(sync_redis.hlen("durable_wait_resume_tasks"), 0)
+
+    async def test_failed_enqueue_keeps_the_resume(self):
+        from tasks import workflow as workflow_tasks
+
+        server = fakeredis.FakeServer()
+        sync_redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+        resume_at = datetime.now(timezone.utc)
+        defer_resume(sync_redis, "exec-wait", {"execution_id": "exec-wait", "resume": True}, resume_at)
+
+        scheduler = ResumeScheduler()
+        scheduler.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        due = resume_at.timestamp() + 1
+        with patch("services.resume_scheduler.time.time", return_value=due), \
+                patch.object(workflow_tasks.execute_workflow, "apply_async", side_effect=ConnectionError("broker down")):
+            self.assertEqual(await scheduler.poll_once(), 0)
+
+        # Still recorded, leased until the claim expires
+        self.assertEqual(sync_redis.zscore(RESUMES_KEY, "exec-wait"), due + scheduler.lease_seconds)
+        self.assertIsNotNone(sync_redis.hget(RESUME_TASKS_KEY, "exec-wait"))
+
+        with patch.object(workflow_tasks.execute_workflow, "apply_async") as apply_async:
+            with patch("services.resume_scheduler.time.time", return_value=due + 1):
+                self.assertEqual(await scheduler.poll_once(), 0)  # lease held
+            with patch("services.resume_scheduler.time.time", return_value=due + scheduler.lease_seconds):
+                self.assertEqual(await scheduler.poll_once(), 1)
+        apply_async.assert_called_once_with(kwargs={"execution_id": "exec-wait", "resume": True})
+        self.assertIsNone(sync_redis.zscore(RESUMES_KEY, "exec-wait"))
+        self.assertEqual(sync_redis.hlen(RESUME_TASKS_KEY), 0)
+
+
+class TestResumedExecutionFailure(unittest.TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_checkpoint_is_deleted_when_resumed_run_fails(self):
+        from tasks import workflow as workflow_tasks
+
+        nodes = {"Start": {"is_start": True}, "Wait": {"type": "wait", "parameters": {"amount": 30}},
+                 "Broken": {"type": "fail"}}
+        workflow = make_workflow(nodes, [("Start", "Wait"), ("Wait", "Broken")])
+        with patch("nodes.wait.time.sleep", _no_sleep), patch("nodes.wait.settings.DURABLE_WAIT_MIN_SECONDS", 1):
+            checkpoint = run(workflow)["checkpoint"]
+
+        with patched_engine(), \
+                patch.object(workflow_tasks, "get_sync_session_manual", MagicMock()), \
+                patch.object(workflow_tasks, "ExecutionCRUD") as crud:
+            crud.get_execution_checkpoint_sync.return_value = checkpoint
+            response = workflow_tasks.run_workflow(
+                workflow_tasks.prepare_workflow(workflow), "exec-wait", "user-1", resume=True,
+            )
+
+        self.assertEqual(response["result"]["status"], "error")
+        self.assertEqual(CALLS, ["Start"])  # Start ran once, before the suspension
+        last_update = crud.update_execution_status_sync.call_args
+        self.assertEqual(last_update.kwargs["data"], {"checkpoint": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
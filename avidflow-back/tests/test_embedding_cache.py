@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed embedding cache (utils/embedding_cache.py) and
+its use by OpenAIEmbeddingProvider and Retriever.insert_documents.
+
+The OpenAI /embeddings endpoint is replaced by a fake that derives a vector
+from the text and counts calls.
+
+Run with: pytest tests/test_embedding_cache.py -v
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import requests
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+from utils.embedding_cache import (
+    MemoryEmbeddingCache,
+    RedisEmbeddingCache,
+    SQLiteEmbeddingCache,
+    TieredEmbeddingCache,
+    embedding_key,
+)
+from utils.embedding_providers import EmbeddingProviderFactory, OpenAIEmbeddingProvider
+from utils.qdrant_retriever import Retriever
+
+
+def fake_vector(text, dims=8):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [b / 255 for b in digest[:dims]]
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, texts):
+        self._data = {"data": [{"embedding": fake_vector(t)} for t in texts]}
+
+    def json(self):
+        return self._data
+
+
+class _FakeEmbeddingsAPI:
+    def __init__(self):
+        self.batches = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.batches.append(list(json["input"]))
+        return _FakeResponse(json["input"])
+
+    @property
+    def texts(self):
+        return sum(len(batch) for batch in self.batches)
+
+
+class _FakeAdapter:
+    def __init__(self):
+        self.points = {}
+
+    def upsert_points(self, collection_name, points, wait=True):
+        self.points.update((p["id"], {**p, "vector": [float(v) for v in p["vector"]]}) for p in points)
+        return {"status": "completed"}
+
+
+class EmbeddingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.api = _FakeEmbeddingsAPI()
+        patcher = patch.object(
+            requests.Session, "post", lambda session, url, **kwargs: self.api.post(url, **kwargs)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def provider(self, cache, **kwargs):
+        return OpenAIEmbeddingProvider(api_key="sk-test", cache=cache, **kwargs)
+
+
+class TestEmbeddingCache(EmbeddingTestCase):
+
+    def test_only_misses_reach_the_api(self):
+        provider = self.provider(MemoryEmbeddingCache(100), batch_size=2, max_concurrency=1)
+        texts = ["alpha", "beta", "alpha", "gamma"]
+        self.assertEqual(provider.generate_embeddings(texts), [fake_vector(t) for t in texts])
+        # "alpha" is embedded once; 3 distinct texts in batches of 2
+        self.assertEqual(self.api.batches, [["alpha", "beta"], ["gamma"]])
+
+        texts = ["gamma", "delta", "beta"]
+        self.assertEqual(provider.generate_embeddings(texts), [fake_vector(t) for t in texts])
+        self.assertEqual(self.api.batches[-1], ["delta"])
+
+        stats = provider.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["api_calls"]), (2, 4, 3))
+        self.assertEqual(stats["hit_rate"], round(2 / 6, 4))
+
+    def test_key_includes_endpoint_model_and_dimensions(self):
+        cache = MemoryEmbeddingCache(100)
+        self.provider(cache).generate_embeddings(["text"])
+        self.provider(cache, dimensions=256).generate_embeddings(["text"])
+        self.provider(cache, model="text-embedding-3-large").generate_embeddings(["text"])
+        self.provider(cache, base_url="https://llm.internal/v1").generate_embeddings(["text"])
+        self.provider(cache, base_url="https://llm.internal/v1/").generate_embeddings(["text"])
+        self.assertEqual(len(self.api.batches), 4)
+        self.assertNotEqual(
+            embedding_key("https://a/v1", "m", None, "text"), embedding_key("https://a/v1", "m", 256, "text")
+        )
+        self.assertNotEqual(
+            embedding_key("https://a/v1", "m", None, "text"), embedding_key("https://b/v1", "m", None, "text")
+        )
+
+    def test_lru_bound(self):
+        cache = MemoryEmbeddingCache(max_entries=2)
+        cache.set_many({"a": [1.0], "b": [2.0]})
+        cache.get_many(["a"])
+        cache.set_many({"c": [3.0]})
+        self.assertEqual(cache.get_many(["a", "b", "c"]), {"a": [1.0], "c": [3.0]})
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_cache_disabled(self):
+        provider = OpenAIEmbeddingProvider(api_key="sk-test", use_cache=False)
+        provider.generate_embeddings(["x"])
+        provider.generate_embeddings(["x"])
+        self.assertEqual(len(self.api.batches), 2)
+
+    def test_factory_passes_cache(self):
+        cache = MemoryEmbeddingCache(10)
+        provider = EmbeddingProviderFactory.create("openai", {"api_key": "sk-test", "cache": cache})
+        self.assertIs(provider.cache, cache)
+
+
+class TestPersistentTiers(EmbeddingTestCase):
+
+    def test_reindex_unchanged_corpus_with_sqlite_tier(self):
+        corpus = [{"text": f"Article {i}: " + "statute text " * 30, "source": "law.pdf"} for i in range(250)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "embeddings.sqlite3")
+
+            def retriever():
+                # A fresh memory tier each time, as after a worker restart
+                cache = TieredEmbeddingCache([MemoryEmbeddingCache(50), SQLiteEmbeddingCache(path)])
+                return Retriever(_FakeAdapter(), self.provider(cache)), cache
+
+            first, _ = retriever()
+            first.insert_documents("docs", corpus)
+            calls = len(self.api.batches)
+            self.assertEqual(calls, 3)  # 250 texts in batches of 100
+
+            second, cache = retriever()
+            second.insert_documents("docs", corpus)
+            self.assertEqual(len(self.api.batches), calls, "Unchanged corpus must not call the API")
+            self.assertEqual(second.adapter.points, first.adapter.points)
+            self.assertEqual(cache.stats()["tiers"][1]["hits"], 250)
+
+    def test_sqlite_row_bound(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = SQLiteEmbeddingCache(os.path.join(tmp, "embeddings.sqlite3"), max_rows=3)
+            cache.set_many({"a": [1.0], "b": [2.0]})
+            cache.set_many({"c": [3.0], "d": [4.0]})
+            # Rewriting "b" makes it the newest row, so "c" is the oldest now
+            cache.set_many({"b": [2.5], "e": [5.0]})
+            self.assertEqual(
+                cache.get_many(["a", "b", "c", "d", "e"]),
+                {"b": [2.5], "d": [4.0], "e": [5.0]},
+            )
+            stats = cache.stats()
+            self.assertEqual((stats["size"], stats["evictions"]), (3, 2))
+            cache.close()
+
+    @unittest.skipIf(fakeredis is None, "fakeredis not installed")
+    def test_redis_tier_backfills_memory(self):
+        client = fakeredis.FakeRedis()
+        redis_tier = RedisEmbeddingCache(client=client, ttl_seconds=60)
+        self.provider(TieredEmbeddingCache([MemoryEmbeddingCache(10), redis_tier])).generate_embeddings(["a", "b"])
+
+        memory = MemoryEmbeddingCache(10)
+        provider = self.provider(TieredEmbeddingCache([memory, redis_tier]))
+        self.assertEqual(provider.generate_embeddings(["b", "a"]), [fake_vector("b"), fake_vector("a")])
+        self.assertEqual(len(self.api.batches), 1)
+        self.assertEqual(memory.stats()["size"], 2)
+        self.assertTrue(0 < client.ttl(RedisEmbeddingCache.KEY_PREFIX + embedding_key(
+            provider.base_url, provider.model, None, "a")) <= 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
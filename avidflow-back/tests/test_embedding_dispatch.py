@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent embedding batch dispatch in OpenAIEmbeddingProvider:
+token-aware batch packing, order-preserving reassembly, bounded in-flight
+batches, and the shared Retry-After backoff on 429 responses.
+
+A local HTTP server stands in for the OpenAI /embeddings endpoint (with a
+fixed latency per request), so requests go through the real pooled session.
+
+The OpenAI Embeddings node and the Qdrant node's typed insert are run
+against the same server. The sequential vs. concurrent timing comparison is
+marked "stress".
+
+Run with: pytest tests/test_embedding_dispatch.py -v
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Node, NodeExecutionData, WorkflowModel
+from nodes.embeddings_openai import EmbeddingsOpenAINode
+from nodes.qdrantVectorStore import QdrantVectorStoreNode
+from utils.embedding_providers import OpenAIEmbeddingProvider
+from utils.http_pool import RetryAfterBackoff, parse_duration, retry_after_seconds
+from utils.qdrant_exceptions import EmbeddingError
+from utils.qdrant_models import InsertParams
+from utils.qdrant_retriever import Retriever
+
+
+def fake_vector(text):
+    return [float(len(text)), float(sum(map(ord, text)) % 997)]
+
+
+class _MockEmbeddingsServer:
+    """Threaded /embeddings endpoint that records batches and peak concurrency."""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.batches = []
+        self.rate_limited = 0  # number of upcoming requests answered with 429
+        self.retry_after_ms = "200"
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.request_times = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, payload, headers = server.handle(body["input"])
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def handle(self, texts):
+        with self._lock:
+            self.request_times.append(time.monotonic())
+            if self.rate_limited:
+                self.rate_limited -= 1
+                return 429, {"error": {"message": "Rate limit reached"}}, {"retry-after-ms": self.retry_after_ms}
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+            self.batches.append(list(texts))
+        return 200, {"data": [{"embedding": fake_vector(t)} for t in texts]}, {}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _WordEncoding:
+    """Stand-in tokenizer: one token per whitespace-separated word."""
+
+    def encode_ordinary(self, text):
+        return text.split()
+
+
+class DispatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _MockEmbeddingsServer()
+        self.addCleanup(self.server.close)
+        patcher = patch("utils.token_ledger.get_encoding", return_value=_WordEncoding())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def provider(self, **kwargs):
+        provider = OpenAIEmbeddingProvider(
+            api_key="sk-test", base_url=self.server.base_url, use_cache=False, **kwargs
+        )
+        self.addCleanup(provider.close)
+        return provider
+
+
+class TestBatchPacking(DispatchTestCase):
+
+    def test_packs_by_items_and_tokens(self):
+        provider = self.provider(batch_size=3, max_batch_tokens=10)
+        texts = ["one two", "three four five", "six", "w " * 8, "a", "b", "c", "d"]
+        # 2+3+1 tokens hit the item limit; 8+1+1 tokens fill the token budget before "c"
+        self.assertEqual(provider._pack_batches(texts), [(0, 3), (3, 6), (6, 8)])
+
+    def test_oversized_text_gets_its_own_batch(self):
+        provider = self.provider(max_batch_tokens=5)
+        self.assertEqual(provider._pack_batches(["a", "w " * 20, "b"]), [(0, 1), (1, 2), (2, 3)])
+
+    def test_retry_after_headers(self):
+        self.assertEqual(retry_after_seconds({"retry-after-ms": "250", "retry-after": "3"}), 0.25)
+        self.assertEqual(retry_after_seconds({"retry-after": "2"}), 2.0)
+        self.assertEqual(
+            retry_after_seconds({"x-ratelimit-reset-requests": "20ms", "x-ratelimit-reset-tokens": "1m0.5s"}),
+            60.5,
+        )
+        self.assertIsNone(retry_after_seconds({}))
+        self.assertEqual(parse_duration("6m0s"), 360.0)
+
+
+class TestConcurrentDispatch(DispatchTestCase):
+
+    def test_order_preserved_with_bounded_concurrency(self):
+        provider = self.provider(batch_size=5, max_concurrency=3)
+        texts = [f"document {i} " + "word " * (i % 7) for i in range(47)]
+        self.assertEqual(provider.generate_embeddings(texts), [fake_vector(t) for t in texts])
+        self.assertEqual(len(self.server.batches), 10)
+        self.assertEqual(self.server.peak_in_flight, 3)
+        self.assertEqual(sorted(t for batch in self.server.batches for t in batch), sorted(texts))
+
+    def test_rate_limit_pauses_all_batches(self):
+        self.server.rate_limited = 1
+        provider = self.provider(batch_size=2, max_concurrency=4)
+        texts = [f"text {i}" for i in range(8)]
+        self.assertEqual(provider.generate_embeddings(texts), [fake_vector(t) for t in texts])
+
+        stats = provider.cache_stats()
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["api_calls"], 5)
+        # Requests started after the 429 honour its 200ms Retry-After
+        first = self.server.request_times[0]
+        late = [t - first for t in self.server.request_times if t - first > 0.1]
+        self.assertTrue(late and min(late) >= 0.18, self.server.request_times)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.rate_limited = 10
+        self.server.retry_after_ms = "10"
+        provider = self.provider(max_retries=2)
+        with self.assertRaises(EmbeddingError) as ctx:
+            provider.generate_embeddings(["text"])
+        self.assertEqual(ctx.exception.details["status_code"], 429)
+        self.assertEqual(provider.api_calls, 3)
+
+    def test_backoff_falls_back_to_exponential(self):
+        backoff = RetryAfterBackoff(base_delay=0.1, max_delay=1.0)
+        delays = [backoff.on_retry({}, attempt) for attempt in range(6)]
+        self.assertTrue(all(0 < d <= 1.0 for d in delays), delays)
+        self.assertGreater(delays[3], delays[0])
+        self.assertEqual(backoff.retries, 6)
+
+
+class _FakeAdapter:
+    def __init__(self):
+        self.points = {}
+
+    def upsert_points(self, collection_name, points, wait=True):
+        self.points.update((p["id"], p) for p in points)
+        return {"status": "completed"}
+
+
+class TestNodes(DispatchTestCase):
+
+    def embeddings_node(self, texts, options):
+        node_model = Node(
+            id="e1",
+            name="OpenAI Embeddings",
+            type="ai_embedding",
+            position=(0, 0),
+            parameters={"model": "text-embedding-3-small", "dimensions": 2, "options": options},
+        )
+        workflow = WorkflowModel(id="wf", name="wf", nodes=[node_model], connections={})
+        node = EmbeddingsOpenAINode(node_model, workflow, {})
+        node.input_data = {"main": [[NodeExecutionData(json_data={"text": t}) for t in texts]]}
+        node.execution = None
+        return node
+
+    def test_embeddings_node_batches_item_texts(self):
+        texts = [f"item {i}" for i in range(12)]
+        node = self.embeddings_node(texts, {"baseUrl": self.server.base_url, "batchSize": 5, "maxConcurrency": 2})
+        with patch.object(EmbeddingsOpenAINode, "get_credentials", return_value={"apiKey": "sk-test"}):
+            [items] = node.execute()
+        self.assertEqual([item.json_data["embedding"] for item in items], [fake_vector(t) for t in texts])
+        self.assertEqual(sorted(len(batch) for batch in self.server.batches), [2, 5, 5])
+        self.assertLessEqual(self.server.peak_in_flight, 2)
+
+    def test_embeddings_node_reports_errors_per_item(self):
+        self.server.rate_limited = 10
+        self.server.retry_after_ms = "1"
+        node = self.embeddings_node(["a", "b"], {"baseUrl": self.server.base_url})
+        with patch.object(EmbeddingsOpenAINode, "get_credentials", return_value={"apiKey": "sk-test"}):
+            [items] = node.execute()
+        self.assertTrue(all("Rate limit" in item.json_data["embedding_error"] for item in items))
+
+    def test_typed_insert_closes_the_provider_sessions(self):
+        # Without an execution the provider creates (and must close) its own session pool
+        provider = OpenAIEmbeddingProvider(api_key="sk-test", base_url=self.server.base_url, use_cache=False)
+        retriever = Retriever(_FakeAdapter(), provider)
+
+        class _Node:
+            def _get_typed_documents(self):
+                return [{"text": "one"}, {"text": "two"}]
+
+            def _initialize_retriever(self):
+                return retriever
+
+        result = QdrantVectorStoreNode._insert_vectors_typed(_Node(), InsertParams(collection_name="docs"), 10)
+        self.assertEqual(result["inserted"], 2)
+        self.assertEqual(provider.http_sessions.stats()["created"], 1)
+        self.assertEqual(provider.http_sessions.stats()["sessions"], 0)
+
+
+class TestDispatchBenchmark(DispatchTestCase):
+
+    def run_provider(self, texts, max_concurrency):
+        provider = self.provider(batch_size=25, max_concurrency=max_concurrency)
+        started = time.perf_counter()
+        vectors = provider.generate_embeddings(texts)
+        return vectors, time.perf_counter() - started
+
+    def test_concurrent_matches_sequential(self):
+        texts = [f"chunk {i} " + "legal text " * 20 for i in range(100)]
+        sequential, _ = self.run_provider(texts, 1)
+        self.assertEqual(self.server.peak_in_flight, 1)
+        concurrent, _ = self.run_provider(texts, 4)
+        self.assertEqual(concurrent, sequential)
+        self.assertEqual(self.server.peak_in_flight, 4)
+
+    @pytest.mark.stress
+    def test_concurrent_vs_sequential(self):
+        texts = [f"chunk {i} " + "legal text " * 20 for i in range(400)]
+        sequential, sequential_time = self.run_provider(texts, 1)
+        concurrent, concurrent_time = self.run_provider(texts, 4)
+        self.assertEqual(concurrent, sequential)
+        self.assertLess(concurrent_time * 2.5, sequential_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
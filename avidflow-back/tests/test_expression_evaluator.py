@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled-expression fast path of ExpressionEngine.
+
+Covers n8n syntax rewriting, caching of compiled expressions/templates and a
+micro-benchmark of per-item evaluation cost (cached vs. re-parsing every time,
+marked "stress").
+
+Run with: pytest tests/test_expression_evaluator.py -v -s
+"""
+
+import sys
+import os
+import time
+import unittest
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.expression_evaluator import (
+    ExpressionEngine,
+    ExpressionError,
+    SafeExpressionEvaluator,
+    _parse_template,
+    compile_expression,
+    has_expression,
+)
+from unittest.mock import patch
+
+from models import Node, NodeExecutionData, WorkflowModel
+from nodes.base import BaseNode
+
+
+def make_context(index: int = 0) -> dict:
+    items = [NodeExecutionData(json_data={"id": i, "name": f"user {i}"}) for i in range(3)]
+    return {
+        "$json": {"id": index, "price": 12.5, "qty": 3, "from": "shop", "tags": ["a", "b"]},
+        "$items": items,
+        "$parameter": {"name": "value", "itemIndex": index},
+        "$node_ref": lambda name: {"json": {"node": name}},
+    }
+
+
+class TestExpressionSemantics(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ExpressionEngine()
+
+    def evaluate(self, value, index=0):
+        return self.engine.evaluate_parameter(value, make_context(index), index)
+
+    def test_literals_pass_through(self):
+        self.assertEqual(self.evaluate("plain text"), "plain text")
+        self.assertEqual(self.evaluate(42), 42)
+        self.assertFalse(has_expression("plain {text}"))
+        self.assertTrue(has_expression("={{ $json.id }}"))
+
+    def test_single_expression_keeps_type(self):
+        self.assertEqual(self.evaluate("{{ $json.price * $json.qty }}"), 37.5)
+        self.assertEqual(self.evaluate("{{ $json.tags }}"), ["a", "b"])
+
+    def test_mixed_template_is_stringified(self):
+        self.assertEqual(
+            self.evaluate("Order {{ $json.id }} x{{ $json.qty }} from {{ $json.from }}", 7),
+            "Order 7 x3 from shop",
+        )
+
+    def test_ternary_and_node_reference(self):
+        self.assertEqual(self.evaluate("{{ $json.qty > 2 ? 'many' : 'few' }}"), "many")
+        self.assertEqual(self.evaluate("{{ $('Webhook').json.node }}"), "Webhook")
+        self.assertEqual(self.evaluate('{{ $("Other").json.node }}'), "Other")
+
+    def test_helpers(self):
+        self.assertEqual(self.evaluate("{{ $item(1).name }}"), "user 1")
+        self.assertEqual(self.evaluate("{{ len($items()) }}"), 3)
+        self.assertEqual(self.evaluate("{{ Math.floor(2.9) }}"), 2)
+        self.assertEqual(self.evaluate("{{ jsonStringify($json.tags) }}"), '["a", "b"]')
+
+    def test_helpers_are_not_shared_between_engines(self):
+        self.evaluate("{{ Math.clear() }}")
+        other = ExpressionEngine()
+        self.assertEqual(other.evaluate_parameter("{{ Math.floor(2.9) }}", make_context(), 0), 2)
+
+    def test_helpers_cached_without_items(self):
+        context = {"$json": {"id": 1}}
+        first = self.engine._get_helper_functions(context, 0)
+        self.assertIs(self.engine._get_helper_functions(dict(context), 0), first)
+        self.assertEqual(self.engine.evaluate_parameter("{{ $items() }}", context, 0), [])
+        self.assertEqual(self.engine.evaluate_parameter("{{ $item() }}", context, 0), {})
+
+    def test_missing_values_are_none(self):
+        self.assertIsNone(self.evaluate("{{ $json.missing.deeper }}"))
+        self.assertIsNone(self.evaluate("{{ $json.tags[10] }}"))
+
+    def test_errors(self):
+        with self.assertRaises(ExpressionError):
+            self.evaluate("{{ undefined_name }}")
+        with self.assertRaises(ExpressionError):
+            self.evaluate("{{ $json.id + }}")
+        # Unsupported constructs only fail when evaluated
+        self.assertEqual(self.evaluate("{{ 1 if True else (lambda: 2) }}"), 1)
+        with self.assertRaises(ExpressionError):
+            self.evaluate("{{ (lambda: 2) }}")
+
+    def test_compiled_expressions_are_cached(self):
+        compile_expression.cache_clear()
+        for index in range(100):
+            self.evaluate("{{ $json.id + 1 }}", index)
+        info = compile_expression.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 99)
+
+    def test_legacy_evaluator_api(self):
+        evaluator = SafeExpressionEvaluator()
+        self.assertEqual(evaluator.evaluate("$json.qty * 2", make_context()), 6)
+        processed, context = evaluator._preprocess_n8n_expression("$json.from", make_context())
+        self.assertEqual(processed, "n8n_json['from']")
+        self.assertIn("n8n_json", context)
+
+
+class _ParamNode(BaseNode):
+    type = "paramTest"
+    version = 1
+    description = {}
+    properties = {}
+
+
+def make_param_node(parameters: dict, items: int = 3) -> BaseNode:
+    node_model = Node(id="n1", name="Set", type="paramTest", position=(0, 0), parameters=parameters)
+    workflow = WorkflowModel(id="wf", name="wf", nodes=[node_model], connections={})
+    node = _ParamNode(node_model, workflow, {})
+    node.input_data = {"main": [[NodeExecutionData(json_data={"id": i}) for i in range(items)]]}
+    return node
+
+
+class TestLazyExpressionContext(unittest.TestCase):
+    """BaseNode builds only the context an expression needs, once per item."""
+
+    def test_literal_parameters_skip_context(self):
+        node = make_param_node({"mode": "manual", "limit": 10})
+        with patch.object(BaseNode, "get_input_data") as get_input_data, \
+                patch.object(BaseNode, "_get_node_context") as node_context:
+            self.assertEqual(node.get_node_parameter("mode", 0), "manual")
+            self.assertEqual(node.get_node_parameter("limit", 2), 10)
+        get_input_data.assert_not_called()
+        node_context.assert_not_called()
+
+    def test_only_referenced_variables_are_built(self):
+        node = make_param_node({"value": "={{ $json.id * 10 }}"})
+        with patch.object(BaseNode, "_get_node_context") as node_context, \
+                patch.object(BaseNode, "_get_workflow_context") as workflow_context:
+            self.assertEqual(node.get_node_parameter("value", 2), "=20")
+        node_context.assert_not_called()
+        workflow_context.assert_not_called()
+
+    def test_context_cached_per_item(self):
+        node = make_param_node({"a": "{{ $json.id }}", "b": "{{ $node.name }}-{{ $json.id }}"})
+        with patch.object(BaseNode, "get_input_data", wraps=node.get_input_data) as get_input_data:
+            for index in range(3):
+                self.assertEqual(node.get_node_parameter("a", index), index)
+                self.assertEqual(node.get_node_parameter("b", index), f"Set-{index}")
+        self.assertEqual(get_input_data.call_count, 1)
+
+    def test_replacing_input_data_invalidates_cache(self):
+        node = make_param_node({"a": "{{ $json.id }}"})
+        self.assertEqual(node.get_node_parameter("a", 0), 0)
+        node.input_data = {"main": [[NodeExecutionData(json_data={"id": 99})]]}
+        self.assertEqual(node.get_node_parameter("a", 0), 99)
+
+    def test_item_helpers_and_node_reference(self):
+        node = make_param_node({"a": "{{ $item(1).id }}", "b": "{{ $('Set') }}", "c": "{{ $now.year }}"})
+        self.assertEqual(node.get_node_parameter("a", 0), 1)
+        self.assertEqual(node.get_node_parameter("b", 0).node_name, "Set")
+        self.assertGreater(node.get_node_parameter("c", 0), 2000)
+
+
+class TestExpressionBenchmark(unittest.TestCase):
+    """Per-item evaluation cost with and without the compiled-expression cache."""
+
+    TEMPLATES = [
+        "{{ $json.price * $json.qty }}",
+        "Hello {{ $json.name }}, your order {{ $json.id }} ships from {{ $json.from }}",
+        "{{ $json.qty > 2 ? 'bulk' : 'single' }}",
+        "{{ $item(0).name }}",
+    ]
+    ITEMS = 2000
+
+    def _run(self, clear_cache: bool) -> float:
+        engine = ExpressionEngine()
+        contexts = [make_context(i) for i in range(self.ITEMS)]
+        started = time.perf_counter()
+        for index, context in enumerate(contexts):
+            for template in self.TEMPLATES:
+                if clear_cache:
+                    compile_expression.cache_clear()
+                    _parse_template.cache_clear()
+                engine.evaluate_parameter(template, context, index)
+        return (time.perf_counter() - started) / self.ITEMS
+
+    @pytest.mark.stress
+    def test_cached_evaluation_is_faster(self):
+        uncached = self._run(clear_cache=True)
+        cached = self._run(clear_cache=False)
+        self.assertLess(cached * 2, uncached)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tests for pooled sessions, concurrent dispatch and per-host rate limiting in
+HttpRequestNode, against a local keep-alive HTTP server.
+
+Run with: pytest tests/test_http_request_pool.py -v
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from requests.adapters import HTTPAdapter
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Node, NodeExecutionData, WorkflowModel
+from nodes.http_request import HttpRequestNode
+from utils.http_pool import ExecutionHttpSessions, HostRateLimiter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    lock = threading.Lock()
+    in_flight = 0
+    peak_in_flight = 0
+
+    def do_GET(self):
+        with self.lock:
+            self.connections.add(self.client_address)
+            _Handler.in_flight += 1
+            _Handler.peak_in_flight = max(_Handler.peak_in_flight, _Handler.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            _Handler.in_flight -= 1
+        body = json.dumps({"path": self.path, "cookie": self.headers.get("Cookie")}).encode()
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session=item-" + self.path.rsplit("/", 1)[-1])
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Execution:
+    def __init__(self):
+        self.http_sessions = ExecutionHttpSessions()
+
+
+class _FrozenTime:
+    """Stand-in for utils.http_pool.time: a fixed clock that records sleeps."""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def monotonic(self):
+        return 100.0
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+
+
+def make_node(base_url: str, count: int, options: dict, execution=None) -> HttpRequestNode:
+    node_model = Node(
+        id="n1",
+        name="HTTP Request",
+        type="http_request",
+        position=(0, 0),
+        parameters={
+            "url": base_url + "/item/{{ $json.id }}",
+            "method": "GET",
+            "authentication": "none",
+            "options": options,
+        },
+    )
+    workflow = WorkflowModel(id="wf", name="wf", nodes=[node_model], connections={})
+    items = [NodeExecutionData(json_data={"id": i}) for i in range(count)]
+    node = HttpRequestNode(node_model, workflow, {})
+    node.input_data = {"main": [items]}
+    node.execution = execution
+    return node
+
+
+class TestHttpRequestPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.daemon_threads = True
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Handler.connections.clear()
+        _Handler.peak_in_flight = 0
+
+    def _paths(self, result):
+        return [item.json_data["body"]["path"] for item in result[0]]
+
+    def test_sequential_items_reuse_one_connection(self):
+        execution = _Execution()
+        result = make_node(self.base_url, 10, {}, execution).execute()
+        self.assertEqual(self._paths(result), [f"/item/{i}" for i in range(10)])
+        self.assertEqual(len(_Handler.connections), 1)
+        self.assertEqual(execution.http_sessions.stats()["created"], 1)
+
+    def test_concurrent_dispatch_preserves_order(self):
+        node = make_node(self.base_url, 40, {"concurrency": 8})
+        result = node.execute()
+        self.assertEqual(self._paths(result), [f"/item/{i}" for i in range(40)])
+        self.assertLessEqual(len(_Handler.connections), 8)
+        self.assertGreater(_Handler.peak_in_flight, 1)
+        self.assertLessEqual(_Handler.peak_in_flight, 8)
+
+    def test_node_without_execution_attribute(self):
+        node = make_node(self.base_url, 2, {})
+        del node.execution
+        self.assertEqual(self._paths(node.execute()), ["/item/0", "/item/1"])
+
+    def test_pooled_sessions_keep_no_cookies(self):
+        result = make_node(self.base_url, 3, {}, _Execution()).execute()
+        self.assertEqual([item.json_data["body"]["cookie"] for item in result[0]], [None, None, None])
+
+        session = ExecutionHttpSessions().get(self.base_url)
+        session.get(self.base_url + "/a", cookies={"explicit": "1"})
+        self.assertEqual(len(session.cookies), 0)
+        # Cookies passed with a request are still sent
+        self.assertEqual(session.get(self.base_url + "/b", cookies={"explicit": "1"}).json()["cookie"], "explicit=1")
+
+    def test_verify_is_passed_per_request(self):
+        sent = []
+
+        def capture(adapter, request, **kwargs):
+            sent.append(kwargs["verify"])
+            raise ConnectionError("captured")
+
+        sessions = ExecutionHttpSessions()
+        with patch.dict(os.environ, {"REQUESTS_CA_BUNDLE": "/etc/ssl/custom-ca.pem"}), \
+                patch.object(HTTPAdapter, "send", autospec=True, side_effect=capture):
+            for verify in (False, True):
+                with self.assertRaises(ConnectionError):
+                    sessions.get("https://example.test", verify=verify).get("https://example.test/x")
+        self.assertEqual(sent, [False, "/etc/ssl/custom-ca.pem"])
+
+    def test_errors_stay_in_place(self):
+        node = make_node("http://127.0.0.1:1", 3, {"concurrency": 3, "timeout": 500})
+        result = node.execute()
+        self.assertEqual(len(result[0]), 3)
+        self.assertTrue(all("error" in item.json_data for item in result[0]))
+
+    def test_rate_limit_spaces_requests_per_host(self):
+        clock = _FrozenTime()
+        with patch("utils.http_pool.time", clock):
+            limiter = HostRateLimiter(rate=50)
+            delays = [limiter.acquire("http://a") for _ in range(3)]
+            delays.append(limiter.acquire("http://b"))
+        self.assertEqual([round(d, 6) for d in delays], [0, 0.02, 0.04, 0])
+
+        clock = _FrozenTime()
+        with patch("utils.http_pool.time", clock):
+            make_node(self.base_url, 5, {"concurrency": 5, "rateLimit": 20}).execute()
+        self.assertEqual(sorted(clock.sleeps), [0.05, 0.1, 0.15, 0.2])
+
+
+if __name__ == "__main__":
+    unittest.main()
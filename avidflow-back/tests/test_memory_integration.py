@@ -97,7 +97,7 @@ class TestBufferMemoryWorkflow(unittest.TestCase):
     def setUp(self):
         """Clear memory store before each test."""
         from nodes.memory.buffer_memory import _STORE
-        _STORE._store.clear()
+        _STORE.clear()
         self.session_id = f"workflow-test-{id(self)}"
     
     def tearDown(self):
@@ -184,7 +184,7 @@ class TestMemoryRunnableIntegration(unittest.TestCase):
     def setUp(self):
         """Clear memory store before each test."""
         from nodes.memory.buffer_memory import _STORE
-        _STORE._store.clear()
+        _STORE.clear()
         self.session_id = f"runnable-test-{id(self)}"
     
     def tearDown(self):
@@ -374,7 +374,7 @@ class TestBufferMemoryNodeExecution(unittest.TestCase):
     
     def setUp(self):
         from nodes.memory.buffer_memory import _STORE
-        _STORE._store.clear()
+        _STORE.clear()
     
     def test_node_class_has_required_attributes(self):
         """Test BufferMemoryNode class has required class attributes."""
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental per-node result persistence (execution_node_results).
+
+Uses an in-memory SQLite database with the real ORM models and ExecutionCRUD,
+and compares the bytes written per node against rewriting the ExecutionData
+blob after every node.
+
+Run with: pytest tests/test_node_result_persistence.py -v
+"""
+
+import sys
+import os
+import json
+import uuid
+import asyncio
+import unittest
+from contextlib import contextmanager
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import models as db_models
+from database.config import Base
+from database.crud import ExecutionCRUD
+from engine.execution import ExecutionPlanBuilder, WorkflowExecutionContext, WorkflowExecutor
+from models import Node, NodeExecutionData, WorkflowModel
+from utils.serialization import to_dict_without_binary
+
+
+TABLES = [
+    db_models.Execution.__table__,
+    db_models.ExecutionData.__table__,
+    db_models.ExecutionNodeResult.__table__,
+]
+
+
+def make_session_factory():
+    # One shared connection, so every session sees the same in-memory database
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine, tables=TABLES)
+    return sessionmaker(bind=engine)
+
+
+def create_execution(session, execution_id: str = "exec-1") -> None:
+    session.add(db_models.Execution(
+        id=execution_id, workflow_id="wf-1", status="running", mode="manual", finished=False,
+    ))
+    session.add(db_models.ExecutionData(execution_id=execution_id, data="{}", workflow_data={}))
+    session.commit()
+
+
+def node_output(name: str, items: int = 1, size: int = 10) -> List[List[NodeExecutionData]]:
+    return [[
+        NodeExecutionData(json_data={
+            "node": name,
+            "index": i,
+            "text": " ".join(uuid.uuid4().hex[:8] for _ in range(size)),
+        })
+        for i in range(items)
+    ]]
+
+
+class _AsyncSession:
+    """Just enough of AsyncSession over a sync session for the async CRUD reads."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+
+class TestExecutionNodeResultCRUD(unittest.TestCase):
+
+    def setUp(self):
+        self.Session = make_session_factory()
+        self.session = self.Session()
+        create_execution(self.session)
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_save_and_load_round_trip(self):
+        output = to_dict_without_binary(node_output("A", items=3))
+        written = ExecutionCRUD.save_node_result_sync(self.session, "exec-1", "A", output)
+
+        row = self.session.get(db_models.ExecutionNodeResult, ("exec-1", "A", 0))
+        self.assertEqual(len(row.payload), written)
+        self.assertEqual(row.raw_size, len(json.dumps(output, separators=(",", ":"))))
+        self.assertEqual(ExecutionCRUD.get_node_results_sync(self.session, "exec-1"), {"A": output})
+
+    def test_resave_is_idempotent_and_latest_run_wins(self):
+        first = to_dict_without_binary(node_output("A"))
+        retry = to_dict_without_binary(node_output("A", items=2))
+        second_run = to_dict_without_binary(node_output("A", items=4))
+        ExecutionCRUD.save_node_result_sync(self.session, "exec-1", "A", first)
+        ExecutionCRUD.save_node_result_sync(self.session, "exec-1", "A", retry)
+        ExecutionCRUD.save_node_result_sync(self.session, "exec-1", "A", second_run, run_index=1)
+
+        self.assertEqual(self.session.query(db_models.ExecutionNodeResult).count(), 2)
+        self.assertEqual(ExecutionCRUD.get_node_results_sync(self.session, "exec-1"), {"A": second_run})
+
+    def test_legacy_blob_assembled_on_read(self):
+        blob_only = to_dict_without_binary(node_output("Legacy"))
+        stored = to_dict_without_binary(node_output("B"))
+        execution = self.session.get(db_models.Execution, "exec-1")
+        execution.executionData.data = json.dumps({
+            "output": {"done": True},
+            "node_results": {"Legacy": blob_only},
+        })
+        self.session.commit()
+        ExecutionCRUD.save_node_result_sync(self.session, "exec-1", "B", stored)
+
+        data = asyncio.run(ExecutionCRUD.load_execution_data(_AsyncSession(self.session), execution))
+        self.assertEqual(data["output"], {"done": True})
+        self.assertEqual(data["node_results"], {"Legacy": blob_only, "B": stored})
+
+
+class RecordingNode:
+
+    def __init__(self, node_data: Node, workflow: WorkflowModel, execution_data: Dict[str, Any]):
+        self.params = node_data.parameters.model_dump()
+        self.name = node_data.name
+        self.execution = None
+
+    def set_execution_id(self, execution_id: str) -> None:
+        pass
+
+    def execute(self) -> List[List[NodeExecutionData]]:
+        if self.params.get("fail"):
+            raise RuntimeError("boom")
+        return node_output(self.name)
+
+    trigger = execute
+
+
+class TestExecutorPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.Session = make_session_factory()
+        with self.Session() as session:
+            create_execution(session)
+
+    @contextmanager
+    def session_manual(self):
+        session = self.Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def run_workflow(self, nodes: Dict[str, Dict[str, Any]]) -> (WorkflowExecutionContext, Dict[str, Any]):
+        names = list(nodes)
+        workflow = WorkflowModel(
+            id="wf-1",
+            name="persist",
+            nodes=[
+                {"id": n, "name": n, "type": "record", "position": (0, 0),
+                 "parameters": nodes[n], "is_start": i == 0}
+                for i, n in enumerate(names)
+            ],
+            connections={
+                source: {"main": [[{"node": target, "type": "main", "index": 0}]]}
+                for source, target in zip(names, names[1:])
+            },
+        )
+        context = WorkflowExecutionContext(workflow=workflow, execution_id="exec-1")
+        executor = WorkflowExecutor(context, parallel=False)
+        with patch("engine.execution.node_definitions",
+                   {"record": {"node_class": RecordingNode, "type": "regular"}}), \
+                patch("engine.execution.get_sync_session_manual", self.session_manual):
+            result = executor.execute_nodes(ExecutionPlanBuilder(workflow).topological_sort())
+        return context, result
+
+    def test_each_node_written_as_it_completes(self):
+        context, result = self.run_workflow({"A": {}, "B": {}, "C": {}})
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(context.persisted_nodes, {"A", "B", "C"})
+        with self.Session() as session:
+            stored = ExecutionCRUD.get_node_results_sync(session, "exec-1")
+        self.assertEqual(list(stored), ["A", "B", "C"])
+        self.assertEqual(stored["B"], to_dict_without_binary(result["all_results"]["B"]))
+
+    def test_error_blob_skips_persisted_nodes(self):
+        context, result = self.run_workflow({"A": {}, "Broken": {"fail": True}})
+        self.assertEqual(result["status"], "error")
+        with self.Session() as session:
+            execution = session.get(db_models.Execution, "exec-1")
+            data = json.loads(execution.executionData.data)
+        self.assertEqual(data["nodes_results"], {})
+        self.assertEqual(execution.status, "error")
+
+    def test_failed_write_falls_back_to_blob(self):
+        with patch.object(ExecutionCRUD, "save_node_result_sync", side_effect=RuntimeError("no table")):
+            context, result = self.run_workflow({"A": {}})
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(context.persisted_nodes, set())
+
+
+class TestWriteAmplificationBenchmark(unittest.TestCase):
+
+    def test_per_node_rows_vs_blob_rewrite(self):
+        """50 nodes x ~20KB output: per-node rows vs. rewriting the data blob after each node."""
+        Session = make_session_factory()
+        nodes = 50
+        outputs = {
+            f"Node {i}": to_dict_without_binary(node_output(f"Node {i}", items=20, size=100))
+            for i in range(nodes)
+        }
+
+        with Session() as session:
+            create_execution(session, "blob")
+            create_execution(session, "rows")
+
+            blob_bytes = 0
+            accumulated: Dict[str, Any] = {}
+            for name, output in outputs.items():
+                accumulated[name] = output
+                ExecutionCRUD.update_execution_data_sync(session, "blob", {"node_results": {name: output}})
+                blob_bytes += len(json.dumps({"node_results": accumulated}))
+
+            row_bytes = 0
+            for name, output in outputs.items():
+                row_bytes += ExecutionCRUD.save_node_result_sync(session, "rows", name, output)
+
+            self.assertEqual(ExecutionCRUD.get_node_results_sync(session, "rows"), outputs)
+
+        raw_bytes = sum(len(json.dumps(o)) for o in outputs.values())
+        self.assertLess(row_bytes, raw_bytes)
+        self.assertLess(row_bytes * 10, blob_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel (ready-queue) scheduler in WorkflowExecutor.
+
+Workflows are built from a fake "sleepy" node type that sleeps, records its
+execution and emits one item per configured output, so branch activation,
+error handling and branch overlap can be checked without external I/O.
+
+Run with: pytest tests/test_parallel_execution.py -v
+"""
+
+import sys
+import os
+import time
+import threading
+import unittest
+from typing import Any, Dict, List
+from unittest.mock import patch, MagicMock
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.execution import ExecutionPlanBuilder, WorkflowExecutionContext, WorkflowExecutor
+from models import Node, NodeExecutionData, WorkflowModel
+
+
+CALLS: List[str] = []
+CALLS_LOCK = threading.Lock()
+
+
+class SleepyNode:
+    """Minimal node: sleeps `delay`, fails on `fail`, emits items on `outputs`."""
+
+    def __init__(self, node_data: Node, workflow: WorkflowModel, execution_data: Dict[str, Any]):
+        self.params = node_data.parameters.model_dump()
+        self.name = node_data.name
+        self.execution = None
+
+    def set_execution_id(self, execution_id: str) -> None:
+        pass
+
+    def execute(self) -> List[List[NodeExecutionData]]:
+        time.sleep(self.params.get("delay", 0))
+        with CALLS_LOCK:
+            CALLS.append(self.name)
+        if self.params.get("fail"):
+            raise RuntimeError(f"{self.name} failed")
+        outputs = self.params.get("outputs", [1])
+        return [
+            [NodeExecutionData(json_data={"node": self.name})] * count
+            for count in outputs
+        ]
+
+    trigger = execute
+
+
+NODE_DEFINITIONS = {"sleepy": {"node_class": SleepyNode, "type": "regular"}}
+
+
+def make_workflow(nodes: Dict[str, Dict[str, Any]], edges: List[tuple]) -> WorkflowModel:
+    """edges: (source, target) or (source, target, output_index)."""
+    connections: Dict[str, Any] = {}
+    for edge in edges:
+        source, target = edge[0], edge[1]
+        output_index = edge[2] if len(edge) > 2 else 0
+        outputs = connections.setdefault(source, {"main": []})["main"]
+        while len(outputs) <= output_index:
+            outputs.append([])
+        outputs[output_index].append({"node": target, "type": "main", "index": 0})
+    return WorkflowModel(
+        id="wf-1",
+        name="parallel test",
+        nodes=[
+            {
+                "id": name,
+                "name": name,
+                "type": "sleepy",
+                "position": (0, 0),
+                "parameters": params,
+                "is_start": params.pop("is_start", False),
+            }
+            for name, params in nodes.items()
+        ],
+        connections=connections,
+    )
+
+
+def run(workflow: WorkflowModel, parallel: bool) -> Dict[str, Any]:
+    context = WorkflowExecutionContext(workflow=workflow, execution_id="exec-1")
+    executor = WorkflowExecutor(context, parallel=parallel, max_workers=8)
+    sorted_nodes = ExecutionPlanBuilder(workflow).topological_sort()
+    with patch("engine.execution.node_definitions", NODE_DEFINITIONS), \
+            patch("engine.execution.get_sync_session_manual", MagicMock()), \
+            patch("engine.execution.ExecutionCRUD", MagicMock()):
+        return executor.execute_nodes(sorted_nodes)
+
+
+class TestParallelScheduler(unittest.TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_independent_branches_overlap(self):
+        """Fan-out branches run concurrently: all four are running at the same time."""
+        nodes = {"Webhook": {"is_start": True}}
+        edges = []
+        for i in range(4):
+            nodes[f"Branch {i}"] = {"delay": 0.2}
+            edges.append(("Webhook", f"Branch {i}"))
+
+        result = run(make_workflow(nodes, edges), parallel=True)
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(len(result["all_results"]), 5)
+
+        timings = result["node_timings"]
+        self.assertEqual(set(timings), set(nodes))
+        branch_starts = sorted(timings[f"Branch {i}"]["started_at"] for i in range(4))
+        branch_ends = sorted(timings[f"Branch {i}"]["finished_at"] for i in range(4))
+        # All branches were running at the same time at some point
+        self.assertLess(branch_starts[-1], branch_ends[0])
+
+    def test_waits_for_all_upstream_inputs(self):
+        """A join node only runs after both of its inputs completed."""
+        nodes = {
+            "Start": {"is_start": True},
+            "Fast": {"delay": 0.01},
+            "Slow": {"delay": 0.15},
+            "Join": {},
+        }
+        edges = [("Start", "Fast"), ("Start", "Slow"), ("Fast", "Join"), ("Slow", "Join")]
+        result = run(make_workflow(nodes, edges), parallel=True)
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(CALLS[-1], "Join")
+        self.assertEqual(CALLS.count("Join"), 1)
+        self.assertEqual(result["final_result"][0][0].json_data["node"], "Join")
+
+    def test_empty_output_prunes_branch(self):
+        """Nodes hanging off an empty output are skipped, as in sequential mode."""
+        nodes = {
+            "Start": {"is_start": True},
+            "If": {"outputs": [1, 0]},
+            "True Branch": {},
+            "False Branch": {},
+            "After False": {},
+        }
+        edges = [
+            ("Start", "If"),
+            ("If", "True Branch", 0),
+            ("If", "False Branch", 1),
+            ("False Branch", "After False"),
+        ]
+        workflow = make_workflow(nodes, edges)
+        sequential = run(workflow, parallel=False)
+        CALLS.clear()
+        parallel = run(workflow, parallel=True)
+
+        self.assertEqual(set(parallel["all_results"]), {"Start", "If", "True Branch"})
+        self.assertEqual(set(parallel["all_results"]), set(sequential["all_results"]))
+        self.assertNotIn("After False", CALLS)
+
+    def test_first_error_wins(self):
+        """The first failing node is reported and nothing downstream of it runs."""
+        nodes = {
+            "Start": {"is_start": True},
+            "Broken": {"fail": True, "delay": 0.01},
+            "Slow": {"delay": 0.1},
+            "After Broken": {},
+            "After Slow": {},
+        }
+        edges = [
+            ("Start", "Broken"),
+            ("Start", "Slow"),
+            ("Broken", "After Broken"),
+            ("Slow", "After Slow"),
+        ]
+        result = run(make_workflow(nodes, edges), parallel=True)
+
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["error_node_name"], "Broken")
+        self.assertIn("Broken failed", result["error_message"])
+        self.assertNotIn("After Broken", CALLS)
+        self.assertNotIn("After Slow", CALLS)
+        # In-flight sibling is allowed to finish and is kept in the results
+        self.assertIn("Slow", result["all_results"])
+
+    def test_sequential_mode_records_timings(self):
+        nodes = {"Start": {"is_start": True}, "Next": {}}
+        result = run(make_workflow(nodes, [("Start", "Next")]), parallel=False)
+
+        self.assertEqual(CALLS, ["Start", "Next"])
+        self.assertEqual(set(result["node_timings"]), {"Start", "Next"})
+        self.assertGreaterEqual(result["node_timings"]["Next"]["duration_ms"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
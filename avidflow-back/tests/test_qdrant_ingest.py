@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming ingest path of Retriever.insert_documents: chunked
+embedding, upserts pipelined behind the next chunk's embedding (wait=false with
+a final wait=true barrier), float32 vector buffers, splitting of oversized
+upserts, body encoding, and throughput counters (the wall-clock throughput
+comparison is marked "stress").
+
+A local HTTP server stands in for Qdrant's PUT /collections/{name}/points, with
+a per-point latency, so upserts go through QdrantClientAdapter unchanged.
+
+Run with: pytest tests/test_qdrant_ingest.py -v
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import tracemalloc
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.embedding_providers import BaseEmbeddingProvider
+from utils.qdrant_client import QdrantClientAdapter, encode_json
+from utils.qdrant_exceptions import EmbeddingError, ParameterError, QdrantError
+from utils.qdrant_retriever import Retriever
+
+
+def fake_vector(text, dims):
+    seed = sum(map(ord, text))
+    return [((seed * (i + 1)) % 1000) / 997 for i in range(dims)]
+
+
+class _MockQdrantServer:
+    """Threaded Qdrant stand-in recording each upsert and its wait flag."""
+
+    def __init__(self, seconds_per_point=0.0):
+        self.seconds_per_point = seconds_per_point
+        self.keep_points = True  # False: count points without parsing (benchmarks)
+        self.upserts = []  # (wait, points)
+        self.intervals = []  # (start, end) of each upsert
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_PUT(self):
+                url = urlparse(self.path)
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if server.keep_points:
+                    points = json.loads(body)["points"]
+                else:
+                    points = [None] * body.count(b'"id":')
+                wait = parse_qs(url.query).get("wait") == ["true"]
+                data = json.dumps(server.upsert(points, wait)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def upsert(self, points, wait):
+        started = time.monotonic()
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(self.seconds_per_point * len(points))
+        with self._lock:
+            self.in_flight -= 1
+            self.upserts.append((wait, points))
+            self.intervals.append((started, time.monotonic()))
+        status = "completed" if wait else "acknowledged"
+        return {"result": {"operation_id": len(self.upserts), "status": status}, "status": "ok"}
+
+    @property
+    def points(self):
+        return {p["id"]: p for _, points in self.upserts for p in points}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _SlowEmbeddingProvider(BaseEmbeddingProvider):
+    """Deterministic vectors with a per-text latency; records call sizes and timings."""
+
+    def __init__(self, dims=64, seconds_per_text=0.0, fail_after=None):
+        self.dims = dims
+        self.seconds_per_text = seconds_per_text
+        self.fail_after = fail_after
+        self.calls = []
+        self.intervals = []
+
+    def generate_embeddings(self, texts):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise RuntimeError("embedding API unavailable")
+        started = time.monotonic()
+        time.sleep(self.seconds_per_text * len(texts))
+        self.calls.append(len(texts))
+        self.intervals.append((started, time.monotonic()))
+        return [fake_vector(t, self.dims) for t in texts]
+
+    def get_vector_size(self):
+        return self.dims
+
+
+def documents(count, size=40):
+    return [{"text": f"Article {i}: " + "statute " * size, "source": "law.pdf", "article": i}
+            for i in range(count)]
+
+
+class IngestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _MockQdrantServer()
+        self.addCleanup(self.server.close)
+        self.adapter = QdrantClientAdapter(self.server.url)
+        self.addCleanup(self.adapter.close)
+
+    def retriever(self, **provider_kwargs):
+        return Retriever(self.adapter, _SlowEmbeddingProvider(**provider_kwargs))
+
+
+class TestStreamingInsert(IngestTestCase):
+
+    def test_chunks_and_final_barrier(self):
+        retriever = self.retriever()
+        docs = documents(23)
+        result = retriever.insert_documents("docs", iter(docs), chunk_size=5)
+
+        self.assertEqual(result["documents_inserted"], 23)
+        self.assertEqual(retriever.provider.calls, [5, 5, 5, 5, 3])
+        self.assertEqual([wait for wait, _ in self.server.upserts], [False] * 4 + [True])
+        self.assertEqual(result["result"]["result"]["status"], "completed")
+        self.assertEqual(result["stats"]["chunks"], 5)
+        self.assertEqual(self.server.peak_in_flight, 1)
+
+        stored = self.server.points
+        self.assertEqual(len(stored), 23)
+        for doc in docs:
+            point = stored[retriever._generate_point_id(doc["text"])]
+            self.assertEqual(point["payload"], doc)
+            np.testing.assert_array_equal(
+                np.asarray(point["vector"], dtype=np.float32),
+                np.asarray(fake_vector(doc["text"], 64), dtype=np.float32),
+            )
+
+    def test_wait_false_is_passed_to_last_chunk(self):
+        self.retriever().insert_documents("docs", documents(4), chunk_size=2, wait=False)
+        self.assertEqual([wait for wait, _ in self.server.upserts], [False, False])
+
+    def test_metadata_fields_and_missing_text(self):
+        retriever = self.retriever()
+        retriever.insert_documents("docs", documents(2), metadata_fields=["source"])
+        self.assertEqual(
+            sorted(self.server.points.values(), key=lambda p: p["payload"]["text"])[0]["payload"],
+            {"text": documents(1)[0]["text"], "source": "law.pdf"},
+        )
+        with self.assertRaises(ParameterError):
+            retriever.insert_documents("docs", [{"content": "no text"}])
+        with self.assertRaises(ParameterError):
+            retriever.insert_documents("docs", iter([]))
+
+    def test_embedding_failure_reports_progress(self):
+        retriever = self.retriever(fail_after=2)
+        with self.assertRaises(EmbeddingError) as ctx:
+            retriever.insert_documents("docs", documents(10), chunk_size=3)
+        self.assertEqual(ctx.exception.details["documents_inserted"], 3)
+        # Chunks embedded before the failure are still written
+        self.assertEqual(len(self.server.points), 6)
+
+    def test_oversized_upsert_is_split(self):
+        self.adapter.MAX_PAYLOAD_SIZE = 20_000
+        self.retriever().insert_documents("docs", documents(40), chunk_size=40)
+        self.assertGreater(len(self.server.upserts), 1)
+        self.assertEqual(len(self.server.points), 40)
+        self.assertEqual([wait for wait, _ in self.server.upserts][-1], True)
+        self.assertFalse(any(wait for wait, _ in self.server.upserts[:-1]))
+        self.assertEqual(self.adapter.upserted_points, 40)
+
+    def test_embedding_overlaps_upsert(self):
+        self.server.seconds_per_point = 0.002
+        retriever = self.retriever(seconds_per_text=0.002)
+        retriever.insert_documents("docs", documents(60), chunk_size=10)
+        overlapping = [
+            (e_start, e_end) for e_start, e_end in retriever.provider.intervals
+            if any(u_start < e_end and e_start < u_end for u_start, u_end in self.server.intervals)
+        ]
+        self.assertGreaterEqual(len(overlapping), 4)
+
+
+class TestEncodeJson(IngestTestCase):
+
+    def test_numpy_vectors_and_non_str_keys(self):
+        body = {"points": [{"id": 1, "vector": np.arange(3, dtype=np.float32), "payload": {1: "a", "b": np.int64(2)}}]}
+        self.assertEqual(json.loads(encode_json(body)),
+                         {"points": [{"id": 1, "vector": [0.0, 1.0, 2.0], "payload": {"1": "a", "b": 2}}]})
+
+    def test_falls_back_to_json_for_wide_integers(self):
+        self.assertEqual(json.loads(encode_json({"n": 2 ** 70, "v": np.zeros(2)})), {"n": 2 ** 70, "v": [0.0, 0.0]})
+
+    def test_unserializable_points_raise_qdrant_error(self):
+        with self.assertRaises(QdrantError):
+            self.adapter.upsert_points("docs", [{"id": 1, "vector": [0.0], "payload": {"x": object()}}])
+        self.assertEqual(self.server.upserts, [])
+
+
+class TestIngestBenchmark(IngestTestCase):
+    """Streaming insert against the previous embed-everything-then-upsert path."""
+
+    COUNT = 2000
+    DIMS = 256
+
+    def setUp(self):
+        super().setUp()
+        self.server.keep_points = False
+
+    def _baseline(self, retriever, docs):
+        # Previous implementation: all vectors as float lists, one wait=true upsert
+        texts = [d["text"] for d in docs]
+        embeddings = retriever.provider.generate_embeddings(texts)
+        points = [
+            {"id": retriever._generate_point_id(text), "vector": vector,
+             "payload": {k: v for k, v in doc.items()}}
+            for doc, text, vector in zip(docs, texts, embeddings)
+        ]
+        return self.adapter.upsert_points("docs", points, wait=True)
+
+    @pytest.mark.stress
+    def test_throughput(self):
+        self.server.seconds_per_point = 0.0005
+        docs = documents(self.COUNT)
+
+        started = time.perf_counter()
+        self._baseline(self.retriever(dims=self.DIMS, seconds_per_text=0.0005), docs)
+        baseline_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.retriever(dims=self.DIMS, seconds_per_text=0.0005).insert_documents(
+            "docs", docs, chunk_size=100
+        )
+        streaming_time = time.perf_counter() - started
+
+        self.assertLess(streaming_time * 1.3, baseline_time)
+
+    def test_peak_memory(self):
+        docs = documents(self.COUNT)
+
+        def peak(ingest):
+            tracemalloc.start()
+            try:
+                ingest()
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        baseline_peak = peak(lambda: self._baseline(self.retriever(dims=self.DIMS), docs))
+        streaming_peak = peak(lambda: self.retriever(dims=self.DIMS).insert_documents(
+            "docs", docs, chunk_size=100
+        ))
+        self.assertLess(streaming_peak * 4, baseline_peak)
+
+
+if __name__ == "__main__":
+    unittest.main()
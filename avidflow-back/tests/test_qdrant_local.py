@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process Qdrant backend (utils/qdrant_local.py): response
+shapes shared with QdrantClientAdapter, scoring for every distance against a
+NumPy reference, payload filters, scroll/delete, persistence across reloads, writes from
+several worker processes, the IVF index, and selection through the qdrantApi
+credential.
+
+The benchmark compares IVF recall with exact (brute-force) search over 100k
+clustered vectors; its timing comparison is marked "stress".
+
+Run with: pytest tests/test_qdrant_local.py -v
+"""
+
+import sys
+import os
+import asyncio
+import hashlib
+import multiprocessing
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from utils.embedding_providers import BaseEmbeddingProvider
+from utils.qdrant_exceptions import ParameterError, QdrantError
+from utils.qdrant_local import LocalQdrantAdapter, _LocalCollection, close_local_collections, matches_filter
+from utils.qdrant_retriever import Retriever
+
+
+def reference_scores(distance, vectors, query):
+    vectors = np.asarray(vectors, dtype=np.float64)
+    query = np.asarray(query, dtype=np.float64)
+    if distance == "Cosine":
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)) @ (query / np.linalg.norm(query))
+    if distance == "Dot":
+        return vectors @ query
+    if distance == "Euclid":
+        return np.linalg.norm(vectors - query, axis=1)
+    return np.abs(vectors - query).sum(axis=1)
+
+
+def upsert_from_worker(path, worker, batches, size):
+    """Runs in a spawned process: the collection is opened with its own state."""
+    adapter = LocalQdrantAdapter(path)
+    for batch in range(batches):
+        ids = [worker * 10_000 + batch * 5 + i for i in range(5)]
+        adapter.upsert_points("shared", [{"id": i, "vector": [float(i)] * size} for i in ids], wait=False)
+    adapter.close()
+
+
+class _HashEmbeddingProvider(BaseEmbeddingProvider):
+
+    def generate_embeddings(self, texts):
+        seeds = [int.from_bytes(hashlib.sha256(t.encode()).digest()[:8], "big") for t in texts]
+        return [np.random.default_rng(seed).normal(size=16).tolist() for seed in seeds]
+
+    def get_vector_size(self):
+        return 16
+
+
+class LocalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(close_local_collections)
+        self.path = tmp.name
+        self.adapter = LocalQdrantAdapter(self.path)
+
+    def collection(self, name="docs", size=8, distance="Cosine", count=50, seed=0):
+        vectors = np.random.default_rng(seed).normal(size=(count, size)).astype(np.float32)
+        self.adapter.create_collection(name, size, distance)
+        self.adapter.upsert_points(name, [
+            {"id": i, "vector": vectors[i].tolist(), "payload": {"n": i, "parity": ["even", "odd"][i % 2]}}
+            for i in range(count)
+        ])
+        return vectors
+
+
+class TestLocalAdapter(LocalTestCase):
+
+    def test_scores_match_reference_for_each_distance(self):
+        for distance in ("Cosine", "Dot", "Euclid", "Manhattan"):
+            vectors = self.collection(distance, distance=distance, seed=1)
+            query = np.random.default_rng(2).normal(size=8)
+            expected = reference_scores(distance, vectors, query)
+            order = np.argsort(expected if distance in ("Euclid", "Manhattan") else -expected)[:5]
+
+            results = self.adapter.search(distance, query.tolist(), limit=5)
+            self.assertEqual([r["id"] for r in results], order.tolist(), distance)
+            np.testing.assert_allclose([r["score"] for r in results], expected[order], rtol=1e-4, atol=1e-4)
+
+    def test_response_shapes(self):
+        self.assertEqual(self.adapter.create_collection("docs", 8)["result"], True)
+        self.assertEqual(self.adapter.create_collection("docs", 8)["status"], {"info": "Collection already exists"})
+        result = self.adapter.upsert_points("docs", [{"id": 1, "vector": [1.0] * 8, "payload": {"a": 1}}])
+        self.assertEqual(result["result"]["status"], "completed")
+
+        hit = self.adapter.search("docs", [1.0] * 8, with_vector=True)[0]
+        self.assertEqual(set(hit), {"id", "version", "score", "payload", "vector"})
+        self.assertAlmostEqual(hit["score"], 1.0, places=5)
+        self.assertAlmostEqual(float(np.linalg.norm(hit["vector"])), 1.0, places=5)  # Cosine normalizes
+        self.assertNotIn("payload", self.adapter.search("docs", [1.0] * 8, with_payload=False)[0])
+
+        info = self.adapter.get_collection_info("docs")
+        self.assertEqual(info["points_count"], 1)
+        self.assertEqual(info["config"]["params"]["vectors"], {"size": 8, "distance": "Cosine"})
+
+    def test_errors(self):
+        with self.assertRaises(QdrantError) as ctx:
+            self.adapter.search("missing", [1.0])
+        self.assertEqual(ctx.exception.status_code, 404)
+        self.adapter.create_collection("docs", 4)
+        with self.assertRaises(QdrantError) as ctx:
+            self.adapter.upsert_points("docs", [{"id": 1, "vector": [1.0, 2.0]}])
+        self.assertEqual(ctx.exception.status_code, 400)
+        with self.assertRaises(ParameterError):
+            self.adapter.create_collection("../escape", 4)
+        with self.assertRaises(ParameterError):
+            LocalQdrantAdapter.for_namespace("a/b")
+
+    def test_score_threshold_and_upsert_overwrites(self):
+        self.adapter.create_collection("docs", 2, "Euclid")
+        self.adapter.upsert_points("docs", [
+            {"id": "a", "vector": [0, 0]}, {"id": "b", "vector": [3, 4]}, {"id": "c", "vector": [10, 0]}
+        ])
+        self.assertEqual([r["id"] for r in self.adapter.search("docs", [0, 0], score_threshold=5.0)], ["a", "b"])
+        self.adapter.upsert_points("docs", [{"id": "c", "vector": [0, 1], "payload": {"v": 2}}])
+        hits = self.adapter.search("docs", [0, 0], limit=2)
+        self.assertEqual([(h["id"], h["score"]) for h in hits], [("a", 0.0), ("c", 1.0)])
+        self.assertEqual(self.adapter.get_collection_info("docs")["points_count"], 3)
+
+    def test_scroll_and_delete(self):
+        self.collection(count=10)
+        page = self.adapter.scroll("docs", limit=4, offset=3)["result"]
+        self.assertEqual([p["id"] for p in page["points"]], [3, 4, 5, 6])
+        self.assertEqual(page["next_page_offset"], 7)
+
+        self.adapter.delete_points("docs", point_ids=[0, 1])
+        self.adapter.delete_points("docs", filter_obj={"must": [{"key": "parity", "match": {"value": "odd"}}]})
+        remaining = self.adapter.scroll("docs", limit=100)["result"]
+        self.assertEqual([p["id"] for p in remaining["points"]], [2, 4, 6, 8])
+        self.assertIsNone(remaining["next_page_offset"])
+        self.assertNotIn(3, [r["id"] for r in self.adapter.search("docs", [1.0] * 8, limit=10)])
+
+        # Freed rows are reused by new points
+        self.adapter.upsert_points("docs", [{"id": 100, "vector": [1.0] * 8}])
+        self.assertEqual(self.adapter.get_collection_info("docs")["points_count"], 5)
+
+    def test_search_with_filter(self):
+        vectors = self.collection(count=40)
+        flt = {"must": [{"key": "parity", "match": {"value": "even"}}, {"key": "n", "range": {"gte": 10}}]}
+        results = self.adapter.search("docs", vectors[11].tolist(), limit=100, filter_obj=flt)
+        self.assertEqual(sorted(r["id"] for r in results), list(range(10, 40, 2)))
+
+    def test_persists_across_reload(self):
+        vectors = self.collection(count=3000)  # grows the matrix past its first 1024 rows
+        before = self.adapter.search("docs", vectors[7].tolist(), limit=3)
+        close_local_collections()
+
+        reopened = LocalQdrantAdapter(self.path)
+        self.assertEqual(reopened.search("docs", vectors[7].tolist(), limit=3), before)
+        self.assertEqual(reopened.get_collection_info("docs")["points_count"], 3000)
+        self.assertEqual(reopened.list_collections(), ["docs"])
+
+
+class TestSeveralProcesses(LocalTestCase):
+
+    def test_reloads_after_another_process_writes(self):
+        self.collection(count=10)
+        # A second process has its own in-memory state for the same files
+        other = _LocalCollection(os.path.join(self.path, "docs"), self.adapter.index_threshold)
+        self.addCleanup(other.close)
+        with other.locked(exclusive=True):
+            other.upsert([100, 101], np.ones((2, 8), dtype=np.float32), [{"n": 100}, {"n": 101}])
+
+        self.adapter.upsert_points("docs", [{"id": 200, "vector": [1.0] * 8, "payload": {"n": 200}}])
+        ids = [p["id"] for p in self.adapter.scroll("docs", limit=100)["result"]["points"]]
+        self.assertEqual(ids, list(range(10)) + [100, 101, 200])
+
+        with other.locked():
+            self.assertEqual(other.count, 13)
+            self.assertEqual(other.reloads, 1)
+
+    def test_concurrent_writers(self):
+        self.adapter.create_collection("shared", 4)
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=upsert_from_worker, args=(self.path, w, 20, 4)) for w in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+        self.assertEqual([worker.exitcode for worker in workers], [0, 0])
+        self.assertEqual(self.adapter.get_collection_info("shared")["points_count"], 200)
+        hit = self.adapter.search("shared", [1.0] * 4, limit=1, filter_obj={"has_id": [10_007]}, with_vector=True)
+        self.assertEqual(hit[0]["vector"], [0.5] * 4)
+
+
+class TestFilters(unittest.TestCase):
+
+    PAYLOAD = {
+        "city": "Tehran", "tags": ["law", "tax"], "year": 2020, "note": None,
+        "meta": {"source": "law.pdf", "pages": [{"n": 1, "title": "intro"}, {"n": 2, "title": "scope"}]},
+    }
+
+    def check(self, flt, expected=True, point_id=7):
+        self.assertEqual(matches_filter(flt, point_id, self.PAYLOAD), expected, flt)
+
+    def test_conditions(self):
+        self.check({"must": [{"key": "city", "match": {"value": "Tehran"}}]})
+        self.check({"must": [{"key": "tags", "match": {"value": "tax"}}]})
+        self.check({"must": [{"key": "tags", "match": {"any": ["x", "law"]}}]})
+        self.check({"must": [{"key": "city", "match": {"except": ["Tehran"]}}]}, False)
+        self.check({"must": [{"key": "meta.source", "match": {"text": "law"}}]})
+        self.check({"must": [{"key": "year", "range": {"gt": 2019, "lt": 2021}}]})
+        self.check({"must": [{"key": "year", "range": {"gte": 2021}}]}, False)
+        self.check({"must": [{"key": "tags", "values_count": {"gte": 2}}]})
+        self.check({"must": [{"has_id": [1, 7]}]})
+        self.check({"must": [{"is_empty": {"key": "missing"}}]})
+        self.check({"must": [{"is_null": {"key": "note"}}]})
+        self.check({"must": [{"key": "meta.pages[].n", "match": {"value": 2}}]})
+
+    def test_clauses(self):
+        self.check({"should": [{"key": "city", "match": {"value": "Paris"}}, {"has_id": [7]}]})
+        self.check({"should": [{"key": "city", "match": {"value": "Paris"}}]}, False)
+        self.check({"must_not": [{"key": "tags", "match": {"value": "law"}}]}, False)
+        self.check({"must": [{"should": [{"key": "year", "match": {"value": 2020}}]}]})
+        self.check({"must": [{"nested": {"key": "meta.pages", "filter": {"must": [
+            {"key": "n", "match": {"value": 1}}, {"key": "title", "match": {"value": "intro"}}]}}}]})
+        self.check({"must": [{"nested": {"key": "meta.pages", "filter": {"must": [
+            {"key": "n", "match": {"value": 1}}, {"key": "title", "match": {"value": "scope"}}]}}}]}, False)
+        with self.assertRaises(ParameterError):
+            matches_filter({"must": [{"key": "city", "geo_radius": {}}]}, 1, self.PAYLOAD)
+
+
+class TestIVFIndex(LocalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.adapter = LocalQdrantAdapter(self.path, index_threshold=500)
+
+    def test_index_sees_writes_after_build(self):
+        vectors = self.collection(count=2000, size=16)
+        self.adapter.search("docs", vectors[0].tolist(), limit=1)  # builds the index
+        self.assertEqual(self.adapter.get_collection_info("docs")["indexed_vectors_count"], 2000)
+
+        # New point, rewritten point and deleted point are all reflected
+        self.adapter.upsert_points("docs", [
+            {"id": "new", "vector": vectors[5].tolist()},
+            {"id": 6, "vector": (-vectors[6]).tolist()},
+        ])
+        self.adapter.delete_points("docs", point_ids=[5])
+        hits = self.adapter.search("docs", vectors[5].tolist(), limit=2)
+        self.assertEqual(hits[0]["id"], "new")
+        self.assertNotIn(5, [h["id"] for h in hits])
+        self.assertNotEqual(self.adapter.search("docs", vectors[6].tolist(), limit=1)[0]["id"], 6)
+
+    def test_retriever_on_local_backend(self):
+        retriever = Retriever(self.adapter, _HashEmbeddingProvider())
+        retriever.create_collection("kb")
+        docs = [{"text": f"document {i}", "metadata": {"i": i}} for i in range(30)]
+        self.assertEqual(retriever.insert_documents("kb", docs, chunk_size=8)["documents_inserted"], 30)
+        hits = retriever.search("kb", "document 17", top_k=3)
+        self.assertEqual(hits[0]["payload"]["metadata"], {"i": 17})
+        self.assertAlmostEqual(hits[0]["score"], 1.0, places=5)
+
+
+class TestCredentialSelection(LocalTestCase):
+
+    def test_node_uses_local_backend(self):
+        from nodes.qdrantVectorStore import QdrantVectorStoreNode
+
+        class _Node:
+            def __init__(self, credential_id):
+                self.credential_id = credential_id
+
+            def get_credentials(self, name):
+                # A leftover user-supplied namespace is ignored
+                return {"backend": "local", "localNamespace": "tenant-1"}
+
+            def _get_credential_id(self, name):
+                return self.credential_id
+
+        with patch.object(settings, "QDRANT_LOCAL_PATH", self.path):
+            adapter = QdrantVectorStoreNode._initialize_qdrant_adapter(_Node("cred-a"))
+            other = QdrantVectorStoreNode._initialize_qdrant_adapter(_Node("cred-b"))
+        self.assertIsInstance(adapter, LocalQdrantAdapter)
+        self.assertEqual(os.path.dirname(adapter.path), os.path.abspath(self.path))
+        self.assertTrue(os.path.basename(adapter.path).startswith("credential-"))
+        self.assertNotEqual(adapter.path, other.path)
+        self.assertNotIn("tenant-1", adapter.path)
+
+        adapter.create_collection("docs", 4)
+        self.assertEqual(other.list_collections(), [])
+
+    def test_local_credential_needs_no_url(self):
+        from credentials.qdrantApi import QdrantApiCredential
+
+        with patch.object(settings, "QDRANT_LOCAL_PATH", self.path):
+            result = asyncio.run(QdrantApiCredential({"backend": "local"}).test())
+        self.assertTrue(result["success"], result["message"])
+        self.assertEqual(
+            QdrantApiCredential({"apiKey": "k"}).validate(),
+            {"valid": False, "message": "Missing required fields: qdrantUrl"},
+        )
+
+    def test_credential_id_is_required(self):
+        with self.assertRaises(ParameterError):
+            LocalQdrantAdapter.for_credential(None)
+
+
+class TestLocalSearchBenchmark(LocalTestCase):
+    """IVF index vs exact brute-force scoring on 100k clustered 128D vectors."""
+
+    COUNT = 100_000
+    DIMS = 128
+    QUERIES = 200
+
+    def _bench(self):
+        rng = np.random.default_rng(7)
+        centers = rng.normal(size=(200, self.DIMS)).astype(np.float32)
+        noise = lambda n: 0.35 * rng.normal(size=(n, self.DIMS)).astype(np.float32)
+        vectors = centers[rng.integers(0, 200, self.COUNT)] + noise(self.COUNT)
+        queries = centers[rng.integers(0, 200, self.QUERIES)] + noise(self.QUERIES)
+
+        adapter = LocalQdrantAdapter(self.path, index_threshold=20_000)
+        adapter.create_collection("bench", self.DIMS)
+        for start in range(0, self.COUNT, 5000):
+            adapter.upsert_points("bench", [
+                {"id": i, "vector": vectors[i], "payload": {"n": i}} for i in range(start, start + 5000)
+            ], wait=False)
+
+        def run(exact):
+            started = time.perf_counter()
+            ids = [
+                [hit["id"] for hit in adapter.search("bench", q, limit=10, with_payload=False, exact=exact)]
+                for q in queries
+            ]
+            return ids, (time.perf_counter() - started) / self.QUERIES
+
+        adapter.search("bench", queries[0], limit=10)  # builds the index
+        exact_ids, exact_time = run(True)
+        ivf_ids, ivf_time = run(False)
+        recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(exact_ids, ivf_ids)])
+        return recall, exact_time, ivf_time
+
+    def test_ivf_recall(self):
+        recall, _, _ = self._bench()
+        self.assertGreaterEqual(recall, 0.95)
+
+    @pytest.mark.stress
+    def test_ivf_vs_brute_force(self):
+        recall, exact_time, ivf_time = self._bench()
+        self.assertGreaterEqual(recall, 0.95)
+        self.assertLess(ivf_time * 2, exact_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled RabbitMQ publisher behind QueueService.publish_sync.
+
+pika.BlockingConnection is replaced by a fake that records channel calls,
+so connection reuse, queue-declare memoization, reconnects and batching can
+be verified without a broker.
+
+Run with: pytest tests/test_queue_publisher.py -v
+"""
+
+import sys
+import os
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pika
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.queue import QueueService, SyncPublisherPool
+
+
+class FakeConnection:
+    """Stand-in for pika.BlockingConnection; every instance is recorded."""
+
+    instances = []
+    fail_next_publish = 0
+
+    def __init__(self, params):
+        self.is_open = True
+        self.channel_obj = MagicMock()
+        self.channel_obj.is_open = True
+        self.channel_obj.basic_publish.side_effect = self._maybe_fail
+        self.process_data_events = MagicMock()
+        FakeConnection.instances.append(self)
+
+    def _maybe_fail(self, **kwargs):
+        if FakeConnection.fail_next_publish:
+            FakeConnection.fail_next_publish -= 1
+            self.is_open = False
+            raise pika.exceptions.StreamLostError("connection reset")
+
+    def channel(self):
+        return self.channel_obj
+
+    def close(self):
+        self.is_open = False
+
+
+def make_service(**pool_kwargs) -> QueueService:
+    pool = SyncPublisherPool(MagicMock(), **pool_kwargs)
+    return QueueService(publisher=pool)
+
+
+@patch("services.queue.pika.BlockingConnection", FakeConnection)
+class TestPooledPublisher(unittest.TestCase):
+
+    def setUp(self):
+        FakeConnection.instances = []
+        FakeConnection.fail_next_publish = 0
+
+    def test_connection_and_declare_reused(self):
+        service = make_service(size=2)
+        for i in range(50):
+            self.assertTrue(service.publish_sync("workflow_updates", {"event": "node_completed", "i": i}))
+
+        self.assertEqual(len(FakeConnection.instances), 1)
+        channel = FakeConnection.instances[0].channel_obj
+        self.assertEqual(channel.queue_declare.call_count, 1)
+        self.assertEqual(channel.basic_publish.call_count, 50)
+
+        stats = service.get_publisher_stats()
+        self.assertEqual(stats["published"], 50)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["reconnects"], 0)
+
+    def test_reconnects_after_lost_connection(self):
+        service = make_service()
+        service.publish_sync("workflow_updates", {"event": "a"})
+        FakeConnection.fail_next_publish = 1
+
+        self.assertTrue(service.publish_sync("workflow_updates", {"event": "b"}))
+        self.assertEqual(len(FakeConnection.instances), 2)
+        self.assertEqual(service.get_publisher_stats()["reconnects"], 1)
+        # The fresh connection declares the queue again
+        self.assertEqual(FakeConnection.instances[1].channel_obj.queue_declare.call_count, 1)
+
+    def test_gives_up_after_one_retry(self):
+        service = make_service()
+        FakeConnection.fail_next_publish = 2
+
+        self.assertFalse(service.publish_sync("workflow_updates", {"event": "a"}))
+        self.assertEqual(service.get_publisher_stats()["failed"], 1)
+        # Slots are released even on failure
+        FakeConnection.fail_next_publish = 0
+        self.assertTrue(service.publish_sync("workflow_updates", {"event": "b"}))
+
+    def test_batching_coalesces_until_terminal_event(self):
+        service = make_service(batching=True, batch_size=100, batch_interval_ms=60_000)
+        for i in range(10):
+            service.publish_sync("workflow_updates", {"event": "node_completed", "i": i})
+        self.assertEqual(FakeConnection.instances, [])
+
+        service.publish_sync("workflow_updates", {"event": "workflow_completed"})
+        self.assertEqual(len(FakeConnection.instances), 1)
+        channel = FakeConnection.instances[0].channel_obj
+        self.assertEqual(channel.basic_publish.call_count, 11)
+        last_body = channel.basic_publish.call_args_list[-1].kwargs["body"]
+        self.assertIn(b"workflow_completed", last_body)
+        self.assertEqual(service.get_publisher_stats()["batches_flushed"], 1)
+
+    def test_batching_flushes_when_full(self):
+        service = make_service(batching=True, batch_size=5, batch_interval_ms=60_000)
+        for i in range(12):
+            service.publish_sync("workflow_updates", {"event": "agent", "i": i})
+        self.assertEqual(service.get_publisher_stats()["published"], 10)
+        service.flush()
+        self.assertEqual(service.get_publisher_stats()["published"], 12)
+
+    def test_keepalive_services_idle_connections(self):
+        service = make_service(size=2)
+        pool = service.publisher
+        pool.publish_many([("workflow_updates", b"{}", True)])
+        connection = FakeConnection.instances[0]
+
+        pool.keepalive_idle()
+        connection.process_data_events.assert_called_once_with(time_limit=0)
+        self.assertEqual(pool.stats()["idle_channels"], 1)
+
+        connection.process_data_events.side_effect = pika.exceptions.StreamLostError("missed heartbeats")
+        connection.close()
+        pool.keepalive_idle()
+        self.assertEqual(pool.stats()["idle_channels"], 0)
+        # The next publish opens a fresh connection
+        self.assertTrue(service.publish_sync("workflow_updates", {"event": "a"}))
+        self.assertEqual(len(FakeConnection.instances), 2)
+
+    def test_background_threads_start_once(self):
+        pool = make_service(batching=True, batch_interval_ms=60_000, keepalive_interval=60).publisher
+        names = ("QueuePublishKeepalive", "QueuePublishFlusher")
+
+        def running():
+            return sum(t.name in names for t in threading.enumerate())
+
+        before = running()
+        barrier = threading.Barrier(16)
+
+        def start():
+            barrier.wait()
+            pool._ensure_keepalive()
+            pool._ensure_flusher()
+
+        callers = [threading.Thread(target=start) for _ in range(16)]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+        self.assertEqual(running() - before, 2)
+
+    def test_non_persistent_delivery(self):
+        service = make_service()
+        service.publish_sync("workflow_updates", {"event": "model_token"}, persistent=False)
+        props = FakeConnection.instances[0].channel_obj.basic_publish.call_args.kwargs["properties"]
+        self.assertEqual(props.delivery_mode, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
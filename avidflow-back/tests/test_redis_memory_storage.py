@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only "list" storage of RedisMemoryManager: windowed
+loads, auto-clear, TTLs, migration of legacy JSON sessions, and a benchmark of
+per-turn writes against the JSON layout near the 800-message cap (bytes sent
+by default, write time marked "stress").
+
+Uses fakeredis in place of a Redis server (skipped when not installed).
+
+Run with: pytest tests/test_redis_memory_storage.py -v
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+from nodes.memory.redis_memory import RedisMemoryManager, _RedisConnectionManager
+from utils.langchain_memory import RedisMemoryRunnable
+
+
+def turn(i: int, content_size: int = 0):
+    """One agent turn: user message, assistant tool call, tool result, answer."""
+    filler = "x" * content_size
+    return [
+        {"role": "user", "content": f"question {i} {filler}"},
+        {"role": "assistant", "content": "", "tool_calls": [
+            {"id": f"call_{i}", "type": "function", "function": {"name": "search", "arguments": "{}"}}
+        ]},
+        {"role": "tool", "tool_call_id": f"call_{i}", "content": f"result {i} {filler}"},
+        {"role": "assistant", "content": f"answer {i} {filler}"},
+    ]
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class RedisTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch.object(_RedisConnectionManager, "get_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def manager(self, storage_mode=RedisMemoryManager.STORAGE_LIST):
+        return RedisMemoryManager({}, storage_mode=storage_mode)
+
+
+class TestListStorage(RedisTestCase):
+
+    def test_append_and_windowed_load(self):
+        manager = self.manager()
+        manager.save("s1", [{"role": "system", "content": "be brief"}] + turn(0))
+        for i in range(1, 6):
+            manager.append("s1", turn(i), context_window=10)
+
+        self.assertEqual(self.redis.type("memory:redis:s1:messages"), "list")
+        self.assertFalse(self.redis.exists("memory:redis:s1"))
+        loaded = manager.load("s1", context_window=2)
+        self.assertEqual(loaded[0], {"role": "system", "content": "be brief"})
+        self.assertEqual(loaded[1:], turn(4) + turn(5))
+        self.assertEqual(len(manager.load("s1", context_window=0)), 1 + 6 * 4)
+
+    def test_matches_json_storage(self):
+        json_manager = self.manager(RedisMemoryManager.STORAGE_JSON)
+        list_manager = self.manager()
+        history = []
+        for i in range(7):
+            history = json_manager.load("json", 3) + turn(i)
+            json_manager.save("json", history, context_window=3)
+            list_manager.append("list", turn(i), context_window=3)
+            self.assertEqual(list_manager.load("list", 3), json_manager.load("json", 3), f"turn {i}")
+
+    def test_auto_clear_keeps_last_turn(self):
+        manager = self.manager()
+        for i in range(3):
+            manager.append("s1", turn(i), context_window=3)
+        self.assertEqual(manager.load("s1", 3), turn(2))
+        self.assertEqual(self.redis.hget("memory:redis:s1:meta", "turns"), "1")
+
+        manager.append("s2", turn(0), context_window=3, auto_clear_on_full=False)
+        for i in range(1, 5):
+            manager.append("s2", turn(i), context_window=3, auto_clear_on_full=False)
+        self.assertEqual(manager.load("s2", 0), turn(2) + turn(3) + turn(4))
+
+    def test_ttl(self):
+        manager = self.manager()
+        manager.append("s1", turn(0), ttl_seconds=120)
+        for key in ("memory:redis:s1:messages", "memory:redis:s1:meta"):
+            self.assertTrue(0 < self.redis.ttl(key) <= 120)
+        self.assertTrue(0 < manager.get_ttl("s1") <= 120)
+
+        manager.append("s1", turn(1), ttl_seconds=0)
+        self.assertEqual(manager.get_ttl("s1"), -1)
+
+        manager.clear("s1")
+        self.assertFalse(manager.exists("s1"))
+        self.assertEqual(self.redis.keys("memory:redis:s1*"), [])
+
+    def test_migrates_legacy_json_session(self):
+        legacy = self.manager(RedisMemoryManager.STORAGE_JSON)
+        history = [{"role": "system", "content": "sys"}] + turn(0) + turn(1)
+        legacy.save("s1", history, ttl_seconds=300)
+
+        manager = self.manager()
+        self.assertTrue(manager.exists("s1"))
+        self.assertEqual(manager.load("s1", 0), history)
+        self.assertFalse(self.redis.exists("memory:redis:s1"))
+        self.assertTrue(0 < self.redis.ttl("memory:redis:s1:messages") <= 300)
+
+        manager.append("s1", turn(2))
+        self.assertEqual(manager.load("s1", 0), history + turn(2))
+
+    def test_runnable_appends_only_new_messages(self):
+        memory = RedisMemoryRunnable(session_id="s1", context_window=10, storage_mode="list")
+        manager = memory._get_manager()
+        calls = []
+        manager.append = lambda *a, _append=manager.append, **k: (calls.append("append"), _append(*a, **k))[1]
+        manager.save = lambda *a, _save=manager.save, **k: (calls.append("save"), _save(*a, **k))[1]
+
+        for i in range(3):
+            history = memory.invoke({"action": "load"})["messages"]
+            memory.invoke({"action": "save", "messages": history + turn(i)})
+        self.assertEqual(calls, ["append", "append", "append"])
+        self.assertEqual(memory.invoke({"action": "load"})["messages"], turn(0) + turn(1) + turn(2))
+
+        # A history that no longer starts with the loaded messages is rewritten
+        memory.invoke({"action": "save", "messages": turn(5)})
+        self.assertEqual(calls[-1], "save")
+        self.assertEqual(memory.invoke({"action": "load"})["messages"], turn(5))
+
+
+class TestListStorageBenchmark(RedisTestCase):
+    """Per-turn write cost with ~780 stored messages (the no-window cap is 800)."""
+
+    TURNS = 40
+    HISTORY_TURNS = 195
+
+    def _payload_bytes(self, write):
+        sent = 0
+        original = self.redis.pipeline
+
+        def counting_pipeline(*args, **kwargs):
+            pipe = original(*args, **kwargs)
+            pipe_execute_command = pipe.pipeline_execute_command
+
+            def record(*command, **options):
+                nonlocal sent
+                sent += sum(len(str(part)) for part in command)
+                return pipe_execute_command(*command, **options)
+
+            pipe.pipeline_execute_command = record
+            return pipe
+
+        with patch.object(self.redis, "pipeline", counting_pipeline), \
+                patch.object(self.redis, "setex", wraps=self.redis.setex) as setex:
+            started = time.perf_counter()
+            write()
+            elapsed = time.perf_counter() - started
+        sent += sum(len(str(call.args[2])) for call in setex.call_args_list)
+        return sent, elapsed
+
+    def _turn_writes_near_cap(self):
+        """(bytes, seconds) for TURNS appended turns with the JSON and list layouts."""
+        history = [m for i in range(self.HISTORY_TURNS) for m in turn(i, 300)]
+        json_manager = self.manager(RedisMemoryManager.STORAGE_JSON)
+        list_manager = self.manager()
+        json_manager.save("json", history)
+        list_manager.save("list", history)
+
+        def json_turns():
+            for i in range(self.TURNS):
+                messages = json_manager.load("json", 0) + turn(1000 + i, 300)
+                json_manager.save("json", messages)
+
+        def list_turns():
+            for i in range(self.TURNS):
+                list_manager.append("list", turn(1000 + i, 300))
+
+        json_cost = self._payload_bytes(json_turns)
+        list_cost = self._payload_bytes(list_turns)
+
+        self.assertEqual(list_manager.load("list", 0), json_manager.load("json", 0))
+        self.assertEqual(len(list_manager.load("list", 0)), RedisMemoryManager.MAX_MESSAGES)
+        return json_cost, list_cost
+
+    def test_turn_writes_near_cap(self):
+        (json_bytes, _), (list_bytes, _) = self._turn_writes_near_cap()
+        self.assertLess(list_bytes * 50, json_bytes)
+
+    @pytest.mark.stress
+    def test_turn_write_time_near_cap(self):
+        (_, json_time), (_, list_time) = self._turn_writes_near_cap()
+        self.assertLess(list_time * 3, json_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
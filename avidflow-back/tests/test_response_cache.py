@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat model response cache (utils/response_cache.py) and its use
+in ChatModelRunnable: exact-match keys, the semantic tier, TTLs, per-workflow
+scoping, saved-token accounting and bypass of non-deterministic requests.
+The wall-clock comparison of cached and uncached traffic is marked "stress".
+
+Run with: pytest tests/test_response_cache.py -v
+"""
+
+import sys
+import os
+import gc
+import re
+import time
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+from utils.langchain_chat_models import ChatModelRunnable
+from utils.response_cache import (
+    ChatResponseCache,
+    MemoryResponseStore,
+    RedisResponseStore,
+    _semantic_indexes,
+    is_deterministic,
+)
+from utils.http_pool import ExecutionHttpSessions
+
+SYSTEM = {"role": "system", "content": "You answer questions about our shipping policy."}
+VOCABULARY = ["refund", "return", "shipping", "cost", "days", "international", "order", "cancel", "how", "long"]
+
+
+class _FakeAdapter:
+    """Answers after ``latency`` seconds, echoing the last message; counts calls."""
+
+    def __init__(self, latency=0.0, tool_calls=None, fail=False, base_url=None):
+        self.latency = latency
+        self.base_url = base_url
+        self.tool_calls = tool_calls or []
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, messages, tools=None):
+        self.calls += 1
+        if self.fail:
+            raise ValueError("invalid request")
+        time.sleep(self.latency)
+        return {
+            "assistant_message": {"role": "assistant", "content": f"answer to: {messages[-1]['content']}"},
+            "tool_calls": list(self.tool_calls),
+            "usage": {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150},
+        }
+
+
+class _BagOfWordsEmbedder:
+    """Counts vocabulary words, so rephrasings of a question get similar vectors."""
+
+    model = "bag-of-words"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_embeddings(self, texts):
+        self.calls += 1
+        return [[float(re.findall(r"\w+", t.lower()).count(w)) for w in VOCABULARY] + [0.01] for t in texts]
+
+
+def ask(question, *history):
+    return {"messages": [SYSTEM, *history, {"role": "user", "content": question}]}
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryResponseStore()
+        _semantic_indexes.clear()
+        self.addCleanup(_semantic_indexes.clear)
+
+    def runnable(self, adapter=None, temperature=0, scope="wf-1", embedder=None, **kwargs):
+        cache = ChatResponseCache(scope=scope, ttl_seconds=60, store=self.store, embedder=embedder,
+                                  semantic_threshold=0.9)
+        return ChatModelRunnable(adapter or _FakeAdapter(), model="gpt-4o-mini", temperature=temperature,
+                                 response_cache=cache, **kwargs)
+
+
+class TestExactTier(ResponseCacheTestCase):
+
+    def test_identical_request_is_served_from_cache(self):
+        chat = self.runnable()
+        first = chat.invoke(ask("How long does shipping take?"))
+        second = chat.invoke(ask("How long does shipping take?"))
+
+        self.assertEqual(chat.adapter.calls, 1)
+        self.assertEqual(second["assistant_message"], first["assistant_message"])
+        self.assertEqual(second["usage"]["total_tokens"], 0)
+        self.assertEqual(second["_metadata"]["cache"]["hit"], "exact")
+        self.assertEqual(second["_metadata"]["cache"]["saved_tokens"], 150)
+        self.assertNotIn("cache", first["_metadata"])
+
+        stats = chat.response_cache.stats()
+        self.assertEqual((stats["exact_hits"], stats["misses"]), (1, 1))
+        self.assertEqual((stats["saved_prompt_tokens"], stats["saved_completion_tokens"]), (120, 30))
+
+    def test_hits_are_independent_copies(self):
+        chat = self.runnable()
+        chat.invoke(ask("cancel order"))
+        chat.invoke(ask("cancel order"))["assistant_message"]["content"].append("mutated")
+        self.assertEqual(len(chat.invoke(ask("cancel order"))["assistant_message"]["content"]), 1)
+
+    def test_request_differences_miss(self):
+        chat = self.runnable()
+        chat.invoke(ask("cancel order"))
+        chat.invoke(ask("cancel my order"))
+        chat.invoke({**ask("cancel order"), "tools": [{"type": "function", "function": {"name": "lookup"}}]})
+        chat.invoke({**ask("cancel order"), "max_tokens": 50})
+        self.runnable(chat.adapter, top_p=0.5).invoke(ask("cancel order"))
+        self.assertEqual(chat.adapter.calls, 5)
+
+    def test_non_deterministic_requests_bypass(self):
+        chat = self.runnable(temperature=0.7)
+        chat.invoke(ask("cancel order"))
+        chat.invoke(ask("cancel order"))
+        self.assertEqual(chat.adapter.calls, 2)
+        self.assertEqual(chat.response_cache.stats()["bypassed"], 2)
+
+        deterministic = self.runnable(chat.adapter)
+        deterministic.invoke(ask("cancel order"))
+        deterministic.invoke(ask("cancel order"), {"response_cache": False})
+        deterministic.invoke({**ask("cancel order"), "temperature": 1.0})
+        self.assertEqual(chat.adapter.calls, 5)
+
+        self.assertTrue(is_deterministic({"temperature": 0}))
+        self.assertFalse(is_deterministic({"temperature": 0, "n": 3}))
+        self.assertFalse(is_deterministic({}))
+
+    def test_errors_are_not_cached(self):
+        chat = self.runnable(_FakeAdapter(fail=True))
+        self.assertTrue(chat.invoke(ask("cancel order"), {"max_retries": 1})["_metadata"]["error"])
+        chat.invoke(ask("cancel order"), {"max_retries": 1})
+        self.assertEqual(chat.adapter.calls, 2)
+
+    def test_scopes_are_isolated(self):
+        adapter = _FakeAdapter()
+        one, two = self.runnable(adapter, scope="wf-1"), self.runnable(adapter, scope="wf-2")
+        one.invoke(ask("cancel order"))
+        two.invoke(ask("cancel order"))
+        one.invoke(ask("cancel order"))
+        self.assertEqual(adapter.calls, 2)
+
+    def test_base_url_is_part_of_the_key(self):
+        openai = self.runnable(_FakeAdapter(base_url="https://api.openai.com/v1"))
+        gateway = self.runnable(_FakeAdapter(base_url="https://gateway.internal/v1"))
+        openai.invoke(ask("cancel order"))
+        gateway.invoke(ask("cancel order"))
+        self.assertEqual((openai.adapter.calls, gateway.adapter.calls), (1, 1))
+
+        same = self.runnable(_FakeAdapter(base_url="https://api.openai.com/v1/"))
+        same.invoke(ask("cancel order"))
+        self.assertEqual(same.adapter.calls, 0)
+
+    def test_entries_expire(self):
+        chat = self.runnable()
+        with patch("utils.response_cache.time.monotonic", return_value=1000.0):
+            chat.invoke(ask("cancel order"))
+        with patch("utils.response_cache.time.monotonic", return_value=1059.0):
+            chat.invoke(ask("cancel order"))
+        with patch("utils.response_cache.time.monotonic", return_value=1061.0):
+            chat.invoke(ask("cancel order"))
+        self.assertEqual(chat.adapter.calls, 2)
+
+    def test_bound_tools_keep_the_cache(self):
+        chat = self.runnable()
+        self.assertIs(chat.bind_tools([]).response_cache, chat.response_cache)
+
+    @unittest.skipIf(fakeredis is None, "fakeredis not installed")
+    def test_redis_store_is_shared(self):
+        self.store = RedisResponseStore(client=fakeredis.FakeRedis())
+        adapter = _FakeAdapter()
+        self.runnable(adapter).invoke(ask("cancel order"))
+        hit = self.runnable(adapter).invoke(ask("cancel order"))
+        self.assertEqual(adapter.calls, 1)
+        self.assertEqual(hit["_metadata"]["cache"]["hit"], "exact")
+        self.assertEqual(len(self.store._client.keys("chat_response:wf-1:*")), 1)
+
+
+class TestSemanticTier(ResponseCacheTestCase):
+
+    def test_similar_question_reuses_answer(self):
+        embedder = _BagOfWordsEmbedder()
+        chat = self.runnable(embedder=embedder)
+        chat.invoke(ask("How long does international shipping take?"))
+        hit = chat.invoke(ask("how long does shipping take, international?"))
+        miss = chat.invoke(ask("How do I cancel my order?"))
+
+        self.assertEqual(chat.adapter.calls, 2)
+        self.assertEqual(hit["_metadata"]["cache"]["hit"], "semantic")
+        self.assertGreaterEqual(hit["_metadata"]["cache"]["similarity"], 0.9)
+        self.assertNotIn("cache", miss["_metadata"])
+        self.assertEqual(chat.response_cache.stats()["semantic_hits"], 1)
+        # One embedding per question: the miss's vector is reused when saving
+        self.assertEqual(embedder.calls, 3)
+
+    def test_follow_up_questions_are_not_matched(self):
+        chat = self.runnable(embedder=_BagOfWordsEmbedder())
+        chat.invoke(ask("How long does international shipping take?"))
+        earlier = ({"role": "user", "content": "I ordered shoes"}, {"role": "assistant", "content": "Noted."})
+        chat.invoke(ask("How long does international shipping take?", *earlier))
+        self.assertEqual(chat.adapter.calls, 2)
+
+    def test_context_must_match(self):
+        embedder = _BagOfWordsEmbedder()
+        chat = self.runnable(embedder=embedder)
+        chat.invoke(ask("How long does shipping take?"))
+        other_prompt = {"messages": [{"role": "system", "content": "Other bot"},
+                                     {"role": "user", "content": "how long does shipping take"}]}
+        chat.invoke(other_prompt)
+        self.runnable(chat.adapter, embedder=embedder, scope="wf-2").invoke(ask("how long does shipping take"))
+        self.assertEqual(chat.adapter.calls, 3)
+
+    def test_tool_call_answers_only_match_exactly(self):
+        adapter = _FakeAdapter(tool_calls=[{"id": "c1", "type": "function",
+                                            "function": {"name": "track", "arguments": "{}"}}])
+        chat = self.runnable(adapter, embedder=_BagOfWordsEmbedder())
+        chat.invoke(ask("How long does shipping take?"))
+        chat.invoke(ask("how long does shipping take"))
+        exact = chat.invoke(ask("How long does shipping take?"))
+        self.assertEqual(adapter.calls, 2)
+        self.assertEqual(exact["assistant_message"]["tool_calls"][0]["function"]["name"], "track")
+
+
+    def test_semantic_indexes_are_bounded(self):
+        embedder = _BagOfWordsEmbedder()
+        with patch("utils.response_cache.settings.CHAT_RESPONSE_CACHE_SEMANTIC_INDEXES", 3):
+            for scope in ["wf-1", "wf-2", "wf-3"]:
+                self.runnable(embedder=embedder, scope=scope).invoke(ask("How long does shipping take?"))
+            # A hit refreshes wf-1, so wf-2 is the least recently used index
+            hit = self.runnable(embedder=embedder, scope="wf-1").invoke(ask("how long does shipping take"))
+            self.assertEqual(hit["_metadata"]["cache"]["hit"], "semantic")
+            self.runnable(embedder=embedder, scope="wf-4").invoke(ask("How long does shipping take?"))
+        self.assertEqual([key.split(":")[0] for key in _semantic_indexes], ["wf-3", "wf-1", "wf-4"])
+
+
+class TestNodeResponseCache(ResponseCacheTestCase):
+
+    def build(self, execution=None):
+        from nodes.chat_models.openai_chat_model import OpenAIChatModelNode
+        node = OpenAIChatModelNode.__new__(OpenAIChatModelNode)
+        node.workflow = type("Workflow", (), {"id": "wf-1"})()
+        node.execution = execution
+        return node._build_response_cache({"responseCache": "semantic"}, "https://api.openai.com/v1", "sk-test")
+
+    def test_embedder_uses_the_execution_sessions(self):
+        execution = type("Execution", (), {"http_sessions": ExecutionHttpSessions()})()
+        cache = self.build(execution)
+        self.assertIs(cache.embedder.http_sessions, execution.http_sessions)
+
+    def test_owned_sessions_are_closed_with_the_cache(self):
+        cache = self.build()
+        sessions = cache.embedder.http_sessions
+        with patch.object(sessions, "close") as close:
+            del cache
+            gc.collect()
+        close.assert_called_once()
+
+    def test_off_builds_no_cache(self):
+        from nodes.chat_models.openai_chat_model import OpenAIChatModelNode
+        node = OpenAIChatModelNode.__new__(OpenAIChatModelNode)
+        self.assertIsNone(node._build_response_cache({}, "", ""))
+
+
+FAQ_QUESTIONS = [f"Question {i}: how long does shipping take to zone {i}?" for i in range(10)]
+FAQ_TRAFFIC = [FAQ_QUESTIONS[i % len(FAQ_QUESTIONS)] for i in range(100)]
+
+
+class TestResponseCacheBenchmark(ResponseCacheTestCase):
+
+    def replay(self, chat):
+        for question in FAQ_TRAFFIC:
+            chat.invoke(ask(question))
+
+    def test_repeated_faq_traffic(self):
+        cached = self.runnable()
+        self.replay(cached)
+        stats = cached.response_cache.stats()
+        self.assertEqual(cached.adapter.calls, len(FAQ_QUESTIONS))
+        self.assertEqual(stats["exact_hits"], len(FAQ_TRAFFIC) - len(FAQ_QUESTIONS))
+        self.assertEqual(stats["saved_tokens"], 150 * (len(FAQ_TRAFFIC) - len(FAQ_QUESTIONS)))
+
+    @pytest.mark.stress
+    def test_repeated_faq_traffic_time(self):
+        def timed(chat):
+            started = time.perf_counter()
+            self.replay(chat)
+            return time.perf_counter() - started
+
+        uncached = ChatModelRunnable(_FakeAdapter(latency=0.01), model="gpt-4o-mini", temperature=0)
+        cached = self.runnable(_FakeAdapter(latency=0.01))
+        self.assertLess(timed(cached) * 5, timed(uncached))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass serializer in utils.serialization.
+
+Checks output parity with the previous model_dump()-based implementation,
+binary stripping/references, per-execution memoization, and benchmarks on
+representative large outputs (Google Sheets rows, Qdrant search results,
+marked "stress").
+
+Run with: pytest tests/test_serialization.py -v
+"""
+
+import sys
+import os
+import time
+import unittest
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import NodeExecutionData
+from utils.serialization import (
+    BINARY_REFERENCE,
+    ExecutionSerializer,
+    deep_serialize,
+    json_size,
+    to_dict_without_binary,
+)
+
+
+def legacy_deep_serialize(obj):
+    """The recursive model_dump() + re-walk implementation this module replaced."""
+    if hasattr(obj, 'model_dump'):
+        return legacy_deep_serialize(obj.model_dump(mode='json'))
+    if isinstance(obj, dict):
+        return {k: legacy_deep_serialize(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [legacy_deep_serialize(i) for i in obj]
+    if isinstance(obj, tuple):
+        return tuple(legacy_deep_serialize(i) for i in obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    return obj
+
+
+def sheets_rows(count: int):
+    """Google Sheets read: one item per row, flat string/number columns."""
+    return [[
+        NodeExecutionData(json_data={
+            "row_number": i + 2,
+            "Name": f"Customer {i}",
+            "Email": f"customer{i}@example.com",
+            "Amount": i * 1.5,
+            "Status": "paid" if i % 2 else "open",
+            "Notes": "lorem ipsum dolor sit amet " * 3,
+        })
+        for i in range(count)
+    ]]
+
+
+def qdrant_results(count: int, dims: int = 256):
+    """Qdrant search: nested payload plus the stored vector."""
+    return [[
+        NodeExecutionData(json_data={
+            "id": str(uuid.UUID(int=i)),
+            "score": 1.0 / (i + 1),
+            "payload": {"page_content": "chunk text " * 20, "metadata": {"source": f"doc-{i}.pdf", "page": i}},
+            "vector": [0.001 * j for j in range(dims)],
+        })
+        for i in range(count)
+    ]]
+
+
+class TestSerializationParity(unittest.TestCase):
+
+    def test_matches_legacy_output(self):
+        item = NodeExecutionData(
+            json_data={"id": uuid.UUID(int=7), "at": datetime(2024, 1, 2, tzinfo=timezone.utc), "nested": [{"a": 1}]},
+            binary_data={"file": {"data": "aGVsbG8=", "mimeType": "text/plain"}},
+        )
+        data = {"final_result": [[item]], "all_results": {"Node": [[item]]}, "id": uuid.UUID(int=1)}
+        self.assertEqual(deep_serialize(data), legacy_deep_serialize(data))
+        self.assertEqual(
+            to_dict_without_binary([[item]]),
+            [[item.model_dump(mode='json', exclude={"binary_data"})]],
+        )
+
+    def test_binary_reference(self):
+        item = NodeExecutionData(
+            json_data={"ok": True},
+            binary_data={"file": {"data": "x" * 100, "mimeType": "image/png", "fileName": "a.png"}},
+        )
+        serialized = ExecutionSerializer().serialize([[item]], BINARY_REFERENCE)
+        self.assertEqual(
+            serialized[0][0]["binary_data"],
+            {"file": {"mimeType": "image/png", "fileName": "a.png", "size": 100}},
+        )
+
+    def test_memoized_per_object(self):
+        serializer = ExecutionSerializer()
+        outputs = sheets_rows(10)
+        first = serializer.node_outputs(outputs)
+        self.assertIs(serializer.node_outputs(outputs), first)
+        self.assertEqual(first, to_dict_without_binary(outputs))
+
+        # Serializing the task result reuses the memoized final_result
+        final = serializer.serialize(outputs)
+        result = serializer.serialize({"final_result": outputs, "all_results": {"Sheets": outputs}})
+        self.assertIs(result["final_result"], final)
+        self.assertIs(result["all_results"]["Sheets"], final)
+        self.assertEqual(serializer.stats()["hits"], 1)
+
+    def test_memo_respects_leaf_conversion(self):
+        serializer = ExecutionSerializer()
+        at = datetime(2024, 1, 2, tzinfo=timezone.utc)
+        payload = {"at": at}
+        self.assertIs(serializer.serialize(payload)["at"], at)
+
+        # The same dict inside json_data is converted like model_dump(mode='json')
+        item = NodeExecutionData(json_data={"payload": payload})
+        serialized = serializer.serialize([[item]])
+        self.assertEqual(serialized[0][0]["json_data"]["payload"], {"at": at.isoformat().replace("+00:00", "Z")})
+
+    def test_binary_bytes_accounted(self):
+        serializer = ExecutionSerializer()
+        outputs = [[NodeExecutionData(json_data={}, binary_data={"f": {"data": "y" * 64}})]]
+        serializer.node_outputs(outputs)
+        serializer.node_outputs(outputs)
+        self.assertEqual(serializer.stats()["binary_bytes_skipped"], 64)
+        self.assertGreater(json_size(serializer.serialize(outputs)), 64)
+
+
+class TestSerializationBenchmark(unittest.TestCase):
+    """The task serializes final_result four times; compare legacy vs memoized single pass."""
+
+    REPEATS = 4
+
+    def _bench(self, outputs):
+        started = time.perf_counter()
+        for _ in range(self.REPEATS):
+            legacy = legacy_deep_serialize(outputs)
+        legacy_time = time.perf_counter() - started
+
+        serializer = ExecutionSerializer()
+        started = time.perf_counter()
+        for _ in range(self.REPEATS):
+            current = serializer.serialize(outputs)
+        current_time = time.perf_counter() - started
+
+        self.assertEqual(current, legacy)
+        return legacy_time, current_time
+
+    def test_large_outputs_match_legacy(self):
+        for outputs in (sheets_rows(500), qdrant_results(50)):
+            self.assertEqual(ExecutionSerializer().serialize(outputs), legacy_deep_serialize(outputs))
+
+    @pytest.mark.stress
+    def test_large_outputs(self):
+        for outputs in (sheets_rows(5000), qdrant_results(500)):
+            legacy, current = self._bench(outputs)
+            self.assertLess(current * 2, legacy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming document splitter (utils/text_splitter.py): boundary
+preference (paragraph, sentence with Persian punctuation, word, hard cut),
+overlap, token-based sizing, lazy generation, and the Default Data Loader
+options that use it.
+
+Run with: pytest tests/test_text_splitter.py -v
+"""
+
+import sys
+import os
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nodes.document_default_data_loader import DocumentDefaultDataLoaderNode
+from utils.text_splitter import TextSplitter, estimate_tokens, split_text, token_counter
+
+
+class _WordEncoding:
+    """Stand-in tokenizer: one token per whitespace-separated word."""
+
+    def encode_ordinary(self, text):
+        return text.split()
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def legacy_split_text(text, max_length, overlap):
+    """Previous character-based splitter, kept as the benchmark baseline."""
+    if len(text) <= max_length:
+        return [text]
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + max_length
+        if end < len(text):
+            last_space = text[start:end].rfind(' ')
+            if last_space > 0:
+                end = start + last_space
+        chunks.append(text[start:end].strip())
+        start = end - overlap
+        if start <= 0:
+            start = end
+    return chunks
+
+
+PERSIAN_ARTICLE = (
+    "ماده ۱ - قرارداد باید کتبی باشد. طرفین متعهد به اجرای آن هستند؟ "
+    "تبصره ۱ - در صورت اختلاف، موضوع به داوری ارجاع می‌شود؛ رأی داور قطعی است.\n\n"
+)
+
+
+def long_document(paragraphs, sentences=6):
+    sentence = "The parties agree to the terms set out in this article and its notes. "
+    return "\n\n".join(
+        f"Article {i}. " + sentence * sentences for i in range(paragraphs)
+    )
+
+
+class TestBoundaries(unittest.TestCase):
+
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(list(split_text("  short text  ", 100)), ["short text"])
+        self.assertEqual(list(split_text("", 100)), [])
+
+    def test_prefers_paragraphs(self):
+        text = "first paragraph here\n\nsecond paragraph here\n\nthird one"
+        self.assertEqual(
+            list(split_text(text, 45)),
+            ["first paragraph here\n\nsecond paragraph here", "third one"],
+        )
+
+    def test_persian_sentence_and_clause_punctuation(self):
+        chunks = list(split_text(PERSIAN_ARTICLE, 40))
+        self.assertTrue(all(len(c) <= 40 for c in chunks), chunks)
+        self.assertEqual(chunks[0], "ماده ۱ - قرارداد باید کتبی باشد.")
+        self.assertTrue(chunks[1].endswith("؟"), chunks)
+        self.assertTrue(any(c.endswith("،") or c.endswith("؛") for c in chunks), chunks)
+
+    def test_words_and_hard_cut(self):
+        self.assertEqual(list(split_text("alpha beta gamma delta", 11)), ["alpha beta", "gamma delta"])
+        self.assertEqual(list(split_text("x" * 25, 10)), ["x" * 10, "x" * 10, "x" * 5])
+
+    def test_chunks_cover_text_in_order(self):
+        text = long_document(40)
+        chunks = list(split_text(text, 500))
+        self.assertTrue(all(len(c) <= 500 for c in chunks))
+        self.assertEqual("".join(chunks).replace(" ", "").replace("\n", ""),
+                         text.replace(" ", "").replace("\n", ""))
+
+    def test_overlap_repeats_tail(self):
+        text = " ".join(f"w{i}" for i in range(100))
+        chunks = list(split_text(text, 60, chunk_overlap=20))
+        for previous, current in zip(chunks, chunks[1:]):
+            # The next chunk starts with the last <= 20 characters of the previous one
+            head = current.split()[0]
+            tail = previous[previous.rindex(head):]
+            self.assertTrue(0 < len(tail) <= 20 and current.startswith(tail), (previous, current))
+            self.assertLessEqual(len(current), 60)
+        self.assertEqual(chunks[-1].split()[-1], "w99")
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            TextSplitter(0)
+        with self.assertRaises(ValueError):
+            TextSplitter(100, chunk_overlap=100)
+
+
+class TestTokenSizing(unittest.TestCase):
+
+    def setUp(self):
+        token_counter.cache_clear()
+        self.addCleanup(token_counter.cache_clear)
+
+    def test_chunks_fit_token_budget(self):
+        with patch("utils.token_ledger.get_encoding", return_value=_WordEncoding()):
+            splitter = TextSplitter.from_tokens(30, chunk_overlap=5)
+        chunks = list(splitter.split(long_document(10)))
+        self.assertTrue(all(word_count(c) <= 30 for c in chunks))
+        # Character sizing at the same number would produce far more chunks
+        self.assertLess(len(chunks), len(list(split_text(long_document(10), 30))) / 3)
+
+    def test_falls_back_to_estimate(self):
+        with patch("utils.token_ledger.get_encoding", side_effect=ConnectionError("offline")):
+            self.assertIs(token_counter("text-embedding-3-small"), estimate_tokens)
+        self.assertEqual(estimate_tokens("abcd"), 3)
+
+    def test_each_character_measured_about_once(self):
+        measured = []
+
+        def counting_words(text):
+            measured.append(len(text))
+            return word_count(text)
+
+        text = long_document(200)
+        chunks = list(TextSplitter(200, 20, counting_words, max_span_chars=200 * 8).split(text))
+        self.assertTrue(all(word_count(c) <= 200 for c in chunks))
+        # Only spans too long to fit are measured before being split further
+        self.assertLess(sum(measured), 2 * len(text))
+
+
+class TestLazySplitting(unittest.TestCase):
+
+    def test_generator_does_not_scan_ahead(self):
+        measured = []
+
+        def counting_len(text):
+            measured.append(len(text))
+            return len(text)
+
+        text = long_document(2000)
+        chunks = TextSplitter(1000, 100, counting_len, max_span_chars=1000).split(text)
+        next(chunks)
+        self.assertLess(sum(measured), 10_000)
+
+
+class TestDocumentLoaderSplitting(unittest.TestCase):
+
+    def setUp(self):
+        self.node = DocumentDefaultDataLoaderNode.__new__(DocumentDefaultDataLoaderNode)
+
+    def test_character_options(self):
+        options = {"maxTextLength": 500, "chunkOverlap": 50}
+        chunks = list(self.node._split_text(long_document(20), options))
+        self.assertGreater(len(chunks), 5)
+        self.assertTrue(all(len(c) <= 500 for c in chunks))
+
+    def test_token_options(self):
+        token_counter.cache_clear()
+        self.addCleanup(token_counter.cache_clear)
+        options = {"maxTextLength": 100, "chunkOverlap": 500, "lengthUnit": "tokens"}
+        with patch("utils.token_ledger.get_encoding", return_value=_WordEncoding()):
+            chunks = list(self.node._split_text(long_document(20), options))
+        # Overlap is capped at half the chunk size
+        self.assertTrue(all(word_count(c) <= 100 for c in chunks))
+        self.assertGreater(len(chunks), 3)
+
+
+class TestSplitterBenchmark(unittest.TestCase):
+
+    def test_streaming_memory(self):
+        text = long_document(20_000)  # ~9 MB of text
+
+        def peak(split):
+            tracemalloc.start()
+            try:
+                split()
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        legacy = lambda: len(legacy_split_text(text, 2000, 200))
+        streaming = lambda: sum(1 for _ in TextSplitter(2000, 200).split(text))
+        legacy_peak, streamed_peak = peak(legacy), peak(streaming)
+        self.assertLess(streamed_peak * 20, legacy_peak)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for TokenLedger, the incremental token accounting used by the agent loop,
+including a benchmark over a 50-turn tool-heavy conversation.
+
+A regex tokenizer stands in for tiktoken so the tests do not depend on
+downloading encoding files; the ledger only relies on ``encode()``.
+
+Run with: pytest tests/test_token_ledger.py -v
+"""
+
+import sys
+import os
+import json
+import re
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.token_ledger import TokenLedger, count_tokens, message_tokens
+
+
+class _RegexEncoding:
+    """Roughly BPE-sized pieces: words, numbers and single punctuation marks."""
+
+    pattern = re.compile(r"\w{1,4}|[^\w\s]")
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return self.pattern.findall(text)
+
+
+def tool_turn(turn: int):
+    """One agent iteration: assistant message with 3 tool calls + 3 large tool results."""
+    tool_calls = [
+        {"id": f"call_{turn}_{i}", "type": "function",
+         "function": {"name": f"search_{i}", "arguments": json.dumps({"query": f"question {turn}", "topK": 20})}}
+        for i in range(3)
+    ]
+    messages = [{"role": "assistant", "content": f"Looking up part {turn}", "tool_calls": tool_calls}]
+    for i in range(3):
+        docs = [{"page_content": f"document {turn}-{i}-{d} " + "legal text " * 40, "score": 0.8} for d in range(5)]
+        messages.append({
+            "role": "tool", "tool_call_id": f"call_{turn}_{i}", "name": f"search_{i}",
+            "content": json.dumps(docs, ensure_ascii=False),
+        })
+    return messages
+
+
+class TestTokenLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.encoding = _RegexEncoding()
+        self.messages = [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": "What changed in the 2024 tax law?"},
+        ]
+
+    def test_matches_count_tokens(self):
+        ledger = TokenLedger(self.messages, encoding=self.encoding)
+        self.assertEqual(ledger.total, count_tokens(self.messages, encoding=self.encoding))
+
+        self.messages.extend(tool_turn(1))
+        self.assertEqual(ledger.sync(self.messages), count_tokens(self.messages, encoding=self.encoding))
+
+    def test_sync_reuses_counts_after_truncation(self):
+        self.messages.extend(tool_turn(1))
+        ledger = TokenLedger(self.messages, encoding=self.encoding)
+        encoded = ledger.encoded
+
+        truncated = [self.messages[0]] + self.messages[-2:]
+        self.assertEqual(ledger.sync(truncated), count_tokens(truncated, encoding=self.encoding))
+        self.assertEqual(ledger.encoded, encoded)
+
+    def test_total_if_added(self):
+        ledger = TokenLedger(self.messages, encoding=self.encoding)
+        message = {"role": "tool", "content": "result text"}
+        tokens = ledger.measure(message)
+        self.assertEqual(tokens, message_tokens(message, self.encoding))
+        self.assertEqual(ledger.total_if_added(tokens), ledger.total + tokens)
+        self.assertFalse(ledger.fits(tokens, limit=ledger.total))
+
+        ledger.append(message, tokens)
+        self.assertEqual(ledger.total, count_tokens(self.messages + [message], encoding=self.encoding))
+
+
+class TestTokenLedgerBenchmark(unittest.TestCase):
+    """The agent loop checks the budget twice per iteration (before the model call, after tools)."""
+
+    TURNS = 50
+
+    def _conversation(self):
+        return [
+            {"role": "system", "content": "You are a helpful assistant. " * 50},
+            {"role": "user", "content": "Summarize every relevant article."},
+        ]
+
+    def test_50_turn_conversation(self):
+        legacy_encoding = _RegexEncoding()
+        messages = self._conversation()
+        for turn in range(self.TURNS):
+            legacy_before = count_tokens(messages, encoding=legacy_encoding)
+            messages.extend(tool_turn(turn))
+            legacy_after = count_tokens(messages, encoding=legacy_encoding)
+
+        ledger_encoding = _RegexEncoding()
+        messages = self._conversation()
+        ledger = TokenLedger(encoding=ledger_encoding)
+        for turn in range(self.TURNS):
+            before = ledger.sync(messages)
+            messages.extend(tool_turn(turn))
+            after = ledger.sync(messages)
+
+        self.assertEqual((before, after), (legacy_before, legacy_after))
+        # Every message is encoded exactly once, as if counted a single time at the end
+        single_pass = _RegexEncoding()
+        count_tokens(messages, encoding=single_pass)
+        self.assertEqual(ledger_encoding.calls, single_pass.calls)
+        self.assertLess(ledger_encoding.calls * 10, legacy_encoding.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
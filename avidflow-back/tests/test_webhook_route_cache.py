@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for the webhook route cache (services/webhook_route_cache.py):
+hot webhooks skip the database, validation and serialization; workflow
+updates, deactivation and deletion (through the workflow router or the admin
+view) invalidate routes on every worker through the Redis version bump and
+pub/sub channel. The wall-clock comparison with uncached resolution is marked
+"stress".
+
+Run with: pytest tests/test_webhook_route_cache.py -v
+"""
+
+import sys
+import os
+import asyncio
+import time
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+from auth.dependencies import get_current_user
+from database.admin2 import WorkflowView
+from database.models import Workflow
+from models import WorkflowModel
+from routers import webhook as webhook_router
+from routers import workflow as workflow_router
+from services.webhook_route_cache import WebhookRoute, WebhookRouteCache, webhook_route_cache
+from tasks import workflow as workflow_tasks
+from utils.workflow_cache import workflow_version
+
+
+CREATED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_workflow(active=True, http_method="POST", extra_nodes=0):
+    nodes = [{
+        "id": "hook", "name": "Webhook", "type": "webhook", "position": (0, 0),
+        "parameters": {"httpMethod": http_method, "path": "payment"}, "is_start": True, "is_webhook": True,
+    }]
+    nodes += [{
+        "id": f"set{i}", "name": f"Set {i}", "type": "set", "position": (i * 100, 0),
+        "parameters": {"values": [{"name": f"field{j}", "value": f"={{{{ $json.body.v{j} }}}}"} for j in range(5)]},
+    } for i in range(extra_nodes)]
+    return SimpleNamespace(
+        id="wf-hook", name="Payment callback", description=None, user_id="user-1", active=active,
+        created_at=CREATED_AT, updated_at=CREATED_AT, nodes=nodes, connections={},
+    )
+
+
+def resolver(workflow_id="wf-hook"):
+    return AsyncMock(return_value=workflow_id)
+
+
+def loader(workflow):
+    return AsyncMock(return_value=workflow)
+
+
+class TestWebhookListener(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        webhook_route_cache.clear()
+        self.addCleanup(webhook_route_cache.clear)
+        self.workflow = make_workflow()
+        self.get_webhook = AsyncMock(side_effect=lambda db, webhook_id: SimpleNamespace(workflow_id=self.workflow.id)
+                                     if webhook_id == "hook-1" else None)
+        self.get_workflow = AsyncMock(side_effect=lambda db, workflow_id: self.workflow)
+        self.create_execution = AsyncMock()
+        self.task = MagicMock()
+        self.task.apply_async.side_effect = lambda kwargs, task_id: SimpleNamespace(id=task_id)
+
+        async def no_db():
+            yield None
+
+        def set_active(active):
+            async def update(db, workflow_id):
+                self.workflow.active = active
+                return self.workflow
+            return update
+
+        app = FastAPI()
+        app.include_router(webhook_router.router)
+        app.include_router(workflow_router.router, prefix="/api/workflows")
+        app.dependency_overrides[webhook_router.get_db_from_app] = no_db
+        app.dependency_overrides[workflow_router.get_db_from_app] = no_db
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user-1")
+        for patcher in (
+            patch.object(webhook_router.WebhookCRUD, "get_webhook_by_id", self.get_webhook),
+            patch.object(webhook_router.WorkflowCRUD, "get_workflow", self.get_workflow),
+            patch.object(webhook_router.ExecutionCRUD, "create_execution", self.create_execution),
+            patch.object(webhook_router.WorkflowCRUD, "activate_workflow", set_active(True)),
+            patch.object(webhook_router.WorkflowCRUD, "deactivate_workflow", set_active(False)),
+            patch.object(workflow_router.SchedulerService, "schedule_workflow", AsyncMock()),
+            patch.object(workflow_tasks, "execute_workflow", self.task),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        self.addAsyncCleanup(self.client.aclose)
+
+    async def test_hot_webhook_reads_database_once(self):
+        for i in range(3):
+            response = await self.client.post("/webhook/hook-1/webhook", json={"paid": i})
+            self.assertEqual(response.json()["status"], "started")
+        self.assertEqual((self.get_webhook.await_count, self.get_workflow.await_count), (1, 1))
+
+        kwargs = self.task.apply_async.call_args.kwargs["kwargs"]
+        self.assertEqual(kwargs["primary_result"]["body"], {"paid": 2})
+        self.assertEqual(kwargs["user_id"], "user-1")
+        expected = WorkflowModel.model_validate(self.workflow).model_dump(mode="json")
+        self.assertEqual(self.create_execution.call_args.kwargs["workflow_data"], expected)
+        # The task carries a reference to the snapshot stored with the execution
+        self.assertEqual(kwargs["workflow_id"], "wf-hook")
+        self.assertEqual(kwargs["workflow_version"], workflow_version(expected))
+        self.assertNotIn("workflow_data", kwargs)
+
+    async def test_unroutable_requests(self):
+        self.assertEqual((await self.client.get("/webhook/hook-1/webhook")).status_code, 404)
+        self.assertEqual((await self.client.post("/webhook/hook-1/set")).status_code, 404)
+        self.assertEqual((await self.client.post("/webhook/hook-1/chat")).status_code, 404)
+        # The route was resolved once and reused for the rejections
+        self.assertEqual(self.get_workflow.await_count, 1)
+
+        self.assertEqual((await self.client.post("/webhook/unknown/webhook")).status_code, 404)
+        self.assertEqual((await self.client.post("/webhook/unknown/webhook")).status_code, 404)
+        self.assertEqual(self.get_webhook.await_count, 3)
+
+    async def test_deactivation_is_seen_immediately(self):
+        invalidations = webhook_route_cache.stats()["invalidations"]
+        await self.client.post("/webhook/hook-1/webhook")
+
+        response = await self.client.post(f"/api/workflows/{self.workflow.id}/deactivate")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.workflow.active)
+
+        self.assertEqual((await self.client.post("/webhook/hook-1/webhook")).status_code, 404)
+        # Inactive workflows are not cached: activating needs no invalidation to be seen,
+        # but it invalidates anyway
+        await self.client.post(f"/api/workflows/{self.workflow.id}/activate")
+        self.assertEqual((await self.client.post("/webhook/hook-1/webhook")).status_code, 200)
+        self.assertEqual(self.get_workflow.await_count, 5)  # 2 of them by the router's ownership checks
+        self.assertEqual(webhook_route_cache.stats()["invalidations"] - invalidations, 2)
+
+    async def test_admin_edits_invalidate(self):
+        invalidations = webhook_route_cache.stats()["invalidations"]
+        await self.client.post("/webhook/hook-1/webhook")
+        view = WorkflowView(Workflow)
+        self.workflow.active = False
+        await view.after_edit(MagicMock(), self.workflow)
+        self.assertEqual((await self.client.post("/webhook/hook-1/webhook")).status_code, 404)
+
+        self.workflow.active = True
+        await self.client.post("/webhook/hook-1/webhook")
+        await view.after_delete(MagicMock(), self.workflow)
+        self.assertEqual(webhook_route_cache.stats()["invalidations"] - invalidations, 2)
+        self.assertEqual(webhook_route_cache.stats()["size"], 0)
+
+
+class TestRouteCache(unittest.IsolatedAsyncioTestCase):
+
+    async def test_triggers_match_first_node_of_each_type(self):
+        workflow = make_workflow()
+        workflow.nodes.append({**workflow.nodes[0], "id": "hook2", "name": "Webhook 2",
+                               "parameters": {"httpMethod": "GET"}})
+        route = WebhookRoute.from_workflow("hook-1", workflow)
+        node, http_method = route.trigger("webhook")
+        self.assertEqual((node.name, http_method), ("Webhook", "POST"))
+        self.assertIsNone(route.trigger("set"))
+
+    async def test_expiry_and_lru_bound(self):
+        cache = WebhookRouteCache(max_entries=2, ttl_seconds=60)
+        load = loader(make_workflow())
+        with patch("services.webhook_route_cache.time.monotonic", return_value=1000.0):
+            for webhook_id in ("a", "b", "c"):
+                await cache.get(webhook_id, resolver(), load)
+            await cache.get("a", resolver(), load)
+        self.assertEqual(load.await_count, 4)
+        with patch("services.webhook_route_cache.time.monotonic", return_value=1061.0):
+            await cache.get("c", resolver(), load)
+        self.assertEqual(load.await_count, 5)
+
+    async def test_invalidation_during_load_is_not_overwritten(self):
+        cache = WebhookRouteCache()
+        workflow = make_workflow()
+
+        async def slow_load(workflow_id):
+            await cache.invalidate_workflow(workflow_id)  # the workflow changes mid-load
+            return workflow
+
+        self.assertIsNotNone(await cache.get("hook-1", resolver(), slow_load))
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class TestSharedRouteCache(unittest.IsolatedAsyncioTestCase):
+    """Two API workers sharing one Redis server."""
+
+    async def asyncSetUp(self):
+        server = fakeredis.FakeServer()
+        self.workers = []
+        for _ in range(2):
+            cache = WebhookRouteCache()
+            await cache.start(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+            self.addAsyncCleanup(cache.stop)
+            self.workers.append(cache)
+
+    async def wait_for(self, condition):
+        for _ in range(100):
+            if condition():
+                return
+            await asyncio.sleep(0.02)
+        self.fail("condition not reached")
+
+    async def test_route_is_shared_and_invalidated_everywhere(self):
+        one, two = self.workers
+        load = loader(make_workflow())
+        await one.get("hook-1", resolver(), load)
+        route = await two.get("hook-1", resolver(), load)
+        self.assertEqual(load.await_count, 1)
+        self.assertEqual(two.stats()["redis_hits"], 1)
+        self.assertEqual(route.trigger("webhook")[1], "POST")
+
+        await one.invalidate_workflow("wf-hook")
+        await self.wait_for(lambda: two.stats()["size"] == 0)
+
+        # The Redis entry carries the old version and is ignored
+        await two.get("hook-1", resolver(), load)
+        self.assertEqual(load.await_count, 2)
+        await one.get("hook-1", resolver(), load)
+        self.assertEqual((load.await_count, one.stats()["redis_hits"]), (2, 1))
+
+    async def test_update_during_load_is_rejected_from_redis(self):
+        one, two = self.workers
+
+        async def racing_load(workflow_id):
+            # Committed after the version was read, before this route is published
+            await self.workers[1].redis.incr(f"webhook_route_version:{workflow_id}")
+            return make_workflow()
+
+        await one.get("hook-1", resolver(), racing_load)
+        load = loader(make_workflow())
+        await two.get("hook-1", resolver(), load)
+        self.assertEqual(load.await_count, 1)
+
+
+class TestRouteCacheBenchmark(unittest.IsolatedAsyncioTestCase):
+
+    REQUESTS = 500
+
+    @staticmethod
+    def uncached(workflow):
+        # Previous listener: validate, scan, dump parameters, dump the workflow twice
+        workflow_data = WorkflowModel.model_validate(workflow)
+        node = next(n for n in workflow_data.nodes if n.type == "webhook")
+        node.parameters.model_dump(mode="json").get("httpMethod")
+        return workflow_data.model_dump(), workflow_data.model_dump(mode="json")
+
+    async def test_hot_webhook_resolution(self):
+        workflow = make_workflow(extra_nodes=30)
+        cache = WebhookRouteCache()
+        resolve, load = resolver(), loader(workflow)
+        with patch.object(WorkflowModel, "model_validate", wraps=WorkflowModel.model_validate) as validate:
+            for _ in range(self.REQUESTS):
+                route = await cache.get("hook-1", resolve, load)
+                self.assertEqual(route.trigger("webhook")[0].name, "Webhook")
+        self.assertEqual((load.await_count, resolve.await_count, validate.call_count), (1, 1, 1))
+
+    @pytest.mark.stress
+    async def test_hot_webhook_resolution_time(self):
+        workflow = make_workflow(extra_nodes=30)
+        started = time.perf_counter()
+        for _ in range(self.REQUESTS):
+            self.uncached(workflow)
+        uncached_time = time.perf_counter() - started
+
+        cache = WebhookRouteCache()
+        resolve, load = resolver(), loader(workflow)
+        started = time.perf_counter()
+        for _ in range(self.REQUESTS):
+            (await cache.get("hook-1", resolve, load)).trigger("webhook")
+        cached_time = time.perf_counter() - started
+        self.assertLess(cached_time * 10, uncached_time)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Multi-worker tests for targeted WebSocket message routing: several
+WorkflowMessageHandlers (one per API worker) share a Redis connection
+registry and an in-memory RabbitMQ stand-in with the "websocket_messages"
+fanout and "websocket_direct" exchanges. Updates a worker cannot deliver
+locally go to the owning worker only, so per-event cost does not grow with
+the number of workers. Routes expire unless their worker's heartbeat refreshes
+them, routes that could not be registered are broadcast, and the WebSocket
+endpoint drops its route however the connection ends.
+
+Run with: pytest tests/test_websocket_routing.py -v
+"""
+
+import sys
+import os
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+from auth.dependencies import get_current_user_websocket
+from routers import websocket as websocket_router
+from services.connection_registry import ROUTE_PREFIX
+from services.workflow_message_handler import WorkflowMessageHandler
+
+
+class _Broker:
+    """RabbitMQ stand-in: each API worker's exclusive coordination queue is bound
+    to the fanout exchange and, under its worker id, to the direct exchange."""
+
+    def __init__(self):
+        self.workers = {}  # worker_id -> handler
+        self.deliveries = 0
+
+    def bind(self, handler):
+        self.workers[handler.worker_id] = handler
+        handler.websocket_exchange = _Exchange(self, direct=False)
+        handler.direct_exchange = _Exchange(self, direct=True)
+
+    async def deliver(self, handler, body):
+        self.deliveries += 1
+        await handler.handle_websocket_coordination_message(json.loads(body))
+
+
+class _Exchange:
+
+    def __init__(self, broker, direct):
+        self.broker = broker
+        self.direct = direct
+
+    async def publish(self, message, routing_key):
+        if self.direct:
+            # Unroutable messages are dropped, as by RabbitMQ
+            targets = [self.broker.workers[routing_key]] if routing_key in self.broker.workers else []
+        else:
+            targets = list(self.broker.workers.values())
+        for handler in targets:
+            await self.broker.deliver(handler, message.body)
+
+
+class _FakeWebSocket:
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        self.closed = True
+
+
+def node_event(i, execution_id="exec-1"):
+    return {"event": "node_completed", "workflow_id": "wf", "execution_id": execution_id, "node": f"Node {i}"}
+
+
+class RoutingTestCase(unittest.IsolatedAsyncioTestCase):
+
+    WORKERS = 4
+
+    async def asyncSetUp(self):
+        self.broker = _Broker()
+        self.redis = fakeredis.aioredis.FakeRedis(decode_responses=True) if fakeredis else None
+        self.workers = []
+        for _ in range(self.WORKERS):
+            handler = WorkflowMessageHandler()
+            self.broker.bind(handler)
+            handler.attach_registry(self.redis)
+            self.workers.append(handler)
+
+    async def consume(self, events):
+        """Deliver events from the shared workflow_updates queue round-robin."""
+        for i, event in enumerate(events):
+            await self.workers[i % len(self.workers)].handle_message(event)
+
+    async def settle(self):
+        for handler in self.workers:
+            if handler._background_tasks:
+                await asyncio.gather(*handler._background_tasks)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class TestTargetedRouting(RoutingTestCase):
+
+    async def test_updates_reach_the_owner_only(self):
+        owner = self.workers[1]
+        websocket = _FakeWebSocket()
+        await owner.register_execution("wf", "exec-1", websocket)
+        self.assertEqual(await self.redis.get(ROUTE_PREFIX + "wf:exec-1"), owner.worker_id)
+
+        events = [node_event(i) for i in range(20)]
+        await self.consume(events)
+        self.assertEqual([m["data"] for m in websocket.sent], events)
+        # Only events consumed by other workers cross the broker, once each
+        self.assertEqual(self.broker.deliveries, 15)
+        self.assertEqual(sum(w.routing_stats["direct"] for w in self.workers), 15)
+        self.assertEqual(sum(w.routing_stats["broadcast"] for w in self.workers), 0)
+
+        await self.workers[0].handle_message({"event": "workflow_completed", "workflow_id": "wf",
+                                              "execution_id": "exec-1"})
+        await self.settle()
+        self.assertTrue(websocket.closed)
+        self.assertIsNone(await self.redis.get(ROUTE_PREFIX + "wf:exec-1"))
+
+    async def test_updates_without_websocket_are_dropped(self):
+        # e.g. a REST-triggered execution publishing with pub_sub=True
+        await self.consume([node_event(i, "rest-exec") for i in range(12)])
+        self.assertEqual(self.broker.deliveries, 0)
+        self.assertEqual(sum(w.routing_stats["dropped"] for w in self.workers), 12)
+
+    async def test_chat_result_is_routed_to_its_waiter(self):
+        waiting = self.workers[2]
+        await waiting.register_execution_result_waiter("exec-chat")
+        await self.workers[0].handle_message({"event": "execution_result", "workflow_id": "wf",
+                                              "execution_id": "exec-chat", "result": {"status": "success"}})
+        self.assertEqual(await waiting.wait_for_execution_result("exec-chat", timeout=1), {"status": "success"})
+        self.assertEqual(self.broker.deliveries, 1)
+        await self.settle()
+        self.assertEqual(await self.redis.keys(ROUTE_PREFIX + "*"), [])
+
+    async def test_test_webhook_token_follows_latest_waiter(self):
+        first, second = self.workers[1], self.workers[2]
+        await first.register_test_webhook_waiter("wf:a", "token-1")
+        await second.register_test_webhook_waiter("wf:b", "token-1")
+        # The first editor session times out; the second registration survives
+        self.assertIsNone(await first.wait_for_test_webhook("token-1", timeout=0.01))
+        await self.settle()
+
+        await self.workers[3].receive_test_webhook_payload("token-1", {"body": {"ok": True}})
+        self.assertEqual(await second.wait_for_test_webhook("token-1", timeout=1), {"body": {"ok": True}})
+        self.assertEqual(self.broker.deliveries, 1)
+
+    async def test_close_unregisters_remaining_routes(self):
+        await self.workers[0].register_execution("wf", "exec-1", _FakeWebSocket())
+        await self.workers[1].register_execution("wf", "exec-2", _FakeWebSocket())
+        await self.workers[0].close()
+        self.assertEqual(await self.redis.keys(ROUTE_PREFIX + "*"), [ROUTE_PREFIX + "wf:exec-2"])
+
+    async def test_routes_expire_unless_refreshed(self):
+        owner = self.workers[0]
+        await owner.register_execution("wf", "exec-1", _FakeWebSocket())
+        key = ROUTE_PREFIX + "wf:exec-1"
+        self.assertTrue(0 < await self.redis.ttl(key) <= owner.registry.ttl_seconds)
+
+        await self.redis.expire(key, 5)
+        await owner.registry.refresh(owner._registered_routes)
+        self.assertGreater(await self.redis.ttl(key), 5)
+        self.assertFalse(owner._heartbeat.done())
+
+        await owner.close()
+        self.assertIsNone(owner._heartbeat)
+
+    async def test_failed_registration_falls_back_to_fanout(self):
+        owner = self.workers[1]
+        websocket = _FakeWebSocket()
+        with patch.object(owner.registry, "register", AsyncMock(return_value=False)):
+            await owner.register_execution("wf", "exec-1", websocket)
+        self.assertIsNone(await self.redis.get(ROUTE_PREFIX + "wf:exec-1"))
+
+        events = [node_event(i) for i in range(20)]
+        await self.consume(events)
+        self.assertEqual([m["data"] for m in websocket.sent], events)
+        self.assertEqual(sum(w.routing_stats["broadcast"] for w in self.workers), 15)
+        self.assertEqual(sum(w.routing_stats["dropped"] for w in self.workers), 0)
+        # Other executions are still routed (or dropped) through the registry
+        await self.consume([node_event(i, "rest-exec") for i in range(4)])
+        self.assertEqual(sum(w.routing_stats["dropped"] for w in self.workers), 4)
+
+
+class TestBroadcastFallback(RoutingTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        for handler in self.workers:
+            handler.attach_registry(None)
+
+    async def test_without_registry_updates_are_broadcast(self):
+        websocket = _FakeWebSocket()
+        await self.workers[1].register_execution("wf", "exec-1", websocket)
+        events = [node_event(i) for i in range(8)]
+        await self.consume(events)
+        self.assertEqual([m["data"] for m in websocket.sent], events)
+        self.assertEqual(self.broker.deliveries, 6 * self.WORKERS)
+
+
+class TestWebSocketEndpoint(unittest.TestCase):
+    """The endpoint drops its connection and route however the execution ends."""
+
+    def setUp(self):
+        self.handler = WorkflowMessageHandler()
+        workflow = SimpleNamespace(
+            id="wf", name="Test", description=None, user_id="user-1", active=True,
+            created_at=None, updated_at=None, connections={},
+            nodes=[{"id": "hook", "name": "Webhook", "type": "webhook", "position": (0, 0),
+                    "parameters": {"httpMethod": "POST"}, "is_start": True, "is_webhook": True,
+                    "webhook_id": "token-1"}],
+        )
+
+        async def no_db():
+            yield None
+
+        app = FastAPI()
+        app.include_router(websocket_router.router)
+        app.state.message_handler = self.handler
+        app.state.redis = SimpleNamespace(set_test_webhook_state=AsyncMock())
+        app.dependency_overrides[websocket_router.get_db_from_app_websocket] = no_db
+        app.dependency_overrides[get_current_user_websocket] = lambda: SimpleNamespace(id="user-1")
+        wait = self.handler.wait_for_test_webhook
+
+        async def wait_briefly(token, timeout):
+            return await wait(token, timeout=0.01)
+
+        for patcher in (
+            patch.object(websocket_router.WorkflowCRUD, "get_workflow", AsyncMock(return_value=workflow)),
+            patch.object(websocket_router.ExecutionCRUD, "create_execution", AsyncMock()),
+            patch.object(self.handler, "wait_for_test_webhook", wait_briefly),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def test_test_webhook_timeout(self):
+        with self.client.websocket_connect("/ws/workflows/execute/wf") as websocket:
+            self.assertEqual(websocket.receive_json()["type"], "execution_started")
+            self.assertEqual(websocket.receive_json()["type"], "waiting_for_test_webhook")
+            self.assertEqual(websocket.receive_json()["error"], "Timed out waiting for test webhook payload")
+        self.assertEqual(self.handler.local_websocket_connections, {})
+        self.assertEqual(self.handler.execution_complete_events, {})
+
+    def test_disconnect_before_any_update(self):
+        with patch.object(websocket_router.ExecutionCRUD, "create_execution",
+                          AsyncMock(side_effect=websocket_router.WebSocketDisconnect())):
+            with self.client.websocket_connect("/ws/workflows/execute/wf") as websocket:
+                websocket.receive_json()
+        self.assertEqual(self.handler.local_websocket_connections, {})
+        self.assertEqual(self.handler.execution_complete_events, {})
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class TestRoutingBenchmark(RoutingTestCase):
+
+    WORKERS = 8
+
+    async def test_deliveries_per_event(self):
+        events = [node_event(i) for i in range(400)]
+        forwarded = len(events) - len(events) // self.WORKERS
+
+        websocket = _FakeWebSocket()
+        await self.workers[0].register_execution("wf", "exec-1", websocket)
+        await self.consume(events)
+        targeted = self.broker.deliveries
+
+        for handler in self.workers:
+            handler.attach_registry(None)
+        self.broker.deliveries = 0
+        await self.consume(events)
+        fanout = self.broker.deliveries
+
+        self.assertEqual(len(websocket.sent), 2 * len(events))
+        self.assertEqual(targeted, forwarded)
+        self.assertEqual(fanout, forwarded * self.WORKERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for workflow references in Celery messages
+(utils/workflow_cache.py): version hashing, the worker-side cache of validated
+workflows and execution order, execute_workflow resolving references from the
+execution's workflow snapshot, and broker payload metrics. The wall-clock comparison of cached and uncached
+preparation is marked "stress".
+
+Run with: pytest tests/test_workflow_cache.py -v
+"""
+
+import sys
+import os
+import json
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import WorkflowModel
+from tasks import workflow as workflow_tasks
+from utils.serialization import deep_serialize
+from utils.workflow_cache import (
+    BrokerPayloadMetrics,
+    WorkflowModelCache,
+    WorkflowReference,
+    broker_payload_metrics,
+    workflow_version,
+)
+
+SYSTEM_PROMPT = "You are a support agent for an online store. Answer politely and cite the policy. " * 20
+
+
+def ai_workflow(nodes=30, prompt=SYSTEM_PROMPT):
+    """A chain Trigger -> Agent 0 -> ... of agents with long prompts, as a JSON dump."""
+    names = ["Trigger"] + [f"Agent {i}" for i in range(nodes - 1)]
+    return WorkflowModel(
+        id="wf-ai",
+        name="Support agents",
+        nodes=[{
+            "id": f"n{i}", "name": name, "type": "manual_trigger" if i == 0 else "ai_agent",
+            "position": (i * 200, 0), "is_start": i == 0,
+            "parameters": {} if i == 0 else {"systemMessage": prompt, "text": "={{ $json.chatInput }}",
+                                             "options": {"maxIterations": 10}},
+        } for i, name in enumerate(names)],
+        connections={
+            source: {"main": [[{"node": target, "type": "main", "index": 0}]]}
+            for source, target in zip(names, names[1:])
+        },
+    ).model_dump(mode="json")
+
+
+class TestWorkflowReference(unittest.TestCase):
+
+    def test_version_identifies_definition(self):
+        payload = ai_workflow(3)
+        reference = WorkflowReference.of(payload)
+        self.assertEqual(reference.workflow_id, "wf-ai")
+        self.assertEqual(reference.version, workflow_version(payload))
+        self.assertEqual(workflow_version(dict(reversed(list(payload.items())))), reference.version)
+        self.assertNotEqual(workflow_version(ai_workflow(3, prompt="Be brief.")), reference.version)
+
+    def test_stored_snapshot_has_the_same_version(self):
+        # What ExecutionCRUD.create_execution stores and the JSON column returns
+        payload = ai_workflow(3)
+        stored = json.loads(json.dumps(deep_serialize(payload)))
+        self.assertEqual(workflow_version(stored), WorkflowReference.of(payload).version)
+
+    def test_task_arguments_record_metrics(self):
+        metrics = BrokerPayloadMetrics()
+        reference = WorkflowReference.of(ai_workflow(3))
+        with patch("utils.workflow_cache.broker_payload_metrics", metrics):
+            arguments = reference.task_arguments()
+        self.assertEqual(arguments, {"workflow_id": "wf-ai", "workflow_version": reference.version})
+        stats = metrics.stats()
+        self.assertEqual((stats["messages"], stats["workflow_bytes"]), (1, reference.size))
+        self.assertEqual(stats["reference_bytes"], len(json.dumps(arguments)))
+
+
+class TestWorkflowModelCache(unittest.TestCase):
+
+    def test_loads_once_per_version(self):
+        cache = WorkflowModelCache()
+        payload = ai_workflow(4)
+        version = workflow_version(payload)
+        loader = MagicMock(return_value=payload)
+
+        first = cache.get("wf-ai", version, loader)
+        second = cache.get("wf-ai", version, loader)
+        self.assertIs(first, second)
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual([n.name for n in first.sorted_nodes], ["Trigger", "Agent 0", "Agent 1", "Agent 2"])
+        # The input index is built with the entry and shared by executions
+        self.assertIsNotNone(first.workflow._input_index)
+
+        edited = ai_workflow(4, prompt="Be brief.")
+        cache.get("wf-ai", workflow_version(edited), MagicMock(return_value=edited))
+        self.assertEqual(cache.stats(), {"size": 2, "hits": 1, "misses": 2, "evictions": 0})
+
+    def test_lru_bound(self):
+        cache = WorkflowModelCache(max_entries=1)
+        one, two = ai_workflow(2), ai_workflow(2, prompt="Be brief.")
+        cache.get("wf-ai", workflow_version(one), lambda: one)
+        cache.get("wf-ai", workflow_version(two), lambda: two)
+        loader = MagicMock(return_value=one)
+        cache.get("wf-ai", workflow_version(one), loader)
+        self.assertEqual((loader.call_count, cache.stats()["evictions"]), (1, 2))
+
+    def test_missing_and_mismatched_snapshots(self):
+        cache = WorkflowModelCache()
+        with self.assertRaises(LookupError):
+            cache.get("wf-ai", "0" * 16, lambda: None)
+
+        payload = ai_workflow(2)
+        entry = cache.get("wf-ai", "0" * 16, lambda: payload)
+        self.assertEqual(entry.workflow.id, "wf-ai")
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+class TestExecuteWorkflowReference(unittest.TestCase):
+
+    def setUp(self):
+        self.payload = ai_workflow(5)
+        self.reference = WorkflowReference.of(self.payload)
+        self.crud = MagicMock()
+        self.crud.get_execution_workflow_data_sync.return_value = self.payload
+        self.run = MagicMock(return_value={"status": "success"})
+        for patcher in (
+            patch.object(workflow_tasks, "workflow_model_cache", WorkflowModelCache()),
+            patch.object(workflow_tasks, "ExecutionCRUD", self.crud),
+            patch.object(workflow_tasks, "get_sync_session_manual", MagicMock()),
+            patch.object(workflow_tasks, "run_workflow", self.run),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def execute(self, execution_id, **kwargs):
+        arguments = {"workflow_id": self.reference.workflow_id, "workflow_version": self.reference.version}
+        arguments.update(kwargs)
+        return workflow_tasks.execute_workflow(execution_id=execution_id, user_id="user-1", **arguments)
+
+    def test_executions_share_the_cached_workflow(self):
+        self.execute("exec-1")
+        self.execute("exec-2")
+        self.assertEqual(self.crud.get_execution_workflow_data_sync.call_count, 1)
+        (first, *_), (second, *_) = (c.args for c in self.run.call_args_list)
+        self.assertIs(first, second)
+        self.assertEqual(first.workflow.nodes[1].name, "Agent 0")
+        self.assertEqual(self.run.call_args.args[-1], self.reference.version)
+
+    def test_missing_snapshot_fails_the_execution(self):
+        self.crud.get_execution_workflow_data_sync.return_value = None
+        with patch.object(workflow_tasks.queue_service, "publish_sync") as publish:
+            response = self.execute("exec-1", pub_sub=True, publish_result=True)
+        self.assertEqual(response["status"], "error")
+        self.run.assert_not_called()
+        args, kwargs = self.crud.update_execution_status_sync.call_args
+        self.assertEqual((args[1:3], kwargs["finished"]), (("exec-1", "error"), True))
+        events = [c.kwargs["message"]["event"] for c in publish.call_args_list]
+        self.assertEqual(events, ["workflow_error", "execution_result"])
+
+    def test_full_workflow_messages_still_run(self):
+        self.execute("exec-1", workflow_id=None, workflow_version=None, workflow_data=self.payload)
+        self.crud.get_execution_workflow_data_sync.assert_not_called()
+        prepared = self.run.call_args.args[0]
+        self.assertEqual(len(prepared.sorted_nodes), 5)
+
+    def test_resume_is_enqueued_by_reference(self):
+        result = {"resume_at": "2030-01-01T00:00:00+00:00", "checkpoint": {}}
+        workflow = WorkflowModel.model_validate(self.payload)
+        with patch.object(workflow_tasks.execute_workflow, "apply_async") as apply_async:
+            workflow_tasks.schedule_resume(MagicMock(), workflow, "exec-1", "user-1", {}, False, result,
+                                           None, self.reference.version)
+        kwargs = apply_async.call_args.kwargs["kwargs"]
+        self.assertNotIn("workflow_data", kwargs)
+        self.assertEqual((kwargs["workflow_id"], kwargs["workflow_version"]), ("wf-ai", self.reference.version))
+
+
+class TestBrokerPayloadBenchmark(unittest.TestCase):
+
+    MESSAGES = 200
+
+    def test_message_size_and_worker_preparation(self):
+        payload = ai_workflow(30)
+        common = {"execution_id": "0" * 36, "user_id": "1" * 36, "primary_result": {"chatInput": "hi"},
+                  "pub_sub": False}
+        broker_payload_metrics.reset()
+        self.addCleanup(broker_payload_metrics.reset)
+
+        full_message = len(json.dumps({**common, "workflow_data": payload}))
+        reference = WorkflowReference.of(payload)
+        reference_message = len(json.dumps({**common, **reference.task_arguments()}))
+        self.assertLess(reference_message * 50, full_message)
+        self.assertEqual(broker_payload_metrics.stats()["workflow_bytes"], reference.size)
+
+        cache = WorkflowModelCache()
+        load = MagicMock(return_value=payload)
+        for _ in range(self.MESSAGES):
+            cache.get(reference.workflow_id, reference.version, load)
+        self.assertEqual(load.call_count, 1)
+
+    @pytest.mark.stress
+    def test_worker_preparation_time(self):
+        payload = ai_workflow(30)
+        reference = WorkflowReference.of(payload)
+        started = time.perf_counter()
+        for _ in range(self.MESSAGES):
+            workflow_tasks.prepare_workflow(WorkflowModel.model_validate(payload))
+        uncached_time = time.perf_counter() - started
+
+        cache = WorkflowModelCache()
+        started = time.perf_counter()
+        for _ in range(self.MESSAGES):
+            cache.get(reference.workflow_id, reference.version, lambda: payload)
+        cached_time = time.perf_counter() - started
+        self.assertLess(cached_time * 20, uncached_time)
+
+if __name__ == "__main__":
+    unittest.main()
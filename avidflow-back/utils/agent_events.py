@@ -3,16 +3,200 @@ Agent Event Publisher for LangChain Runnables.
 
 Publishes structured events to RabbitMQ following the standard workflow
 updates envelope format, enabling real-time UI updates via WebSocket relay.
+
+Events are coalesced per execution by AgentEventBuffer: consecutive
+model_token deltas are merged, and everything buffered during a short window
+(AGENT_EVENT_COALESCE_MS) or up to AGENT_EVENT_MAX_BATCH events leaves as one
+"agent_event_batch" message, so a streamed answer costs a few broker messages
+and WebSocket sends instead of one per token. Publishers of the same
+execution share its buffer through execution_buffer().
+
+The AI Agent node attaches a publisher to its AgentRunnable only when
+AGENT_EVENT_STREAMING is enabled, and flushes it when the run ends.
+WorkflowMessageHandler sends a batch to the client as one
+"workflow_update_batch" frame.
 """
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import threading
 import time
 import logging
+import weakref
 
+from config import settings
 from services.queue import QueueService
 
 logger = logging.getLogger(__name__)
 
+# UI-only progress events: not worth persisting to disk in RabbitMQ
+EPHEMERAL_EVENT_TYPES = frozenset({
+    "model_token", "agent_step", "tool_called", "tool_result", "model_result", "memory_result",
+})
+
+# Flushed immediately, with everything buffered before them
+TERMINAL_EVENT_TYPES = frozenset({"agent_completed", "agent_error"})
+
+
+class AgentEventMetrics:
+    """Counts agent events and the workflow_updates messages carrying them (per worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events = 0
+        self.messages = 0
+        self.persistent_messages = 0
+
+    def record(self, events: int, persistent: bool) -> None:
+        with self._lock:
+            self.events += events
+            self.messages += 1
+            self.persistent_messages += int(persistent)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.events = self.messages = self.persistent_messages = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "events": self.events,
+                "messages": self.messages,
+                "persistent_messages": self.persistent_messages,
+                "events_per_message": round(self.events / (self.messages or 1), 2),
+            }
+
+
+agent_event_metrics = AgentEventMetrics()
+
+
+class AgentEventBuffer:
+    """
+    Per-execution buffer coalescing agent event envelopes into fewer messages.
+
+    - Consecutive model_token envelopes of the same node and lane are merged
+      into one (texts concatenated, "seq" of the last, "seq_from" of the first).
+    - The buffer is flushed ``window_ms`` after its first pending event, once
+      ``max_events`` events are pending, or immediately on a terminal event.
+    - A flush of one envelope publishes it unchanged; several are published as
+      one envelope whose event is {"type": "agent_event_batch", "events": [...]},
+      in seq order. Batches made only of ephemeral events are not persistent.
+
+    Publishers of the same execution (e.g. several agent nodes) share one
+    buffer, see execution_buffer(); call flush() when the execution ends.
+    """
+
+    def __init__(
+        self,
+        queue_service: QueueService,
+        window_ms: Optional[int] = None,
+        max_events: Optional[int] = None,
+    ):
+        self.queue_service = queue_service
+        window_ms = settings.AGENT_EVENT_COALESCE_MS if window_ms is None else window_ms
+        self.window = max(0, window_ms) / 1000.0
+        self.max_events = max(1, settings.AGENT_EVENT_MAX_BATCH if max_events is None else max_events)
+
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_events = 0
+        self._lock = threading.Lock()  # guards _pending
+        self._flush_lock = threading.Lock()  # keeps messages in seq order
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, envelope: Dict[str, Any]) -> bool:
+        """Buffer an envelope; returns False only if an inline flush failed."""
+        event_type = envelope["event"].get("type")
+        with self._lock:
+            if not self._merge_token(envelope):
+                self._pending.append(envelope)
+            self._pending_events += 1
+            flush_now = (
+                event_type in TERMINAL_EVENT_TYPES
+                or self._pending_events >= self.max_events
+                or self.window == 0
+            )
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            return self.flush()
+        return True
+
+    def _merge_token(self, envelope: Dict[str, Any]) -> bool:
+        if not self._pending or envelope["event"].get("type") != "model_token":
+            return False
+        last = self._pending[-1]
+        if (
+            last["event"].get("type") != "model_token"
+            or last["node_name"] != envelope["node_name"]
+            or last["lane"] != envelope["lane"]
+        ):
+            return False
+        last.setdefault("seq_from", last["seq"])
+        last["seq"] = envelope["seq"]
+        last["ts"] = envelope["ts"]
+        last["event"] = {
+            **envelope["event"],
+            "text": last["event"].get("text", "") + envelope["event"].get("text", ""),
+        }
+        return True
+
+    def flush(self) -> bool:
+        """Publish everything buffered so far as one message."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                events, self._pending_events = self._pending_events, 0
+                timer, self._timer = self._timer, None
+            if timer is not None:
+                timer.cancel()
+            if not pending:
+                return True
+
+            if len(pending) == 1:
+                message = pending[0]
+            else:
+                first, last = pending[0], pending[-1]
+                message = {
+                    "workflow_id": last["workflow_id"],
+                    "execution_id": last["execution_id"],
+                    "node_name": last["node_name"],
+                    "lane": last["lane"],
+                    "seq": last["seq"],
+                    "seq_from": first.get("seq_from", first["seq"]),
+                    "ts": last["ts"],
+                    "pub_sub": True,
+                    "event": {"type": "agent_event_batch", "count": events, "events": pending},
+                }
+            persistent = any(e["event"].get("type") not in EPHEMERAL_EVENT_TYPES for e in pending)
+            agent_event_metrics.record(events, persistent)
+            try:
+                ok = self.queue_service.publish_sync(
+                    queue_name="workflow_updates",
+                    message=message,
+                    persistent=persistent
+                )
+                logger.debug(f"[AgentEvents] Published {events} events in 1 message (seq={message['seq']})")
+                return ok
+            except Exception as e:
+                logger.error(f"[AgentEvents] Failed to publish {events} events: {e}")
+                return False
+
+
+# (workflow_id, execution_id) -> buffer, alive while a publisher or a pending flush timer holds it
+_execution_buffers: "weakref.WeakValueDictionary[Tuple[str, str], AgentEventBuffer]" = weakref.WeakValueDictionary()
+_execution_buffers_lock = threading.Lock()
+
+
+def execution_buffer(workflow_id: str, execution_id: str, queue_service: QueueService) -> AgentEventBuffer:
+    """The execution's shared event buffer, created (with ``queue_service``) on first use."""
+    key = (str(workflow_id), str(execution_id))
+    with _execution_buffers_lock:
+        buffer = _execution_buffers.get(key)
+        if buffer is None:
+            buffer = _execution_buffers[key] = AgentEventBuffer(queue_service)
+        return buffer
+
 
 class AgentEventPublisher:
     """
@@ -40,6 +224,8 @@ class AgentEventPublisher:
     - agent_error: {"type": "agent_error", "ts": int, "seq": int, "message": str, "context": dict}
     - model_result: {"type": "model_result", "usage": dict, "_metadata": dict, "ts": int, "seq": int}
     - memory_result: {"type": "memory_result", "ok": bool, "operation": str, "ts": int, "seq": int}
+    - agent_event_batch: {"type": "agent_event_batch", "count": int, "events": [envelope, ...]}
+      (coalesced envelopes; merged model_token envelopes carry "seq_from")
     
     Usage:
         publisher = AgentEventPublisher(
@@ -55,7 +241,7 @@ class AgentEventPublisher:
         publisher.agent_started(model="gpt-4", tools_count=3)
         publisher.tool_called(name="search", tool_call_id="call_1", args={"query": "n8n"})
         publisher.tool_result(name="search", tool_call_id="call_1", ok=True, data={...})
-        publisher.agent_completed(final_preview="Result text", summary={...})
+        publisher.agent_completed(final_preview="Result text", summary={...})  # flushes the buffer
     """
     
     def __init__(
@@ -65,7 +251,8 @@ class AgentEventPublisher:
         node_name: str,
         lane: int = 0,
         pub_sub: bool = True,
-        queue_service: Optional[QueueService] = None
+        queue_service: Optional[QueueService] = None,
+        buffer: Optional[AgentEventBuffer] = None
     ):
         """
         Initialize Agent Event Publisher.
@@ -77,6 +264,7 @@ class AgentEventPublisher:
             lane: Execution lane (default: 0)
             pub_sub: Whether to publish events (enable/disable publishing)
             queue_service: QueueService instance (creates new if None)
+            buffer: Event buffer to use (default: the execution's, see execution_buffer)
         """
         self.workflow_id = workflow_id
         self.execution_id = execution_id
@@ -85,6 +273,7 @@ class AgentEventPublisher:
         self.pub_sub = pub_sub
         self.queue_service = queue_service or QueueService()
         self._seq = 0  # Event sequence number
+        self.buffer = buffer or execution_buffer(workflow_id, execution_id, self.queue_service)
     
     def _publish(self, event: Dict[str, Any]) -> None:
         """
@@ -109,14 +298,12 @@ class AgentEventPublisher:
             "event": event
         }
         
-        try:
-            self.queue_service.publish_sync(
-                queue_name="workflow_updates",
-                message=envelope
-            )
-            logger.debug(f"[AgentEvents] Published {event.get('type')} event (seq={self._seq})")
-        except Exception as e:
-            logger.error(f"[AgentEvents] Failed to publish event: {e}")
+        self.buffer.add(envelope)
+    
+    def flush(self) -> None:
+        """Publish buffered events now (e.g. when the node finishes)."""
+        if self.pub_sub:
+            self.buffer.flush()
     
     # ============================================================================
     # Agent Lifecycle Events
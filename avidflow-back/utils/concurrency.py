@@ -0,0 +1,191 @@
+"""
+Bounded worker pools that cooperate with the Celery gevent pool.
+
+Celery workers run with --pool=gevent (see docker-compose.yml), so blocking
+I/O must be dispatched as greenlets there. Outside a patched process (API
+server, scripts, tests) a regular ThreadPoolExecutor is used instead.
+
+Both backends return concurrent.futures.Future objects, so callers can use
+concurrent.futures.wait()/as_completed() regardless of the runtime.
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+try:
+    import gevent
+    from gevent import monkey
+    from gevent.pool import Pool as GeventPool
+    GEVENT_AVAILABLE = True
+except ImportError:
+    gevent = None
+    monkey = None
+    GeventPool = None
+    GEVENT_AVAILABLE = False
+
+
+def gevent_patched() -> bool:
+    """True when the process has been monkey-patched by gevent (Celery gevent pool)."""
+    if not GEVENT_AVAILABLE:
+        return False
+    try:
+        return bool(monkey.is_module_patched("socket"))
+    except Exception:
+        return False
+
+
+class BoundedExecutor:
+    """
+    Run callables on at most ``max_workers`` concurrent greenlets/threads.
+
+    Greenlets are used when gevent has patched the process, OS threads
+    otherwise. ``submit`` always returns a concurrent.futures.Future.
+    """
+
+    def __init__(self, max_workers: int, name_prefix: str = "worker") -> None:
+        self.max_workers = max(1, int(max_workers or 1))
+        self.runtime = "gevent" if gevent_patched() else "threading"
+        self._pool: Any
+        if self.runtime == "gevent":
+            self._pool = GeventPool(self.max_workers)
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=name_prefix
+            )
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Schedule ``fn(*args, **kwargs)`` and return a Future for its result."""
+        if self.runtime == "threading":
+            return self._pool.submit(fn, *args, **kwargs)
+
+        future: Future = Future()
+
+        def _run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:  # GreenletExit included, so waiters never hang
+                future.set_exception(e)
+
+        # Pool.spawn blocks the caller while the pool is full, which is the
+        # same back-pressure ThreadPoolExecutor gives via its work queue.
+        self._pool.spawn(_run)
+        return future
+
+    def shutdown(self, wait: bool = True, kill_pending: bool = False) -> None:
+        """Release the pool. ``kill_pending`` aborts greenlets that are still running."""
+        if self.runtime == "threading":
+            self._pool.shutdown(wait=wait, cancel_futures=kill_pending)
+            return
+        if kill_pending:
+            self._pool.kill(block=wait)
+        elif wait:
+            self._pool.join()
+
+    def __enter__(self) -> "BoundedExecutor":
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: Any) -> None:
+        self.shutdown(wait=True)
+
+
+class CallOutcome(NamedTuple):
+    """Result of one call run by TimeoutRunner."""
+    status: str  # "ok" | "error" | "timeout" | "cancelled"
+    value: Any  # return value, or the exception for "error"
+    elapsed: float
+
+
+class TimeoutRunner:
+    """
+    Reusable bounded runner for batches of calls with a per-call timeout.
+
+    ``run`` returns one CallOutcome per call, in call order. A call's timeout
+    starts when it is handed to a worker; calls are only submitted while a
+    worker is free, so a full gevent pool never blocks the caller. Timed-out
+    calls cannot be interrupted: they keep their worker until they return and
+    are counted in ``stats()["hung"]`` meanwhile. Calls that never get a
+    worker because every slot is hung are reported as "cancelled".
+    """
+
+    def __init__(self, max_workers: int, name_prefix: str = "worker") -> None:
+        self.max_workers = max(1, int(max_workers or 1))
+        self.name_prefix = name_prefix
+        self._executor: Optional[BoundedExecutor] = None
+        self._hung: Set[Future] = set()
+        self.completed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    def run(self, calls: Sequence[Callable[[], Any]], timeout: float) -> List[CallOutcome]:
+        if self._executor is None:
+            self._executor = BoundedExecutor(self.max_workers, name_prefix=self.name_prefix)
+        outcomes: List[Optional[CallOutcome]] = [None] * len(calls)
+        queued = deque(range(len(calls)))
+        running: Dict[Future, Tuple[int, float]] = {}
+
+        while queued or running:
+            self._hung = {f for f in self._hung if not f.done()}
+            free = self.max_workers - len(running) - len(self._hung)
+            while queued and free > 0:
+                index = queued.popleft()
+                running[self._executor.submit(calls[index])] = (index, time.monotonic())
+                free -= 1
+            if not running:
+                # Every worker is stuck on a call that timed out earlier
+                for index in queued:
+                    outcomes[index] = CallOutcome("cancelled", None, 0.0)
+                    self.cancelled += 1
+                break
+
+            next_deadline = min(started for _, started in running.values()) + timeout
+            done, _ = wait(
+                list(running), timeout=max(0.0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            now = time.monotonic()
+            for future in list(running):
+                index, started = running[future]
+                if future in done:
+                    error = future.exception()
+                    if error is None:
+                        outcomes[index] = CallOutcome("ok", future.result(), now - started)
+                    else:
+                        outcomes[index] = CallOutcome("error", error, now - started)
+                    self.completed += 1
+                elif now - started >= timeout:
+                    outcomes[index] = CallOutcome("timeout", None, now - started)
+                    self.timed_out += 1
+                    self._hung.add(future)
+                else:
+                    continue
+                del running[future]
+
+        return outcomes  # type: ignore[return-value]
+
+    def shutdown(self) -> None:
+        """Release workers; greenlets of hung calls are killed under gevent."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, kill_pending=True)
+            self._executor = None
+        self._hung.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "hung": sum(1 for f in self._hung if not f.done()),
+        }
+
+    def __enter__(self) -> "TimeoutRunner":
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: Any) -> None:
+        self.shutdown()
@@ -0,0 +1,150 @@
+"""
+Decrypted credential caches used by BaseNode.get_credentials.
+
+Two tiers:
+- ExecutionCredentialCache: lives on WorkflowExecutionContext, so every node
+  (and every item loop inside a node) of one execution shares a single DB
+  read + decrypt per credential id.
+- Worker-level LRU with a short TTL (opt-in, CREDENTIAL_CACHE_TTL_SECONDS > 0)
+  for credentials that are hot across executions on the same worker.
+
+Callers always receive a deep copy, so a node mutating its credential dict
+cannot leak changes into other nodes. update_credentials must call
+invalidate()/set() so OAuth token refreshes are visible immediately.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import copy
+import threading
+import time
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+CredentialLoader = Callable[[str], Optional[Dict[str, Any]]]
+
+
+class WorkerCredentialLRU:
+    """Process-wide TTL + LRU cache of decrypted credentials."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (expires_at, data)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, credential_id: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(credential_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[credential_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(credential_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, credential_id: str, data: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[credential_id] = (time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(credential_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, credential_id: str) -> None:
+        with self._lock:
+            self._entries.pop(credential_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+worker_credential_cache = WorkerCredentialLRU(
+    ttl_seconds=settings.CREDENTIAL_CACHE_TTL_SECONDS,
+    max_entries=settings.CREDENTIAL_CACHE_MAX_ENTRIES,
+)
+
+
+class ExecutionCredentialCache:
+    """Per-execution cache of decrypted credentials, keyed by credential id."""
+
+    def __init__(self, worker_cache: Optional[WorkerCredentialLRU] = None):
+        self._worker_cache = worker_cache if worker_cache is not None else worker_credential_cache
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.worker_hits = 0
+        self.misses = 0
+
+    def get(self, credential_id: str, loader: CredentialLoader) -> Optional[Dict[str, Any]]:
+        """Return a copy of the credential, loading it via ``loader`` on a miss."""
+        with self._lock:
+            data = self._entries.get(credential_id)
+            if data is not None:
+                self.hits += 1
+                return copy.deepcopy(data)
+
+        data = self._worker_cache.get(credential_id)
+        if data is not None:
+            with self._lock:
+                self.worker_hits += 1
+                self._entries[credential_id] = data
+            return copy.deepcopy(data)
+
+        data = loader(credential_id)
+        with self._lock:
+            self.misses += 1
+            if data is not None:
+                self._entries[credential_id] = data
+        if data is not None:
+            self._worker_cache.set(credential_id, data)
+        return copy.deepcopy(data)
+
+    def set(self, credential_id: str, data: Dict[str, Any]) -> None:
+        """Replace a cached credential (e.g. after an OAuth token refresh)."""
+        data = copy.deepcopy(data)
+        with self._lock:
+            self._entries[credential_id] = data
+        self._worker_cache.invalidate(credential_id)
+        self._worker_cache.set(credential_id, data)
+
+    def invalidate(self, credential_id: str) -> None:
+        with self._lock:
+            self._entries.pop(credential_id, None)
+        self._worker_cache.invalidate(credential_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "worker_hits": self.worker_hits,
+                "misses": self.misses,
+            }
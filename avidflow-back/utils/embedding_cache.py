@@ -0,0 +1,288 @@
+"""
+Content-addressed embedding caches used by the embedding providers.
+
+Vectors are keyed by (endpoint, model, dimensions, sha256(text)): the same
+text embedded with the same model at the same API base URL always yields the
+same vector, so providers look texts up before batching and only send misses
+to the API. The endpoint is part of the key because a model name only
+identifies a model at one provider (OpenAI, Azure, a self-hosted server). Re-ingesting an unchanged
+corpus therefore makes no embedding calls.
+
+Tiers:
+- MemoryEmbeddingCache: process-wide LRU (vectors stored as packed doubles).
+- SQLiteEmbeddingCache / RedisEmbeddingCache: persistent tier that survives
+  worker restarts (Redis is shared by every worker). SQLite is capped at a
+  row count, Redis entries expire.
+- TieredEmbeddingCache: checks tiers in order and backfills the faster ones.
+
+get_default_embedding_cache() builds the worker-wide cache from settings
+(EMBEDDING_CACHE_*); providers created without an explicit cache use it.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import hashlib
+import sqlite3
+import threading
+import time
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Vector = List[float]
+
+
+def embedding_key(base_url: str, model: str, dimensions: Optional[int], text: str) -> str:
+    """Cache key of ``text`` embedded by ``model`` at ``base_url`` (``dimensions`` None = model default)."""
+    endpoint = hashlib.sha256(base_url.rstrip("/").encode("utf-8")).hexdigest()[:16]
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{endpoint}:{model}:{dimensions or 0}:{digest}"
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    return array("d", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> Vector:
+    values = array("d")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class BaseEmbeddingCache(ABC):
+    """Batch get/set of vectors by embedding_key(), with hit/miss counters."""
+
+    def __init__(self) -> None:
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _get_many(self, keys: List[str]) -> Dict[str, Vector]:
+        pass
+
+    @abstractmethod
+    def set_many(self, vectors: Dict[str, Vector]) -> None:
+        pass
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Vector]:
+        """Vectors found for ``keys`` (missing keys are absent from the result)."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            found = self._get_many(keys)
+        except Exception as e:
+            logger.warning(f"[EmbeddingCache] {type(self).__name__} lookup failed: {e}")
+            found = {}
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class MemoryEmbeddingCache(BaseEmbeddingCache):
+    """In-process LRU of at most ``max_entries`` vectors."""
+
+    def __init__(self, max_entries: int = 2000):
+        super().__init__()
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.evictions = 0
+
+    def _get_many(self, keys: List[str]) -> Dict[str, Vector]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                blob = self._entries.get(key)
+                if blob is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = blob
+        return {key: _unpack(blob) for key, blob in found.items()}
+
+    def set_many(self, vectors: Dict[str, Vector]) -> None:
+        packed = {key: _pack(vector) for key, vector in vectors.items()}
+        with self._lock:
+            for key, blob in packed.items():
+                self._entries[key] = blob
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            stats.update(size=len(self._entries), evictions=self.evictions)
+        return stats
+
+
+class SQLiteEmbeddingCache(BaseEmbeddingCache):
+    """
+    Persistent cache in a local SQLite file (one table, key -> packed vector).
+
+    Holds at most ``max_rows`` vectors (0 = unbounded): the oldest writes are
+    deleted once a write goes over the limit.
+    """
+
+    def __init__(self, path: str, max_rows: int = 0):
+        super().__init__()
+        self.path = path
+        self.max_rows = max(0, max_rows)
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+
+    def _get_many(self, keys: List[str]) -> Dict[str, Vector]:
+        found: Dict[str, Vector] = {}
+        with self._lock:
+            # Stay below SQLite's default limit of 999 bound parameters
+            for start in range(0, len(keys), 900):
+                chunk = keys[start:start + 900]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update((key, _unpack(blob)) for key, blob in rows)
+        return found
+
+    def set_many(self, vectors: Dict[str, Vector]) -> None:
+        now = time.time()
+        rows = [(key, _pack(vector), now) for key, vector in vectors.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)", rows
+            )
+            if self.max_rows:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Counted on every write: other processes may share the file
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self.max_rows:
+            deleted = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY created_at, rowid LIMIT ?)",
+                (count - self.max_rows,),
+            ).rowcount
+            self.evictions += deleted
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            stats.update(size=size, evictions=self.evictions)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisEmbeddingCache(BaseEmbeddingCache):
+    """Persistent cache shared by all workers: one Redis string per vector, with a TTL."""
+
+    KEY_PREFIX = "embedding:"
+
+    def __init__(self, client: Any = None, url: Optional[str] = None, ttl_seconds: int = 0):
+        super().__init__()
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or settings.REDIS_URL)  # bytes responses
+        self._client = client
+        self.ttl_seconds = ttl_seconds
+
+    def _get_many(self, keys: List[str]) -> Dict[str, Vector]:
+        blobs = self._client.mget([self.KEY_PREFIX + key for key in keys])
+        return {key: _unpack(blob) for key, blob in zip(keys, blobs) if blob}
+
+    def set_many(self, vectors: Dict[str, Vector]) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for key, vector in vectors.items():
+            pipe.set(self.KEY_PREFIX + key, _pack(vector), ex=self.ttl_seconds or None)
+        pipe.execute()
+
+
+class TieredEmbeddingCache(BaseEmbeddingCache):
+    """Looks tiers up in order; hits in a slower tier are copied into the faster ones."""
+
+    def __init__(self, tiers: List[BaseEmbeddingCache]):
+        super().__init__()
+        self.tiers = tiers
+
+    def _get_many(self, keys: List[str]) -> Dict[str, Vector]:
+        found: Dict[str, Vector] = {}
+        missing = keys
+        for index, tier in enumerate(self.tiers):
+            if not missing:
+                break
+            hits = tier.get_many(missing)
+            if hits:
+                for faster in self.tiers[:index]:
+                    faster.set_many(hits)
+                found.update(hits)
+                missing = [key for key in missing if key not in hits]
+        return found
+
+    def set_many(self, vectors: Dict[str, Vector]) -> None:
+        for tier in self.tiers:
+            try:
+                tier.set_many(vectors)
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] {type(tier).__name__} write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["tiers"] = [tier.stats() for tier in self.tiers]
+        return stats
+
+
+_default_cache: Optional[BaseEmbeddingCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_embedding_cache() -> Optional[BaseEmbeddingCache]:
+    """Worker-wide cache configured by EMBEDDING_CACHE_* settings (None when disabled)."""
+    global _default_cache
+    if _default_cache is not None or settings.EMBEDDING_CACHE_MAX_ENTRIES <= 0:
+        return _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            tiers: List[BaseEmbeddingCache] = [MemoryEmbeddingCache(settings.EMBEDDING_CACHE_MAX_ENTRIES)]
+            backend = (settings.EMBEDDING_CACHE_PERSISTENT or "").lower()
+            try:
+                if backend == "sqlite":
+                    tiers.append(SQLiteEmbeddingCache(
+                        settings.EMBEDDING_CACHE_SQLITE_PATH, settings.EMBEDDING_CACHE_SQLITE_MAX_ROWS
+                    ))
+                elif backend == "redis":
+                    tiers.append(RedisEmbeddingCache(ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS))
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] Persistent tier '{backend}' unavailable: {e}")
+            _default_cache = tiers[0] if len(tiers) == 1 else TieredEmbeddingCache(tiers)
+    return _default_cache
@@ -3,10 +3,14 @@ Embedding provider interface and factory.
 Delegates to existing embedding nodes to avoid logic duplication.
 """
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import requests
 
+from utils.concurrency import BoundedExecutor
+from utils.embedding_cache import BaseEmbeddingCache, embedding_key, get_default_embedding_cache
+from utils.http_pool import ExecutionHttpSessions, RetryAfterBackoff
 from utils.qdrant_exceptions import EmbeddingError, ParameterError
 
 logger = logging.getLogger(__name__)
@@ -43,12 +47,25 @@ class BaseEmbeddingProvider(ABC):
             Embedding dimension
         """
         pass
+    
+    def close(self) -> None:
+        """Release resources held by the provider (HTTP sessions); no-op by default."""
 
 
 class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
     """
     OpenAI embedding provider using logic from embeddings_openai.py.
     Avoids duplication by reusing the same API call pattern.
+    
+    Texts are looked up in the embedding cache first (keyed by base URL,
+    model, dimensions and sha256 of the text); only misses, deduplicated, are
+    sent to the API and then stored in the cache.
+    
+    Misses are packed into batches of at most batch_size texts and
+    max_batch_tokens tokens, sent over a pooled keep-alive session with up
+    to max_concurrency batches in flight, and reassembled in input order.
+    429 and 5xx responses are retried after the delay the response headers
+    ask for; the pause is shared by all in-flight batches.
     """
     
     # Model dimensions (from embeddings_openai.py)
@@ -58,6 +75,10 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
         "text-embedding-3-large": 3072
     }
     
+    MAX_INPUTS_PER_REQUEST = 2048
+    MAX_TOKENS_PER_REQUEST = 300_000  # Summed over all inputs of one /embeddings call
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+    
     def __init__(
         self,
         api_key: str,
@@ -66,7 +87,13 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
         dimensions: Optional[int] = None,
         organization: Optional[str] = None,
         timeout: int = 60,
-        batch_size: int = 100
+        batch_size: int = 100,
+        cache: Optional[BaseEmbeddingCache] = None,
+        use_cache: bool = True,
+        max_concurrency: int = 4,
+        max_batch_tokens: int = MAX_TOKENS_PER_REQUEST,
+        max_retries: int = 5,
+        http_sessions: Optional[ExecutionHttpSessions] = None
     ):
         """
         Initialize OpenAI embedding provider.
@@ -79,6 +106,12 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
             organization: Organization ID (optional)
             timeout: Request timeout in seconds
             batch_size: Maximum texts per API call
+            cache: Embedding cache (default: the worker-wide cache from settings)
+            use_cache: Set False to always call the API
+            max_concurrency: Batches in flight at once
+            max_batch_tokens: Token budget of one API call
+            max_retries: Retries of a batch after 429/5xx responses
+            http_sessions: Session pool to use (e.g. the execution's); one is created otherwise
             
         Raises:
             ParameterError: If required parameters are missing or invalid
@@ -95,7 +128,17 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
         self.dimensions = dimensions
         self.organization = organization
         self.timeout = timeout
-        self.batch_size = batch_size
+        self.batch_size = max(1, min(int(batch_size), self.MAX_INPUTS_PER_REQUEST))
+        self.cache = (cache or get_default_embedding_cache()) if use_cache else None
+        self.max_concurrency = max(1, int(max_concurrency or 1))
+        self.max_batch_tokens = max(1, min(int(max_batch_tokens), self.MAX_TOKENS_PER_REQUEST))
+        self.max_retries = max(0, int(max_retries))
+        self.http_sessions = http_sessions or ExecutionHttpSessions(pool_maxsize=self.max_concurrency)
+        self._owns_sessions = http_sessions is None
+        self.backoff = RetryAfterBackoff()
+        self._encoding = None
+        self._stats_lock = threading.Lock()
+        self.api_calls = 0
         
         # Determine vector size
         if dimensions:
@@ -120,18 +163,83 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
         if not texts:
             raise EmbeddingError("No texts provided for embedding generation")
         
-        # Process in batches if needed
-        if len(texts) > self.batch_size:
+        if self.cache is None:
+            return self._generate_uncached(texts)
+        
+        keys = [embedding_key(self.base_url, self.model, self.dimensions, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        
+        # Embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        
+        if missing:
+            generated = dict(zip(missing, self._generate_uncached(list(missing.values()))))
+            self.cache.set_many(generated)
+            vectors.update(generated)
+        
+        logger.debug(
+            f"[OpenAIProvider] {len(texts)} texts: {len(texts) - len(missing)} from cache, "
+            f"{len(missing)} embedded"
+        )
+        return [vectors[key] for key in keys]
+    
+    def _generate_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Call the API for every text; batches run concurrently, results keep input order."""
+        batches = self._pack_batches(texts)
+        
+        if len(batches) == 1 or self.max_concurrency == 1:
             all_embeddings = []
-            
-            for i in range(0, len(texts), self.batch_size):
-                batch = texts[i:i + self.batch_size]
-                batch_embeddings = self._generate_embeddings_batch(batch)
-                all_embeddings.extend(batch_embeddings)
-            
+            for start, end in batches:
+                all_embeddings.extend(self._generate_embeddings_batch(texts[start:end]))
             return all_embeddings
-        else:
-            return self._generate_embeddings_batch(texts)
+        
+        logger.debug(
+            f"[OpenAIProvider] {len(texts)} texts in {len(batches)} batches, "
+            f"{self.max_concurrency} in flight"
+        )
+        with BoundedExecutor(min(self.max_concurrency, len(batches)), name_prefix="embeddings") as executor:
+            futures = [
+                executor.submit(self._generate_embeddings_batch, texts[start:end])
+                for start, end in batches
+            ]
+            all_embeddings = []
+            for future in futures:
+                all_embeddings.extend(future.result())
+        return all_embeddings
+    
+    def _pack_batches(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """Split texts into contiguous [start, end) ranges within the item and token limits."""
+        batches = []
+        start, tokens = 0, 0
+        for index, text in enumerate(texts):
+            count = self._count_tokens(text)
+            if index > start and (index - start >= self.batch_size or tokens + count > self.max_batch_tokens):
+                batches.append((start, index))
+                start, tokens = index, 0
+            tokens += count
+        batches.append((start, len(texts)))
+        return batches
+    
+    def _count_tokens(self, text: str) -> int:
+        """Tokens of text for the model; a conservative byte estimate if tiktoken is unavailable."""
+        if self._encoding is None:
+            try:
+                from utils.token_ledger import get_encoding
+                self._encoding = get_encoding(self.model)
+            except Exception as e:
+                logger.debug(f"[OpenAIProvider] Tokenizer unavailable, estimating tokens: {e}")
+                self._encoding = False
+        if self._encoding:
+            return len(self._encoding.encode_ordinary(text))
+        return len(text.encode("utf-8")) // 2 + 1
+    
+    def close(self) -> None:
+        """Close the pooled HTTP session (only when the provider created it)."""
+        if self._owns_sessions:
+            self.http_sessions.close()
     
     def _generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """
@@ -166,14 +274,27 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
             payload["dimensions"] = self.dimensions
         
         try:
-            logger.debug(f"[OpenAIProvider] Calling OpenAI API for {len(texts)} texts")
-            
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=self.timeout
-            )
+            session = self.http_sessions.get(url, pool_maxsize=self.max_concurrency)
+            for attempt in range(self.max_retries + 1):
+                self.backoff.wait()
+                logger.debug(f"[OpenAIProvider] Calling OpenAI API for {len(texts)} texts")
+                with self._stats_lock:
+                    self.api_calls += 1
+                
+                response = session.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=self.timeout
+                )
+                
+                if response.status_code not in self.RETRY_STATUS_CODES or attempt == self.max_retries:
+                    break
+                delay = self.backoff.on_retry(response.headers, attempt)
+                logger.warning(
+                    f"[OpenAIProvider] OpenAI API returned {response.status_code}, "
+                    f"retrying batch of {len(texts)} in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})"
+                )
             
             if response.status_code != 200:
                 error_text = response.text
@@ -237,6 +358,13 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
     def get_vector_size(self) -> int:
         """Get embedding dimension."""
         return self.vector_size
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters and API calls made by this provider."""
+        stats = self.cache.stats() if self.cache is not None else {"backend": None}
+        stats["api_calls"] = self.api_calls
+        stats["retries"] = self.backoff.retries
+        return stats
 
 
 class EmbeddingProviderFactory:
@@ -309,6 +437,8 @@ class EmbeddingProviderFactory:
         organization = config.get("organization")
         timeout = config.get("timeout", 60)
         batch_size = config.get("batch_size") or config.get("batchSize", 100)
+        use_cache = config.get("use_cache", config.get("useCache", True))
+        max_concurrency = config.get("max_concurrency") or config.get("maxConcurrency", 4)
         
         return OpenAIEmbeddingProvider(
             api_key=api_key,
@@ -317,7 +447,11 @@ class EmbeddingProviderFactory:
             dimensions=dimensions,
             organization=organization,
             timeout=timeout,
-            batch_size=batch_size
+            batch_size=batch_size,
+            cache=config.get("cache"),
+            use_cache=use_cache,
+            max_concurrency=max_concurrency,
+            http_sessions=config.get("http_sessions")
         )
     
     # Future provider factory methods:
@@ -20,73 +20,26 @@ class SafeExpressionEvaluator:
     """Safe expression evaluator for n8n-style expressions"""
     
     def __init__(self):
-        self.allowed_names = {
-            # Math functions
-            'abs', 'round', 'floor', 'ceil', 'min', 'max', 'sum',
-            # String functions
-            'len', 'str', 'int', 'float', 'bool',
-            # Date functions
-            'now', 'today',
-            # Utility functions
-            'range', 'enumerate', 'zip', 'list', 'dict', 'set',
-            # N8n variables (mapped names)
-            'n8n_json', 'n8n_binary', 'n8n_items', 'n8n_item', 'n8n_node', 
-            'n8n_workflow', 'n8n_execution', 'n8n_now', 'n8n_today', 'n8n_parameter',
-            # Node reference function
-            'n8n_node_ref'
-        }
-        
-        # ... rest of your operators, comparisons, unary_ops remain the same ...
-        self.operators = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.FloorDiv: operator.floordiv,
-            ast.Mod: operator.mod,
-            ast.Pow: operator.pow,
-            ast.LShift: operator.lshift,
-            ast.RShift: operator.rshift,
-            ast.BitOr: operator.or_,
-            ast.BitXor: operator.xor,
-            ast.BitAnd: operator.and_,
-            ast.MatMult: operator.matmul,
-        }
-        
-        self.comparisons = {
-            ast.Eq: operator.eq,
-            ast.NotEq: operator.ne,
-            ast.Lt: operator.lt,
-            ast.LtE: operator.le,
-            ast.Gt: operator.gt,
-            ast.GtE: operator.ge,
-            ast.Is: operator.is_,
-            ast.IsNot: operator.is_not,
-            ast.In: lambda x, y: x in y,
-            ast.NotIn: lambda x, y: x not in y,
-        }
-        
-        self.unary_ops = {
-            ast.UAdd: operator.pos,
-            ast.USub: operator.neg,
-            ast.Not: operator.not_,
-            ast.Invert: operator.invert,
-        }
+        self.allowed_names = set(_ALLOWED_NAMES)
+        self.operators = dict(_OPERATORS)
+        self.comparisons = dict(_COMPARISONS)
+        self.unary_ops = dict(_UNARY_OPS)
 
     def evaluate(self, expression: str, context: Dict[str, Any]) -> Any:
         """Evaluate an expression safely"""
         try:
-            # Preprocess the expression to handle n8n variables
-            processed_expression, processed_context = self._preprocess_n8n_expression(expression, context)
-            
-            # Parse the expression into an AST
-            tree = ast.parse(processed_expression, mode='eval')
-            return self._eval_node(tree.body, processed_context)
+            # Rewrite + parse + compile once per distinct expression (LRU cached)
+            compiled = compile_expression(expression)
+            return compiled(self._map_n8n_context(context))
         except SyntaxError as e:
             raise ExpressionError(f"Syntax error in expression: {str(e)}", expression)
         except Exception as e:
             raise ExpressionError(f"Expression evaluation failed: {str(e)}", expression)
 
+    def compile(self, expression: str) -> "CompiledExpression":
+        """Return the cached compiled form of an expression"""
+        return compile_expression(expression)
+
     def _preprocess_n8n_expression(self, expression: str, context: Dict[str, Any]) -> tuple:
         """
         Preprocess n8n-style expressions to make them Python-compatible
@@ -94,111 +47,240 @@ class SafeExpressionEvaluator:
         Returns:
             tuple: (processed_expression, processed_context)
         """
-        # Handle JavaScript-style ternary operators: condition ? true_val : false_val
-        # Convert to Python: true_val if condition else false_val
-        # This regex matches: <condition> ? <true_value> : <false_value>
-        ternary_pattern = r'([^?]+)\s*\?\s*([^:]+)\s*:\s*(.+)'
-        ternary_match = re.match(ternary_pattern, expression.strip())
-        if ternary_match:
-            condition = ternary_match.group(1).strip()
-            true_val = ternary_match.group(2).strip()
-            false_val = ternary_match.group(3).strip()
-            expression = f"({true_val}) if ({condition}) else ({false_val})"
-        
-        # Handle node reference syntax: $('NodeName') -> n8n_node_ref('NodeName')
-        node_ref_pattern = r"\$\('([^']+)'\)"
-        expression = re.sub(node_ref_pattern, r"n8n_node_ref('\1')", expression)
-        
-        # Handle other node reference formats: $("NodeName") -> n8n_node_ref("NodeName")
-        node_ref_pattern2 = r'\$\("([^"]+)"\)'
-        expression = re.sub(node_ref_pattern2, r'n8n_node_ref("\1")', expression)
-        
-        # Create mapping for n8n variables to Python-safe names
-        n8n_mappings = {
-            '$json': 'n8n_json',
-            '$binary': 'n8n_binary', 
-            '$items': 'n8n_items',
-            '$item': 'n8n_item',
-            '$node': 'n8n_node',
-            '$workflow': 'n8n_workflow',
-            '$execution': 'n8n_execution',
-            '$now': 'n8n_now',
-            '$today': 'n8n_today',
-            '$parameter': 'n8n_parameter'
-        }
-        
-        processed_expression = expression
+        return _rewrite_n8n_expression(expression), self._map_n8n_context(context)
+
+    def _map_n8n_context(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Map n8n variable names ($json, ...) in the context to their Python-safe names"""
         processed_context = {}
-        
-        # Replace n8n variables with Python-safe names
-        for n8n_var, safe_var in n8n_mappings.items():
-            if n8n_var in processed_expression:
-                # Use word boundary to avoid partial replacements
-                pattern = r'\$' + re.escape(n8n_var[1:]) + r'\b'
-                processed_expression = re.sub(pattern, safe_var, processed_expression)
-            
+        for n8n_var, safe_var in N8N_MAPPINGS.items():
             # Add to processed context if exists in original context
             if n8n_var in context:
                 processed_context[safe_var] = context[n8n_var]
         
         # Add node reference function to context
-        processed_context['n8n_node_ref'] = context.get('$node_ref', lambda x: {})
-
-        # Rewrite attribute access to reserved words (e.g. .from -> ['from'])
-        @lru_cache(maxsize=1)
-        def _reserved() -> set[str]:
-            return set(keyword.kwlist)
-        
-        def _fix_reserved_attr(m: re.Match) -> str:
-            name = m.group(1)
-            return f"['{name}']" if name in _reserved() else f".{name}"
-        
-        processed_expression = re.sub(r"\.([A-Za-z_][A-Za-z0-9_]*)", _fix_reserved_attr, processed_expression)
+        processed_context['n8n_node_ref'] = context.get('$node_ref', _empty_node_ref)
         
         # Add all other context items
         for key, value in context.items():
             if not key.startswith('$'):
                 processed_context[key] = value
         
-        return processed_expression, processed_context
+        return processed_context
 
-    # ... rest of your _eval_node method remains exactly the same ...
     def _eval_node(self, node: ast.AST, context: Dict[str, Any]) -> Any:
-        """Recursively evaluate AST nodes"""
-        
-        if isinstance(node, ast.Constant):
-            return node.value
-        
-        elif isinstance(node, ast.Name):
-            if node.id in context:
-                return context[node.id]
-            elif node.id in self.allowed_names:
-                return self._get_builtin_function(node.id)
+        """Evaluate an AST node (compiles it to a closure first)"""
+        return _compile_node(node)(context)
+
+    def _get_builtin_function(self, name: str) -> Callable:
+        """Get safe builtin functions"""
+        return _BUILTINS.get(name)
+
+
+# ── Expression rewriting ─────────────────────────────────────────────────────
+
+# Mapping for n8n variables to Python-safe names
+N8N_MAPPINGS = {
+    '$json': 'n8n_json',
+    '$binary': 'n8n_binary', 
+    '$items': 'n8n_items',
+    '$item': 'n8n_item',
+    '$node': 'n8n_node',
+    '$workflow': 'n8n_workflow',
+    '$execution': 'n8n_execution',
+    '$now': 'n8n_now',
+    '$today': 'n8n_today',
+    '$parameter': 'n8n_parameter'
+}
+
+# Handle JavaScript-style ternary operators: condition ? true_val : false_val
+_TERNARY_PATTERN = re.compile(r'([^?]+)\s*\?\s*([^:]+)\s*:\s*(.+)')
+# Handle node reference syntax: $('NodeName') / $("NodeName") -> n8n_node_ref(...)
+_NODE_REF_PATTERN = re.compile(r"\$\('([^']+)'\)")
+_NODE_REF_PATTERN2 = re.compile(r'\$\("([^"]+)"\)')
+_N8N_VAR_PATTERNS = [
+    # Use word boundary to avoid partial replacements
+    (n8n_var, re.compile(r'\$' + re.escape(n8n_var[1:]) + r'\b'), safe_var)
+    for n8n_var, safe_var in N8N_MAPPINGS.items()
+]
+_ATTRIBUTE_PATTERN = re.compile(r"\.([A-Za-z_][A-Za-z0-9_]*)")
+_RESERVED_WORDS = frozenset(keyword.kwlist)
+# Shared stand-in for a missing $items, so the helper cache keeps hitting
+_NO_ITEMS: tuple = ()
+
+
+def _empty_node_ref(node_name: str) -> Dict[str, Any]:
+    return {}
+
+
+def _fix_reserved_attr(m: re.Match) -> str:
+    # Rewrite attribute access to reserved words (e.g. .from -> ['from'])
+    name = m.group(1)
+    return f"['{name}']" if name in _RESERVED_WORDS else f".{name}"
+
+
+def _rewrite_n8n_expression(expression: str) -> str:
+    """Rewrite an n8n-style expression into Python syntax (context independent)"""
+    # Convert to Python: true_val if condition else false_val
+    ternary_match = _TERNARY_PATTERN.match(expression.strip())
+    if ternary_match:
+        condition = ternary_match.group(1).strip()
+        true_val = ternary_match.group(2).strip()
+        false_val = ternary_match.group(3).strip()
+        expression = f"({true_val}) if ({condition}) else ({false_val})"
+    
+    expression = _NODE_REF_PATTERN.sub(r"n8n_node_ref('\1')", expression)
+    expression = _NODE_REF_PATTERN2.sub(r'n8n_node_ref("\1")', expression)
+    
+    # Replace n8n variables with Python-safe names
+    for n8n_var, pattern, safe_var in _N8N_VAR_PATTERNS:
+        if n8n_var in expression:
+            expression = pattern.sub(safe_var, expression)
+    
+    return _ATTRIBUTE_PATTERN.sub(_fix_reserved_attr, expression)
+
+
+# ── AST -> closure compilation ───────────────────────────────────────────────
+#
+# Each AST node is turned once into a Python closure taking the evaluation
+# context, so evaluating a cached expression for another item is a chain of
+# direct calls instead of an isinstance() dispatch over the tree.
+
+Evaluator = Callable[[Dict[str, Any]], Any]
+
+_ALLOWED_NAMES = frozenset({
+    # Math functions
+    'abs', 'round', 'floor', 'ceil', 'min', 'max', 'sum',
+    # String functions
+    'len', 'str', 'int', 'float', 'bool',
+    # Date functions
+    'now', 'today',
+    # Utility functions
+    'range', 'enumerate', 'zip', 'list', 'dict', 'set',
+    # N8n variables (mapped names)
+    'n8n_json', 'n8n_binary', 'n8n_items', 'n8n_item', 'n8n_node', 
+    'n8n_workflow', 'n8n_execution', 'n8n_now', 'n8n_today', 'n8n_parameter',
+    # Node reference function
+    'n8n_node_ref'
+})
+
+_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+    ast.MatMult: operator.matmul,
+}
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda x, y: x in y,
+    ast.NotIn: lambda x, y: x not in y,
+}
+
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Not: operator.not_,
+    ast.Invert: operator.invert,
+}
+
+_BUILTINS = {
+    'abs': abs,
+    'round': round,
+    'floor': lambda x: int(x),
+    'ceil': lambda x: int(x) + (1 if x % 1 else 0),
+    'min': min,
+    'max': max,
+    'sum': sum,
+    'len': len,
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'now': datetime.now,
+    'today': lambda: datetime.now().date(),
+    'range': range,
+    'enumerate': enumerate,
+    'zip': zip,
+    'list': list,
+    'dict': dict,
+    'set': set,
+}
+
+
+def _raise_at_runtime(error: Exception) -> Evaluator:
+    # Unsupported constructs only fail if they are actually evaluated
+    def evaluate(context: Dict[str, Any]) -> Any:
+        raise error
+    return evaluate
+
+
+def _compile_node(node: ast.AST) -> Evaluator:
+    """Compile an AST node into a closure ``context -> value``"""
+    
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda context: value
+    
+    elif isinstance(node, ast.Name):
+        name = node.id
+        builtin = _BUILTINS.get(name) if name in _ALLOWED_NAMES else None
+        allowed = name in _ALLOWED_NAMES
+
+        def evaluate_name(context: Dict[str, Any]) -> Any:
+            if name in context:
+                return context[name]
+            elif allowed:
+                return builtin
             else:
-                raise NameError(f"Name '{node.id}' is not defined")
-        
-        elif isinstance(node, ast.Attribute):
-            # FIXED: Evaluate the object (node.value), not the attribute name
-            obj = self._eval_node(node.value, context)
+                raise NameError(f"Name '{name}' is not defined")
+        return evaluate_name
+    
+    elif isinstance(node, ast.Attribute):
+        value_fn = _compile_node(node.value)
+        attr = node.attr
+
+        def evaluate_attribute(context: Dict[str, Any]) -> Any:
+            obj = value_fn(context)
             
             # Handle special cases for safe attribute access
             if obj is None:
                 return None
             
             # For dictionaries, treat attribute access as key access
-            if isinstance(obj, dict) and node.attr in obj:
-                return obj[node.attr]
+            if isinstance(obj, dict) and attr in obj:
+                return obj[attr]
             
             # Standard attribute access
-            if hasattr(obj, node.attr):
-                return getattr(obj, node.attr)
+            if hasattr(obj, attr):
+                return getattr(obj, attr)
             
             # If attribute doesn't exist, return None (like n8n behavior)
             return None
-        
-        elif isinstance(node, ast.Subscript):
-            obj = self._eval_node(node.value, context)
-            key = self._eval_node(node.slice, context)
+        return evaluate_attribute
+    
+    elif isinstance(node, ast.Subscript):
+        value_fn = _compile_node(node.value)
+        slice_fn = _compile_node(node.slice)
+
+        def evaluate_subscript(context: Dict[str, Any]) -> Any:
+            obj = value_fn(context)
+            key = slice_fn(context)
             
             # Handle None safely
             if obj is None:
@@ -213,115 +295,245 @@ class SafeExpressionEvaluator:
                 return obj[key] if 0 <= key < len(obj) else None
             
             return obj[key]
-        
-        elif isinstance(node, ast.BinOp):
-            left = self._eval_node(node.left, context)
-            right = self._eval_node(node.right, context)
-            op = self.operators.get(type(node.op))
-            if op:
-                return op(left, right)
-            else:
-                raise ValueError(f"Unsupported binary operator: {type(node.op)}")
-        
-        elif isinstance(node, ast.UnaryOp):
-            operand = self._eval_node(node.operand, context)
-            op = self.unary_ops.get(type(node.op))
-            if op:
-                return op(operand)
-            else:
-                raise ValueError(f"Unsupported unary operator: {type(node.op)}")
-        
-        elif isinstance(node, ast.Compare):
-            left = self._eval_node(node.left, context)
-            for op, right_node in zip(node.ops, node.comparators):
-                right = self._eval_node(right_node, context)
-                comparison = self.comparisons.get(type(op))
-                if comparison:
-                    if not comparison(left, right):
-                        return False
-                    left = right
-                else:
-                    raise ValueError(f"Unsupported comparison: {type(op)}")
+        return evaluate_subscript
+    
+    elif isinstance(node, ast.BinOp):
+        op = _OPERATORS.get(type(node.op))
+        if not op:
+            return _raise_at_runtime(ValueError(f"Unsupported binary operator: {type(node.op)}"))
+        left_fn = _compile_node(node.left)
+        right_fn = _compile_node(node.right)
+        return lambda context: op(left_fn(context), right_fn(context))
+    
+    elif isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPS.get(type(node.op))
+        if not op:
+            return _raise_at_runtime(ValueError(f"Unsupported unary operator: {type(node.op)}"))
+        operand_fn = _compile_node(node.operand)
+        return lambda context: op(operand_fn(context))
+    
+    elif isinstance(node, ast.Compare):
+        left_fn = _compile_node(node.left)
+        steps = [
+            (_compile_node(right_node), _COMPARISONS[type(op)])
+            for op, right_node in zip(node.ops, node.comparators)
+        ]
+
+        def evaluate_compare(context: Dict[str, Any]) -> Any:
+            left = left_fn(context)
+            for right_fn, comparison in steps:
+                right = right_fn(context)
+                if not comparison(left, right):
+                    return False
+                left = right
             return True
-        
-        elif isinstance(node, ast.IfExp):
-            # Handle Python ternary: value_if_true if condition else value_if_false
-            test = self._eval_node(node.test, context)
-            if test:
-                return self._eval_node(node.body, context)
-            else:
-                return self._eval_node(node.orelse, context)
-        
-        elif isinstance(node, ast.Call):
-            return self._eval_call(node, context)
-        
-        elif isinstance(node, ast.List):
-            return [self._eval_node(item, context) for item in node.elts]
-        
-        elif isinstance(node, ast.Dict):
-            return {
-                self._eval_node(k, context): self._eval_node(v, context)
-                for k, v in zip(node.keys, node.values)
-            }
-        
-        elif isinstance(node, ast.Slice):
-            return slice(
-                self._eval_node(node.lower, context) if node.lower else None,
-                self._eval_node(node.upper, context) if node.upper else None,
-                self._eval_node(node.step, context) if node.step else None
-            )
-        
-        else:
-            raise ValueError(f"Unsupported node type: {type(node)}")
-
-    def _eval_call(self, node: ast.Call, context: Dict[str, Any]) -> Any:
-        """Evaluate function calls"""
-        func = self._eval_node(node.func, context)
-        args = [self._eval_node(arg, context) for arg in node.args]
-        kwargs = {
-            kw.arg: self._eval_node(kw.value, context) 
-            for kw in node.keywords
-        }
-        
-        # Security check for callable
-        if not callable(func):
-            raise ValueError(f"Object is not callable: {func}")
-        
-        return func(*args, **kwargs)
+        return evaluate_compare
+    
+    elif isinstance(node, ast.IfExp):
+        # Handle Python ternary: value_if_true if condition else value_if_false
+        test_fn = _compile_node(node.test)
+        body_fn = _compile_node(node.body)
+        orelse_fn = _compile_node(node.orelse)
+        return lambda context: body_fn(context) if test_fn(context) else orelse_fn(context)
+    
+    elif isinstance(node, ast.Call):
+        func_fn = _compile_node(node.func)
+        arg_fns = [_compile_node(arg) for arg in node.args]
+        kwarg_fns = [(kw.arg, _compile_node(kw.value)) for kw in node.keywords]
+
+        def evaluate_call(context: Dict[str, Any]) -> Any:
+            """Evaluate function calls"""
+            func = func_fn(context)
+            args = [fn(context) for fn in arg_fns]
+            kwargs = {name: fn(context) for name, fn in kwarg_fns}
+            
+            # Security check for callable
+            if not callable(func):
+                raise ValueError(f"Object is not callable: {func}")
+            
+            return func(*args, **kwargs)
+        return evaluate_call
+    
+    elif isinstance(node, ast.List):
+        item_fns = [_compile_node(item) for item in node.elts]
+        return lambda context: [fn(context) for fn in item_fns]
+    
+    elif isinstance(node, ast.Dict):
+        pair_fns = [(_compile_node(k), _compile_node(v)) for k, v in zip(node.keys, node.values)]
+        return lambda context: {k(context): v(context) for k, v in pair_fns}
+    
+    elif isinstance(node, ast.Slice):
+        lower_fn = _compile_node(node.lower) if node.lower else None
+        upper_fn = _compile_node(node.upper) if node.upper else None
+        step_fn = _compile_node(node.step) if node.step else None
+        return lambda context: slice(
+            lower_fn(context) if lower_fn else None,
+            upper_fn(context) if upper_fn else None,
+            step_fn(context) if step_fn else None
+        )
+    
+    else:
+        return _raise_at_runtime(ValueError(f"Unsupported node type: {type(node)}"))
+
+
+class CompiledExpression:
+    """A rewritten, parsed and closure-compiled n8n expression"""
+
+    __slots__ = ("source", "processed", "names", "_evaluate")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.processed = _rewrite_n8n_expression(source)
+        tree = ast.parse(self.processed, mode='eval')
+        # Every identifier the expression can look up in its context
+        self.names = frozenset(
+            node.id for node in ast.walk(tree) if isinstance(node, ast.Name)
+        )
+        self._evaluate = _compile_node(tree.body)
+
+    def __call__(self, context: Dict[str, Any]) -> Any:
+        return self._evaluate(context)
+
+
+# Bounded LRU of compiled expressions keyed by the raw expression text.
+# Compilation is context independent, so entries are shared by every node.
+EXPRESSION_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Rewrite, parse and compile an expression (cached)"""
+    return CompiledExpression(expression)
+
+
+# Template parsing is cached separately from expression compilation: a
+# parameter value maps to (is_single_expression, [literal | expression, ...]).
+_EXPRESSION_PATTERN = re.compile(r'\{\{(.*?)\}\}', re.DOTALL)
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _parse_template(value: str) -> Optional[tuple]:
+    """Split a template into literal and expression segments (None if no expressions)"""
+    matches = list(_EXPRESSION_PATTERN.finditer(value))
+    if not matches:
+        return None
+    
+    # If the entire string is one expression, the evaluated result is returned as-is
+    if len(matches) == 1 and matches[0].span() == (0, len(value)):
+        return True, (matches[0].group(1).strip(),)
+    
+    # Odd positions are expressions, even positions are literal text
+    segments: List[str] = []
+    position = 0
+    for match in matches:
+        segments.append(value[position:match.start()])
+        segments.append(match.group(1).strip())
+        position = match.end()
+    segments.append(value[position:])
+    return False, tuple(segments)
+
+
+_SAFE_TO_N8N = {safe_var: n8n_var for n8n_var, safe_var in N8N_MAPPINGS.items()}
+_SAFE_TO_N8N['n8n_node_ref'] = '$node_ref'
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def template_variables(value: str) -> Optional[frozenset]:
+    """
+    n8n context variables ($json, $items, $node_ref, ...) referenced by a template.
+
+    Returns an empty set for literals and None when an expression does not
+    compile (callers should then provide the full context).
+    """
+    template = _parse_template(value)
+    if template is None:
+        return frozenset()
+    single, segments = template
+    expressions = segments if single else segments[1::2]
+    variables = set()
+    for expression in expressions:
+        try:
+            names = compile_expression(expression).names
+        except Exception:
+            return None
+        variables.update(_SAFE_TO_N8N[name] for name in names if name in _SAFE_TO_N8N)
+    # $item()/$items() helpers read the current $items list
+    if variables & {'$item', '$items'}:
+        variables.add('$items')
+    return frozenset(variables)
+
+
+def has_expression(value: Any) -> bool:
+    """True if a parameter value contains at least one {{ }} expression"""
+    return isinstance(value, str) and "{{" in value and _parse_template(value) is not None
+
+
+def _date_format(date_val: Any, format_str: str = "%Y-%m-%d") -> str:
+    """Format date"""
+    if isinstance(date_val, str):
+        date_val = date_parser.parse(date_val)
+    elif isinstance(date_val, (int, float)):
+        date_val = datetime.fromtimestamp(date_val)
+    
+    if isinstance(date_val, datetime):
+        return date_val.strftime(format_str)
+    return str(date_val)
+
+
+def _json_parse(json_str: str) -> Any:
+    """Parse JSON string"""
+    return json.loads(json_str)
+
+
+def _json_stringify(obj: Any) -> str:
+    """Convert object to JSON string"""
+    return json.dumps(obj)
+
+
+_MATH_HELPERS: Dict[str, Any] = {
+    'floor': lambda x: int(x),
+    'ceil': lambda x: int(x) + (1 if x % 1 else 0),
+    'round': round,
+    'abs': abs,
+    'min': min,
+    'max': max,
+}
+
+_STRING_HELPERS: Dict[str, Any] = {
+    'toLowerCase': lambda s: str(s).lower(),
+    'toUpperCase': lambda s: str(s).upper(),
+    'trim': lambda s: str(s).strip(),
+    'split': lambda s, sep: str(s).split(sep),
+    'replace': lambda s, old, new: str(s).replace(old, new),
+}
+
+
+def _new_static_helpers() -> Dict[str, Any]:
+    """Helpers that do not depend on the current item.
+
+    Each engine gets its own Math/String dicts: expressions can call dict
+    methods on them (e.g. ``Math.clear()``), which must not leak to other nodes.
+    """
+    return {
+        'dateFormat': _date_format,
+        'jsonParse': _json_parse,
+        'jsonStringify': _json_stringify,
+        'Math': dict(_MATH_HELPERS),
+        'String': dict(_STRING_HELPERS),
+    }
 
-    def _get_builtin_function(self, name: str) -> Callable:
-        """Get safe builtin functions"""
-        builtins = {
-            'abs': abs,
-            'round': round,
-            'floor': lambda x: int(x),
-            'ceil': lambda x: int(x) + (1 if x % 1 else 0),
-            'min': min,
-            'max': max,
-            'sum': sum,
-            'len': len,
-            'str': str,
-            'int': int,
-            'float': float,
-            'bool': bool,
-            'now': datetime.now,
-            'today': lambda: datetime.now().date(),
-            'range': range,
-            'enumerate': enumerate,
-            'zip': zip,
-            'list': list,
-            'dict': dict,
-            'set': set,
-        }
-        return builtins.get(name)
 
-# ExpressionEngine class remains the same
 class ExpressionEngine:
     """N8n-style expression engine"""
     
     def __init__(self):
         self.evaluator = SafeExpressionEvaluator()
-        self.expression_pattern = re.compile(r'\{\{(.*?)\}\}', re.DOTALL)
+        self.expression_pattern = _EXPRESSION_PATTERN
+        # Item helpers ($item/$items) memoized per item index for the current
+        # $items list; one engine lives on one node instance.
+        self._helpers_items: Any = None
+        self._helpers_by_index: Dict[int, Dict[str, Any]] = {}
+        self._static_helpers = _new_static_helpers()
     
     def evaluate_parameter(
         self, 
@@ -335,23 +547,19 @@ class ExpressionEngine:
             return value
         
         # Check if it contains expressions
-        matches = list(self.expression_pattern.finditer(value))
-        if not matches:
+        template = _parse_template(value) if "{{" in value else None
+        if template is None:
             return value
         
-        # If the entire string is one expression, return the evaluated result
-        if len(matches) == 1 and matches[0].span() == (0, len(value)):
-            expression = matches[0].group(1).strip()
-            return self._evaluate_expression(expression, context, item_index)
+        single, segments = template
+        if single:
+            return self._evaluate_expression(segments[0], context, item_index)
         
-        # Replace expressions in string
-        result = value
-        for match in reversed(matches):  # Reverse to maintain positions
-            expression = match.group(1).strip()
-            evaluated = self._evaluate_expression(expression, context, item_index)
-            result = result[:match.start()] + str(evaluated) + result[match.end():]
-        
-        return result
+        # Replace expressions in string (evaluated last to first, as before)
+        parts = list(segments)
+        for index in range(len(parts) - 2, 0, -2):
+            parts[index] = str(self._evaluate_expression(parts[index], context, item_index))
+        return "".join(parts)
     
     def _evaluate_expression(self, expression: str, context: Dict[str, Any], item_index: int) -> Any:
         """Evaluate a single expression"""
@@ -369,11 +577,21 @@ class ExpressionEngine:
     
     def _get_helper_functions(self, context: Dict[str, Any], item_index: int) -> Dict[str, Any]:
         """Get helper functions for expressions"""
-        
+        items = context.get('$items', _NO_ITEMS)
+        if items is not self._helpers_items:
+            self._helpers_items = items
+            self._helpers_by_index = {}
+        helpers = self._helpers_by_index.get(item_index)
+        if helpers is None:
+            helpers = {**self._build_item_helpers(items, item_index), **self._static_helpers}
+            self._helpers_by_index[item_index] = helpers
+        return helpers
+
+    @staticmethod
+    def _build_item_helpers(items: List[Any], item_index: int) -> Dict[str, Any]:
         def get_item(index: Optional[int] = None) -> Dict[str, Any]:
             """Get item by index"""
             idx = index if index is not None else item_index
-            items = context.get('$items', [])
             if 0 <= idx < len(items):
                 item = items[idx]
                 if hasattr(item, 'json_data'):
@@ -383,50 +601,12 @@ class ExpressionEngine:
         
         def get_items() -> List[Dict[str, Any]]:
             """Get all items"""
-            items = context.get('$items', [])
             return [
                 item.json_data if hasattr(item, 'json_data') else item 
                 for item in items
             ]
         
-        def date_format(date_val: Any, format_str: str = "%Y-%m-%d") -> str:
-            """Format date"""
-            if isinstance(date_val, str):
-                date_val = date_parser.parse(date_val)
-            elif isinstance(date_val, (int, float)):
-                date_val = datetime.fromtimestamp(date_val)
-            
-            if isinstance(date_val, datetime):
-                return date_val.strftime(format_str)
-            return str(date_val)
-        
-        def json_parse(json_str: str) -> Any:
-            """Parse JSON string"""
-            return json.loads(json_str)
-        
-        def json_stringify(obj: Any) -> str:
-            """Convert object to JSON string"""
-            return json.dumps(obj)
-        
         return {
             '$item': get_item,
             '$items': get_items,
-            'dateFormat': date_format,
-            'jsonParse': json_parse,
-            'jsonStringify': json_stringify,
-            'Math': {
-                'floor': lambda x: int(x),
-                'ceil': lambda x: int(x) + (1 if x % 1 else 0),
-                'round': round,
-                'abs': abs,
-                'min': min,
-                'max': max,
-            },
-            'String': {
-                'toLowerCase': lambda s: str(s).lower(),
-                'toUpperCase': lambda s: str(s).upper(),
-                'trim': lambda s: str(s).strip(),
-                'split': lambda s, sep: str(s).split(sep),
-                'replace': lambda s, old, new: str(s).replace(old, new),
-            }
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,213 @@
+"""
+Pooled HTTP sessions and per-host rate limiting for HTTP-calling nodes.
+
+ExecutionHttpSessions lives on WorkflowExecutionContext, so every item (and
+every node) of one execution reuses keep-alive connections instead of paying
+DNS/TCP/TLS setup per request. Sessions are keyed by (scheme://host, verify,
+auth) so credentials and certificate checks never leak between targets, and
+are closed when the execution finishes. Pooled sessions keep no cookies (a
+Set-Cookie from one item must not be sent with the next) and pass ``verify``
+with every request, so REQUESTS_CA_BUNDLE cannot re-enable certificate checks
+a node turned off.
+
+HostRateLimiter spaces requests to the same host at a fixed rate, and
+RetryAfterBackoff pauses every caller sharing it after a 429/5xx for as long
+as the response headers ask. Waiting uses time.sleep, which yields to other
+greenlets under the Celery gevent pool.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Optional, Tuple
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+import random
+import re
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, bool, Any]
+
+
+def host_of(url: str) -> str:
+    """scheme://host[:port] of ``url`` (lower-cased)."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HostRateLimiter:
+    """Allow at most ``rate`` requests per second to each host."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def acquire(self, host: str) -> float:
+        """Block until the next slot for ``host``; returns the seconds waited."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in a duration such as "20ms", "1.5s" or "6m0s" (OpenAI x-ratelimit-reset-*)."""
+    parts = _DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Delay requested by a rate-limited response, from the first header that has one."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass  # HTTP-date form is not used by the APIs we call
+    delays = [
+        parse_duration(headers.get(name, ""))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    delays = [d for d in delays if d is not None]
+    return max(delays) if delays else None
+
+
+class RetryAfterBackoff:
+    """
+    Shared pause for concurrent callers of one rate-limited API.
+
+    After a 429/5xx, ``on_retry`` sets a pause honouring Retry-After (or the
+    x-ratelimit-reset-* headers), falling back to exponential backoff with
+    jitter; every caller blocks in ``wait`` until the pause ends, so
+    in-flight batches back off together instead of hammering the API.
+    """
+
+    def __init__(self, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pause_until = 0.0
+        self.retries = 0
+        self.waited = 0.0
+
+    def wait(self) -> float:
+        """Sleep until the shared pause is over; returns the seconds waited."""
+        with self._lock:
+            delay = self._pause_until - time.monotonic()
+        if delay <= 0:
+            return 0.0
+        time.sleep(delay)
+        with self._lock:
+            self.waited += delay
+        return delay
+
+    def on_retry(self, headers: Mapping[str, str], attempt: int) -> float:
+        """Register a retryable response; returns the pause applied."""
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = self.base_delay * (2 ** attempt) * (1 + random.random() * 0.25)
+        delay = min(max(delay, 0.0), self.max_delay)
+        with self._lock:
+            self.retries += 1
+            self._pause_until = max(self._pause_until, time.monotonic() + delay)
+        return delay
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session shared by the items and nodes of an execution.
+
+    The cookie jar accepts nothing, and ``verify`` is passed per request:
+    with trust_env, requests replaces a missing or True per-request verify
+    with REQUESTS_CA_BUNDLE before merging it with Session.verify, so a
+    session-level verify=False would be ignored.
+    """
+
+    def __init__(self, verify: bool = True):
+        super().__init__()
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.pooled_verify = verify
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("verify", self.pooled_verify)
+        return super().request(method, url, **kwargs)
+
+
+class ExecutionHttpSessions:
+    """Per-execution pool of requests.Session objects and host rate limiters."""
+
+    def __init__(self, pool_maxsize: int = 10):
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._sessions: Dict[SessionKey, PooledSession] = {}
+        self._limiters: Dict[float, HostRateLimiter] = {}
+        self.created = 0
+        self.reused = 0
+
+    def get(self, url: str, verify: bool = True, auth: Any = None,
+            pool_maxsize: Optional[int] = None) -> PooledSession:
+        """Session for ``url``'s host with ``verify``/``auth`` applied."""
+        key = (host_of(url), verify, auth)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self.reused += 1
+                return session
+            size = max(self.pool_maxsize, pool_maxsize or 0)
+            session = PooledSession(verify)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.auth = auth
+            self._sessions[key] = session
+            self.created += 1
+            return session
+
+    def rate_limiter(self, rate: float) -> HostRateLimiter:
+        """Limiter shared by every node of the execution using the same rate."""
+        with self._lock:
+            limiter = self._limiters.get(rate)
+            if limiter is None:
+                limiter = self._limiters[rate] = HostRateLimiter(rate)
+            return limiter
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                logger.debug("Closing pooled HTTP session failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "created": self.created,
+                "reused": self.reused,
+            }
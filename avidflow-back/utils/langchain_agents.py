@@ -34,51 +34,16 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional, Callable, Tuple, Iterator
 import logging
 import json
-import tiktoken
 
+from utils.concurrency import TimeoutRunner
 from utils.langchain_base import BaseLangChainRunnable
+from utils.token_ledger import TokenLedger, get_encoding
 from utils.langchain_chat_models import ChatModelRunnable
 from utils.langchain_tools import ToolCollectionRunnable
 
 logger = logging.getLogger(__name__)
 
 
-def count_tokens(messages: List[Dict[str, Any]], model: str = "gpt-4") -> int:
-    """
-    Count tokens in messages using tiktoken.
-    
-    Args:
-        messages: List of message dicts
-        model: Model name for tokenizer
-    
-    Returns:
-        Approximate token count
-    """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")  # Default for GPT-4
-    
-    num_tokens = 0
-    for message in messages:
-        # Per message overhead (role + formatting)
-        num_tokens += 4
-        
-        for key, value in message.items():
-            if isinstance(value, str):
-                num_tokens += len(encoding.encode(value))
-            elif isinstance(value, list) and key == "tool_calls":
-                # Count tool calls
-                for tool_call in value:
-                    if isinstance(tool_call, dict):
-                        num_tokens += len(encoding.encode(json.dumps(tool_call)))
-    
-    # Per-response overhead
-    num_tokens += 2
-    
-    return num_tokens
-
-
 def truncate_tool_results(
     processed_data: Any,
     max_tokens: int = 30000,
@@ -101,10 +66,7 @@ def truncate_tool_results(
         processed_data.pop("_skip_truncation", None)
         return processed_data  # Already doing this - just verify it works
     
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
+    encoding = get_encoding(model)
     
     # Convert to JSON string
     json_str = json.dumps(processed_data, ensure_ascii=False, default=str)
@@ -263,6 +225,11 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
         
         # Get tool schemas
         tool_schemas = self.tools.get_tool_schemas(format="openai")
+        self._emit(
+            "agent_started",
+            model=f"{getattr(self.chat_model, 'provider', '')}/{getattr(self.chat_model, 'model', '')}",
+            tools_count=len(tool_schemas)
+        )
         
         # Execute agent loop
         try:
@@ -285,6 +252,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             
         except Exception as e:
             logger.error(f"[AgentRunnable] Execution error: {e}")
+            self._emit("agent_error", message=str(e), fatal=True)
             return {
                 "success": False,
                 "error": str(e),
@@ -294,6 +262,15 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                 "total_tokens": 0
             }
     
+    def _emit(self, event: str, **kwargs: Any) -> None:
+        """Publish an agent event when a publisher is attached (never fails the run)."""
+        if self.event_publisher is None:
+            return
+        try:
+            getattr(self.event_publisher, event)(**kwargs)
+        except Exception as e:
+            logger.warning(f"[AgentRunnable] Failed to publish {event}: {e}")
+    
     def _build_initial_messages(
         self,
         user_input: str,
@@ -339,6 +316,29 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
         messages: List[Dict[str, Any]],
         tool_schemas: List[Dict[str, Any]],
         user_input: str
+    ) -> Dict[str, Any]:
+        """
+        Run the agent loop with a tool runner shared by all of its turns.
+
+        Tool calls of one assistant message run concurrently on at most
+        ``max_parallel_tools`` workers (config, default 4); the runner is
+        released when the loop ends.
+        """
+        max_parallel = int(self._config.get("max_parallel_tools", 4) or 1)
+        with TimeoutRunner(max_parallel, name_prefix="agent-tool") as tool_runner:
+            result = self._run_agent_iterations(messages, tool_schemas, user_input, tool_runner)
+            tool_stats = tool_runner.stats()
+        if tool_stats["timed_out"] or tool_stats["cancelled"]:
+            logger.warning(f"[AgentRunnable] Tool calls not completed: {tool_stats}")
+        result["tool_call_stats"] = tool_stats
+        return result
+
+    def _run_agent_iterations(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_schemas: List[Dict[str, Any]],
+        user_input: str,
+        tool_runner: TimeoutRunner
     ) -> Dict[str, Any]:
         """
         Execute the agent reasoning loop with safeguards.
@@ -353,6 +353,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             messages: Current message history
             tool_schemas: Available tool schemas
             user_input: Original user query
+            tool_runner: Runner used for each turn's tool calls
         
         Returns:
             Agent execution result with safeguards enforced
@@ -360,6 +361,8 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
         intermediate_steps = []
         iterations = 0
         total_tokens = 0
+        # Per-message token counts: each message is encoded once, when first seen
+        ledger = TokenLedger(model="gpt-4")
         
         # Get safeguard config from _config
         # CRITICAL: Lower limit to 95K to account for:
@@ -374,11 +377,11 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
         while iterations < self.max_iterations:
             iterations += 1
             
-            # OPTIMIZATION: Removed agent_step event publishing to reduce RabbitMQ overhead
-            # Only final result will be published by the engine
+            # Progress events are opt-in and coalesced (see AIAgentNode)
+            self._emit("agent_step", iteration=iterations)
             
             # PROACTIVE TOKEN CHECK: Count tokens before API call
-            current_tokens = count_tokens(messages, model="gpt-4")
+            current_tokens = ledger.sync(messages)
             
             # MULTI-ITERATION PROTECTION: On iteration 2+, be MORE aggressive to prevent accumulation
             # First iteration typically uses 2-5K tokens, second iteration adds tool results (60K+)
@@ -392,7 +395,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                 # This removes all previous tool calls and results from iteration 1
                 if len(messages) > 3:
                     messages = [messages[0]] + messages[-2:]  # system + last 2 messages
-                    current_tokens = count_tokens(messages, model="gpt-4")
+                    current_tokens = ledger.sync(messages)
                     #logger.info(f"[AgentRunnable] After multi-iteration truncation: {current_tokens} tokens")
             
             # AGGRESSIVE TRUNCATION: Account for large system prompts (7-10K tokens)
@@ -405,7 +408,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                 # Keep only system + last 2 messages (most aggressive for safety)
                 if len(messages) > 3:
                     messages = [messages[0]] + messages[-2:]  # system + last 2 messages
-                    current_tokens = count_tokens(messages, model="gpt-4")
+                    current_tokens = ledger.sync(messages)
                     #logger.info(f"[AgentRunnable] After aggressive truncation: {current_tokens} tokens")
             elif current_tokens > max_total_tokens:
                 logger.warning(
@@ -415,7 +418,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                 # Remove oldest messages (keep system + last 4)
                 if len(messages) > 5:
                     messages = [messages[0]] + messages[-4:]  # system + last 4 messages
-                    current_tokens = count_tokens(messages, model="gpt-4")
+                    current_tokens = ledger.sync(messages)
                     logger.info(f"[AgentRunnable] After truncation: {current_tokens} tokens")
             
             # Determine if tools should be provided this turn
@@ -433,6 +436,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             usage = model_result.get("usage", {})
             call_tokens = usage.get("total_tokens", 0)
             total_tokens += call_tokens
+            self._emit("model_result", usage=usage, metadata=model_result.get("_metadata"))
 
             #logger.info(
             #    f"[AgentRunnable] Iteration {iterations}: Used {call_tokens} tokens "
@@ -440,8 +444,10 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             #)
 
             if total_tokens > max_total_tokens:
-                # OPTIMIZATION: Removed agent_error event publishing
-                
+                self._emit(
+                    "agent_error", message="Token limit exceeded", fatal=True,
+                    context={"total_tokens": total_tokens, "max_total_tokens": max_total_tokens}
+                )
                 return {
                     "success": False,
                     "error": "Token limit exceeded",
@@ -453,6 +459,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             
             # Check for errors
             if "error" in model_result:
+                self._emit("agent_error", message=str(model_result["error"]), fatal=True)
                 return {
                     "success": False,
                     "error": model_result["error"],
@@ -488,8 +495,19 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                     "tool_calls": openai_tool_calls
                 })
                 
-                # Execute each tool with flattened format
-                for tool_call in tool_calls_from_msg:
+                for tc in tool_calls_from_msg:
+                    if tc.get("name"):
+                        self._emit(
+                            "tool_called", name=tc["name"], tool_call_id=tc.get("id", ""),
+                            args=tc.get("arguments", {})
+                        )
+                
+                # Execute the turn's tools concurrently; results come back in call order
+                tool_results = self._run_tool_calls(
+                    tool_runner, tool_calls_from_msg, user_input,
+                    self._extract_content_string(assistant_msg), tool_timeout
+                )
+                for tool_call, tool_result in zip(tool_calls_from_msg, tool_results):
                     # tool_calls_from_msg is already in flattened format from adapter:
                     # {"id": str, "name": str, "arguments": dict}
                     tool_id = tool_call.get("id", "")
@@ -509,72 +527,6 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                         })
                         continue
                     
-                    # OPTIMIZATION: Removed tool_called event publishing
-                    
-                    # Execute tool via collection with timeout
-                    import signal
-                    import threading
-                    
-                    tool_result = None
-                    timeout_error = None
-                    
-                    def execute_with_timeout():
-                        nonlocal tool_result
-                        try:
-                            tool_result = self.tools.invoke({
-                                "tool_name": tool_name,
-                                "arguments": tool_args,
-                                "tool_call_id": tool_id,
-                                "context": {
-                                    "user_query": user_input,
-                                    "assistant_text": self._extract_content_string(assistant_msg)
-                                }
-                            })
-                        except Exception as e:
-                            tool_result = {
-                                "ok": False,
-                                "name": tool_name,
-                                "tool_call_id": tool_id,
-                                "error": {
-                                    "type": "ExecutionError",
-                                    "message": str(e),
-                                    "details": []
-                                }
-                            }
-                    
-                    # Execute in thread with timeout
-                    exec_thread = threading.Thread(target=execute_with_timeout)
-                    exec_thread.daemon = True
-                    exec_thread.start()
-                    exec_thread.join(timeout=tool_timeout)
-                    
-                    if exec_thread.is_alive():
-                        # Timeout occurred
-                        logger.warning(f"[AgentRunnable] Tool {tool_name} timed out after {tool_timeout}s")
-                        tool_result = {
-                            "ok": False,
-                            "name": tool_name,
-                            "tool_call_id": tool_id,
-                            "error": {
-                                "type": "TimeoutError",
-                                "message": f"Tool execution timed out after {tool_timeout}s",
-                                "details": []
-                            }
-                        }
-                    
-                    # Ensure tool_result is set
-                    if tool_result is None:
-                        tool_result = {
-                            "ok": False,
-                            "name": tool_name,
-                            "tool_call_id": tool_id,
-                            "error": {
-                                "type": "UnknownError",
-                                "message": "Tool execution failed silently",
-                                "details": []
-                            }
-                        }
-                    
                     # Process tool response with smart filtering (like existing implementation)
                     if tool_result.get("ok"):
                         raw_data = tool_result.get("data")
@@ -592,7 +544,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                             model="gpt-4"
                         )
                         
-                        # OPTIMIZATION: Removed tool_result event publishing (success)
+                        self._emit("tool_result", name=tool_name, tool_call_id=tool_id, ok=True, data=processed_data)
                         
                         # Add successful tool result message
                         messages.append({
@@ -615,7 +567,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                         # Add error tool result message
                         error_info = tool_result.get("error", {})
                         
-                        # OPTIMIZATION: Removed tool_result event publishing (error)
+                        self._emit("tool_result", name=tool_name, tool_call_id=tool_id, ok=False, error=error_info)
                         
                         messages.append({
                             "role": "tool",
@@ -638,7 +590,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                             })
                 
                 # TOKEN CHECK AFTER ADDING TOOL RESULTS: Check if we're approaching the limit
-                messages_with_tools_tokens = count_tokens(messages, model="gpt-4")
+                messages_with_tools_tokens = ledger.sync(messages)
                 if messages_with_tools_tokens > 85000:  # Leave 40K for completion + overhead
                     logger.warning(
                         f"[AgentRunnable] High token count AFTER tool results: "
@@ -655,7 +607,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                     if last_user_idx is not None and last_user_idx > 1:
                         # Keep system (0) + everything from last user message onwards
                         messages = [messages[0]] + messages[last_user_idx:]
-                        messages_with_tools_tokens = count_tokens(messages, model="gpt-4")
+                        messages_with_tools_tokens = ledger.sync(messages)
                         # logger.info(
                         #     f"[AgentRunnable] After tool-result truncation: {messages_with_tools_tokens} tokens "
                         #     f"(kept system + last {len(messages) - 1} messages)"
@@ -674,6 +626,7 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                     f"Message length: {len(final_message) if final_message else 0}, "
                     f"Total tokens: {total_tokens}"
                 )
+                self._emit("agent_error", message="Empty or truncated response", fatal=True)
                 return {
                     "success": False,
                     "error": "Response was empty or truncated. Please try a more specific question.",
@@ -690,9 +643,11 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                 del sanitized_msg["tool_calls"]
             messages.append(sanitized_msg)
             
-            # OPTIMIZATION: Removed model_result event publishing
-            
-            # OPTIMIZATION: Removed agent_completed event publishing
+            self._emit(
+                "agent_completed",
+                final_preview=final_message[:200],
+                summary={"iterations": iterations, "total_tokens": total_tokens}
+            )
             
             return {
                 "success": True,
@@ -703,7 +658,10 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                 "providers": self._build_providers_meta()
             }
         
-        # OPTIMIZATION: Removed agent_error event publishing for max iterations
+        self._emit(
+            "agent_error", message="Maximum iterations reached", fatal=True,
+            context={"iterations": iterations}
+        )
         
         return {
             "success": False,
@@ -714,6 +672,65 @@ class AgentRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             "total_tokens": total_tokens
         }
     
+    def _run_tool_calls(
+        self,
+        tool_runner: TimeoutRunner,
+        tool_calls: List[Dict[str, Any]],
+        user_input: str,
+        assistant_text: str,
+        tool_timeout: float
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Invoke a turn's tool calls on ``tool_runner``, each with ``tool_timeout``.
+
+        Returns one tool result per call in the order of ``tool_calls`` (None
+        for calls without a tool name), so the ``tool`` messages appended to
+        the conversation are deterministic whatever order the tools finish in.
+        """
+        def make_call(tool_call: Dict[str, Any]) -> Callable[[], Dict[str, Any]]:
+            def call() -> Dict[str, Any]:
+                return self.tools.invoke({
+                    "tool_name": tool_call.get("name", ""),
+                    "arguments": tool_call.get("arguments", {}),
+                    "tool_call_id": tool_call.get("id", ""),
+                    "context": {
+                        "user_query": user_input,
+                        "assistant_text": assistant_text
+                    }
+                })
+            return call
+
+        named = [tc for tc in tool_calls if tc.get("name")]
+        outcomes = iter(tool_runner.run([make_call(tc) for tc in named], tool_timeout))
+
+        results: List[Optional[Dict[str, Any]]] = []
+        for tool_call in tool_calls:
+            tool_name = tool_call.get("name", "")
+            if not tool_name:
+                results.append(None)
+                continue
+            outcome = next(outcomes)
+            if outcome.status == "ok" and outcome.value is not None:
+                results.append(outcome.value)
+                continue
+
+            if outcome.status == "timeout":
+                logger.warning(f"[AgentRunnable] Tool {tool_name} timed out after {tool_timeout}s")
+                error = {"type": "TimeoutError", "message": f"Tool execution timed out after {tool_timeout}s"}
+            elif outcome.status == "cancelled":
+                error = {"type": "TimeoutError", "message": "Tool was not started: all tool workers are busy with timed-out calls"}
+            elif outcome.status == "error":
+                error = {"type": "ExecutionError", "message": str(outcome.value)}
+            else:
+                error = {"type": "UnknownError", "message": "Tool execution failed silently"}
+            results.append({
+                "ok": False,
+                "name": tool_name,
+                "tool_call_id": tool_call.get("id", ""),
+                "error": {**error, "details": []}
+            })
+        return results
+
     def _process_tool_response(
         self,
         tool_name: str,
@@ -9,6 +9,10 @@ Langfuse Integration:
 - Each LLM call is wrapped in a Langfuse generation observation
 - Captures input messages, output, token usage, and latency
 - Gracefully degrades when Langfuse is not configured
+
+Response caching (opt-in, utils/response_cache.py):
+- Deterministic requests are answered from an exact or semantic cache
+- Cache hits skip the provider call and report saved tokens
 """
 from __future__ import annotations
 from typing import Any, Dict, List, Optional, Iterator
@@ -17,6 +21,7 @@ import time
 import json
 
 from utils.langchain_base import BaseLangChainRunnable, MessageConverter
+from utils.response_cache import ChatResponseCache, is_deterministic
 
 # Langfuse observability (gracefully degrades if not configured)
 from observability.langfuse_client import create_llm_generation, is_langfuse_enabled
@@ -65,6 +70,7 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
         model: str = "gpt-4",
         temperature: float = 0.7,
         name: Optional[str] = None,
+        response_cache: Optional[ChatResponseCache] = None,
         **kwargs: Any
     ):
         """
@@ -76,6 +82,7 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             model: Model identifier
             temperature: Default temperature
             name: Optional display name
+            response_cache: Opt-in cache of deterministic (temperature 0) responses
             **kwargs: Additional config (max_tokens, top_p, etc.)
         """
         super().__init__(name=name or f"{provider}:{model}", **kwargs)
@@ -84,6 +91,7 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
         self.model = model
         self.temperature = temperature
         self.default_params = kwargs
+        self.response_cache = response_cache
     
     def invoke(
         self,
@@ -111,9 +119,14 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             "_metadata": {"provider": str, "model": str, "latency_ms": int, "finish_reason": str}
         }
         
+        With a response cache, deterministic requests are answered from it
+        when possible (usage is then zero and ``_metadata["cache"]`` reports
+        the saved tokens); pass ``{"response_cache": False}`` in config to
+        bypass it.
+        
         Args:
             input: Dict with "messages" (required) and optional overrides
-            config: Runtime config (max_retries, timeout, etc.)
+            config: Runtime config (max_retries, timeout, response_cache, etc.)
         
         Returns:
             Dict with normalized assistant_message, usage, and _metadata
@@ -127,6 +140,13 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             if k not in ("messages", "tools") and v is not None
         }
         
+        cache_keys = self._response_cache_keys(messages, tools, runtime_params, config)
+        if cache_keys is not None:
+            cached = self.response_cache.lookup(cache_keys)
+            if cached is not None:
+                logger.debug(f"[ChatModelRunnable] Response cache hit ({cached['_metadata']['cache']['hit']})")
+                return cached
+        
         # Retry configuration
         max_retries = (config or {}).get("max_retries", 3)
         backoff_factor = (config or {}).get("backoff_factor", 1.0)
@@ -164,6 +184,8 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
                             metadata={"latency_ms": elapsed_ms, "attempt": attempt + 1},
                         )
                     
+                    if cache_keys is not None:
+                        self.response_cache.save(cache_keys, normalized)
                     return normalized
                     
                 except Exception as e:
@@ -196,6 +218,25 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             
             return self._error_response(str(last_error), elapsed_ms, is_transient)
     
+    def _response_cache_keys(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        runtime_params: Dict[str, Any],
+        config: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """Cache keys of a request, or None when it must go to the provider."""
+        if self.response_cache is None or (config or {}).get("response_cache") is False:
+            return None
+        params = {"temperature": self.temperature, **self.default_params, **runtime_params}
+        params.pop("timeout", None)  # transport settings do not change the answer
+        if not is_deterministic(params):
+            self.response_cache.record_bypass()
+            return None
+        return self.response_cache.request_keys(
+            self.provider, self.model, params, messages, tools, base_url=getattr(self.adapter, "base_url", "") or ""
+        )
+    
     def _truncate_messages_for_trace(self, messages: List[Dict[str, Any]], max_chars: int = 5000) -> List[Dict[str, Any]]:
         """
         Truncate messages for Langfuse trace to avoid huge payloads.
@@ -480,6 +521,7 @@ class ChatModelRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]]):
             model=self.model,
             temperature=self.temperature,
             name=self.name,
+            response_cache=self.response_cache,
             **self.default_params
         )
         new_runnable._bound_tools = tools
@@ -309,6 +309,10 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
             "storage": "redis"  # storage type identifier
         }
     
+    With storage_mode="list", a save whose messages start with the history
+    this runnable loaded only appends the new messages (one RPUSH pipeline)
+    instead of rewriting the session; anything else is a full save.
+    
     Example:
         memory = RedisMemoryRunnable(
             session_id="user_123",
@@ -334,6 +338,7 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
         ttl_seconds: Optional[int] = None,
         credentials: Optional[Dict[str, Any]] = None,
         name: Optional[str] = None,
+        storage_mode: str = "json",
         **kwargs: Any
     ):
         """
@@ -345,6 +350,7 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
             ttl_seconds: Time-to-live for stored messages (seconds)
             credentials: Redis connection credentials (host, port, password, etc.)
             name: Optional memory name
+            storage_mode: "json" (whole history per key) or "list" (append-only)
             **kwargs: Additional config
         """
         super().__init__(name=name or f"RedisMemory:{session_id}", **kwargs)
@@ -352,7 +358,10 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
         self.context_window = context_window
         self.ttl_seconds = ttl_seconds
         self.credentials = credentials or {}
+        self.storage_mode = storage_mode
         self._manager = None
+        # Non-system messages last loaded/saved; a save extending them is an append
+        self._persisted: Optional[List[Dict[str, Any]]] = None
     
     def _get_manager(self):
         """
@@ -363,7 +372,7 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
         """
         if self._manager is None:
             from nodes.memory.redis_memory import RedisMemoryManager
-            self._manager = RedisMemoryManager(self.credentials)
+            self._manager = RedisMemoryManager(self.credentials, storage_mode=self.storage_mode)
         return self._manager
     
     def invoke(
@@ -425,6 +434,7 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
         try:
             manager = self._get_manager()
             messages = manager.load(self.session_id, self.context_window)
+            self._persisted = [m for m in messages if m.get("role") != "system"]
             
             logger.info(
                 f"[RedisMemoryRunnable] Loaded {len(messages)} messages "
@@ -463,18 +473,39 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
         try:
             manager = self._get_manager()
             ttl = self.ttl_seconds or manager.DEFAULT_TTL_SECONDS
+            non_system = [m for m in messages if m.get("role") != "system"]
+            persisted = self._persisted
             
-            manager.save(
-                self.session_id,
-                messages,
-                ttl_seconds=ttl,
-                context_window=self.context_window,
-                auto_clear_on_full=True
-            )
+            if (
+                self.storage_mode == manager.STORAGE_LIST
+                and persisted is not None
+                and len(non_system) == len(messages)
+                and messages[:len(persisted)] == persisted
+            ):
+                new_messages = messages[len(persisted):]
+                manager.append(
+                    self.session_id,
+                    new_messages,
+                    ttl_seconds=ttl,
+                    context_window=self.context_window,
+                    auto_clear_on_full=True
+                )
+                written = len(new_messages)
+            else:
+                manager.save(
+                    self.session_id,
+                    messages,
+                    ttl_seconds=ttl,
+                    context_window=self.context_window,
+                    auto_clear_on_full=True
+                )
+                written = len(messages)
+            self._persisted = non_system
             
             logger.info(
                 f"[RedisMemoryRunnable] Saved {len(messages)} messages "
-                f"for session '{self.session_id}' to Redis (TTL: {ttl}s)"
+                f"for session '{self.session_id}' to Redis "
+                f"({written} written, TTL: {ttl}s)"
             )
             
             return {
@@ -506,6 +537,7 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
         try:
             manager = self._get_manager()
             manager.clear(self.session_id)
+            self._persisted = []
             
             logger.info(f"[RedisMemoryRunnable] Cleared Redis memory for session '{self.session_id}'")
             
@@ -544,6 +576,7 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
             ttl_seconds=self.ttl_seconds,
             credentials=self.credentials,
             name=f"RedisMemory:{session_id}",
+            storage_mode=self.storage_mode,
             **self._config
         )
     
@@ -563,6 +596,7 @@ class RedisMemoryRunnable(BaseLangChainRunnable[Dict[str, Any], Dict[str, Any]])
             ttl_seconds=self.ttl_seconds,
             credentials=self.credentials,
             name=self.name,
+            storage_mode=self.storage_mode,
             **self._config
         )
     
@@ -608,7 +642,8 @@ def create_redis_memory(
     session_id: str,
     context_window: int = 5,
     ttl_seconds: Optional[int] = None,
-    credentials: Optional[Dict[str, Any]] = None
+    credentials: Optional[Dict[str, Any]] = None,
+    storage_mode: str = "json"
 ) -> RedisMemoryRunnable:
     """
     Factory function to create a RedisMemoryRunnable.
@@ -618,6 +653,7 @@ def create_redis_memory(
         context_window: Number of recent turns to include
         ttl_seconds: Time-to-live for stored messages
         credentials: Redis connection credentials
+        storage_mode: "json" (default) or "list" for append-only storage
     
     Returns:
         RedisMemoryRunnable instance
@@ -626,5 +662,6 @@ def create_redis_memory(
         session_id=session_id,
         context_window=context_window,
         ttl_seconds=ttl_seconds,
-        credentials=credentials
+        credentials=credentials,
+        storage_mode=storage_mode
     )
@@ -22,6 +22,11 @@ PERSIAN_DIGITS = {
     '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'
 }
 
+# Sentence and clause punctuation (Persian/Arabic forms next to their Latin
+# counterparts), used to pick split points in long documents
+PERSIAN_SENTENCE_TERMINATORS = '.!?\u061F\u06D4\u2026'  # . ! ? ؟ ۔ …
+PERSIAN_CLAUSE_SEPARATORS = ';,\u061B\u060C'  # ; , ؛ ،
+
 def normalize_persian_text(text: str) -> str:
     """
     Normalize Persian text by replacing Arabic characters with Persian equivalents.
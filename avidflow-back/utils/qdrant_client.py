@@ -2,19 +2,48 @@
 Qdrant Client Adapter with connection pooling and retry logic.
 Synchronous adapter wrapping requests.Session for Celery compatibility.
 """
+import json
 import time
 import logging
 from typing import Dict, List, Any, Optional
 from urllib.parse import urlparse
+import numpy as np
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry as Urllib3Retry
 
 from utils.qdrant_exceptions import QdrantError, ParameterError
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(data: Any) -> bytes:
+    """
+    Request body for ``data``. Vectors may be float32 numpy arrays (as built by
+    Retriever.insert_documents); orjson writes them straight from the buffer.
+
+    Payloads orjson rejects (integers wider than 64 bits, for instance) are
+    encoded with json instead; TypeError is raised only if that fails too.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except TypeError as e:  # orjson.JSONEncodeError
+            logger.debug(f"[QdrantAdapter] orjson could not encode the body, using json: {e}")
+    return json.dumps(data, default=_json_default).encode("utf-8")
+
+
 class QdrantClientAdapter:
     """
     Synchronous Qdrant API client with connection pooling and retry logic.
@@ -24,6 +53,7 @@ class QdrantClientAdapter:
     - Exponential backoff on transient failures (5xx, timeout)
     - Configurable timeouts
     - Structured error handling
+    - Upserts over MAX_PAYLOAD_SIZE are split into several requests
     """
     
     # Allowed URL schemes for security
@@ -61,6 +91,11 @@ class QdrantClientAdapter:
         
         # Initialize session with connection pooling
         self.session = self._create_session()
+        
+        # Upsert counters (read by Retriever.insert_documents for throughput logs)
+        self.upsert_requests = 0
+        self.upserted_points = 0
+        self.upserted_bytes = 0
     
     def _validate_and_clean_url(self, url: str) -> str:
         """
@@ -139,7 +174,8 @@ class QdrantClientAdapter:
         method: str,
         path: str,
         json_data: Optional[Dict[str, Any]] = None,
-        params: Optional[Dict[str, Any]] = None
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None
     ) -> Dict[str, Any]:
         """
         Make HTTP request to Qdrant API with error handling.
@@ -149,6 +185,7 @@ class QdrantClientAdapter:
             path: API path (e.g., "/collections/{name}")
             json_data: Request body as dict
             params: Query parameters
+            body: Pre-encoded JSON request body (instead of json_data)
             
         Returns:
             Response data as dict
@@ -166,6 +203,7 @@ class QdrantClientAdapter:
                 url=url,
                 headers=self._get_headers(),
                 json=json_data,
+                data=body,
                 params=params,
                 timeout=self.timeout
             )
@@ -269,13 +307,17 @@ class QdrantClientAdapter:
         """
         Insert or update points in collection.
         
+        With wait=False Qdrant acknowledges the write once it is queued; a
+        later wait=True write to the collection returns after the queued
+        ones are applied (updates are applied in order).
+        
         Args:
             collection_name: Target collection
-            points: List of points with id, vector, payload
+            points: List of points with id, vector (list or numpy array), payload
             wait: Wait for operation to complete
             
         Returns:
-            API response
+            API response (of the last request when the points were split)
             
         Raises:
             ParameterError: If parameters are invalid
@@ -289,12 +331,32 @@ class QdrantClientAdapter:
         
         logger.info(f"[QdrantAdapter] Upserting {len(points)} points to '{collection_name}'")
         
-        return self._request(
+        try:
+            body = encode_json({"points": points})
+        except (TypeError, ValueError) as e:
+            raise QdrantError(
+                f"Points are not JSON serializable: {e}",
+                details={"collection": collection_name}
+            )
+        if len(body) > self.MAX_PAYLOAD_SIZE and len(points) > 1:
+            half = len(points) // 2
+            logger.info(
+                f"[QdrantAdapter] Upsert body of {len(body)} bytes exceeds {self.MAX_PAYLOAD_SIZE}, "
+                f"splitting into {half} + {len(points) - half} points"
+            )
+            self.upsert_points(collection_name, points[:half], wait=False)
+            return self.upsert_points(collection_name, points[half:], wait=wait)
+        
+        result = self._request(
             "PUT",
             f"/collections/{collection_name}/points",
-            json_data={"points": points},
-            params={"wait": "true" if wait else "false"}
+            params={"wait": "true" if wait else "false"},
+            body=body
         )
+        self.upsert_requests += 1
+        self.upserted_points += len(points)
+        self.upserted_bytes += len(body)
+        return result
     
     def search(
         self,
@@ -0,0 +1,873 @@
+"""
+In-process Qdrant backend for small tenants and tests.
+
+LocalQdrantAdapter implements the QdrantClientAdapter methods used by the
+Qdrant node and Retriever (create_collection, upsert_points, search, scroll,
+delete_points, get_collection_info, close) and returns the same response
+shapes, without a Qdrant server:
+
+- vectors live in a memory-mapped float32 matrix per collection
+  (<root>/<collection>/vectors.f32) grown by doubling; Cosine vectors are
+  normalized on insert, as Qdrant does
+- ids and payloads are stored in SQLite next to it and kept in memory for
+  filtering
+- search is a vectorized matrix product over the live rows; collections with
+  at least ``index_threshold`` points also get an IVF index (k-means lists
+  over an in-memory copy of the vectors, ``nprobe`` lists scanned per query)
+  used for unfiltered, non-exact searches
+- filters support must/should/must_not with match (value/any/except/text),
+  range, values_count, has_id, is_empty, is_null and nested filters
+
+Collections are shared by every adapter opened on the same root in the
+process, so the node's per-operation adapters see each other's writes.
+Several worker processes may open the same collection: every operation holds
+an flock on the collection's lock file (exclusive for writes), and a process
+reloads its in-memory state when the version stored in points.sqlite3 shows
+that another process wrote since it last looked. Where fcntl is unavailable
+(Windows) the backend is only safe with a single worker process.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from config import settings
+from utils.qdrant_exceptions import ParameterError, QdrantError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DISTANCES = ("Cosine", "Dot", "Euclid", "Manhattan")
+
+# Distances where a lower score is a better match
+_ASCENDING = ("Euclid", "Manhattan")
+
+_NAME = re.compile(r"[A-Za-z0-9_.\-]+")
+
+# Rows scored per block for Manhattan distance and IVF assignment
+_BLOCK_ROWS = 8192
+
+
+def _check_name(name: str, what: str) -> str:
+    if not name or not _NAME.fullmatch(name) or name in (".", ".."):
+        raise ParameterError(
+            f"Invalid {what}: {name!r} (letters, digits, '_', '-' and '.' only)",
+            details={what.replace(" ", "_"): name}
+        )
+    return name
+
+
+@contextmanager
+def _file_lock(path: str, exclusive: bool) -> Iterator[None]:
+    """flock on ``path`` (created if missing) shared between worker processes."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _id_key(point_id: Any) -> str:
+    # 5 and "5" are different Qdrant ids
+    return json.dumps(point_id)
+
+
+def _response(result: Any, started: float) -> Dict[str, Any]:
+    return {"result": result, "status": "ok", "time": round(time.perf_counter() - started, 6)}
+
+
+def _not_found(collection_name: str) -> QdrantError:
+    body = f"Not found: Collection `{collection_name}` doesn't exist!"
+    return QdrantError(
+        f"Qdrant API error: collection '{collection_name}' not found",
+        details={"collection": collection_name},
+        status_code=404,
+        response_body=json.dumps({"status": {"error": body}})
+    )
+
+
+# ============================================================================
+# Filters
+# ============================================================================
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _payload_values(payload: Dict[str, Any], key: str) -> List[Any]:
+    """Values at a dotted key ("a.b", "a[].b"), with arrays flattened."""
+    values: List[Any] = [payload]
+    for part in key.split("."):
+        part = part[:-2] if part.endswith("[]") else part
+        found = []
+        for value in values:
+            if isinstance(value, dict) and part in value:
+                item = value[part]
+                found.extend(item if isinstance(item, list) else [item])
+        values = found
+    return values
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _in_range(value: Any, bounds: Dict[str, Any]) -> bool:
+    if not _is_number(value):
+        return False
+    return (
+        (bounds.get("gt") is None or value > bounds["gt"])
+        and (bounds.get("gte") is None or value >= bounds["gte"])
+        and (bounds.get("lt") is None or value < bounds["lt"])
+        and (bounds.get("lte") is None or value <= bounds["lte"])
+    )
+
+
+def matches_filter(filter_obj: Dict[str, Any], point_id: Any, payload: Dict[str, Any]) -> bool:
+    """Whether a point satisfies a Qdrant filter."""
+    for condition in _as_list(filter_obj.get("must")):
+        if not _matches_condition(condition, point_id, payload):
+            return False
+    should = _as_list(filter_obj.get("should"))
+    if should and not any(_matches_condition(c, point_id, payload) for c in should):
+        return False
+    for condition in _as_list(filter_obj.get("must_not")):
+        if _matches_condition(condition, point_id, payload):
+            return False
+    return True
+
+
+def _matches_condition(condition: Dict[str, Any], point_id: Any, payload: Dict[str, Any]) -> bool:
+    if any(clause in condition for clause in ("must", "should", "must_not")):
+        return matches_filter(condition, point_id, payload)
+    if "has_id" in condition:
+        return str(point_id) in {str(i) for i in condition["has_id"]}
+    if "is_empty" in condition:
+        return not [v for v in _payload_values(payload, condition["is_empty"]["key"]) if v is not None]
+    if "is_null" in condition:
+        return None in _payload_values(payload, condition["is_null"]["key"])
+    if "nested" in condition:
+        nested = condition["nested"]
+        items = [v for v in _payload_values(payload, nested["key"]) if isinstance(v, dict)]
+        return any(matches_filter(nested["filter"], point_id, item) for item in items)
+
+    key = condition.get("key")
+    if key is None:
+        raise ParameterError("Unsupported filter condition", details={"condition": condition})
+    values = _payload_values(payload, key)
+
+    if "match" in condition:
+        match = condition["match"]
+        if "value" in match:
+            return match["value"] in values
+        if "any" in match:
+            return any(v in match["any"] for v in values)
+        if "except" in match:
+            return not values or any(v not in match["except"] for v in values)
+        if "text" in match:
+            return any(isinstance(v, str) and match["text"] in v for v in values)
+    if "range" in condition:
+        return any(_in_range(v, condition["range"]) for v in values)
+    if "values_count" in condition:
+        return _in_range(len(values), condition["values_count"])
+    raise ParameterError("Unsupported filter condition", details={"condition": condition})
+
+
+# ============================================================================
+# IVF index
+# ============================================================================
+
+class _IVFIndex:
+    """
+    Inverted-file index: rows grouped by nearest k-means centroid, with a
+    list-ordered copy of their vectors so each list is one contiguous block.
+    A query scores the centroids, then only the ``nprobe`` closest lists.
+    Rows written after the build are tracked in ``pending`` and scored by the
+    collection directly.
+    """
+
+    def __init__(self, centroids: np.ndarray, rows: np.ndarray, offsets: np.ndarray,
+                 vectors: np.ndarray, sq_norms: np.ndarray, distance: str):
+        self.centroids = centroids
+        self.rows = rows
+        self.offsets = offsets
+        self.vectors = vectors
+        self.sq_norms = sq_norms
+        self.distance = distance
+        self.size = len(rows)
+        self.pending: set = set()
+        self._half_sq_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, sq_norms: np.ndarray, rows: np.ndarray, distance: str,
+              iterations: int = 8, seed: int = 0) -> "_IVFIndex":
+        data = np.ascontiguousarray(vectors[rows])
+        n_lists = max(1, int(math.sqrt(len(rows))))
+        rng = np.random.default_rng(seed)
+        sample = data[rng.choice(len(data), size=min(len(data), n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = cls._assign(sample, centroids)
+            counts = np.bincount(labels, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = counts > 0  # empty lists keep their centroid
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        labels = cls._assign(data, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(n_lists + 1))
+        return cls(centroids, rows[order], offsets, data[order], sq_norms[rows][order], distance)
+
+    @staticmethod
+    def _assign(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin ||x - c||^2 == argmax (x.c - ||c||^2 / 2)
+        half_sq_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        labels = np.empty(len(data), dtype=np.int64)
+        for start in range(0, len(data), _BLOCK_ROWS):
+            block = data[start:start + _BLOCK_ROWS]
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T - half_sq_norms, axis=1)
+        return labels
+
+    def search(self, query: np.ndarray, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of the ``nprobe`` lists closest to the query, with their scores."""
+        closeness = self.centroids @ query
+        if self.distance != "Dot":
+            closeness = closeness - self._half_sq_norms
+        nprobe = min(nprobe, len(self.centroids))
+        probed = np.sort(np.argpartition(-closeness, nprobe - 1)[:nprobe])
+        rows, scores = [], []
+        for i in probed:
+            start, end = self.offsets[i], self.offsets[i + 1]
+            if start < end:
+                rows.append(self.rows[start:end])
+                scores.append(_distance_scores(
+                    self.distance, self.vectors[start:end], self.sq_norms[start:end], query
+                ))
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(scores)
+
+
+def _distance_scores(distance: str, vectors: np.ndarray, sq_norms: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Scores of ``vectors`` against a prepared query (sq_norms are used for Euclid only)."""
+    if distance in ("Cosine", "Dot"):
+        return vectors @ query
+    if distance == "Euclid":
+        squared = sq_norms - 2 * (vectors @ query) + float(query @ query)
+        return np.sqrt(np.maximum(squared, 0))
+    # Manhattan, in blocks to bound the temporary (rows x dims) array
+    if not len(vectors):
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate([
+        np.abs(vectors[start:start + _BLOCK_ROWS] - query).sum(axis=1)
+        for start in range(0, len(vectors), _BLOCK_ROWS)
+    ])
+
+
+# ============================================================================
+# Collections
+# ============================================================================
+
+class _LocalCollection:
+    """
+    One collection on disk: meta.json, vectors.f32 (memmap) and points.sqlite3.
+
+    The in-memory state (ids, payloads, live rows) is loaded on first use
+    and reloaded inside ``locked()`` whenever the database's user_version,
+    bumped by every write, differs from the version it was loaded at.
+    """
+
+    def __init__(self, path: str, index_threshold: int):
+        self.path = path
+        self.index_threshold = index_threshold
+        self.lock = threading.RLock()
+        self.version: Optional[int] = None
+        self.reloads = 0
+
+        self._db = sqlite3.connect(
+            os.path.join(path, "points.sqlite3"), check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, payload TEXT NOT NULL)"
+        )
+        self._vectors: Optional[np.memmap] = None
+
+    @contextmanager
+    def locked(self, exclusive: bool = False) -> Iterator["_LocalCollection"]:
+        """Hold the thread and process locks, with the state synced from disk."""
+        with self.lock, _file_lock(os.path.join(self.path, "lock"), exclusive):
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.version:
+                self._load()
+                self.version = version
+            yield self
+
+    def _load(self) -> None:
+        if self.version is not None:
+            self.reloads += 1
+            logger.debug(f"[LocalQdrant] Reloading {os.path.basename(self.path)} after a write by another process")
+        with open(os.path.join(self.path, "meta.json")) as f:
+            meta = json.load(f)
+        self.size = int(meta["size"])
+        self.distance = meta["distance"]
+        self.capacity = int(meta.get("capacity", 0))
+
+        self._vectors = self._open_vectors()
+        self._alive = np.zeros(self.capacity, dtype=bool)
+        self._ids: List[Any] = []
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._row_of: Dict[str, int] = {}
+        for row, key, payload in self._db.execute("SELECT row, id, payload FROM points ORDER BY row"):
+            self._extend_rows(row + 1)
+            self._ids[row] = json.loads(key)
+            self._payloads[row] = json.loads(payload)
+            self._row_of[key] = row
+            self._alive[row] = True
+        self._free = [row for row in range(len(self._ids)) if not self._alive[row]]
+        self._sq_norms = np.zeros(self.capacity, dtype=np.float32)
+        if self.distance == "Euclid" and self._ids:
+            head = self._vectors[:len(self._ids)]
+            self._sq_norms[:len(self._ids)] = np.einsum("ij,ij->i", head, head)
+        self.index: Optional[_IVFIndex] = None
+
+    @classmethod
+    def create(cls, path: str, size: int, distance: str, index_threshold: int) -> "_LocalCollection":
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"size": size, "distance": distance, "capacity": 0}, f)
+        return cls(path, index_threshold)
+
+    @property
+    def count(self) -> int:
+        return len(self._row_of)
+
+    # ---------------------------------------------------------------- storage
+
+    def _open_vectors(self) -> Optional[np.memmap]:
+        if not self.capacity:
+            return None
+        return np.memmap(
+            os.path.join(self.path, "vectors.f32"), dtype=np.float32, mode="r+",
+            shape=(self.capacity, self.size)
+        )
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(os.path.join(self.path, "vectors.f32"), "ab") as f:
+            f.truncate(capacity * self.size * 4)
+        self.capacity = capacity
+        self._vectors = self._open_vectors()
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+        self._sq_norms = np.concatenate(
+            [self._sq_norms, np.zeros(capacity - len(self._sq_norms), dtype=np.float32)]
+        )
+        self._write_meta()
+
+    def _extend_rows(self, rows: int) -> None:
+        while len(self._ids) < rows:
+            self._ids.append(None)
+            self._payloads.append(None)
+
+    def _write_meta(self) -> None:
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({"size": self.size, "distance": self.distance, "capacity": self.capacity}, f)
+
+    def _write_rows(self, sql: str, rows: List[Tuple[Any, ...]]) -> None:
+        # One transaction per batch (the connection is in autocommit mode);
+        # callers hold locked(exclusive=True), so the version bump cannot race
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(sql, rows)
+            self._db.execute(f"PRAGMA user_version = {self.version + 1}")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        self.version += 1
+
+    def flush(self) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            self.flush()
+            self._vectors = None
+            self._db.close()
+
+    # ----------------------------------------------------------------- writes
+
+    def upsert(self, ids: List[Any], vectors: np.ndarray, payloads: List[Dict[str, Any]]) -> None:
+        """Write points; the caller holds locked(exclusive=True)."""
+        if self.distance == "Cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1)
+        with self.lock:
+            keys = [_id_key(point_id) for point_id in ids]
+            rows = []
+            for key in keys:
+                row = self._row_of.get(key)
+                if row is None:
+                    row = self._free.pop() if self._free else len(self._ids)
+                    self._extend_rows(row + 1)
+                    self._row_of[key] = row
+                rows.append(row)
+            self._ensure_capacity(len(self._ids))
+
+            rows_array = np.asarray(rows, dtype=np.int64)
+            self._vectors[rows_array] = vectors
+            self._alive[rows_array] = True
+            if self.distance == "Euclid":
+                self._sq_norms[rows_array] = np.einsum("ij,ij->i", vectors, vectors)
+            for row, point_id, payload in zip(rows, ids, payloads):
+                self._ids[row] = point_id
+                self._payloads[row] = payload
+            self._write_rows(
+                "INSERT OR REPLACE INTO points (row, id, payload) VALUES (?, ?, ?)",
+                [(row, key, json.dumps(p, default=str)) for row, key, p in zip(rows, keys, payloads)]
+            )
+            if self.index is not None:
+                self.index.pending.update(rows)
+
+    def delete(self, rows: Iterable[int]) -> int:
+        """Delete live ``rows``; the caller holds locked(exclusive=True)."""
+        with self.lock:
+            rows = [row for row in rows if self._alive[row]]
+            for row in rows:
+                del self._row_of[_id_key(self._ids[row])]
+                self._ids[row] = None
+                self._payloads[row] = None
+                self._alive[row] = False
+            self._free.extend(rows)
+            self._write_rows("DELETE FROM points WHERE row = ?", [(row,) for row in rows])
+            return len(rows)
+
+    # ------------------------------------------------------------------ reads
+
+    def rows_for_ids(self, ids: Iterable[Any]) -> List[int]:
+        rows = (self._row_of.get(_id_key(point_id)) for point_id in ids)
+        return [row for row in rows if row is not None]
+
+    def rows_matching(self, filter_obj: Optional[Dict[str, Any]]) -> np.ndarray:
+        live = np.flatnonzero(self._alive[:len(self._ids)])
+        if not filter_obj:
+            return live
+        return np.fromiter(
+            (row for row in live if matches_filter(filter_obj, self._ids[row], self._payloads[row])),
+            dtype=np.int64
+        )
+
+    def prepare_query(self, query: Sequence[float]) -> np.ndarray:
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.size:
+            raise QdrantError(
+                f"Wrong input: Vector dimension error: expected dim: {self.size}, got {query.shape[0]}",
+                status_code=400
+            )
+        if self.distance == "Cosine":
+            norm = float(np.linalg.norm(query))
+            query = query / norm if norm > 0 else query
+        return query
+
+    def scores(self, rows: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        """Scores of ``rows`` (every stored row when None) against a prepared query."""
+        if rows is None:
+            rows = slice(0, len(self._ids))
+        return _distance_scores(self.distance, self._vectors[rows], self._sq_norms[rows], query)
+
+    def search_rows(
+        self,
+        query: np.ndarray,
+        limit: int,
+        filter_obj: Optional[Dict[str, Any]],
+        exact: bool,
+        nprobe: Optional[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Best ``limit`` rows and their scores, best first."""
+        ascending = self.distance in _ASCENDING
+        if not self.count:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if filter_obj:
+            rows = self.rows_matching(filter_obj)
+            scores = self.scores(rows, query)
+        elif not exact and self._use_index():
+            rows, scores = self.index.search(query, nprobe or max(1, len(self.index.centroids) // 8))
+            pending = np.fromiter(self.index.pending, dtype=np.int64)
+            # The index holds stale copies of rows rewritten since the build
+            current = self._alive[rows] & ~np.isin(rows, pending)
+            pending = pending[self._alive[pending]]
+            rows = np.concatenate([rows[current], pending])
+            scores = np.concatenate([scores[current], self.scores(pending, query)])
+        else:
+            rows = None
+            scores = self.scores(rows, query)
+
+        if rows is None:
+            rows = np.arange(len(self._ids))
+            dead = ~self._alive[:len(self._ids)]
+            scores[dead] = np.inf if ascending else -np.inf
+
+        limit = min(limit, len(rows))
+        if limit <= 0:
+            return rows[:0], scores[:0]
+        keys = scores if ascending else -scores
+        top = np.argpartition(keys, limit - 1)[:limit]
+        top = top[np.argsort(keys[top], kind="stable")]
+        rows, scores = rows[top], scores[top]
+        live = self._alive[rows]
+        return rows[live], scores[live]
+
+    def _use_index(self) -> bool:
+        if self.count < self.index_threshold:
+            self.index = None
+            return False
+        if self.index is None or len(self.index.pending) > 0.2 * self.index.size:
+            started = time.perf_counter()
+            live = np.flatnonzero(self._alive[:len(self._ids)])
+            self.index = _IVFIndex.build(self._vectors, self._sq_norms, live, self.distance)
+            logger.info(
+                f"[LocalQdrant] Built IVF index for {os.path.basename(self.path)}: {len(live)} points, "
+                f"{len(self.index.centroids)} lists in {time.perf_counter() - started:.2f}s"
+            )
+        return True
+
+    def point(self, row: int, with_payload: bool, with_vector: bool) -> Dict[str, Any]:
+        point: Dict[str, Any] = {"id": self._ids[row], "version": 0}
+        if with_payload:
+            point["payload"] = self._payloads[row]
+        if with_vector:
+            point["vector"] = self._vectors[row].tolist()
+        return point
+
+
+_collections: Dict[str, _LocalCollection] = {}
+_collections_lock = threading.Lock()
+
+
+# ============================================================================
+# Adapter
+# ============================================================================
+
+class LocalQdrantAdapter:
+    """
+    QdrantClientAdapter-compatible backend storing collections under ``path``.
+
+    Features:
+    - Memory-mapped float32 vectors, SQLite payloads (survive restarts)
+    - Cosine / Dot / Euclid / Manhattan search via vectorized matrix ops
+    - IVF index above ``index_threshold`` points (``exact=True`` bypasses it)
+    - Qdrant payload filters, scroll and delete
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        index_threshold: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ):
+        """
+        Initialize local adapter.
+
+        Args:
+            path: Directory holding one sub-directory per collection
+                (default: settings.QDRANT_LOCAL_PATH)
+            index_threshold: Points above which searches use the IVF index
+                (default: settings.QDRANT_LOCAL_INDEX_THRESHOLD)
+            nprobe: IVF lists scanned per query (default: 1/8 of the lists)
+        """
+        self.path = os.path.abspath(path or settings.QDRANT_LOCAL_PATH)
+        self.index_threshold = (
+            settings.QDRANT_LOCAL_INDEX_THRESHOLD if index_threshold is None else index_threshold
+        )
+        self.nprobe = nprobe
+        os.makedirs(self.path, exist_ok=True)
+
+        self._operation_id = 0
+
+        # Same counters as QdrantClientAdapter
+        self.upsert_requests = 0
+        self.upserted_points = 0
+        self.upserted_bytes = 0
+
+    @classmethod
+    def for_namespace(cls, namespace: str, **kwargs: Any) -> "LocalQdrantAdapter":
+        """Adapter rooted at <QDRANT_LOCAL_PATH>/<namespace>."""
+        namespace = _check_name(namespace, "local namespace")
+        return cls(os.path.join(settings.QDRANT_LOCAL_PATH, namespace), **kwargs)
+
+    @classmethod
+    def for_credential(cls, credential_id: Any, **kwargs: Any) -> "LocalQdrantAdapter":
+        """
+        Adapter for the collections of one qdrantApi credential.
+
+        The namespace is derived from the credential's id on the server, so
+        workflows can only reach collections through a credential they use.
+        """
+        if not credential_id:
+            raise ParameterError("The local Qdrant backend requires a saved qdrantApi credential")
+        digest = hashlib.sha256(str(credential_id).encode("utf-8")).hexdigest()[:32]
+        return cls.for_namespace(f"credential-{digest}", **kwargs)
+
+    def _collection(self, collection_name: str) -> _LocalCollection:
+        if not collection_name:
+            raise ParameterError("Collection name is required")
+        path = os.path.join(self.path, _check_name(collection_name, "collection name"))
+        with _collections_lock:
+            collection = _collections.get(path)
+            if collection is None:
+                if not os.path.exists(os.path.join(path, "meta.json")):
+                    raise _not_found(collection_name)
+                collection = _collections[path] = _LocalCollection(path, self.index_threshold)
+            collection.index_threshold = self.index_threshold
+            return collection
+
+    def list_collections(self) -> List[str]:
+        """Names of the collections stored under this adapter's path."""
+        return sorted(
+            name for name in os.listdir(self.path)
+            if os.path.exists(os.path.join(self.path, name, "meta.json"))
+        )
+
+    def create_collection(
+        self,
+        collection_name: str,
+        vector_size: int,
+        distance: str = "Cosine",
+        on_disk_payload: bool = False
+    ) -> Dict[str, Any]:
+        """Create a collection; an existing one is left as is (idempotent, like the remote adapter)."""
+        started = time.perf_counter()
+        if not collection_name:
+            raise ParameterError("Collection name is required")
+        if vector_size <= 0:
+            raise ParameterError(
+                "Vector size must be positive",
+                details={"vector_size": vector_size}
+            )
+        if distance not in DISTANCES:
+            raise ParameterError(
+                f"Unsupported distance: {distance}. Allowed: {DISTANCES}",
+                details={"distance": distance}
+            )
+
+        path = os.path.join(self.path, _check_name(collection_name, "collection name"))
+        with _collections_lock, _file_lock(os.path.join(self.path, ".lock"), exclusive=True):
+            if os.path.exists(os.path.join(path, "meta.json")):
+                logger.info(f"[LocalQdrant] Collection '{collection_name}' already exists, treating as success")
+                return {
+                    "status": {"info": "Collection already exists"},
+                    "time": 0.0,
+                    "result": True
+                }
+            logger.info(f"[LocalQdrant] Creating collection '{collection_name}' ({vector_size}D, {distance})")
+            _collections[path] = _LocalCollection.create(
+                path, int(vector_size), distance, self.index_threshold
+            )
+        return _response(True, started)
+
+    def upsert_points(
+        self,
+        collection_name: str,
+        points: List[Dict[str, Any]],
+        wait: bool = True
+    ) -> Dict[str, Any]:
+        """Insert or update points; vectors may be lists or numpy arrays."""
+        started = time.perf_counter()
+        if not collection_name:
+            raise ParameterError("Collection name is required")
+        if not points:
+            raise ParameterError("No points provided for upsert")
+
+        collection = self._collection(collection_name)
+        for point in points:
+            if isinstance(point.get("vector"), dict):
+                raise ParameterError("Named vectors are not supported by the local Qdrant backend")
+        vectors = np.asarray([point["vector"] for point in points], dtype=np.float32)
+        with collection.locked(exclusive=True):
+            if vectors.ndim != 2 or vectors.shape[1] != collection.size:
+                raise QdrantError(
+                    f"Wrong input: Vector dimension error: expected dim: {collection.size}, "
+                    f"got {vectors.shape[-1] if vectors.ndim else 0}",
+                    details={"collection": collection_name},
+                    status_code=400
+                )
+
+            collection.upsert(
+                [point["id"] for point in points],
+                vectors,
+                [point.get("payload") or {} for point in points]
+            )
+            if wait:
+                collection.flush()
+
+        self.upsert_requests += 1
+        self.upserted_points += len(points)
+        self.upserted_bytes += vectors.nbytes
+        self._operation_id += 1
+        return _response({"operation_id": self._operation_id, "status": "completed"}, started)
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        filter_obj: Optional[Dict[str, Any]] = None,
+        with_payload: bool = True,
+        with_vector: bool = False,
+        exact: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar vectors (same arguments and result shape as QdrantClientAdapter.search).
+
+        For Euclid and Manhattan the score is the distance: results are in
+        ascending order and score_threshold is an upper bound.
+
+        Args:
+            exact: Score every point even when the collection has an IVF index
+        """
+        if not collection_name:
+            raise ParameterError("Collection name is required")
+        if query_vector is None or len(query_vector) == 0:
+            raise ParameterError("Query vector is required")
+
+        collection = self._collection(collection_name)
+        with collection.locked():
+            query = collection.prepare_query(query_vector)
+            rows, scores = collection.search_rows(query, int(limit), filter_obj, exact, self.nprobe)
+            if score_threshold is not None:
+                keep = scores <= score_threshold if collection.distance in _ASCENDING else scores >= score_threshold
+                rows, scores = rows[keep], scores[keep]
+            results = []
+            for row, score in zip(rows.tolist(), scores.tolist()):
+                result = collection.point(row, with_payload, with_vector)
+                result["score"] = score
+                results.append(result)
+        return results
+
+    def scroll(
+        self,
+        collection_name: str,
+        limit: int = 100,
+        offset: Optional[Any] = None,
+        filter_obj: Optional[Dict[str, Any]] = None,
+        with_payload: bool = True,
+        with_vector: bool = False
+    ) -> Dict[str, Any]:
+        """Points in id order starting at id ``offset``, with next_page_offset like Qdrant."""
+        started = time.perf_counter()
+        if not collection_name:
+            raise ParameterError("Collection name is required")
+
+        collection = self._collection(collection_name)
+        with collection.locked():
+            rows = collection.rows_matching(filter_obj).tolist()
+            # Integer ids before UUID strings, each in natural order
+            keyed = sorted(
+                ((isinstance(collection._ids[row], str), collection._ids[row]), row) for row in rows
+            )
+            if offset is not None:
+                start = (isinstance(offset, str), offset)
+                keyed = [(key, row) for key, row in keyed if key >= start]
+            page, rest = keyed[:int(limit)], keyed[int(limit):]
+            points = [collection.point(row, with_payload, with_vector) for _, row in page]
+        return _response(
+            {"points": points, "next_page_offset": rest[0][0][1] if rest else None}, started
+        )
+
+    def delete_points(
+        self,
+        collection_name: str,
+        point_ids: Optional[List[Any]] = None,
+        filter_obj: Optional[Dict[str, Any]] = None,
+        wait: bool = True
+    ) -> Dict[str, Any]:
+        """Delete points by ids, or by filter when no ids are given."""
+        started = time.perf_counter()
+        if not collection_name:
+            raise ParameterError("Collection name is required")
+        if not point_ids and not filter_obj:
+            raise ParameterError("Either point_ids or filter_obj must be provided")
+
+        collection = self._collection(collection_name)
+        with collection.locked(exclusive=True):
+            if point_ids:
+                rows = collection.rows_for_ids(point_ids)
+            else:
+                rows = collection.rows_matching(filter_obj).tolist()
+            deleted = collection.delete(rows)
+        logger.info(f"[LocalQdrant] Deleted {deleted} points from '{collection_name}'")
+        self._operation_id += 1
+        return _response({"operation_id": self._operation_id, "status": "completed"}, started)
+
+    def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
+        """Collection info in the shape of Qdrant's GET /collections/{name} result."""
+        collection = self._collection(collection_name)
+        with collection.locked():
+            return {
+                "status": "green",
+                "optimizer_status": "ok",
+                "points_count": collection.count,
+                "vectors_count": collection.count,
+                "indexed_vectors_count": collection.index.size if collection.index else 0,
+                "segments_count": 1,
+                "config": {
+                    "params": {
+                        "vectors": {"size": collection.size, "distance": collection.distance}
+                    }
+                },
+                "payload_schema": {}
+            }
+
+    def close(self):
+        """Flush vectors of this adapter's open collections (they stay loaded for other adapters)."""
+        with _collections_lock:
+            for path, collection in _collections.items():
+                if os.path.dirname(path) == self.path:
+                    collection.flush()
+
+    def __enter__(self):
+        """Context manager support."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager cleanup."""
+        self.close()
+
+
+def close_local_collections() -> None:
+    """Flush and unload every open local collection (worker shutdown, tests)."""
+    with _collections_lock:
+        for collection in _collections.values():
+            collection.close()
+        _collections.clear()
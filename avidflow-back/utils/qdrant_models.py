@@ -261,6 +261,12 @@ class EmbeddingProviderConfig(BaseModel):
         le=1000,
         description="Batch size for embedding generation"
     )
+    max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        le=16,
+        description="Embedding batches in flight at the same time"
+    )
     
     @field_validator("provider_type")
     @classmethod
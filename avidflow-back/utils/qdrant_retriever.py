@@ -4,9 +4,14 @@ Handles high-level search/insert/delete operations for RAG workflows.
 """
 import logging
 import hashlib
-from typing import List, Dict, Any, Optional
+import itertools
+import time
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
+from utils.concurrency import BoundedExecutor
 from utils.qdrant_client import QdrantClientAdapter
 from utils.embedding_providers import BaseEmbeddingProvider
 from utils.qdrant_exceptions import ParameterError, QdrantError, EmbeddingError
@@ -14,12 +19,34 @@ from utils.qdrant_exceptions import ParameterError, QdrantError, EmbeddingError
 logger = logging.getLogger(__name__)
 
 
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _with_last(chunks: Iterator[List[Any]]) -> Iterator[Tuple[List[Any], bool]]:
+    """Pairs each chunk with whether it is the last one (one chunk of lookahead)."""
+    previous = next(chunks, None)
+    for chunk in chunks:
+        yield previous, False
+        previous = chunk
+    if previous is not None:
+        yield previous, True
+
+
 class Retriever:
     """
     High-level retriever for RAG operations.
     Composes QdrantClientAdapter + BaseEmbeddingProvider.
     """
     
+    # Documents embedded and upserted together by insert_documents
+    UPSERT_CHUNK_SIZE = 256
+    
     def __init__(
         self,
         qdrant_adapter: QdrantClientAdapter,
@@ -161,95 +188,118 @@ class Retriever:
     def insert_documents(
         self,
         collection_name: str,
-        documents: List[Dict[str, Any]],
+        documents: Iterable[Dict[str, Any]],
         text_field: str = "text",
         metadata_fields: Optional[List[str]] = None,
-        wait: bool = True
+        wait: bool = True,
+        chunk_size: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Insert documents into collection with embeddings.
         
+        Documents are streamed in chunks of chunk_size: while one chunk is
+        being upserted (wait=False) the next one is embedded, so at most two
+        chunks of vectors are held in memory, as float32 arrays. The last
+        upsert is sent with ``wait`` and acts as the consistency barrier for
+        the earlier ones.
+        
         Args:
             collection_name: Target collection
-            documents: List of documents (must have text_field key)
+            documents: Documents (must have text_field key); any iterable
             text_field: Key containing text to embed
             metadata_fields: Additional fields to store as payload
             wait: Wait for operation to complete
+            chunk_size: Documents embedded and upserted together (default UPSERT_CHUNK_SIZE)
             
         Returns:
-            Insert operation result
+            Insert operation result, with throughput counters under "stats"
             
         Raises:
             ParameterError: If documents are invalid
             EmbeddingError: If embedding generation fails
             QdrantError: If insertion fails
         """
-        if not documents:
-            raise ParameterError("No documents provided for insertion")
-        
-        logger.info(f"[Retriever] Inserting {len(documents)} documents into '{collection_name}'")
-        
-        # Extract texts
-        texts = []
-        for doc in documents:
-            if text_field not in doc:
-                raise ParameterError(
-                    f"Document missing required field: {text_field}",
-                    details={"document_keys": list(doc.keys())}
+        chunk_size = max(1, int(chunk_size or self.UPSERT_CHUNK_SIZE))
+        stats = {"chunks": 0, "embed_seconds": 0.0, "upsert_seconds": 0.0}
+        inserted = 0
+        result: Dict[str, Any] = {}
+        started = time.perf_counter()
+        pending = None
+        
+        logger.info(f"[Retriever] Inserting documents into '{collection_name}' (chunks of {chunk_size})")
+        
+        with BoundedExecutor(1, name_prefix="qdrant-upsert") as executor:
+            for chunk, is_last in _with_last(_chunked(documents, chunk_size)):
+                texts = self._extract_texts(chunk, text_field)
+                
+                embed_started = time.perf_counter()
+                try:
+                    embeddings = self.provider.generate_embeddings(texts)
+                except Exception as e:
+                    raise EmbeddingError(
+                        f"Failed to generate embeddings for {len(texts)} documents: {str(e)}",
+                        details={"document_count": len(texts), "documents_inserted": inserted}
+                    )
+                stats["embed_seconds"] += time.perf_counter() - embed_started
+                
+                points = self._build_points(chunk, texts, embeddings, text_field, metadata_fields)
+                
+                # Keep one upsert in flight: finish the previous chunk's before queueing this one
+                if pending is not None:
+                    result = pending[0].result()
+                    inserted += pending[1]
+                stats["chunks"] += 1
+                future = executor.submit(
+                    self._upsert_chunk, collection_name, points, wait if is_last else False, stats
+                )
+                pending = (future, len(points))
+                logger.debug(
+                    f"[Retriever] Chunk {stats['chunks']}: {len(points)} documents embedded, "
+                    f"{inserted} inserted so far"
                 )
-            texts.append(str(doc[text_field]))
-        
-        # Generate embeddings
-        try:
-            embeddings = self.provider.generate_embeddings(texts)
-        except Exception as e:
-            raise EmbeddingError(
-                f"Failed to generate embeddings for {len(texts)} documents: {str(e)}",
-                details={"document_count": len(texts)}
-            )
-        
-        # Prepare points
-        points = []
-        for idx, (doc, embedding) in enumerate(zip(documents, embeddings)):
-            # Generate point ID from content hash
-            point_id = self._generate_point_id(texts[idx])
-            
-            # Build payload
-            payload = {text_field: texts[idx]}
-            
-            # Add metadata fields
-            if metadata_fields:
-                for field in metadata_fields:
-                    if field in doc:
-                        payload[field] = doc[field]
-            else:
-                # Include all fields except text_field
-                for key, value in doc.items():
-                    if key != text_field:
-                        payload[key] = value
             
-            points.append({
-                "id": point_id,
-                "vector": embedding,
-                "payload": payload
-            })
+            if pending is None:
+                raise ParameterError("No documents provided for insertion")
+            result = pending[0].result()
+            inserted += pending[1]
         
-        # Upsert to Qdrant
-        result = self.adapter.upsert_points(
-            collection_name=collection_name,
-            points=points,
-            wait=wait
-        )
+        elapsed = time.perf_counter() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["embed_seconds"] = round(stats["embed_seconds"], 3)
+        stats["upsert_seconds"] = round(stats["upsert_seconds"], 3)
+        stats["documents_per_second"] = round(inserted / elapsed, 1) if elapsed else 0.0
+        
+        cache_stats = getattr(self.provider, "cache_stats", None)
+        if cache_stats is not None:
+            logger.info(f"[Retriever] Embedding cache: {cache_stats()}")
         
-        logger.info(f"[Retriever] Inserted {len(points)} points")
+        logger.info(f"[Retriever] Inserted {inserted} points: {stats}")
         
         return {
             "status": "success",
             "collection": collection_name,
-            "documents_inserted": len(points),
-            "result": result
+            "documents_inserted": inserted,
+            "result": result,
+            "stats": stats
         }
     
+    def _upsert_chunk(
+        self,
+        collection_name: str,
+        points: List[Dict[str, Any]],
+        wait: bool,
+        stats: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Upsert one chunk (runs on the upsert worker)."""
+        upsert_started = time.perf_counter()
+        result = self.adapter.upsert_points(
+            collection_name=collection_name,
+            points=points,
+            wait=wait
+        )
+        stats["upsert_seconds"] += time.perf_counter() - upsert_started
+        return result
+    
     def delete_documents(
         self,
         collection_name: str,
@@ -404,6 +454,56 @@ class Retriever:
         
         return "\n\n".join(formatted_parts)
     
+    def _extract_texts(self, documents: List[Dict[str, Any]], text_field: str) -> List[str]:
+        """Texts to embed; every document must have text_field."""
+        texts = []
+        for doc in documents:
+            if text_field not in doc:
+                raise ParameterError(
+                    f"Document missing required field: {text_field}",
+                    details={"document_keys": list(doc.keys())}
+                )
+            texts.append(str(doc[text_field]))
+        return texts
+    
+    def _build_points(
+        self,
+        documents: List[Dict[str, Any]],
+        texts: List[str],
+        embeddings: List[List[float]],
+        text_field: str,
+        metadata_fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Qdrant points for one chunk. Vectors are rows of one float32 buffer
+        (Qdrant stores float32), half the size of float64 and far smaller
+        than lists of Python floats.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        points = []
+        for doc, text, vector in zip(documents, texts, vectors):
+            # Build payload
+            payload = {text_field: text}
+            
+            # Add metadata fields
+            if metadata_fields:
+                for field in metadata_fields:
+                    if field in doc:
+                        payload[field] = doc[field]
+            else:
+                # Include all fields except text_field
+                for key, value in doc.items():
+                    if key != text_field:
+                        payload[key] = value
+            
+            points.append({
+                # Point ID from content hash
+                "id": self._generate_point_id(text),
+                "vector": vector,
+                "payload": payload
+            })
+        return points
+    
     def _generate_point_id(self, text: str) -> int:
         """
         Generate deterministic point ID from text content.
@@ -0,0 +1,364 @@
+"""
+Response cache for chat model calls made through ChatModelRunnable.
+
+Two tiers, both scoped per workflow:
+- Exact: keyed by a sha256 of the canonical JSON of the request (provider,
+  base URL, model, sampling parameters, tools and messages). Stored in the worker-wide
+  response store: an in-process LRU, or Redis when CHAT_RESPONSE_CACHE_BACKEND
+  is "redis" so every worker shares it.
+- Semantic (optional): reuses a final answer when the embedding of the user's
+  question is within ``semantic_threshold`` cosine similarity of a question
+  already answered under the same context (provider, base URL, model,
+  parameters, tools and system prompt). Only first-turn requests (system
+  messages plus one user message) take part, so follow-up questions that depend
+  on earlier turns are never answered from another conversation. The indexes
+  are in-process, the least recently used dropped above
+  CHAT_RESPONSE_CACHE_SEMANTIC_INDEXES.
+
+Only deterministic requests are cached: temperature 0 and a single choice.
+Error responses are never stored, and responses with tool calls only go to
+the exact tier. Hits return the stored response with zero usage and report
+the tokens saved in ``_metadata["cache"]`` and in stats().
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import hashlib
+import json
+import threading
+import time
+import logging
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(
+            block.get("text", "") for block in content
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+    return str(content)
+
+
+def is_deterministic(params: Dict[str, Any]) -> bool:
+    """True when ``params`` (effective sampling parameters) always give the same answer."""
+    try:
+        temperature = float(params.get("temperature", 1.0))
+    except (TypeError, ValueError):
+        return False
+    return temperature == 0 and int(params.get("n", 1) or 1) == 1
+
+
+class BaseResponseStore:
+    """Key -> response dict with a per-entry TTL."""
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, response: Dict[str, Any], ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+
+class MemoryResponseStore(BaseResponseStore):
+    """In-process LRU of at most ``max_entries`` responses."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[1])
+
+    def set(self, key: str, response: Dict[str, Any], ttl_seconds: int) -> None:
+        entry = (time.monotonic() + ttl_seconds, copy.deepcopy(response))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisResponseStore(BaseResponseStore):
+    """Responses shared by all workers: one JSON string per key, expiring with the TTL."""
+
+    KEY_PREFIX = "chat_response:"
+
+    def __init__(self, client: Any = None, url: Optional[str] = None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self._client = client
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._client.get(self.KEY_PREFIX + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, response: Dict[str, Any], ttl_seconds: int) -> None:
+        self._client.set(
+            self.KEY_PREFIX + key, json.dumps(response, ensure_ascii=False, default=str), ex=max(1, ttl_seconds)
+        )
+
+
+class _SemanticIndex:
+    """Unit question vectors of one (scope, context) with their answers and expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.entries: List[Tuple[float, Dict[str, Any]]] = []  # (expires_at, response)
+
+    def search(self, vector: np.ndarray, threshold: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        now = time.monotonic()
+        live = [i for i, (expires_at, _) in enumerate(self.entries) if expires_at > now]
+        if len(live) < len(self.entries):
+            self.vectors = self.vectors[live]
+            self.entries = [self.entries[i] for i in live]
+        if not self.entries:
+            return None
+        scores = self.vectors @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return copy.deepcopy(self.entries[best][1]), float(scores[best])
+
+    def add(self, vector: np.ndarray, response: Dict[str, Any], ttl_seconds: int) -> None:
+        if self.vectors.shape[1] != vector.shape[0]:
+            self.vectors = np.empty((0, vector.shape[0]), dtype=np.float32)
+            self.entries = []
+        self.vectors = np.vstack([self.vectors, vector[None, :]])[-self.max_entries:]
+        self.entries.append((time.monotonic() + ttl_seconds, copy.deepcopy(response)))
+        self.entries = self.entries[-self.max_entries:]
+
+
+# Context key -> index, least recently used first
+_semantic_indexes: "OrderedDict[str, _SemanticIndex]" = OrderedDict()
+_semantic_lock = threading.Lock()
+
+
+def _semantic_index(context: str, create_max_entries: Optional[int] = None) -> Optional[_SemanticIndex]:
+    """Index of a context (created when ``create_max_entries`` is given); callers hold _semantic_lock."""
+    index = _semantic_indexes.get(context)
+    if index is None:
+        if create_max_entries is None:
+            return None
+        index = _semantic_indexes[context] = _SemanticIndex(create_max_entries)
+        while len(_semantic_indexes) > max(1, settings.CHAT_RESPONSE_CACHE_SEMANTIC_INDEXES):
+            _semantic_indexes.popitem(last=False)
+    _semantic_indexes.move_to_end(context)
+    return index
+
+
+class ChatResponseCache:
+    """
+    Exact and semantic response cache of one workflow's chat model.
+
+    Args:
+        scope: Isolation scope, normally the workflow id
+        ttl_seconds: Lifetime of cached responses
+        store: Exact-tier store (default: the worker-wide store from settings)
+        embedder: Embedding provider (generate_embeddings(texts)) enabling the semantic tier
+        semantic_threshold: Minimum cosine similarity for a semantic hit
+        semantic_max_entries: Questions kept per semantic index (oldest dropped first)
+    """
+
+    def __init__(
+        self,
+        scope: str = "",
+        ttl_seconds: Optional[int] = None,
+        store: Optional[BaseResponseStore] = None,
+        embedder: Any = None,
+        semantic_threshold: float = 0.95,
+        semantic_max_entries: int = 1000,
+    ):
+        self.scope = str(scope or "global")
+        self.ttl_seconds = int(ttl_seconds or settings.CHAT_RESPONSE_CACHE_TTL_SECONDS)
+        self.store = store if store is not None else get_default_response_store()
+        self.embedder = embedder
+        self.semantic_threshold = semantic_threshold
+        self.semantic_max_entries = semantic_max_entries
+        self._stats_lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+    def request_keys(
+        self,
+        provider: str,
+        model: str,
+        params: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        base_url: str = "",
+    ) -> Dict[str, Any]:
+        """Exact key, semantic context key and question text (None unless first-turn)."""
+        context = {
+            "provider": provider,
+            "base_url": (base_url or "").rstrip("/"),
+            "model": model,
+            "params": params,
+            "tools": tools or [],
+        }
+        exact_key = f"{self.scope}:{_digest({**context, 'messages': messages})}"
+        question = None
+        system = [m for m in messages if m.get("role") == "system"]
+        if len(messages) == len(system) + 1 and messages[-1].get("role") == "user":
+            question = _message_text(messages[-1]).strip() or None
+        embedder = getattr(self.embedder, "model", type(self.embedder).__name__)
+        context_key = f"{self.scope}:{embedder}:{_digest({**context, 'system': system})}"
+        return {"exact": exact_key, "context": context_key, "question": question}
+
+    def lookup(self, keys: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached response for a request, with ``_metadata["cache"]`` filled in; None on a miss."""
+        response = self._get_exact(keys["exact"])
+        tier, similarity = "exact", 1.0
+        if response is None and self._semantic_enabled(keys):
+            found = self._search_semantic(keys)
+            if found is not None:
+                (response, similarity), tier = found, "semantic"
+        if response is None:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        return self._as_hit(response, tier, similarity)
+
+    def save(self, keys: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """Store a successful response under the request's keys."""
+        metadata = response.get("_metadata") or {}
+        if metadata.get("error"):
+            return
+        try:
+            self.store.set(keys["exact"], response, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"[ResponseCache] Store write failed: {e}")
+        has_tool_calls = bool((response.get("assistant_message") or {}).get("tool_calls"))
+        if has_tool_calls or not self._semantic_enabled(keys):
+            return
+        vector = self._embed(keys)
+        if vector is not None:
+            with _semantic_lock:
+                _semantic_index(keys["context"], self.semantic_max_entries).add(vector, response, self.ttl_seconds)
+
+    def record_bypass(self) -> None:
+        with self._stats_lock:
+            self.bypassed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "scope": self.scope,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "saved_prompt_tokens": self.saved_prompt_tokens,
+                "saved_completion_tokens": self.saved_completion_tokens,
+                "saved_tokens": self.saved_prompt_tokens + self.saved_completion_tokens,
+            }
+
+    def _semantic_enabled(self, keys: Dict[str, Any]) -> bool:
+        return self.embedder is not None and keys["question"] is not None
+
+    def _get_exact(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.store.get(key)
+        except Exception as e:
+            logger.warning(f"[ResponseCache] Store lookup failed: {e}")
+            return None
+
+    def _search_semantic(self, keys: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], float]]:
+        with _semantic_lock:
+            if keys["context"] not in _semantic_indexes:
+                return None
+        vector = self._embed(keys)
+        if vector is None:
+            return None
+        with _semantic_lock:
+            index = _semantic_index(keys["context"])
+            return index.search(vector, self.semantic_threshold) if index else None
+
+    def _embed(self, keys: Dict[str, Any]) -> Optional[np.ndarray]:
+        # The vector is needed by both lookup (miss) and save; embed the question once
+        if "vector" not in keys:
+            try:
+                vector = np.asarray(self.embedder.generate_embeddings([keys["question"]])[0], dtype=np.float32)
+                norm = float(np.linalg.norm(vector))
+                keys["vector"] = vector / norm if norm else None
+            except Exception as e:
+                logger.warning(f"[ResponseCache] Question embedding failed, semantic tier skipped: {e}")
+                keys["vector"] = None
+        return keys["vector"]
+
+    def _as_hit(self, response: Dict[str, Any], tier: str, similarity: float) -> Dict[str, Any]:
+        saved = response.get("usage") or {}
+        prompt_tokens = int(saved.get("prompt_tokens", 0) or 0)
+        completion_tokens = int(saved.get("completion_tokens", 0) or 0)
+        with self._stats_lock:
+            if tier == "exact":
+                self.exact_hits += 1
+            else:
+                self.semantic_hits += 1
+            self.saved_prompt_tokens += prompt_tokens
+            self.saved_completion_tokens += completion_tokens
+        response["usage"] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        metadata = response.setdefault("_metadata", {})
+        metadata["latency_ms"] = 0
+        metadata["cache"] = {
+            "hit": tier,
+            "similarity": round(similarity, 4),
+            "saved_prompt_tokens": prompt_tokens,
+            "saved_completion_tokens": completion_tokens,
+            "saved_tokens": prompt_tokens + completion_tokens,
+        }
+        return response
+
+
+_default_store: Optional[BaseResponseStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_response_store() -> BaseResponseStore:
+    """Worker-wide exact-tier store configured by CHAT_RESPONSE_CACHE_* settings."""
+    global _default_store
+    if _default_store is not None:
+        return _default_store
+    with _default_lock:
+        if _default_store is None:
+            backend = (settings.CHAT_RESPONSE_CACHE_BACKEND or "memory").lower()
+            store: Optional[BaseResponseStore] = None
+            if backend == "redis":
+                try:
+                    store = RedisResponseStore()
+                except Exception as e:
+                    logger.warning(f"[ResponseCache] Redis store unavailable, using memory: {e}")
+            _default_store = store or MemoryResponseStore(settings.CHAT_RESPONSE_CACHE_MAX_ENTRIES)
+    return _default_store
@@ -54,7 +54,8 @@ def get_runnable_from_provider(
     execution_data: dict,
     node_name: str,
     input_name: str,
-    item_index: int = 0
+    item_index: int = 0,
+    execution: Any = None
 ) -> Optional[BaseLangChainRunnable]:
     """
     Resolve and get Runnable from an upstream provider node.
@@ -70,6 +71,8 @@ def get_runnable_from_provider(
         node_name: Current node's name
         input_name: Input type (e.g., "ai_model", "ai_memory")
         item_index: Item index for parameter resolution
+        execution: Running execution context, handed to the provider node
+            (shared HTTP sessions, credential cache)
     
     Returns:
         Runnable instance or None if not found
@@ -124,6 +127,8 @@ def get_runnable_from_provider(
             workflow=workflow,
             execution_data=execution_data
         )
+        if execution is not None:
+            provider_node.execution = execution
         
         # Check if node exposes Runnable
         if not hasattr(provider_node, 'get_runnable'):
@@ -1,34 +1,187 @@
+"""
+JSON serialization of node outputs and API payloads.
+
+Everything goes through one walker (``_walk``) that visits each value once:
+- NodeExecutionData items are handled directly instead of model_dump() +
+  a second recursive pass over the dumped dicts
+- other Pydantic models are dumped once with mode='json' (already JSON-safe)
+- binary_data is kept, stripped, or replaced by a small reference
+  (mime type, file name, size) depending on the ``binary`` mode
+
+ExecutionSerializer lives on WorkflowExecutionContext and memoizes the
+serialized form of each output by object identity, so final_result and node
+outputs are walked once per execution even though they are persisted,
+published and returned several times. Serialized values are shared between
+callers and must not be mutated.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import threading
 import uuid
-from typing import Any, List, Dict
+
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
 from models.node import NodeExecutionData
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+BINARY_KEEP = "keep"
+BINARY_STRIP = "strip"
+BINARY_REFERENCE = "reference"
+
+_SCALARS = (str, int, float, bool, type(None))
+
+Memo = Dict[Tuple[int, str, Callable[[Any], Any]], Tuple[Any, Any]]
+
+
+def _passthrough(value: Any) -> Any:
+    return value
+
+
+def _jsonable(value: Any) -> Any:
+    # Same conversion model_dump(mode='json') applies to values typed as Any
+    return to_jsonable_python(value)
+
+
+def _binary_reference(binary_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Describe binary entries without copying their payload."""
+    refs = {}
+    for key, entry in binary_data.items():
+        if isinstance(entry, dict):
+            ref = {k: v for k, v in entry.items() if k != "data" and isinstance(v, _SCALARS)}
+            data = entry.get("data")
+        else:
+            ref, data = {}, entry
+        ref["size"] = len(data) if isinstance(data, (str, bytes, bytearray)) else 0
+        refs[key] = ref
+    return refs
+
+
+def binary_size(item: NodeExecutionData) -> int:
+    """Bytes of binary payload carried by one item (base64 length for strings)."""
+    if not item.binary_data:
+        return 0
+    return sum(ref["size"] for ref in _binary_reference(item.binary_data).values())
+
+
+def _walk(obj: Any, binary: str, leaf: Callable[[Any], Any], memo: Optional[Memo]) -> Any:
+    if isinstance(obj, _SCALARS):
+        return obj
+    if memo is not None and isinstance(obj, (list, dict)):
+        hit = memo.get((id(obj), binary, leaf))
+        if hit is not None and hit[0] is obj:
+            return hit[1]
+    if isinstance(obj, dict):
+        return {k: _walk(v, binary, leaf, memo) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_walk(v, binary, leaf, memo) for v in obj]
+    if isinstance(obj, NodeExecutionData):
+        out = {"json_data": _walk(obj.json_data, binary, _jsonable, memo)}
+        if binary == BINARY_KEEP:
+            out["binary_data"] = _walk(obj.binary_data, binary, _jsonable, memo)
+        elif binary == BINARY_REFERENCE:
+            out["binary_data"] = _binary_reference(obj.binary_data) if obj.binary_data else obj.binary_data
+        return out
+    if isinstance(obj, tuple):
+        return tuple(_walk(v, binary, leaf, memo) for v in obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode='json')
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    return leaf(obj)
+
 
 def deep_serialize(obj: Any) -> Any:
     """
     Recursively serialize Pydantic models to dictionaries
-    
+
     Args:
         obj: Any object that might contain Pydantic models
-        
+
     Returns:
         JSON-serializable version of the object
     """
-    if hasattr(obj, 'model_dump'):
-        return deep_serialize(obj.model_dump(mode='json'))
-    elif isinstance(obj, dict):
-        return {k: deep_serialize(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [deep_serialize(i) for i in obj]
-    elif isinstance(obj, tuple):
-        return tuple(deep_serialize(i) for i in obj)
-    elif isinstance(obj, uuid.UUID):
-        return str(obj)
-    else:
-        return obj
-    
+    return _walk(obj, BINARY_KEEP, _passthrough, None)
+
 
 def to_dict_without_binary(data: List[List[NodeExecutionData]]) -> List[List[Dict[str, Any]]]:
     return [
-        [node.model_dump(mode='json', exclude={"binary_data"}) for node in inner_list]
+        [_walk(node, BINARY_STRIP, _passthrough, None) for node in inner_list]
         for inner_list in data
-    ]
\ No newline at end of file
+    ]
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an already serialized value as JSON bytes (orjson when available)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=str).encode()
+
+
+def json_size(obj: Any) -> int:
+    """Size in bytes of the JSON encoding of an already serialized value."""
+    return len(dumps(obj))
+
+
+class ExecutionSerializer:
+    """Per-execution memo of serialized outputs, keyed by object identity."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (id(obj), binary mode, leaf) -> (obj, serialized); holding obj keeps its id from being reused
+        self._memo: Memo = {}
+        self.hits = 0
+        self.misses = 0
+        self.binary_bytes_skipped = 0
+
+    def serialize(self, obj: Any, binary: str = BINARY_KEEP) -> Any:
+        """deep_serialize() with memoization; ``binary`` selects keep/strip/reference."""
+        if isinstance(obj, _SCALARS):
+            return obj
+        key = (id(obj), binary, _passthrough)
+        with self._lock:
+            hit = self._memo.get(key)
+            if hit is not None and hit[0] is obj:
+                self.hits += 1
+                return hit[1]
+        # The walk only reads the memo (single dict lookups); entries are added under the lock
+        result = _walk(obj, binary, _passthrough, self._memo)
+        with self._lock:
+            self.misses += 1
+            self._memo[key] = (obj, result)
+        return result
+
+    def node_outputs(self, outputs: List[List[NodeExecutionData]], binary: str = BINARY_STRIP) -> List[List[Dict[str, Any]]]:
+        """Serialize a node result (outputs -> items); binary is stripped by default."""
+        with self._lock:
+            hit = self._memo.get((id(outputs), binary, _passthrough))
+        if hit is None and binary != BINARY_KEEP:
+            skipped = sum(
+                binary_size(item)
+                for output in outputs if isinstance(output, list)
+                for item in output if isinstance(item, NodeExecutionData)
+            )
+            with self._lock:
+                self.binary_bytes_skipped += skipped
+        return self.serialize(outputs, binary)
+
+    def size_of(self, obj: Any, binary: str = BINARY_KEEP) -> int:
+        """JSON size in bytes of the serialized form of ``obj``."""
+        return json_size(self.serialize(obj, binary))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._memo),
+                "hits": self.hits,
+                "misses": self.misses,
+                "binary_bytes_skipped": self.binary_bytes_skipped,
+            }
@@ -0,0 +1,182 @@
+"""
+Streaming text splitter for document chunking.
+
+TextSplitter.split() is a generator: it walks the text once, cutting it at the
+coarsest boundary that keeps a piece within ``chunk_size`` (paragraph, line,
+sentence, clause, word, and finally a hard cut), and merges consecutive pieces
+into chunks. Pieces are (start, end, length) spans of the original string, so
+each chunk is a single slice and the overlap carried into the next chunk is
+the tail of the current window: its lengths are already known and nothing is
+measured twice. Memory stays bounded by one chunk plus its overlap, whatever
+the size of the document.
+
+Sizes are counted by ``length_function``: characters by default, or tokens of
+an embedding model via TextSplitter.from_tokens() (cached tiktoken encoder,
+with a byte-based estimate when tiktoken is unavailable). A chunk's length is
+the sum of its pieces' lengths, which for tokens is a close upper bound of the
+tokens of the joined text.
+"""
+from __future__ import annotations
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Deque, Iterator, List, Optional, Pattern, Tuple
+import logging
+import re
+
+from utils.persian_text import PERSIAN_CLAUSE_SEPARATORS, PERSIAN_SENTENCE_TERMINATORS
+
+logger = logging.getLogger(__name__)
+
+# Spans longer than chunk_size * MAX_CHARS_PER_TOKEN characters cannot fit in
+# chunk_size tokens in practice, so they are split without being encoded first
+MAX_CHARS_PER_TOKEN = 8
+
+# Split points from coarsest to finest; each match ends a piece, so separators
+# stay attached to the text before them
+SEPARATOR_PATTERNS: List[Pattern[str]] = [
+    re.compile(r"\n[ \t\r\f\v]*\n\s*"),  # paragraph (blank line)
+    re.compile(r"\n\s*"),  # line
+    re.compile(rf"[{re.escape(PERSIAN_SENTENCE_TERMINATORS)}]+(?:\s+|$)"),  # sentence
+    re.compile(rf"[{re.escape(PERSIAN_CLAUSE_SEPARATORS)}]\s+"),  # clause
+    re.compile(r"\s+"),  # word
+]
+
+Span = Tuple[int, int, int]  # (start, end, length)
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate used when no tokenizer is available."""
+    return len(text.encode("utf-8")) // 2 + 1
+
+
+@lru_cache(maxsize=8)
+def token_counter(model: str = "text-embedding-3-small") -> Callable[[str], int]:
+    """Token length function for ``model``, built once per model."""
+    try:
+        from utils.token_ledger import get_encoding
+        encoding = get_encoding(model)
+    except Exception as e:
+        logger.debug(f"[TextSplitter] Tokenizer unavailable, estimating tokens: {e}")
+        return estimate_tokens
+    return lambda text: len(encoding.encode_ordinary(text))
+
+
+class TextSplitter:
+    """Recursive, overlap-aware splitter that yields chunks lazily."""
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int = 0,
+        length_function: Callable[[str], int] = len,
+        max_span_chars: Optional[int] = None,
+        separators: Optional[List[Pattern[str]]] = None,
+    ):
+        """
+        Args:
+            chunk_size: Maximum length of a chunk, in ``length_function`` units
+            chunk_overlap: Length of trailing text repeated at the start of the next chunk
+            length_function: Measures a piece of text (characters by default)
+            max_span_chars: Spans with more characters are split without being
+                measured; defaults to chunk_size when counting characters
+            separators: Split patterns from coarsest to finest
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(
+                f"chunk_overlap must be between 0 and chunk_size - 1, got {chunk_overlap}"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_function = length_function
+        if max_span_chars is None and length_function is len:
+            max_span_chars = chunk_size
+        self.max_span_chars = max_span_chars
+        self.separators = SEPARATOR_PATTERNS if separators is None else separators
+
+    @classmethod
+    def from_tokens(
+        cls,
+        chunk_size: int,
+        chunk_overlap: int = 0,
+        model: str = "text-embedding-3-small",
+    ) -> "TextSplitter":
+        """Splitter sizing chunks in tokens of ``model``."""
+        return cls(
+            chunk_size,
+            chunk_overlap,
+            length_function=token_counter(model),
+            max_span_chars=chunk_size * MAX_CHARS_PER_TOKEN,
+        )
+
+    def split(self, text: str) -> Iterator[str]:
+        """Yield the chunks of ``text`` (whitespace-stripped, never empty)."""
+        window: Deque[Span] = deque()
+        total = 0
+        for span in self._fit(text, 0, len(text), 0):
+            length = span[2]
+            if window and total + length > self.chunk_size:
+                chunk = text[window[0][0]:window[-1][1]].strip()
+                if chunk:
+                    yield chunk
+                # Keep the tail of the window as overlap, leaving room for this piece
+                while window and (total > self.chunk_overlap or total + length > self.chunk_size):
+                    total -= window.popleft()[2]
+            window.append(span)
+            total += length
+        if window:
+            chunk = text[window[0][0]:window[-1][1]].strip()
+            if chunk:
+                yield chunk
+
+    def _fit(self, text: str, start: int, end: int, level: int) -> Iterator[Span]:
+        """Yield [start, end) as one piece if it fits, else its pieces at ``level`` or finer."""
+        if self.max_span_chars is None or end - start <= self.max_span_chars:
+            length = self._measure(text, start, end)
+            if length <= self.chunk_size:
+                yield start, end, length
+                return
+        yield from self._split_span(text, start, end, level)
+
+    def _measure(self, text: str, start: int, end: int) -> int:
+        if self.length_function is len:
+            return end - start  # no slice needed to count characters
+        return self.length_function(text[start:end])
+
+    def _split_span(self, text: str, start: int, end: int, level: int) -> Iterator[Span]:
+        """Pieces of an oversized span, cut at the separators of ``level``."""
+        if level >= len(self.separators):
+            yield from self._hard_split(text, start, end)
+            return
+        piece_start = start
+        for match in self.separators[level].finditer(text, start, end):
+            if match.end() < end:
+                yield from self._fit(text, piece_start, match.end(), level + 1)
+                piece_start = match.end()
+        if piece_start == start:
+            # No separator of this level: the span is already known to be too long
+            yield from self._split_span(text, start, end, level + 1)
+        else:
+            yield from self._fit(text, piece_start, end, level + 1)
+
+    def _hard_split(self, text: str, start: int, end: int) -> Iterator[Span]:
+        """Cut text without separators into the longest slices that fit."""
+        while start < end:
+            stop = min(end, start + self.chunk_size)
+            length = self._measure(text, start, stop)
+            while length > self.chunk_size and stop - start > 1:
+                stop = start + (stop - start) // 2
+                length = self._measure(text, start, stop)
+            yield start, stop, length
+            start = stop
+
+
+def split_text(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int = 0,
+    length_function: Callable[[str], int] = len,
+) -> Iterator[str]:
+    """Shorthand for TextSplitter(chunk_size, chunk_overlap, length_function).split(text)."""
+    return TextSplitter(chunk_size, chunk_overlap, length_function).split(text)
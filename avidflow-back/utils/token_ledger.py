@@ -0,0 +1,142 @@
+"""
+Token accounting for agent conversations.
+
+get_encoding() caches tiktoken encoders per model, so callers no longer pay
+encoding_for_model() on every count. TokenLedger keeps the token count of each
+message of a conversation and a running total: appending a message encodes
+only that message, and re-syncing after the history was truncated reuses the
+counts of the messages that were kept. The agent loop checks its budget
+several times per iteration, which used to re-encode the whole history (and
+json.dumps every tool call) each time.
+
+Counts follow count_tokens() (defined here, not re-exported by
+utils.langchain_agents): 4 tokens per message, the encoded string fields, the
+JSON of each tool call, plus 2 tokens for the reply.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 2
+
+
+@lru_cache(maxsize=32)
+def get_encoding(model: str = "gpt-4") -> Any:
+    """tiktoken encoder for ``model`` (cl100k_base for unknown models), built once."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")  # Default for GPT-4
+
+
+def message_tokens(message: Dict[str, Any], encoding: Any) -> int:
+    """Tokens contributed by one message, including its per-message overhead."""
+    num_tokens = MESSAGE_OVERHEAD
+    for key, value in message.items():
+        if isinstance(value, str):
+            num_tokens += len(encoding.encode(value))
+        elif isinstance(value, list) and key == "tool_calls":
+            for tool_call in value:
+                if isinstance(tool_call, dict):
+                    num_tokens += len(encoding.encode(json.dumps(tool_call)))
+    return num_tokens
+
+
+def count_tokens(messages: List[Dict[str, Any]], model: str = "gpt-4", encoding: Any = None) -> int:
+    """
+    Count tokens in messages using tiktoken.
+
+    Args:
+        messages: List of message dicts
+        model: Model name for tokenizer
+        encoding: Encoder to use instead of the cached one for ``model``
+
+    Returns:
+        Approximate token count
+    """
+    encoding = encoding or get_encoding(model)
+    return sum(message_tokens(m, encoding) for m in messages) + REPLY_OVERHEAD
+
+
+class TokenLedger:
+    """Per-message token counts and running total of one agent conversation."""
+
+    def __init__(
+        self,
+        messages: Optional[Iterable[Dict[str, Any]]] = None,
+        model: str = "gpt-4",
+        encoding: Any = None,
+    ):
+        self.encoding = encoding or get_encoding(model)
+        # (message, tokens); holding the message keeps id() lookups in sync() valid
+        self._entries: List[Tuple[Dict[str, Any], int]] = []
+        self._message_total = 0
+        self.encoded = 0
+        if messages:
+            self.extend(messages)
+
+    @property
+    def total(self) -> int:
+        """Same value count_tokens() returns for the tracked messages."""
+        return self._message_total + REPLY_OVERHEAD
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def measure(self, message: Dict[str, Any]) -> int:
+        """Token count of ``message`` (not added to the ledger)."""
+        self.encoded += 1
+        return message_tokens(message, self.encoding)
+
+    def append(self, message: Dict[str, Any], tokens: Optional[int] = None) -> int:
+        """Track ``message``; pass ``tokens`` when it was already measured."""
+        if tokens is None:
+            tokens = self.measure(message)
+        self._entries.append((message, tokens))
+        self._message_total += tokens
+        return tokens
+
+    def extend(self, messages: Iterable[Dict[str, Any]]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def total_if_added(self, tokens: int) -> int:
+        """Total after adding a message of ``tokens`` tokens (O(1))."""
+        return self.total + tokens
+
+    def fits(self, tokens: int, limit: int) -> bool:
+        return self.total_if_added(tokens) <= limit
+
+    def sync(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Match the ledger to ``messages`` and return the total.
+
+        Messages already tracked (same object) keep their count, so after
+        appends only the new messages are encoded, and after truncation
+        nothing is. Messages must not be mutated once tracked.
+        """
+        entries = self._entries
+        if len(messages) >= len(entries) and all(
+            messages[i] is entry[0] for i, entry in enumerate(entries)
+        ):
+            for message in messages[len(entries):]:
+                self.append(message)
+            return self.total
+
+        known = {id(m): (m, tokens) for m, tokens in entries}
+        self._entries = []
+        self._message_total = 0
+        for message in messages:
+            hit = known.get(id(message))
+            self.append(message, hit[1] if hit is not None and hit[0] is message else None)
+        return self.total
+
+    def stats(self) -> Dict[str, int]:
+        return {"messages": len(self._entries), "total": self.total, "encoded": self.encoded}
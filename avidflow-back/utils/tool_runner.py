@@ -68,6 +68,9 @@ def execute_tool(owner: Any, node_cls: Any, node_model: Any, args: Dict[str, Any
                     )
     
     inst = node_cls(model_copy, owner.workflow, exec_ref)
+    # Share the owner's execution context (credential cache, pub_sub) with the tool node
+    if getattr(inst, "execution", None) is None:
+        inst.execution = getattr(owner, "execution", None)
     inst.input_data = {"main": [[NodeExecutionData(json_data=current_item_json, binary_data=None)]]}
 
     out = inst.execute() or [[]]
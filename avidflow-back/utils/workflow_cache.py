@@ -0,0 +1,178 @@
+"""
+Workflow references for Celery task messages and the worker-side workflow cache.
+
+execute_workflow is enqueued with a WorkflowReference (workflow id + a hash of
+the workflow's JSON definition) instead of the definition itself, so broker
+messages stay small whatever the size of the workflow. Workers resolve the
+reference through WorkflowModelCache: an LRU of validated WorkflowModels keyed
+by (workflow_id, version) that also holds the topological execution order and
+the workflow's input connection index. On a miss the definition is read from
+the execution's snapshot (ExecutionData.workflow_data, written when the
+execution is created), so an execution always runs the definition it was
+enqueued with, even if the workflow was edited in the meantime.
+
+broker_payload_metrics counts, per process, the workflow bytes kept out of
+broker messages against the bytes of the references sent instead.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+
+from config import settings
+from models import Node, WorkflowModel
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(workflow_data: Dict[str, Any]) -> bytes:
+    return json.dumps(
+        workflow_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def workflow_version(workflow_data: Dict[str, Any]) -> str:
+    """Version hash of a workflow definition (a JSON-mode WorkflowModel dump)."""
+    return hashlib.sha256(_encode(workflow_data)).hexdigest()[:16]
+
+
+class BrokerPayloadMetrics:
+    """Counts workflow bytes replaced by references in execute_workflow messages."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.workflow_bytes = 0
+        self.reference_bytes = 0
+
+    def record(self, workflow_bytes: int, reference_bytes: int) -> None:
+        with self._lock:
+            self.messages += 1
+            self.workflow_bytes += workflow_bytes
+            self.reference_bytes += reference_bytes
+
+    def reset(self) -> None:
+        with self._lock:
+            self.messages = self.workflow_bytes = self.reference_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            messages = self.messages or 1
+            return {
+                "messages": self.messages,
+                "workflow_bytes": self.workflow_bytes,
+                "reference_bytes": self.reference_bytes,
+                "avg_workflow_bytes": round(self.workflow_bytes / messages),
+                "avg_reference_bytes": round(self.reference_bytes / messages),
+            }
+
+
+broker_payload_metrics = BrokerPayloadMetrics()
+
+
+class WorkflowReference(NamedTuple):
+    """Identifies one version of a workflow definition in task arguments."""
+
+    workflow_id: str
+    version: str
+    size: int  # bytes of the JSON definition a full task argument would carry
+
+    @classmethod
+    def of(cls, workflow_data: Dict[str, Any]) -> "WorkflowReference":
+        """Reference to ``workflow_data`` (a JSON-mode WorkflowModel dump)."""
+        encoded = _encode(workflow_data)
+        return cls(str(workflow_data["id"]), hashlib.sha256(encoded).hexdigest()[:16], len(encoded))
+
+    def task_arguments(self) -> Dict[str, str]:
+        """execute_workflow kwargs for this reference; records the payload saved."""
+        arguments = {"workflow_id": self.workflow_id, "workflow_version": self.version}
+        broker_payload_metrics.record(self.size, len(json.dumps(arguments)))
+        return arguments
+
+
+class CachedWorkflow(NamedTuple):
+    workflow: WorkflowModel
+    sorted_nodes: Tuple[Node, ...]
+
+
+def prepare_workflow(workflow: WorkflowModel) -> CachedWorkflow:
+    """Execution order and input index of ``workflow``, computed once."""
+    from engine.execution import ExecutionPlanBuilder
+
+    plan_builder = ExecutionPlanBuilder(workflow)
+    sorted_nodes = tuple(plan_builder.topological_sort())
+    plan_builder.build_input_index()
+    return CachedWorkflow(workflow, sorted_nodes)
+
+
+WorkflowDataLoader = Callable[[], Optional[Dict[str, Any]]]
+
+
+class WorkflowModelCache:
+    """Process-wide LRU of prepared workflows keyed by (workflow_id, version).
+
+    Entries are shared by concurrent executions and must not be mutated; a
+    version never changes content, so entries need no invalidation.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], CachedWorkflow]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, workflow_id: str, version: str, loader: WorkflowDataLoader) -> CachedWorkflow:
+        """
+        Prepared workflow for the reference, loading its definition on a miss.
+
+        Raises:
+            LookupError: ``loader`` found no definition
+        """
+        key = (workflow_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        workflow_data = loader()
+        if not workflow_data:
+            raise LookupError(f"Workflow {workflow_id} version {version} not found")
+        if workflow_version(workflow_data) != version:
+            # The snapshot is what the execution was created with: run it, but
+            # do not file it under a version it does not have
+            logger.warning(f"[WorkflowCache] Workflow {workflow_id} snapshot does not match version {version}")
+            return prepare_workflow(WorkflowModel.model_validate(workflow_data))
+
+        entry = prepare_workflow(WorkflowModel.model_validate(workflow_data))
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+workflow_model_cache = WorkflowModelCache(settings.WORKFLOW_MODEL_CACHE_MAX_ENTRIES)